@@ -0,0 +1,41 @@
+#!/usr/bin/env bash
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+# A persistent process for the "depend" phase, which evaluates the
+# metadata of many ebuilds without a separate fork and exec of bash by
+# corepkg for each of them.
+#
+# Requests are read from stdin. Each request is the environment of the
+# "depend" phase of an ebuild, as a list of NUL terminated NAME=value
+# entries, followed by an empty entry. For each request, ebuild.sh is
+# sourced in a subshell that has exactly the exported variables of the
+# request, so that no state is shared between ebuilds. The metadata is
+# written to fd 3, followed by a NUL byte, the exit status of the
+# subshell and a newline.
+
+__depend_worker_read_request() {
+	local entry
+	__depend_worker_env=()
+	while IFS= read -r -d '' entry; do
+		[[ -n ${entry} ]] || return 0
+		__depend_worker_env+=( "${entry}" )
+	done
+	return 1
+}
+
+while __depend_worker_read_request; do
+	(
+		for __depend_worker_var in $(compgen -e); do
+			unset "${__depend_worker_var}"
+		done
+		for __depend_worker_var in "${__depend_worker_env[@]}"; do
+			export "${__depend_worker_var}" 2>/dev/null
+		done
+		export PORTAGE_PIPE_FD=3
+		unset __depend_worker_env __depend_worker_var
+		unset -f __depend_worker_read_request
+		source "${PORTAGE_BIN_PATH:?}/ebuild.sh" depend
+	) </dev/null
+	printf '\0%d\n' "$?" >&3 || exit
+done
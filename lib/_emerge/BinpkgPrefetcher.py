@@ -14,7 +14,7 @@ from corepkg.util import no_color
 
 
 class BinpkgPrefetcher(CompositeTask):
-    __slots__ = ("pkg",) + (
+    __slots__ = ("logfile", "pkg") + (
         "pkg_path",
         "pkg_allocated_path",
         "_bintree",
@@ -22,9 +22,11 @@ class BinpkgPrefetcher(CompositeTask):
 
     def _start(self):
         self._bintree = self.pkg.root_config.trees["bintree"]
+        if self.logfile is None:
+            self.logfile = self.scheduler.fetch.log_file
         fetcher = BinpkgFetcher(
             background=self.background,
-            logfile=self.scheduler.fetch.log_file,
+            logfile=self.logfile,
             pkg=self.pkg,
             scheduler=self.scheduler,
         )
@@ -39,7 +41,7 @@ class BinpkgPrefetcher(CompositeTask):
 
         verifier = BinpkgVerifier(
             background=self.background,
-            logfile=self.scheduler.fetch.log_file,
+            logfile=self.logfile,
             pkg=self.pkg,
             scheduler=self.scheduler,
             _pkg_path=self.pkg_path,
@@ -85,7 +87,7 @@ class BinpkgPrefetcher(CompositeTask):
                 else:
                     self.scheduler.output(
                         output_value,
-                        log_path=self.scheduler.fetch.log_file,
+                        log_path=self.logfile,
                         background=self.background,
                     )
 
@@ -106,5 +108,5 @@ class BinpkgPrefetcher(CompositeTask):
         msg = out.getvalue()
         if msg:
             self.scheduler.output(
-                msg, background=self.background, log_path=self.scheduler.fetch.log_file
+                msg, background=self.background, log_path=self.logfile
             )
@@ -105,13 +105,10 @@ class EbuildBuild(CompositeTask):
             pass
         elif prefetcher.isAlive() and prefetcher.poll() is None:
             if not self.background:
-                fetch_log = os.path.join(
-                    _emerge.emergelog._emerge_log_dir, "emerge-fetch.log"
-                )
                 msg = (
                     "Fetching files in the background.",
                     "To view fetch progress, run in another terminal:",
-                    f"tail -f {fetch_log}",
+                    f"tail -f {prefetcher.logfile}",
                 )
                 out = corepkg.output.EOutput()
                 for l in msg:
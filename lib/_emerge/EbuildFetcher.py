@@ -15,6 +15,7 @@ from corepkg import _unicode_encode
 from corepkg import _unicode_decode
 from corepkg.checksum import _hash_filter
 from corepkg.elog.messages import eerror
+from corepkg.package.ebuild._distfile_digests import DistfileDigestCache
 from corepkg.package.ebuild.fetch import (
     _check_distfile,
     _drop_privs_userfetch,
@@ -166,6 +167,7 @@ class _EbuildFetcherProcess(ForkProcess):
         hash_filter = _hash_filter(settings.get("PORTAGE_CHECKSUM_FILTER", ""))
         if hash_filter.transparent:
             hash_filter = None
+        digest_cache = DistfileDigestCache.from_settings(settings)
         stdout_orig = sys.stdout
         stderr_orig = sys.stderr
         global_havecolor = corepkg.output.havecolor
@@ -192,6 +194,7 @@ class _EbuildFetcherProcess(ForkProcess):
                     eout,
                     show_errors=False,
                     hash_filter=hash_filter,
+                    digest_cache=digest_cache,
                 )
                 if not ok:
                     success = False
@@ -203,6 +206,8 @@ class _EbuildFetcherProcess(ForkProcess):
             sys.stdout = stdout_orig
             sys.stderr = stderr_orig
             corepkg.output.havecolor = global_havecolor
+            if digest_cache is not None:
+                digest_cache.close()
 
         if success:
             # When returning unsuccessfully, no messages are produced, since
@@ -23,6 +23,7 @@ class EbuildMetadataPhase(SubProcess):
 
     __slots__ = (
         "cpv",
+        "depend_worker_pool",
         "eapi_supported",
         "ebuild_hash",
         "fd_pipes",
@@ -135,6 +136,7 @@ class EbuildMetadataPhase(SubProcess):
             tree="porttree",
             fd_pipes=fd_pipes,
             returnproc=True,
+            depend_worker_pool=self.depend_worker_pool,
         )
         settings.pop("PORTAGE_PIPE_FD", None)
         # At this point we can return settings to the caller
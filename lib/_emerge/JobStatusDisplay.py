@@ -19,7 +19,7 @@ class JobStatusDisplay:
     # Used as maximum display width and default fallback value.
     max_display_width = 100
 
-    _bound_properties = ("curval", "failed", "running")
+    _bound_properties = ("curval", "failed", "fetched", "fetching", "running")
 
     # Don't update the display unless at least this much
     # time has passed, in units of seconds.
@@ -41,6 +41,7 @@ class JobStatusDisplay:
         object.__setattr__(self, "quiet", quiet)
         object.__setattr__(self, "xterm_titles", xterm_titles)
         object.__setattr__(self, "maxval", 0)
+        object.__setattr__(self, "fetch_maxval", 0)
         object.__setattr__(self, "merge_wait", 0)
         object.__setattr__(self, "merges", 0)
         object.__setattr__(self, "_changed", False)
@@ -170,6 +171,7 @@ class JobStatusDisplay:
 
     def reset(self):
         self.maxval = 0
+        self.fetch_maxval = 0
         self.merges = 0
         for name in self._bound_properties:
             object.__setattr__(self, name, 0)
@@ -277,6 +279,25 @@ class JobStatusDisplay:
             f.pop_style()
             f.add_literal_data(" merge wait")
 
+        # Progress of the parallel-fetch queue, until all of the files
+        # in the merge list have been fetched.
+        if self.fetched < self.fetch_maxval:
+            f.add_literal_data(", ")
+            f.push_style(number_style)
+            f.add_literal_data(f"{self.fetched}")
+            f.pop_style()
+            f.add_literal_data(" of ")
+            f.push_style(number_style)
+            f.add_literal_data(f"{self.fetch_maxval}")
+            f.pop_style()
+            f.add_literal_data(" fetched")
+            if self.fetching:
+                f.add_literal_data(", ")
+                f.push_style(number_style)
+                f.add_literal_data(f"{self.fetching}")
+                f.pop_style()
+                f.add_literal_data(" fetching")
+
         padding = self._jobs_column_width - len(plain_output.getvalue())
         if padding > 0:
             f.add_literal_data(padding * " ")
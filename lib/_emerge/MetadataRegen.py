@@ -9,6 +9,7 @@ import corepkg
 from corepkg import os
 from corepkg.cache.cache_errors import CacheError
 from corepkg.dep import _repo_separator
+from corepkg.package.ebuild._depend_worker import DependWorkerPool
 from corepkg.util._async.AsyncScheduler import AsyncScheduler
 
 
@@ -65,6 +66,10 @@ class MetadataRegen(AsyncScheduler):
             self._global_cleanse = True
         self._cp_iter = cp_iter
         self._consumer = consumer
+        self._depend_worker_pool = None
+        self._depend_worker_pool_close = None
+        if "metadata-workers" in portdb.settings.features:
+            self._depend_worker_pool = DependWorkerPool()
 
         self._valid_pkgs = set()
         self._cp_set = set()
@@ -136,6 +141,7 @@ class MetadataRegen(AsyncScheduler):
                         repo_path=repo_path,
                         settings=settings,
                         deallocate_config=deallocate_config,
+                        depend_worker_pool=self._depend_worker_pool,
                         write_auxdb=self._write_auxdb,
                     )
 
@@ -196,6 +202,27 @@ class MetadataRegen(AsyncScheduler):
 
         portdb.flush_cache()
 
+    def _poll(self):
+        if self._depend_worker_pool is not None and not (
+            self._is_work_scheduled() or self._keep_scheduling()
+        ):
+            # Wait for the depend phase workers to exit before the
+            # returncode is set.
+            if self._depend_worker_pool_close is None:
+                self._depend_worker_pool_close = asyncio.ensure_future(
+                    self._depend_worker_pool.async_close(), loop=self.scheduler
+                )
+                self._depend_worker_pool_close.add_done_callback(
+                    self._depend_worker_pool_closed
+                )
+            return self.returncode
+        return super()._poll()
+
+    def _depend_worker_pool_closed(self, future):
+        future.cancelled() or future.result()
+        self._depend_worker_pool = None
+        self._schedule()
+
     def _task_exit(self, metadata_process):
         if metadata_process.returncode == os.EX_OK:
             self.cpv_successful.add(metadata_process.cpv)
@@ -0,0 +1,328 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import hashlib
+import json
+
+import corepkg
+from corepkg import os
+from corepkg.const import CACHE_PATH, USER_CONFIG_PATH, VDB_PATH
+from corepkg.const import WORLD_FILE, WORLD_SETS_FILE
+from corepkg.data import secpass
+from corepkg.util import writemsg
+
+
+class ResolverCache:
+    """
+    This caches the merge list computed by the dependency resolver, so
+    that an identical request does not have to be resolved (and possibly
+    backtracked) again. A cache entry is keyed on a fingerprint of every
+    input that can alter the result of dependency resolution:
+
+            1) the emerge action, arguments and resolver-relevant options
+            2) the sync state of each configured repository
+            3) the set of installed packages (including COUNTER)
+            4) the profile stack and user configuration files
+            5) the world file and world_sets file
+            6) the local binary package index, if binary packages are used
+
+    The merge list is stored in the same format as the resume list in
+    mtimedb, and it is loaded with depgraph._loadResumeCommand(), which
+    validates that all packages are still available and visible.
+    """
+
+    # Maximum number of distinct requests that are remembered.
+    _max_entries = 8
+
+    # Options which only influence output or scheduling, and therefore
+    # do not affect the result of dependency resolution.
+    _volatile_opts = frozenset(
+        (
+            "--alert",
+            "--alphabetical",
+            "--ask",
+            "--ask-enter-invalid",
+            "--color",
+            "--columns",
+            "--jobs",
+            "--jobs-tmpdir-require-free-gb",
+            "--keep-going",
+            "--load-average",
+            "--nospinner",
+            "--pretend",
+            "--quiet",
+            "--quiet-build",
+            "--quiet-fail",
+            "--quiet-repo-display",
+            "--quiet-unmerge-warn",
+            "--read-news",
+            "--resolver-cache",
+            "--tree",
+            "--unordered-display",
+            "--verbose",
+            "--verbose-conflicts",
+        )
+    )
+
+    # Configuration variables which are not necessarily derived from
+    # files covered by the fingerprint (they may come from the
+    # calling environment).
+    _settings_keys = (
+        "ACCEPT_KEYWORDS",
+        "ACCEPT_LICENSE",
+        "ACCEPT_PROPERTIES",
+        "ACCEPT_RESTRICT",
+        "ARCH",
+        "BINPKG_FORMAT",
+        "CBUILD",
+        "CHOST",
+        "FEATURES",
+        "PKGDIR",
+        "SYSROOT",
+        "USE",
+    )
+
+    # Files that are updated whenever a synced repository changes.
+    _repo_sync_markers = (
+        os.path.join("metadata", "timestamp.chk"),
+        os.path.join("metadata", "timestamp.commit"),
+        os.path.join("metadata", "timestamp.x"),
+        os.path.join("metadata", "timestamp"),
+        os.path.join(".git", "HEAD"),
+        os.path.join(".git", "index"),
+    )
+
+    _cache_version = "1"
+
+    def __init__(self, settings, trees, myopts, myaction, myfiles):
+        self._settings = settings
+        self._trees = trees
+        cache_dir = settings.get("PORTAGE_RESOLVER_CACHE_DIR")
+        # The default location is shared by all users, so it is only
+        # written with superuser privileges.
+        self._shared = not cache_dir
+        if self._shared:
+            cache_dir = os.path.join(settings["EROOT"], CACHE_PATH)
+        self._cache_filename = os.path.join(cache_dir, "resolver_cache.json")
+        self._cache_data = None
+        self._fingerprint = self._compute_fingerprint(myopts, myaction, myfiles)
+
+    @classmethod
+    def applicable(cls, myaction, myopts):
+        """
+        Returns True if the result of dependency resolution for the
+        given action and options can be cached. Remote binary package
+        indexes are not covered by the fingerprint, so --getbinpkg
+        disables the cache.
+        """
+        if myaction not in (None, "merge"):
+            return False
+        for opt in ("--getbinpkg", "--nodeps", "--resume", "--skipfirst"):
+            if opt in myopts:
+                return False
+        return True
+
+    @property
+    def fingerprint(self):
+        return self._fingerprint
+
+    def get(self):
+        """
+        @rtype: dict or None
+        @return: resume data (with mergelist, favorites and binpkgs keys)
+                stored for the current fingerprint, or None
+        """
+        entry = self._load().get(self._fingerprint)
+        if not isinstance(entry, dict) or not isinstance(entry.get("mergelist"), list):
+            return None
+        return entry
+
+    def store(self, mergelist, favorites):
+        """
+        Store the merge list of a successful resolution for the current
+        fingerprint. Unless PORTAGE_RESOLVER_CACHE_DIR is set, this is
+        a no-op if the current user does not have superuser privileges.
+
+        @param mergelist: the result of depgraph.altlist()
+        @type mergelist: list
+        @param favorites: the favorites returned by depgraph.select_files()
+        @type favorites: list
+        """
+        entries = self._load()
+        entries.pop(self._fingerprint, None)
+        entries[self._fingerprint] = {
+            "favorites": [str(x) for x in favorites],
+            "mergelist": [
+                list(x) for x in mergelist if getattr(x, "operation", None) == "merge"
+            ],
+            "binpkgs": [
+                {
+                    "CPV": str(x.cpv),
+                    "BUILD_ID": x.cpv.build_id,
+                    "BUILD_TIME": x.cpv.build_time,
+                    "MTIME": x.cpv.mtime,
+                    "SIZE": x.cpv.file_size,
+                    "EROOT": x.root,
+                }
+                for x in mergelist
+                if getattr(x, "operation", None) == "merge" and x.type_name == "binary"
+            ],
+        }
+        while len(entries) > self._max_entries:
+            del entries[next(iter(entries))]
+        self._flush()
+
+    def discard(self):
+        """
+        Remove the entry for the current fingerprint, for example after
+        it has been found to be unusable.
+        """
+        if self._load().pop(self._fingerprint, None) is not None:
+            self._flush()
+
+    def _load(self):
+        if self._cache_data is not None:
+            return self._cache_data["entries"]
+
+        data = None
+        try:
+            with open(self._cache_filename, encoding="utf_8") as f:
+                data = json.load(f)
+        except (SystemExit, KeyboardInterrupt):
+            raise
+        except Exception as e:
+            if not (
+                isinstance(e, EnvironmentError)
+                and getattr(e, "errno", None) in (errno.ENOENT, errno.EACCES)
+            ):
+                writemsg(
+                    f"!!! Error loading '{self._cache_filename}': {str(e)}\n",
+                    noiselevel=-1,
+                )
+
+        if not (
+            isinstance(data, dict)
+            and data.get("version") == self._cache_version
+            and isinstance(data.get("entries"), dict)
+        ):
+            data = {"version": self._cache_version, "entries": {}}
+        self._cache_data = data
+        return data["entries"]
+
+    def _flush(self):
+        if self._shared and secpass < 2:
+            return
+        try:
+            corepkg.util.ensure_dirs(os.path.dirname(self._cache_filename))
+            with corepkg.util.atomic_ofstream(
+                self._cache_filename, encoding="utf_8"
+            ) as f:
+                json.dump(self._cache_data, f)
+            if self._shared:
+                corepkg.util.apply_secpass_permissions(
+                    self._cache_filename, gid=corepkg.corepkg_gid, mode=0o644
+                )
+        except OSError:
+            pass
+
+    def _compute_fingerprint(self, myopts, myaction, myfiles):
+        settings = self._settings
+        inputs = [
+            ("version", self._cache_version, corepkg.VERSION),
+            ("action", myaction, list(myfiles)),
+            (
+                "options",
+                sorted(
+                    (k, repr(v))
+                    for k, v in myopts.items()
+                    if k not in self._volatile_opts
+                ),
+            ),
+            ("settings", [(k, settings.get(k, "")) for k in self._settings_keys]),
+        ]
+
+        for repo in settings.repositories:
+            inputs.append(("repo", repo.name, repo.location))
+            markers = [
+                _stat_key(os.path.join(repo.location, marker))
+                for marker in self._repo_sync_markers
+            ]
+            if any(st is not None for _path, st in markers):
+                inputs.extend(markers)
+                inputs.append(
+                    _stat_key(os.path.join(repo.location, "metadata", "md5-cache"))
+                )
+                inputs.append(
+                    _stat_key(os.path.join(repo.location, "metadata", "md5-cache.pack"))
+                )
+            else:
+                # Repositories that are not synced (local overlays) may be
+                # edited in place, so every file has to be accounted for.
+                inputs.extend(_walk_stat_keys(repo.location))
+
+        for profile in settings.profiles:
+            inputs.extend(_walk_stat_keys(profile, recurse=_is_profile_config_dir))
+        inputs.extend(
+            _walk_stat_keys(
+                os.path.join(settings["PORTAGE_CONFIGROOT"], USER_CONFIG_PATH)
+            )
+        )
+
+        for eroot in sorted(self._trees):
+            root_trees = self._trees[eroot]
+            inputs.append(("root", eroot))
+            inputs.append(_stat_key(os.path.join(eroot, WORLD_FILE)))
+            inputs.append(_stat_key(os.path.join(eroot, WORLD_SETS_FILE)))
+            inputs.append(_stat_key(os.path.join(eroot, CACHE_PATH, "counter")))
+            vdb_path = os.path.join(eroot, VDB_PATH)
+            inputs.append(_stat_key(vdb_path))
+            inputs.extend(_walk_stat_keys(vdb_path, recurse=lambda path: False))
+            if "--usepkg" in myopts and "bintree" in root_trees:
+                inputs.append(
+                    _stat_key(os.path.join(root_trees["bintree"].pkgdir, "Packages"))
+                )
+
+        return hashlib.sha256(
+            repr(inputs).encode("utf_8", "backslashreplace")
+        ).hexdigest()
+
+
+def _stat_key(path):
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return (path, None)
+    return (path, (st.st_mtime_ns, st.st_size, st.st_ino))
+
+
+def _is_profile_config_dir(path):
+    """
+    Profile directories may contain child profiles, which are not part
+    of the parent profile, and directories of configuration files such
+    as package.use/, which are.
+    """
+    return os.path.basename(path).startswith(("package.", "use.", "sets"))
+
+
+def _walk_stat_keys(top, recurse=None):
+    """
+    Generate stat keys for all entries below top, in sorted order. If
+    recurse is given, only directories for which it returns True are
+    descended into.
+    """
+    try:
+        names = sorted(os.listdir(top))
+    except OSError:
+        yield (top, None)
+        return
+
+    for name in names:
+        path = os.path.join(top, name)
+        key = _stat_key(path)
+        yield key
+        if os.path.isdir(path) and not os.path.islink(path):
+            if name in (".git", "distfiles", "packages"):
+                continue
+            if recurse is None or recurse(path):
+                yield from _walk_stat_keys(path, recurse=recurse)
@@ -6,6 +6,7 @@ import io
 import gc
 import gzip
 import logging
+import shutil
 import signal
 import sys
 import textwrap
@@ -266,6 +267,8 @@ class Scheduler(PollScheduler):
         )
 
         self._prefetchers = weakref.WeakValueDictionary()
+        # Prefetchers that are counted in fetch_maxval, until they exit.
+        self._pending_prefetchers = set()
         self._pkg_queue = []
         self._jobs = 0
         self._running_tasks = {}
@@ -341,6 +344,18 @@ class Scheduler(PollScheduler):
             except OSError:
                 pass
 
+            fetch_jobs = 1
+            try:
+                fetch_jobs = int(settings.get("PORTAGE_FETCH_JOBS", str(fetch_jobs)))
+            except ValueError as e:
+                writemsg(f"!!! {str(e)}\n", noiselevel=-1)
+                writemsg(
+                    "!!! Unable to parse integer: "
+                    f"PORTAGE_FETCH_JOBS='{settings['PORTAGE_FETCH_JOBS']}'\n",
+                    noiselevel=-1,
+                )
+            self._task_queues.fetch.max_jobs = max(1, fetch_jobs)
+
         self._running_corepkg = None
         corepkg_match = self._running_root.trees["vartree"].dbapi.match(
             corepkg.const.PORTAGE_PACKAGE_ATOM
@@ -645,15 +660,16 @@ class Scheduler(PollScheduler):
         fetchers. If self._max_jobs is greater than 1 then the fetch
         queue is bypassed and the fetcher is started immediately,
         otherwise it is added to the front of the parallel-fetch queue.
-        NOTE: The parallel-fetch queue is currently used to serialize
-        access to the parallel-fetch log, so changes in the log handling
-        would be required before it would be possible to enable
-        concurrent fetching within the parallel-fetch queue.
+        The parallel-fetch queue runs up to PORTAGE_FETCH_JOBS fetchers
+        concurrently. If that is greater than 1 then prefetchers write to
+        private log files, which are appended to the parallel-fetch log
+        when they exit, so that their output is not interleaved.
         """
         if self._max_jobs > 1 and not force_queue:
             fetcher.start()
         else:
             self._task_queues.fetch.addFront(fetcher)
+            self._update_fetch_status()
 
     def _schedule_setup(self, setup_phase):
         """
@@ -814,8 +830,21 @@ class Scheduler(PollScheduler):
                 # mergelist can contain solved Blocker instances
                 if not isinstance(pkg, Package) or pkg.operation == "uninstall":
                     continue
-                prefetcher = self._create_prefetcher(pkg)
+                logfile = self._fetch_log
+                if self._task_queues.fetch.max_jobs > 1:
+                    # Concurrent prefetchers use private logs, which are
+                    # appended to the fetch log by _prefetcher_exit.
+                    logfile = f"{self._fetch_log}.{self._status_display.fetch_maxval}"
+                prefetcher = self._create_prefetcher(pkg, logfile=logfile)
                 if prefetcher is not None:
+                    if logfile != self._fetch_log:
+                        try:
+                            os.unlink(logfile)
+                        except OSError:
+                            pass
+                    prefetcher.addExitListener(self._prefetcher_exit)
+                    self._pending_prefetchers.add(prefetcher)
+                    self._status_display.fetch_maxval += 1
                     # This will start the first prefetcher immediately, so that
                     # self._task() won't discard it. This avoids a case where
                     # the first prefetcher is discarded, causing the second
@@ -824,10 +853,49 @@ class Scheduler(PollScheduler):
                     prefetchers[pkg] = prefetcher
                     self._task_queues.fetch.add(prefetcher)
 
-    def _create_prefetcher(self, pkg):
+            self._update_fetch_status()
+
+    def _prefetcher_exit(self, prefetcher):
+        if prefetcher.logfile != self._fetch_log:
+            try:
+                with open(
+                    _unicode_encode(
+                        prefetcher.logfile, encoding=_encodings["fs"], errors="strict"
+                    ),
+                    "rb",
+                ) as src:
+                    with open(
+                        _unicode_encode(
+                            self._fetch_log, encoding=_encodings["fs"], errors="strict"
+                        ),
+                        "ab",
+                    ) as dest:
+                        shutil.copyfileobj(src, dest)
+                os.unlink(prefetcher.logfile)
+            except OSError:
+                pass
+        if prefetcher in self._pending_prefetchers:
+            self._pending_prefetchers.remove(prefetcher)
+            if prefetcher.cancelled:
+                # Prefetchers that are cancelled, including those that are
+                # discarded before they start, are removed from the total,
+                # so that the fetch status disappears once the rest are done.
+                self._status_display.fetch_maxval -= 1
+            else:
+                self._status_display.fetched += 1
+        # The next prefetcher is started by an exit listener of the
+        # fetch queue, which runs after this one.
+        self._event_loop.call_soon(self._update_fetch_status)
+
+    def _update_fetch_status(self):
+        self._status_display.fetching = len(self._task_queues.fetch.running_tasks)
+
+    def _create_prefetcher(self, pkg, logfile=None):
         """
         @return: a prefetcher, or None if not applicable
         """
+        if logfile is None:
+            logfile = self._fetch_log
         prefetcher = None
 
         if not isinstance(pkg, Package):
@@ -841,7 +909,7 @@ class Scheduler(PollScheduler):
                 ),
                 fetchonly=1,
                 fetchall=self._build_opts.fetch_all_uri,
-                logfile=self._fetch_log,
+                logfile=logfile,
                 pkg=pkg,
                 prefetch=True,
                 scheduler=self._sched_iface,
@@ -853,7 +921,10 @@ class Scheduler(PollScheduler):
             and pkg.root_config.trees["bintree"].download_required(pkg.cpv)
         ):
             prefetcher = BinpkgPrefetcher(
-                background=True, pkg=pkg, scheduler=self._sched_iface
+                background=True,
+                logfile=logfile,
+                pkg=pkg,
+                scheduler=self._sched_iface,
             )
 
         return prefetcher
@@ -978,7 +1049,7 @@ class Scheduler(PollScheduler):
                                 "Fetching in the background:",
                                 fetcher.pkg_path,
                                 "To view fetch progress, run in another terminal:",
-                                f"tail -f {self._fetch_log}",
+                                f"tail -f {fetcher.logfile}",
                             )
                             out = corepkg.output.EOutput()
                             for l in msg:
@@ -1743,6 +1814,9 @@ class Scheduler(PollScheduler):
         self._digraph = None
         self._task_queues.fetch.clear()
         self._prefetchers.clear()
+        # The status display has been reset, so the exit listeners of
+        # the cancelled prefetchers must not update it.
+        self._pending_prefetchers.clear()
         self._main_exit = None
         if self._main_loadavg_handle is not None:
             self._main_loadavg_handle.cancel()
@@ -2268,6 +2342,10 @@ class Scheduler(PollScheduler):
                 self._task_queues.fetch._task_queue.remove(prefetcher)
             except ValueError:
                 pass
+            else:
+                # The prefetcher has not started, so cancel it in order
+                # to call its exit listeners, which update the status.
+                prefetcher.cancel()
             prefetcher = None
         return prefetcher
 
@@ -1388,7 +1388,7 @@ def _calc_depclean(
             pkg_dblink = real_vardb._dblink(pkg.cpv)
             consumers = {}
 
-            for lib in pkg_dblink.getcontents():
+            for lib, _data in pkg_dblink.itercontents():
                 lib = lib[root_len:]
                 lib_key = linkmap._obj_key(lib)
                 lib_consumers = consumer_cache.get(lib_key)
@@ -1,4 +1,4 @@
-# Copyright 1999-2023 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import logging
@@ -20,6 +20,8 @@ def create_depgraph_params(myopts, myaction):
     # deep:      go into the dependencies of already merged packages
     # empty:     pretend nothing is merged
     # complete:  completely account for all known dependencies
+    # incremental: with --deep and --update, skip traversal of dependencies
+    #   of installed packages whose installed dependency closure cannot change
     # bdeps:     satisfy build time dependencies of packages that are
     #   already built, even though they are not strictly required
     # remove:    build graph for use in removing packages
@@ -157,6 +159,9 @@ def create_depgraph_params(myopts, myaction):
     if deep is not None and deep != 0:
         myparams["deep"] = deep
 
+    if myopts.get("--resolver-incremental") == "y":
+        myparams["incremental"] = True
+
     complete_if_new_use = myopts.get("--complete-graph-if-new-use")
     if complete_if_new_use is not None:
         myparams["complete_if_new_use"] = complete_if_new_use
@@ -176,6 +181,7 @@ def create_depgraph_params(myopts, myaction):
         myparams["empty"] = True
         myparams["deep"] = True
         myparams.pop("selective", None)
+        myparams.pop("incremental", None)
 
     if "--nodeps" in myopts:
         myparams.pop("recurse", None)
@@ -4,6 +4,7 @@
 import errno
 import functools
 import logging
+import multiprocessing
 import stat
 import textwrap
 import time
@@ -58,11 +59,11 @@ from corepkg.util import ConfigProtect, new_protect_filename
 from corepkg.util import cmp_sort_key, writemsg, writemsg_stdout
 from corepkg.util import ensure_dirs, normalize_path
 from corepkg.util import writemsg_level, write_atomic
-from corepkg.util.digraph import digraph
+from corepkg.util.digraph import digraph, digraph_condensation, indexed_digraph
 from corepkg.util.futures import asyncio
 from corepkg.util._async.TaskScheduler import TaskScheduler
 from corepkg.util.corepkg_lru_cache import show_lru_cache_info
-from corepkg.versions import _pkg_str, catpkgsplit
+from corepkg.versions import _pkg_str, catpkgsplit, vercmp
 from corepkg.binpkg import get_binpkg_format
 
 from _emerge.AtomArg import AtomArg
@@ -87,6 +88,7 @@ from _emerge.is_valid_package_atom import (
 from _emerge.Package import Package
 from _emerge.PackageArg import PackageArg
 from _emerge.PackageVirtualDbapi import PackageVirtualDbapi
+from _emerge.ResolverCache import ResolverCache
 from _emerge.RootConfig import RootConfig
 from _emerge.search import search
 from _emerge.SetArg import SetArg
@@ -98,6 +100,13 @@ from _emerge.UserQuery import UserQuery
 from _emerge.resolver.backtracking import Backtracker, BacktrackParameter
 from _emerge.resolver.DbapiProvidesIndex import DbapiProvidesIndex
 from _emerge.resolver.package_tracker import PackageTracker, PackageTrackerDbapiWrapper
+from _emerge.resolver.profiler import ResolverProfiler
+from _emerge.resolver.speculation import (
+    BacktrackOutcome,
+    BacktrackSpeculation,
+    dumps_outcome,
+    loads_outcome,
+)
 from _emerge.resolver.slot_collision import slot_conflict_handler
 from _emerge.resolver.circular_dependency import circular_dependency_handler
 from _emerge.resolver.output import Display, format_unmatched_atom
@@ -218,6 +227,13 @@ class _frozen_depgraph_config:
         self.rebuild_if_new_rev = "--rebuild-if-new-rev" in myopts
         self.rebuild_if_new_ver = "--rebuild-if-new-ver" in myopts
         self.rebuild_if_unbuilt = "--rebuild-if-unbuilt" in myopts
+        # ResolverProfiler instance, or None if profiling is disabled.
+        self.profiler = None
+        # Dirty installed packages and the installed parents of each
+        # installed package, computed once per resolution by
+        # depgraph._incremental_clean_pkgs(), since backtracking runs
+        # share the same installed packages.
+        self._incremental_deps = None
 
 
 class _depgraph_sets:
@@ -511,6 +527,9 @@ class _dynamic_depgraph_config:
         self._unsatisfied_deps = []
         self._initially_unsatisfied_deps = []
         self._ignored_deps = []
+        # Installed packages for which incremental mode skips dependency
+        # traversal, computed lazily by depgraph._incremental_clean().
+        self._incremental_clean_pkgs = None
         self._highest_pkg_cache = {}
         self._highest_pkg_cache_cp_map = {}
         self._flatten_atoms_cache = {}
@@ -696,6 +715,9 @@ class depgraph:
         self._virt_deps_visible_recursion = set()
         self._virtual_cycle = None
 
+        if frozen_config.profiler is not None:
+            frozen_config.profiler.instrument(self)
+
     def _index_binpkgs(self):
         for root in self._frozen_config.trees:
             bindb = self._frozen_config.trees[root]["bintree"].dbapi
@@ -3643,7 +3665,7 @@ class depgraph:
         dep_stack = self._dynamic_config._dep_stack
         if "recurse" not in self._dynamic_config.myparams:
             return 1
-        if pkg.installed and not recurse:
+        if pkg.installed and (not recurse or self._incremental_clean(pkg)):
             dep_stack = self._dynamic_config._ignored_deps
 
         self._spinner_update()
@@ -3652,6 +3674,262 @@ class depgraph:
             dep_stack.append(pkg)
         return 1
 
+    def _incremental_clean(self, pkg):
+        """
+        In incremental mode, return True if the dependencies of the given
+        installed package do not need to be traversed, since nothing in its
+        installed dependency closure can change. The package is queued in
+        _ignored_deps instead, so that _complete_graph() still traverses
+        it when the graph needs to be complete.
+        """
+        if (
+            "incremental" not in self._dynamic_config.myparams
+            or self._dynamic_config._complete_mode
+        ):
+            return False
+        clean_pkgs = self._dynamic_config._incremental_clean_pkgs
+        if clean_pkgs is None:
+            clean_pkgs = self._incremental_clean_pkgs()
+            self._dynamic_config._incremental_clean_pkgs = clean_pkgs
+        return pkg in clean_pkgs
+
+    def _incremental_clean_pkgs(self):
+        """
+        Compute the installed packages for which incremental mode may skip
+        dependency traversal, using the dependency graph implied by the
+        installed packages themselves. An installed package is dirty if it
+        may be replaced (see _incremental_pkg_changed), or if one of its
+        dependencies is not satisfied by an installed package that is also
+        the best visible match, or if it has slot operator dependencies.
+        Packages that depend on a dirty package, directly or indirectly,
+        are dirty as well. Packages that backtracking masks or unmasks
+        are dirty in the corresponding run only.
+
+        @rtype: frozenset
+        @return: installed packages that are not dirty
+        """
+        myopts = self._frozen_config.myopts
+        params = self._dynamic_config.myparams
+        if (
+            params.get("deep") is not True
+            or "--update" not in myopts
+            or "empty" in params
+            or "remove" in params
+            or len(self._frozen_config.roots) != 1
+            or self._frozen_config.soname_deps_enabled
+            or self._rebuild.rebuild
+            or self._rebuild.rebuild_list
+            or self._rebuild.reinstall_list
+            or self._dynamic_config._slot_operator_replace_installed
+            or params.get("changed_deps", "n") != "n"
+            or params.get("changed_slot")
+            or params.get("rebuilt_binaries")
+        ):
+            return frozenset()
+
+        self._load_vdb()
+        root_config = self._frozen_config.roots[self._frozen_config.target_root]
+        vardb = self._frozen_config.trees[root_config.root]["vartree"].dbapi
+
+        if self._frozen_config._incremental_deps is None:
+            self._frozen_config._incremental_deps = self._incremental_check_vdb(vardb)
+        dirty, parents = self._frozen_config._incremental_deps
+        dirty = set(dirty)
+
+        for pkg in self._dynamic_config._runtime_pkg_mask:
+            if pkg.installed:
+                dirty.add(pkg)
+        for changes in (
+            self._dynamic_config._needed_unstable_keywords,
+            self._dynamic_config._needed_p_mask_changes,
+            self._dynamic_config._needed_license_changes,
+            self._dynamic_config._needed_use_config_changes,
+        ):
+            for pkg in changes:
+                dirty.update(vardb.match_pkgs(pkg.slot_atom))
+
+        stack = list(dirty)
+        while stack:
+            for parent in parents.get(stack.pop(), ()):
+                if parent not in dirty:
+                    dirty.add(parent)
+                    stack.append(parent)
+
+        return frozenset(pkg for pkg in vardb if pkg not in dirty)
+
+    def _incremental_check_vdb(self, vardb):
+        """
+        Check the dependencies of all installed packages for
+        _incremental_clean_pkgs.
+
+        @rtype: tuple
+        @return: a (dirty, parents) tuple, where dirty is the set of
+                installed packages that are dirty themselves, and parents
+                maps each installed package to the installed packages that
+                depend on it
+        """
+        dep_keys = Package._runtime_keys
+        if self._dynamic_config.myparams.get("bdeps") in ("y", "auto"):
+            dep_keys += Package._buildtime_keys
+
+        dirty = set()
+        parents = collections.defaultdict(set)
+        atom_cache = {}
+        for pkg in vardb:
+            if self._incremental_pkg_changed(pkg):
+                dirty.add(pkg)
+            use = self._pkg_use_enabled(pkg)
+            for k in dep_keys:
+                try:
+                    dep_struct = corepkg.dep.use_reduce(
+                        pkg._metadata[k], uselist=use, eapi=pkg.eapi, token_class=Atom
+                    )
+                except InvalidDependString:
+                    dirty.add(pkg)
+                    continue
+                status = self._incremental_check_deps(
+                    pkg, dep_struct, use, parents, atom_cache
+                )
+                if status != "clean":
+                    dirty.add(pkg)
+
+        return frozenset(dirty), dict(parents)
+
+    def _incremental_check_deps(self, pkg, dep_struct, use, parents, atom_cache):
+        """
+        Check a reduced dependency structure of an installed package
+        against the installed packages, and record the installed packages
+        that it depends on in parents.
+
+        @rtype: str
+        @return: "missing" if it is not satisfied by installed packages,
+                "unavailable" if it is not satisfiable by any package,
+                "dirty" if an update is available, else "clean"
+        """
+        results = []
+        i = 0
+        while i < len(dep_struct):
+            x = dep_struct[i]
+            if x == "||":
+                i += 1
+                choices = [
+                    self._incremental_check_deps(
+                        pkg,
+                        choice if isinstance(choice, list) else [choice],
+                        use,
+                        parents,
+                        atom_cache,
+                    )
+                    for choice in dep_struct[i]
+                ]
+                # The resolver prefers the first installed choice over
+                # choices that are not installed (see dep_zapdeps), as
+                # long as those are not pulled into the graph otherwise.
+                choices = [
+                    result
+                    for result in choices
+                    if result not in ("missing", "unavailable")
+                ]
+                if not choices:
+                    results.append("missing")
+                else:
+                    results.append(choices[0])
+            elif isinstance(x, list):
+                results.append(
+                    self._incremental_check_deps(pkg, x, use, parents, atom_cache)
+                )
+            elif x.slot_operator == "=":
+                # Slot operator deps are subject to rebuilds triggered by
+                # _slot_operator_update_probe, so never skip them.
+                results.append("dirty")
+            elif not x.blocker:
+                if x.use and x.use.conditional:
+                    x = x.evaluate_conditionals(use)
+                result = atom_cache.get(x)
+                if result is None:
+                    result = self._incremental_check_atom(x)
+                    atom_cache[x] = result
+                installed, status = result
+                for child in installed:
+                    parents[child].add(pkg)
+                results.append(status)
+            i += 1
+
+        for status in ("missing", "unavailable", "unstable", "dirty"):
+            if status in results:
+                return status
+        return "clean"
+
+    def _incremental_check_atom(self, atom):
+        root_config = self._frozen_config.roots[self._frozen_config.target_root]
+        installed = list(self._iter_match_pkgs(root_config, "installed", atom))
+        if not installed:
+            if any(self._incremental_best_available(atom)):
+                return installed, "missing"
+            return installed, "unavailable"
+        best_installed = max(installed)
+        for candidate in self._incremental_best_available(atom):
+            if vercmp(candidate.version, best_installed.version) > 0:
+                return installed, "dirty"
+        return installed, "clean"
+
+    def _incremental_best_available(self, atom):
+        """
+        Yield the highest visible package matching atom from each
+        non-installed package database that the resolver selects from.
+        """
+        root_config = self._frozen_config.roots[self._frozen_config.target_root]
+        for (
+            db,
+            pkg_type,
+            built,
+            installed,
+            db_keys,
+        ) in self._dynamic_config._filtered_trees[root_config.root]["dbs"]:
+            if installed:
+                continue
+            for candidate in self._iter_match_pkgs(root_config, pkg_type, atom):
+                if (
+                    candidate not in self._dynamic_config._runtime_pkg_mask
+                    and self._pkg_visibility_check(candidate)
+                ):
+                    yield candidate
+                    break
+
+    def _incremental_pkg_changed(self, pkg):
+        """
+        Return True if the resolver may replace the given installed
+        package: it is masked, a higher version is available in its slot,
+        or --newuse, --changed-use or --newrepo apply to an available
+        package of the same version.
+        """
+        if not pkg.visible or pkg in self._dynamic_config._runtime_pkg_mask:
+            return True
+        myopts = self._frozen_config.myopts
+        reinstall_use = (
+            "--newuse" in myopts or myopts.get("--reinstall") == "changed-use"
+        )
+        for candidate in self._incremental_best_available(pkg.slot_atom):
+            result = vercmp(candidate.version, pkg.version)
+            if result > 0:
+                return True
+            if result < 0:
+                continue
+            if "--newrepo" in myopts and candidate.repo != pkg.repo:
+                return True
+            if reinstall_use and not candidate.built:
+                forced_flags = set(chain(candidate.use.force, candidate.use.mask))
+                if self._reinstall_for_flags(
+                    candidate,
+                    forced_flags,
+                    pkg.use.enabled,
+                    pkg.iuse.all,
+                    self._pkg_use_enabled(candidate),
+                    candidate.iuse.all,
+                ):
+                    return True
+        return False
+
     def _add_installed_sonames(self, pkg):
         if self._frozen_config.soname_deps_enabled and pkg.provides is not None:
             for atom in pkg.provides:
@@ -9090,7 +9368,7 @@ class depgraph:
 
             return node_info[node2] - node_info[node1]
 
-        mygraph.order.sort(key=cmp_sort_key(cmp_merge_preference))
+        mygraph.order = sorted(mygraph.order, key=cmp_sort_key(cmp_merge_preference))
 
     def altlist(self, reversed=DeprecationWarning):  # pylint: disable=redefined-builtin
         if reversed is not DeprecationWarning:
@@ -9248,7 +9526,10 @@ class depgraph:
             self._dynamic_config.digraph.debug_print()
             writemsg("\n", noiselevel=-1)
 
-        scheduler_graph = self._dynamic_config.digraph.copy()
+        # Merge order calculation and the Scheduler repeatedly select
+        # leaf and root nodes, which indexed_digraph tracks incrementally.
+        scheduler_graph = indexed_digraph()
+        scheduler_graph.update(self._dynamic_config.digraph)
 
         if "--nodeps" in self._frozen_config.myopts:
             # Preserve the package order given on the command line.
@@ -9261,7 +9542,7 @@ class depgraph:
                 scheduler_graph,
             )
 
-        mygraph = self._dynamic_config.digraph.copy()
+        mygraph = scheduler_graph.copy()
 
         removed_nodes = set()
 
@@ -9424,6 +9705,22 @@ class depgraph:
                     return False
             return True
 
+        def corepkg_rdepends_first(node):
+            """
+            Make sure that corepkg always has all of its RDEPENDs
+            installed first, like gather_deps() does.
+            """
+            return node == replacement_corepkg and any(
+                getattr(rdep, "operation", None) != "uninstall"
+                for rdep in mygraph.child_nodes(
+                    node, ignore_priority=priority_range.ignore_medium_soft
+                )
+            )
+
+        # Strongly connected components of mygraph, for each priority
+        # range that is used to find the smallest cycle.
+        condensations = {}
+
         def ignore_uninst_or_med(priority):
             if priority is BlockerDepPriority.instance:
                 return True
@@ -9565,30 +9862,100 @@ class depgraph:
                     # that depend on them. Therefore, we search for the
                     # smallest cycle in order to try and identify and prefer
                     # these smaller independent cycles.
+                    #
+                    # The group that gather_deps() would collect for a node
+                    # is the union of the strongly connected components that
+                    # are reachable from it, so it is computed from the
+                    # condensation of the graph, which is updated
+                    # incrementally as nodes are removed.
                     smallest_cycle = None
                     ignore_priority = None
 
-                    # Sort nodes for deterministic results.
-                    nodes = sorted(nodes)
-                    for priority in (
+                    priorities = [
                         local_priority_range.ignore_priority[i]
                         for i in range(
                             local_priority_range.MEDIUM_POST,
                             local_priority_range.MEDIUM_SOFT + 1,
                         )
-                    ):
+                    ]
+                    condensation = condensations.get(local_priority_range)
+                    if condensation is None:
+                        condensation = digraph_condensation(mygraph, priorities)
+                        condensations[local_priority_range] = condensation
+
+                    # Sort nodes for deterministic results.
+                    nodes = sorted(nodes)
+                    for level, priority in enumerate(priorities):
+                        components = condensation.components(level)
+                        valid_components = {}
+
+                        def valid_component(component_id):
+                            """
+                            Return True if gather_deps() would succeed
+                            for the nodes of the given component.
+                            """
+                            stack = [(component_id, None)]
+                            while stack:
+                                component_id, successors = stack[-1]
+                                if successors is None:
+                                    if component_id in valid_components:
+                                        stack.pop()
+                                        continue
+                                    if not all(
+                                        node in mergeable_nodes
+                                        and not corepkg_rdepends_first(node)
+                                        for node in components[component_id]
+                                    ):
+                                        valid_components[component_id] = False
+                                        stack.pop()
+                                        continue
+                                    successors = iter(
+                                        condensation.successors(component_id, level)
+                                    )
+                                    stack[-1] = (component_id, successors)
+                                for successor in successors:
+                                    if successor not in valid_components:
+                                        stack.append((successor, None))
+                                        break
+                                    if not valid_components[successor]:
+                                        valid_components[component_id] = False
+                                        stack.pop()
+                                        break
+                                else:
+                                    valid_components[component_id] = True
+                                    stack.pop()
+                            return valid_components[component_id]
+
                         for node in nodes:
                             if not mygraph.parent_nodes(node):
                                 continue
+                            component_id = condensation.component_of(node, level)
+                            if not valid_component(component_id):
+                                continue
+                            # Gather the reachable components, and stop as
+                            # soon as they are not smaller than the smallest
+                            # group that has been found so far.
                             selected_nodes = set()
-                            if gather_deps(
-                                priority, mergeable_nodes, selected_nodes, node
-                            ):
-                                if smallest_cycle is None or len(selected_nodes) < len(
-                                    smallest_cycle
+                            reachable = {component_id}
+                            stack = [component_id]
+                            while stack:
+                                component_id = stack.pop()
+                                selected_nodes.update(components[component_id])
+                                if smallest_cycle is not None and len(
+                                    selected_nodes
+                                ) >= len(smallest_cycle):
+                                    break
+                                for successor in condensation.successors(
+                                    component_id, level
                                 ):
-                                    smallest_cycle = selected_nodes
-                                    ignore_priority = priority
+                                    if successor not in reachable:
+                                        reachable.add(successor)
+                                        stack.append(successor)
+                            if smallest_cycle is None or len(selected_nodes) < len(
+                                smallest_cycle
+                            ):
+                                smallest_cycle = selected_nodes
+                                ignore_priority = priority
 
                         # Exit this loop with the lowest possible priority, which
                         # minimizes the use of installed packages to break cycles.
@@ -9944,6 +10311,10 @@ class depgraph:
                                 priority=BlockerDepPriority.instance,
                             )
 
+                    # Edges have been added, so the strongly connected
+                    # components have to be computed again.
+                    condensations.clear()
+
                     # Reset the state variables for leaf node selection and
                     # continue trying to select leaf nodes.
                     prefer_asap = True
@@ -11891,14 +12262,24 @@ def backtrack_depgraph(
     Raises PackageSetNotFound if myfiles contains a missing package set.
     """
     backtracked, max_retries = -1, -1
+    profiler = ResolverProfiler.from_environ()
     _spinner_start(spinner, myopts)
     try:
         success, mydepgraph, favorites, backtracked, max_retries = _backtrack_depgraph(
-            settings, trees, myopts, myparams, myaction, myfiles, spinner
+            settings,
+            trees,
+            myopts,
+            myparams,
+            myaction,
+            myfiles,
+            spinner,
+            profiler=profiler,
         )
         return (success, mydepgraph, favorites)
     finally:
         _spinner_stop(spinner, backtracked, max_retries)
+        if profiler is not None:
+            profiler.dump()
 
 
 def _backtrack_depgraph(
@@ -11910,6 +12291,7 @@ def _backtrack_depgraph(
     myfiles: list[str],
     spinner: "_emerge.stdout_spinner.stdout_spinner",
     frozen_config: Optional[_frozen_depgraph_config] = None,
+    profiler: Optional[ResolverProfiler] = None,
 ) -> tuple[Any, depgraph, list[str], int, int]:
     debug = "--debug" in myopts
     mydepgraph = None
@@ -11924,24 +12306,119 @@ def _backtrack_depgraph(
         frozen_config = _frozen_depgraph_config(
             settings, trees, myopts, myparams, spinner
         )
+    frozen_config.profiler = profiler
 
-    while backtracker:
-        if debug and mydepgraph is not None:
-            writemsg_level(
-                f"\n\nbacktracking try {backtracked} \n\n",
-                noiselevel=-1,
-                level=logging.DEBUG,
-            )
-            mydepgraph.display_problems()
+    resolver_cache = None
+    if myopts.get("--resolver-cache") == "y" and ResolverCache.applicable(
+        myaction, myopts
+    ):
+        resolver_cache = ResolverCache(settings, trees, myopts, myaction, myfiles)
+        cached = _load_cached_depgraph(
+            resolver_cache, settings, trees, myopts, myparams, spinner, frozen_config
+        )
+        if profiler is not None:
+            profiler.record("resolver_cache", "miss" if cached is None else "hit")
+        if cached is not None:
+            mydepgraph, favorites = cached
+            return (True, mydepgraph, favorites, backtracked, max_retries)
+
+    speculation = None
+    backtrack_jobs = myopts.get("--backtrack-jobs", 1)
+    if (
+        backtrack_jobs > 1
+        and allow_backtracking
+        and not debug
+        and profiler is None
+        and multiprocessing.get_start_method() == "fork"
+    ):
+        speculation = BacktrackSpeculation(
+            functools.partial(
+                _evaluate_backtrack_parameters,
+                settings,
+                trees,
+                myopts,
+                myparams,
+                myfiles,
+                frozen_config,
+            ),
+            backtrack_jobs,
+            asyncio._safe_loop(),
+        )
 
-        backtrack_parameters = backtracker.get()
-        if debug and backtrack_parameters.runtime_pkg_mask:
-            writemsg_level(
-                f"\n\nruntime_pkg_mask: {backtrack_parameters.runtime_pkg_mask} \n\n",
-                noiselevel=-1,
-                level=logging.DEBUG,
-            )
+    # True if the last attempt was only evaluated in a forked process.
+    speculated = False
+    try:
+        while backtracker:
+            if debug and mydepgraph is not None:
+                writemsg_level(
+                    f"\n\nbacktracking try {backtracked} \n\n",
+                    noiselevel=-1,
+                    level=logging.DEBUG,
+                )
+                mydepgraph.display_problems()
+
+            backtrack_parameters = backtracker.get()
+            if debug and backtrack_parameters.runtime_pkg_mask:
+                writemsg_level(
+                    f"\n\nruntime_pkg_mask: {backtrack_parameters.runtime_pkg_mask} \n\n",
+                    noiselevel=-1,
+                    level=logging.DEBUG,
+                )
 
+            outcome = None
+            if speculation is not None and backtracked < max_retries:
+                outcome = _take_backtrack_outcome(
+                    speculation, backtrack_parameters, mydepgraph
+                )
+
+            if outcome is not None and not (
+                outcome.success or outcome.need_config_change
+            ):
+                speculated = True
+                if outcome.need_restart:
+                    backtracked += 1
+                    backtracker.feedback(outcome.backtrack_infos)
+                elif backtracker:
+                    backtracked += 1
+            else:
+                speculated = False
+                if profiler is not None:
+                    profiler.start_iteration()
+                mydepgraph = depgraph(
+                    settings,
+                    trees,
+                    myopts,
+                    myparams,
+                    spinner,
+                    frozen_config=frozen_config,
+                    allow_backtracking=allow_backtracking,
+                    backtrack_parameters=backtrack_parameters,
+                )
+                success, favorites = mydepgraph.select_files(myfiles)
+                if profiler is not None:
+                    profiler.end_iteration(mydepgraph, success)
+
+                if success or mydepgraph.need_config_change():
+                    break
+                elif not allow_backtracking:
+                    break
+                elif backtracked >= max_retries:
+                    break
+                elif mydepgraph.need_restart():
+                    backtracked += 1
+                    backtracker.feedback(mydepgraph.get_backtrack_infos())
+                elif backtracker:
+                    backtracked += 1
+
+            if speculation is not None:
+                speculation.schedule(backtracker.peek(backtrack_jobs))
+    finally:
+        if speculation is not None:
+            speculation.shutdown()
+
+    if speculated:
+        # The last attempt failed in a forked process, so construct its
+        # depgraph here, for display of problems.
         mydepgraph = depgraph(
             settings,
             trees,
@@ -11954,18 +12431,6 @@ def _backtrack_depgraph(
         )
         success, favorites = mydepgraph.select_files(myfiles)
 
-        if success or mydepgraph.need_config_change():
-            break
-        elif not allow_backtracking:
-            break
-        elif backtracked >= max_retries:
-            break
-        elif mydepgraph.need_restart():
-            backtracked += 1
-            backtracker.feedback(mydepgraph.get_backtrack_infos())
-        elif backtracker:
-            backtracked += 1
-
     if backtracked and not success and not mydepgraph.need_display_problems():
         if debug:
             writemsg_level(
@@ -11975,6 +12440,8 @@ def _backtrack_depgraph(
             )
             mydepgraph.display_problems()
 
+        if profiler is not None:
+            profiler.start_iteration(kind="best_run")
         mydepgraph = depgraph(
             settings,
             trees,
@@ -11986,6 +12453,8 @@ def _backtrack_depgraph(
             backtrack_parameters=backtracker.get_best_run(),
         )
         success, favorites = mydepgraph.select_files(myfiles)
+        if profiler is not None:
+            profiler.end_iteration(mydepgraph, success)
 
     if not success and mydepgraph.autounmask_breakage_detected():
         if debug:
@@ -11996,6 +12465,8 @@ def _backtrack_depgraph(
             )
             mydepgraph.display_problems()
         myparams["autounmask"] = False
+        if profiler is not None:
+            profiler.start_iteration(kind="autounmask_breakage")
         mydepgraph = depgraph(
             settings,
             trees,
@@ -12006,10 +12477,179 @@ def _backtrack_depgraph(
             allow_backtracking=False,
         )
         success, favorites = mydepgraph.select_files(myfiles)
+        if profiler is not None:
+            profiler.end_iteration(mydepgraph, success)
+
+    if success and resolver_cache is not None:
+        _store_cached_depgraph(resolver_cache, mydepgraph, favorites)
 
     return (success, mydepgraph, favorites, backtracked, max_retries)
 
 
+def _evaluate_backtrack_parameters(
+    settings: corepkg.package.ebuild.config.config,
+    trees: corepkg._trees_dict,
+    myopts: dict[str, Union[str, int, bool]],
+    myparams: dict[str, Union[int, str, bool]],
+    myfiles: list[str],
+    frozen_config: _frozen_depgraph_config,
+    backtrack_parameters: BacktrackParameter,
+) -> Optional[bytes]:
+    """
+    Evaluate a backtracking attempt in a process that was forked by
+    BacktrackSpeculation. Output is discarded, since the parent process
+    evaluates the attempt again if it succeeds, or if its output is
+    needed for the display of problems.
+
+    @rtype: bytes or None
+    @return: a serialized BacktrackOutcome, or None
+    """
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+    frozen_config.spinner = None
+
+    mydepgraph = depgraph(
+        settings,
+        trees,
+        myopts,
+        myparams,
+        None,
+        frozen_config=frozen_config,
+        allow_backtracking=True,
+        backtrack_parameters=backtrack_parameters,
+    )
+    success, favorites = mydepgraph.select_files(myfiles)
+    outcome = BacktrackOutcome(
+        success=success,
+        need_config_change=mydepgraph.need_config_change(),
+        need_restart=mydepgraph.need_restart(),
+    )
+    if not success and outcome.need_restart:
+        outcome.backtrack_infos = mydepgraph.get_backtrack_infos()
+    return dumps_outcome(outcome)
+
+
+def _take_backtrack_outcome(
+    speculation: BacktrackSpeculation,
+    backtrack_parameters: BacktrackParameter,
+    mydepgraph: depgraph,
+) -> Optional[BacktrackOutcome]:
+    """
+    Wait for the outcome of a backtracking attempt that was evaluated by
+    BacktrackSpeculation, and map the packages that it refers to onto
+    the instances of this process.
+
+    @rtype: BacktrackOutcome or None
+    @return: the outcome, or None if the attempt has to be evaluated here
+    """
+    data = speculation.take(backtrack_parameters)
+    if data is None:
+        return None
+    frozen_config = mydepgraph._frozen_config
+
+    def load_pkg(hash_key, installed, onlydeps):
+        pkg = frozen_config._pkg_cache.get(hash_key)
+        if pkg is None:
+            type_name, root, cpv, _operation, repo = hash_key[:5]
+            pkg = mydepgraph._pkg(
+                cpv,
+                type_name,
+                frozen_config.roots[root],
+                installed=installed,
+                onlydeps=onlydeps,
+                myrepo=repo if type_name == "ebuild" else None,
+            )
+            if pkg._hash_key != hash_key:
+                raise corepkg.exception.PackageNotFound(cpv)
+        return pkg
+
+    return loads_outcome(data, load_pkg, frozen_config.roots)
+
+
+def _load_cached_depgraph(
+    resolver_cache: ResolverCache,
+    settings: corepkg.package.ebuild.config.config,
+    trees: corepkg._trees_dict,
+    myopts: dict[str, Union[str, int, bool]],
+    myparams: dict[str, Union[int, str, bool]],
+    spinner: "_emerge.stdout_spinner.stdout_spinner",
+    frozen_config: _frozen_depgraph_config,
+) -> Optional[tuple[depgraph, list]]:
+    """
+    Reconstruct a depgraph from the merge list that was stored by a
+    previous resolution with an identical fingerprint, without running
+    the resolver or backtracking. The merge list is validated in the
+    same way as a resume list, and the cache entry is discarded if it
+    is no longer valid.
+
+    @rtype: tuple or None
+    @return: (depgraph, favorites), or None if there is no usable entry
+    """
+    resume_data = resolver_cache.get()
+    if resume_data is None:
+        return None
+
+    if "--debug" in myopts:
+        writemsg_level(
+            f"\n\nresolver cache hit: {resolver_cache.fingerprint}\n\n",
+            noiselevel=-1,
+            level=logging.DEBUG,
+        )
+
+    mydepgraph = depgraph(
+        settings,
+        trees,
+        myopts,
+        myparams,
+        spinner,
+        frozen_config=frozen_config,
+        allow_backtracking=False,
+    )
+    try:
+        success = mydepgraph._loadResumeCommand(
+            resume_data, skip_masked=False, skip_missing=False
+        )
+    except (corepkg.exception.PackageNotFound, depgraph.UnsatisfiedResumeDep):
+        success = False
+
+    if not success or mydepgraph.need_display_problems():
+        resolver_cache.discard()
+        return None
+
+    favorites = []
+    for x in resume_data.get("favorites", []):
+        if x.startswith(SETPREFIX):
+            favorites.append(x)
+            continue
+        try:
+            favorites.append(Atom(x, allow_repo=True))
+        except InvalidAtom:
+            continue
+
+    return mydepgraph, favorites
+
+
+def _store_cached_depgraph(
+    resolver_cache: ResolverCache, mydepgraph: depgraph, favorites: list
+) -> None:
+    """
+    Store the merge list of a successful resolution, unless it involved
+    problems or configuration changes that have to be displayed (those
+    must not be hidden by a cache hit on the next run).
+    """
+    if mydepgraph.need_config_reload():
+        return
+    try:
+        mergelist = mydepgraph.altlist()
+    except depgraph._unknown_internal_error:
+        return
+    if mydepgraph.need_display_problems():
+        return
+    resolver_cache.store(mergelist, favorites)
+
+
 def resume_depgraph(
     settings: corepkg.package.ebuild.config.config,
     trees: corepkg._trees_dict,
@@ -386,6 +386,11 @@ def parse_opts(tmpcmdline, silent=False):
             + "calculation fails ",
             "action": "store",
         },
+        "--backtrack-jobs": {
+            "help": "Specifies the number of backtracking attempts to "
+            + "evaluate speculatively in parallel",
+            "action": "store",
+        },
         "--binpkg-changed-deps": {
             "help": ("reject binary packages with outdated " "dependencies"),
             "choices": true_y_or_n,
@@ -668,6 +673,16 @@ def parse_opts(tmpcmdline, silent=False):
             "choices": y_or_n,
             "default": "y",
         },
+        "--resolver-cache": {
+            "help": "reuse the result of a previous dependency calculation "
+            + "if none of its inputs have changed",
+            "choices": y_or_n,
+        },
+        "--resolver-incremental": {
+            "help": "with --deep and --update, only traverse dependencies of "
+            + "installed packages that may be affected by an update",
+            "choices": y_or_n,
+        },
         "--root": {
             "help": "specify the target root filesystem for merging packages",
             "action": "store",
@@ -994,6 +1009,21 @@ def parse_opts(tmpcmdline, silent=False):
 
         myoptions.backtrack = backtrack
 
+    if myoptions.backtrack_jobs is not None:
+        try:
+            backtrack_jobs = int(myoptions.backtrack_jobs)
+        except (OverflowError, ValueError):
+            backtrack_jobs = -1
+
+        if backtrack_jobs < 1:
+            backtrack_jobs = None
+            if not silent:
+                parser.error(
+                    f"Invalid --backtrack-jobs parameter: '{myoptions.backtrack_jobs}'\n"
+                )
+
+        myoptions.backtrack_jobs = backtrack_jobs
+
     if myoptions.deep is not None:
         deep = None
         if myoptions.deep == "True":
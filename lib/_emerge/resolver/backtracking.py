@@ -1,4 +1,4 @@
-# Copyright 2010-2012 Gentoo Foundation
+# Copyright 2010-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import copy
@@ -138,6 +138,16 @@ class Backtracker:
             return copy.deepcopy(node.parameter)
         return None
 
+    def peek(self, count):
+        """
+        Returns the backtrack parameters that get() would return next, up
+        to count of them, in order, as long as no feedback is given.
+        """
+        return [
+            copy.deepcopy(node.parameter)
+            for node in reversed(self._unexplored_nodes[-count:])
+        ]
+
     def __len__(self):
         return len(self._unexplored_nodes)
 
@@ -0,0 +1,223 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import functools
+import json
+import time
+
+from corepkg import os
+from corepkg.util import writemsg
+from corepkg.util.corepkg_lru_cache import get_lru_cache_info
+
+
+class ResolverProfiler:
+    """
+    Record wall time and call counts of the dependency resolver phases,
+    for each backtracking iteration, together with cache hit rates. It is
+    enabled by setting PORTAGE_RESOLVER_PROFILE in the environment, to 1
+    in order to print the profile as JSON after dependency resolution, or
+    to a file name in order to write the profile to that file instead.
+
+    Phases are instrumented by wrapping the corresponding methods of each
+    depgraph instance, so that there is no overhead when profiling is
+    disabled. The time of recursive calls is only accounted for once, by
+    the outermost call.
+    """
+
+    # depgraph methods that are timed, in the order of a typical run.
+    _phases = (
+        "select_files",
+        "_load_vdb",
+        "_create_graph",
+        "_add_pkg",
+        "_add_pkg_deps",
+        "_select_pkg_highest_available",
+        "_select_pkg_highest_available_imp",
+        "_slot_operator_update_probe",
+        "_slot_operator_check_reverse_dependencies",
+        "_complete_graph",
+        "_validate_blockers",
+        "_resolve_conflicts",
+        "_serialize_tasks",
+    )
+
+    # depgraph attributes which may refer to one of the phases above.
+    _aliases = ("_select_package",)
+
+    def __init__(self, output):
+        self._output = output
+        self._start = time.monotonic()
+        self._iterations = []
+        self._current = None
+        self._extra = {}
+
+    @classmethod
+    def from_environ(cls):
+        """
+        @rtype: ResolverProfiler or None
+        @return: a profiler if PORTAGE_RESOLVER_PROFILE is set, else None
+        """
+        output = os.environ.get("PORTAGE_RESOLVER_PROFILE")
+        if not output:
+            return None
+        return cls(output)
+
+    def start_iteration(self, kind="backtrack"):
+        """
+        Start recording a new iteration. All phases of depgraph instances
+        that are instrumented afterwards are accounted to it.
+        """
+        self._current = {
+            "iteration": len(self._iterations),
+            "kind": kind,
+            "start": time.monotonic(),
+            "phases": {name: [0, 0.0, 0] for name in self._phases},
+            "caches": {},
+        }
+        self._iterations.append(self._current)
+
+    def end_iteration(self, mydepgraph, success):
+        """
+        Finish the current iteration, recording its result, the reasons
+        for backtracking, and the hit rates of the per-depgraph caches.
+        """
+        current = self._current
+        if current is None:
+            return
+        current["seconds"] = time.monotonic() - current.pop("start")
+        current["success"] = bool(success)
+        current["need_restart"] = mydepgraph.need_restart()
+        backtrack_infos = []
+        for key, value in mydepgraph.get_backtrack_infos().items():
+            if key == "config":
+                backtrack_infos.extend(f"config:{k}" for k in value)
+            else:
+                backtrack_infos.append(key)
+        current["backtrack_infos"] = sorted(backtrack_infos)
+
+        phases = current["phases"]
+        lookups = phases["_select_pkg_highest_available"][0]
+        misses = phases["_select_pkg_highest_available_imp"][0]
+        current["caches"]["highest_pkg_cache"] = _hit_ratio(lookups - misses, misses)
+
+        cache_info = getattr(
+            mydepgraph._slot_operator_check_reverse_dependencies, "cache_info", None
+        )
+        if cache_info is not None:
+            info = cache_info()
+            current["caches"]["slot_operator_check_reverse_dependencies"] = _hit_ratio(
+                info.hits, info.misses
+            )
+        self._current = None
+
+    def record(self, key, value):
+        """
+        Record an additional top-level value, such as the state of the
+        resolver cache.
+        """
+        self._extra[key] = value
+
+    def instrument(self, mydepgraph):
+        """
+        Wrap the phase methods of a depgraph instance, accounting them to
+        the current iteration. Depgraph instances created outside of an
+        iteration are not instrumented.
+        """
+        if self._current is None:
+            return
+        phases = self._current["phases"]
+        for name in self._phases:
+            orig = getattr(mydepgraph, name)
+            wrapped = self._wrap(orig, phases[name])
+            setattr(mydepgraph, name, wrapped)
+            for alias in self._aliases:
+                if getattr(mydepgraph, alias) == orig:
+                    setattr(mydepgraph, alias, wrapped)
+
+    @staticmethod
+    def _wrap(func, stats):
+        """
+        Wrap func so that calls are counted in stats[0], and the
+        wall time of the outermost call is accumulated in stats[1],
+        while stats[2] tracks the recursion depth.
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats[0] += 1
+            if stats[2]:
+                stats[2] += 1
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    stats[2] -= 1
+            stats[2] = 1
+            start = time.monotonic()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats[1] += time.monotonic() - start
+                stats[2] = 0
+
+        if hasattr(func, "cache_info"):
+            wrapper.cache_info = func.cache_info
+        return wrapper
+
+    def as_dict(self):
+        iterations = []
+        totals = {name: {"calls": 0, "seconds": 0.0} for name in self._phases}
+        for iteration in self._iterations:
+            iteration = dict(iteration)
+            iteration.pop("start", None)
+            phases = {}
+            for name, (calls, seconds, _depth) in iteration["phases"].items():
+                phases[name] = {"calls": calls, "seconds": round(seconds, 6)}
+                totals[name]["calls"] += calls
+                totals[name]["seconds"] += seconds
+            iteration["phases"] = phases
+            if "seconds" in iteration:
+                iteration["seconds"] = round(iteration["seconds"], 6)
+            iterations.append(iteration)
+
+        for stats in totals.values():
+            stats["seconds"] = round(stats["seconds"], 6)
+
+        profile = {
+            "seconds": round(time.monotonic() - self._start, 6),
+            "iterations": iterations,
+            "phases": totals,
+            "lru_caches": {
+                name: _hit_ratio(info.hits, info.misses)
+                for name, info in get_lru_cache_info().items()
+            },
+        }
+        profile.update(self._extra)
+        return profile
+
+    def dump(self):
+        """
+        Print the profile as JSON, or write it to the file named by
+        PORTAGE_RESOLVER_PROFILE.
+        """
+        profile = json.dumps(self.as_dict(), indent=2, sort_keys=True)
+        if self._output == "1":
+            print("Corepkg resolver profile")
+            print(profile)
+            return
+        try:
+            with open(self._output, mode="w", encoding="utf_8") as f:
+                f.write(profile + "\n")
+        except OSError as e:
+            writemsg(
+                f"!!! Unable to write resolver profile '{self._output}': {e}\n",
+                noiselevel=-1,
+            )
+
+
+def _hit_ratio(hits, misses):
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0,
+    }
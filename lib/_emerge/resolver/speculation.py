@@ -0,0 +1,172 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import io
+import pickle
+
+from corepkg.dbapi import dbapi
+from corepkg.package.ebuild.config import config
+from corepkg.util.futures.executor.fork import ForkExecutor
+from _emerge.Package import Package
+from _emerge.RootConfig import RootConfig
+
+
+class BacktrackOutcome:
+    """
+    The result of a backtracking attempt that was evaluated in a forked
+    process. Package instances in backtrack_infos are transferred by
+    reference. Successful attempts are evaluated again by the parent
+    process, so that the resulting depgraph is complete.
+    """
+
+    __slots__ = (
+        "backtrack_infos",
+        "need_config_change",
+        "need_restart",
+        "success",
+    )
+
+    def __init__(
+        self,
+        success=False,
+        need_config_change=False,
+        need_restart=False,
+        backtrack_infos=None,
+    ):
+        self.success = success
+        self.need_config_change = need_config_change
+        self.need_restart = need_restart
+        self.backtrack_infos = backtrack_infos
+
+
+class _OutcomePickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        if isinstance(obj, Package):
+            return ("pkg", obj._hash_key, obj.installed, obj.onlydeps)
+        if isinstance(obj, RootConfig):
+            return ("root_config", obj.root)
+        if isinstance(obj, (config, dbapi)):
+            # These are shared with the parent process, and must never
+            # be copied.
+            raise pickle.PicklingError(f"{obj.__class__.__name__} is not transferable")
+        return None
+
+
+class _OutcomeUnpickler(pickle.Unpickler):
+    def __init__(self, file, load_pkg, roots):
+        pickle.Unpickler.__init__(self, file)
+        self._load_pkg = load_pkg
+        self._roots = roots
+
+    def persistent_load(self, pid):
+        if pid[0] == "pkg":
+            return self._load_pkg(*pid[1:])
+        if pid[0] == "root_config":
+            return self._roots[pid[1]]
+        raise pickle.UnpicklingError(f"unsupported persistent id: {pid[0]}")
+
+
+def dumps_outcome(outcome):
+    """
+    Serialize a BacktrackOutcome in a forked process.
+
+    @rtype: bytes or None
+    @return: the serialized outcome, or None if it is not transferable
+    """
+    f = io.BytesIO()
+    try:
+        _OutcomePickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(outcome)
+    except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+        return None
+    return f.getvalue()
+
+
+def loads_outcome(data, load_pkg, roots):
+    """
+    Deserialize a BacktrackOutcome in the parent process.
+
+    @param load_pkg: called with the hash key, installed and onlydeps
+            attributes of a Package, and returns an equal instance, or
+            raises an exception if there is none
+    @type load_pkg: callable
+    @param roots: maps root to RootConfig
+    @type roots: dict
+    @rtype: BacktrackOutcome or None
+    @return: the outcome, or None if it can not be deserialized
+    """
+    try:
+        return _OutcomeUnpickler(io.BytesIO(data), load_pkg, roots).load()
+    except Exception:
+        return None
+
+
+class BacktrackSpeculation:
+    """
+    Evaluate the backtracking attempts that a Backtracker is going to
+    return next in forked processes, so that they run in parallel while
+    the parent process consumes their outcomes in the same deterministic
+    order as sequential backtracking would. Forked processes share the
+    frozen depgraph config of the parent via copy-on-write memory.
+    """
+
+    def __init__(self, evaluate, max_jobs, loop):
+        """
+        @param evaluate: called in a forked process with a
+                BacktrackParameter, and returns a serialized
+                BacktrackOutcome, or None
+        @type evaluate: callable
+        @param max_jobs: maximum number of concurrent forked processes
+        @type max_jobs: int
+        """
+        self._evaluate = evaluate
+        self._max_jobs = max_jobs
+        self._loop = loop
+        self._executor = ForkExecutor(max_workers=max_jobs, loop=loop)
+        self._pending = []
+
+    def schedule(self, parameters):
+        """
+        Start evaluating the given backtrack parameters, in order, up to
+        max_jobs of them. Pending evaluations of other parameters are
+        cancelled, since feedback has moved them further away.
+        """
+        parameters = parameters[: self._max_jobs]
+        pending = []
+        for parameter, future in self._pending:
+            if any(parameter == x for x in parameters):
+                pending.append((parameter, future))
+            else:
+                future.cancel()
+        for parameter in parameters:
+            if not any(parameter == x for x, _future in pending):
+                pending.append(
+                    (parameter, self._executor.submit(self._evaluate, parameter))
+                )
+        self._pending = pending
+
+    def take(self, parameter):
+        """
+        Wait for the evaluation of the given backtrack parameter.
+
+        @rtype: bytes or None
+        @return: the serialized outcome, or None if the parameter was not
+                scheduled or its evaluation failed
+        """
+        for i, (pending, future) in enumerate(self._pending):
+            if pending == parameter:
+                del self._pending[i]
+                try:
+                    return self._loop.run_until_complete(future)
+                except Exception:
+                    return None
+        return None
+
+    def shutdown(self):
+        """
+        Cancel all pending evaluations, and wait for the forked processes
+        to exit.
+        """
+        for _parameter, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
@@ -10,6 +10,7 @@ from corepkg import os
 from corepkg.package.ebuild.fetch import MirrorLayoutConfig
 from corepkg.util import grabdict, grablines
 from .ContentDB import ContentDB
+from .SqliteDB import SqliteDB
 
 logger = logging.getLogger(__name__)
 
@@ -65,21 +66,23 @@ class Config:
 
         self.recycle_db = None
         if getattr(options, "recycle_db", None) is not None:
-            self.recycle_db = self._open_shelve(options.recycle_db, "recycle")
+            self.recycle_db = self._open_db(options.recycle_db, "recycle")
 
         self.distfiles_db = None
         if getattr(options, "distfiles_db", None) is not None:
-            self.distfiles_db = self._open_shelve(options.distfiles_db, "distfiles")
+            self.distfiles_db = self._open_db(options.distfiles_db, "distfiles")
 
         self.content_db = None
         if getattr(options, "content_db", None) is not None:
-            self.content_db = ContentDB(
-                self._open_shelve(options.content_db, "content")
-            )
+            self.content_db = ContentDB(self._open_db(options.content_db, "content"))
 
         self.deletion_db = None
         if getattr(options, "deletion_db", None) is not None:
-            self.deletion_db = self._open_shelve(options.deletion_db, "deletion")
+            self.deletion_db = self._open_db(options.deletion_db, "deletion")
+
+        self.incremental_db = None
+        if getattr(options, "incremental_db", None) is not None:
+            self.incremental_db = self._open_db(options.incremental_db, "incremental")
 
         self.layout_conf = MirrorLayoutConfig()
         if getattr(options, "layout_conf", None) is None:
@@ -111,7 +114,7 @@ class Config:
         def __call__(self, msg):
             self._log_func(self._line_format % (msg,))
 
-    def _open_shelve(self, db_file, db_desc):
+    def _open_db(self, db_file, db_desc):
         dry_run = getattr(self.options, "dry_run", False)
         if dry_run:
             open_flag = "r"
@@ -120,6 +123,8 @@ class Config:
 
         if dry_run and not os.path.exists(db_file):
             db = {}
+        elif getattr(self.options, "db_backend", None) == "sqlite":
+            db = SqliteDB(db_file, readonly=dry_run)
         else:
             try:
                 db = shelve.open(db_file, flag=open_flag)
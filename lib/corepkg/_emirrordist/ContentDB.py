@@ -3,7 +3,6 @@
 
 import logging
 import operator
-import shelve
 import typing
 
 from corepkg.package.ebuild.fetch import DistfileName
@@ -23,9 +22,11 @@ class ContentDB:
     value associated with a distfile key is a set of content revisions.
     Each content revision is expressed as a dictionary of digests which
     is suitable for construction of a DistfileName instance.
+
+    The values are stored in a shelve.Shelf or in an SqliteDB.
     """
 
-    def __init__(self, shelve_instance: shelve.Shelf):
+    def __init__(self, shelve_instance: typing.MutableMapping):
         self._shelve = shelve_instance
 
     def add(self, filename: DistfileName):
@@ -1,6 +1,8 @@
 # Copyright 2013-2024 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
+import hashlib
+import logging
 import threading
 
 from corepkg import os
@@ -19,11 +21,30 @@ from corepkg.util.futures.iter_completed import iter_gather
 from .FetchTask import FetchTask
 from _emerge.CompositeTask import CompositeTask
 
+logger = logging.getLogger(__name__)
+
 
 class FetchIterator:
+    """
+    Yields _EbuildFetchTasks for every ebuild in the repository.
+
+    If the config has an incremental db, then packages whose ebuilds and
+    Manifest have not changed since a previous run without failures are
+    skipped, and the owners of their files are restored from the db, so
+    that they are not deleted. All packages are processed by a full
+    reconciliation, which is performed if the eclasses or other global
+    inputs have changed, or if the previous full reconciliation is older
+    than the --full-reconcile-interval option.
+    """
+
     def __init__(self, config):
         self._config = config
         self._terminated = threading.Event()
+        self._complete = False
+        self._full = True
+        self._global_signature = None
+        self._processed = {}
+        self._seen = set()
 
     def terminate(self):
         """
@@ -44,18 +65,115 @@ class FetchIterator:
         for category in sorted(self._config.portdb.categories):
             yield from cp_all(categories=(category,))
 
+    @staticmethod
+    def _signature(paths):
+        """
+        Return a digest of the names, sizes and mtimes of the given files.
+        """
+        h = hashlib.sha1()
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def _list_dir(path, predicate):
+        try:
+            return sorted(
+                os.path.join(path, name) for name in os.listdir(path) if predicate(name)
+            )
+        except OSError:
+            return []
+
+    def _cp_signature(self, cp):
+        paths = []
+        for tree in self._config.portdb.porttrees:
+            paths.extend(
+                self._list_dir(
+                    os.path.join(tree, cp),
+                    lambda name: name == "Manifest" or name.endswith(".ebuild"),
+                )
+            )
+        return self._signature(paths)
+
+    def _calc_global_signature(self):
+        """
+        Return a digest of the inputs that may change the files of any
+        package, like eclasses, which make a full reconciliation necessary
+        when they change.
+        """
+        config = self._config
+        portdb = config.portdb
+        paths = [config.options.layout_conf]
+        for tree in portdb.porttrees:
+            repo_config = portdb.repositories.get_repo_for_location(tree)
+            for location in repo_config.eclass_locations or ():
+                paths.extend(
+                    self._list_dir(
+                        os.path.join(location, "eclass"),
+                        lambda name: name.endswith(".eclass"),
+                    )
+                )
+        h = hashlib.sha1(self._signature(paths).encode())
+        h.update(
+            repr(
+                (
+                    sorted(config.restrict_mirror_exemptions or ()),
+                    portdb.settings.get("PORTAGE_CHECKSUM_FILTER", ""),
+                )
+            ).encode()
+        )
+        return h.hexdigest()
+
+    def _init_incremental(self):
+        config = self._config
+        self._global_signature = self._calc_global_signature()
+        meta = config.incremental_db.get("global")
+        interval = getattr(config.options, "full_reconcile_interval", None)
+        self._full = (
+            getattr(config.options, "full_reconcile", False)
+            or meta is None
+            or meta["signature"] != self._global_signature
+            or (
+                interval is not None
+                and config.start_time - meta["full_time"] >= interval
+            )
+        )
+        if self._full:
+            logger.info("incremental db: full reconciliation")
+
     def __iter__(self):
-        portdb = self._config.portdb
+        config = self._config
+        portdb = config.portdb
         get_repo_for_location = portdb.repositories.get_repo_for_location
+        incremental_db = config.incremental_db
 
         hash_filter = _hash_filter(portdb.settings.get("PORTAGE_CHECKSUM_FILTER", ""))
         if hash_filter.transparent:
             hash_filter = None
 
+        if incremental_db is not None:
+            self._init_incremental()
+
         for cp in self._iter_every_cp():
             if self._terminated.is_set():
                 return
 
+            cp_state = None
+            if incremental_db is not None:
+                self._seen.add(cp)
+                signature = self._cp_signature(cp)
+                entry = None if self._full else incremental_db.get(f"cp:{cp}")
+                if entry is not None and entry["signature"] == signature:
+                    for filename, cpv in entry["files"].items():
+                        config.file_owners.setdefault(filename, cpv)
+                    continue
+                cp_state = {"failed": False, "files": {}, "signature": signature}
+                self._processed[cp] = cp_state
+
             for tree in portdb.porttrees:
                 # Reset state so the Manifest is pulled once
                 # for this cp / tree combination.
@@ -74,9 +192,56 @@ class FetchIterator:
                             digests_future,
                             cpv,
                             portdb._event_loop,
+                            cp_state=cp_state,
                         )
                     )
 
+        self._complete = True
+
+    def update_incremental_db(self):
+        """
+        Store the state of the packages that have been processed, after
+        all of their fetch tasks are done. Packages with failures are
+        removed from the db, so that they are processed again by the next
+        run. Nothing is stored if the iteration was terminated early, or
+        for --dry-run, since the db is opened in readonly mode.
+        """
+        config = self._config
+        incremental_db = config.incremental_db
+        if incremental_db is None or not self._complete:
+            return
+        if getattr(config.options, "dry_run", False):
+            logger.warning("dry-run: incremental db not updated")
+            return
+
+        failed_cps = {getattr(cpv, "cp", None) for cpv in config.file_failures.values()}
+        for cp, cp_state in self._processed.items():
+            key = f"cp:{cp}"
+            if cp_state["failed"] or cp in failed_cps:
+                incremental_db.pop(key, None)
+            else:
+                incremental_db[key] = {
+                    "files": cp_state["files"],
+                    "signature": cp_state["signature"],
+                }
+
+        for key in list(incremental_db):
+            if key.startswith("cp:") and key[len("cp:") :] not in self._seen:
+                del incremental_db[key]
+
+        meta = incremental_db.get("global")
+        full_time = config.start_time
+        if not self._full and meta is not None:
+            full_time = meta["full_time"]
+        incremental_db["global"] = {
+            "full_time": full_time,
+            "signature": self._global_signature,
+        }
+        logger.info(
+            f"incremental db: processed {len(self._processed)} "
+            f"of {len(self._seen)} packages"
+        )
+
 
 class _EbuildFetchTasks(CompositeTask):
     """
@@ -106,7 +271,9 @@ class _EbuildFetchTasks(CompositeTask):
         )
 
 
-def _async_fetch_tasks(config, hash_filter, repo_config, digests_future, cpv, loop):
+def _async_fetch_tasks(
+    config, hash_filter, repo_config, digests_future, cpv, loop, cp_state=None
+):
     """
     Asynchronously construct FetchTask instances for each of the files
     referenced by an ebuild.
@@ -124,6 +291,10 @@ def _async_fetch_tasks(config, hash_filter, repo_config, digests_future, cpv, lo
     @type cpv: corepkg.versions._pkg_str
     @param loop: event loop
     @type loop: EventLoop
+    @param cp_state: if not None, the files that are referenced by the
+            ebuild are added to its "files" dict, and "failed" is set if
+            the files of the ebuild could not be determined
+    @type cp_state: dict
     @return: A future that results in a list containing FetchTask
             instances for each of the files referenced by an ebuild.
     @rtype: asyncio.Future (or compatible)
@@ -160,6 +331,8 @@ def _async_fetch_tasks(config, hash_filter, repo_config, digests_future, cpv, lo
             (restrict,) = aux_get_result.result()
         except (CorepkgKeyError, CorepkgException) as e:
             config.log_failure(f"{cpv}\t\taux_get exception {e}")
+            if cp_state is not None:
+                cp_state["failed"] = True
             result.set_result(fetch_tasks)
             return
 
@@ -170,6 +343,8 @@ def _async_fetch_tasks(config, hash_filter, repo_config, digests_future, cpv, lo
             restrict = frozenset(use_reduce(restrict, flat=True, matchnone=True))
         except CorepkgException as e:
             config.log_failure(f"{cpv}\t\tuse_reduce exception {e}")
+            if cp_state is not None:
+                cp_state["failed"] = True
             result.set_result(fetch_tasks)
             return
 
@@ -177,6 +352,8 @@ def _async_fetch_tasks(config, hash_filter, repo_config, digests_future, cpv, lo
             uri_map = fetch_map_result.result()
         except CorepkgException as e:
             config.log_failure(f"{cpv}\t\tgetFetchMap exception {e}")
+            if cp_state is not None:
+                cp_state["failed"] = True
             result.set_result(fetch_tasks)
             return
 
@@ -254,6 +431,8 @@ def _async_fetch_tasks(config, hash_filter, repo_config, digests_future, cpv, lo
                 config.log_failure(f"{cpv}\t{filename}\tdigest entry missing")
                 config.file_failures[filename] = cpv
                 continue
+            if cp_state is not None:
+                cp_state["files"].setdefault(filename, str(cpv))
             if filename in config.file_owners:
                 continue
             config.file_owners[filename] = cpv
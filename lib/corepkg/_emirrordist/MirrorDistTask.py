@@ -42,6 +42,8 @@ class MirrorDistTask(CompositeTask):
             self._async_wait()
             return
 
+        self._fetch_iterator.update_incremental_db()
+
         if self._config.options.delete:
             deletion = TaskScheduler(
                 iter(DeletionIterator(self._config)),
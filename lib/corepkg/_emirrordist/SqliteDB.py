@@ -0,0 +1,167 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import collections.abc
+import dbm
+import logging
+import pickle
+import shelve
+
+from corepkg import os
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteDB(collections.abc.MutableMapping):
+    """
+    A persistent mapping with the same interface and value types as a
+    shelve.Shelf, which stores pickled values in an sqlite database.
+    Lookups and updates of single keys are indexed, and updates are
+    committed in batches of batch_size, using the write-ahead log, so
+    that databases with millions of keys remain fast to update. Pending
+    updates are committed by sync and close.
+    """
+
+    batch_size = 1000
+
+    _header = b"SQLite format 3\x00"
+
+    def __init__(self, filename, readonly=False):
+        import sqlite3
+
+        self._filename = filename
+        self._readonly = readonly
+        self._pending = 0
+        if readonly:
+            self._connection = sqlite3.connect(
+                f"file:{filename}?mode=ro", uri=True, isolation_level=None
+            )
+        else:
+            # Transactions are managed explicitly, so that updates are
+            # batched.
+            self._connection = sqlite3.connect(filename, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS items "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+
+    @classmethod
+    def is_sqlite(cls, filename):
+        """
+        @rtype: bool
+        @return: True if filename is an sqlite database
+        """
+        try:
+            with open(filename, "rb") as f:
+                return f.read(len(cls._header)) == cls._header
+        except OSError:
+            return False
+
+    def _write(self, sql, params):
+        if self._readonly:
+            raise OSError(f"database '{self._filename}' is readonly")
+        if not self._connection.in_transaction:
+            self._connection.execute("BEGIN")
+        cursor = self._connection.execute(sql, params)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.sync()
+        return cursor
+
+    def __getitem__(self, key):
+        row = self._connection.execute(
+            "SELECT value FROM items WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def __setitem__(self, key, value):
+        self._write(
+            "INSERT OR REPLACE INTO items VALUES (?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.DEFAULT_PROTOCOL)),
+        )
+
+    def __delitem__(self, key):
+        if not self._write("DELETE FROM items WHERE key = ?", (key,)).rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return (
+            self._connection.execute(
+                "SELECT 1 FROM items WHERE key = ?", (key,)
+            ).fetchone()
+            is not None
+        )
+
+    def __iter__(self):
+        # A list is returned, so that the mapping can be modified
+        # during iteration, like a shelve.Shelf.
+        return iter(
+            [row[0] for row in self._connection.execute("SELECT key FROM items")]
+        )
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def items(self):
+        return [
+            (key, pickle.loads(value))
+            for key, value in self._connection.execute("SELECT key, value FROM items")
+        ]
+
+    def clear(self):
+        self._write("DELETE FROM items", ())
+
+    def sync(self):
+        if self._connection.in_transaction:
+            self._connection.execute("COMMIT")
+        self._pending = 0
+
+    def close(self):
+        if self._connection is not None:
+            self.sync()
+            self._connection.close()
+            self._connection = None
+
+
+def migrate_shelve(db_file):
+    """
+    Copy a shelve database to a new sqlite database, which replaces
+    it at the same path. If a shelve file exists at that path, then it
+    is kept as db_file + ".shelve". Databases that are already sqlite
+    databases, or do not exist, are left unchanged.
+
+    @rtype: bool
+    @return: True if the database was migrated
+    """
+    if SqliteDB.is_sqlite(db_file) or not dbm.whichdb(db_file):
+        return False
+
+    tmp_file = f"{db_file}.sqlite.{os.getpid()}"
+    try:
+        with shelve.open(db_file, flag="r") as src:
+            dest = SqliteDB(tmp_file)
+            try:
+                for key in src:
+                    dest[key] = src[key]
+                dest.sync()
+                # Remove the write-ahead log, so that the database is a
+                # single file which can be renamed.
+                dest._connection.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                dest.close()
+        if os.path.exists(db_file):
+            os.rename(db_file, f"{db_file}.shelve")
+        os.rename(tmp_file, db_file)
+    except BaseException:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(tmp_file + suffix)
+            except OSError:
+                pass
+        raise
+    logger.info(f"migrated '{db_file}' to sqlite")
+    return True
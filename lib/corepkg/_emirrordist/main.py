@@ -2,6 +2,7 @@
 # Distributed under the terms of the GNU General Public License v2
 
 import argparse
+import dbm
 import logging
 import sys
 
@@ -14,6 +15,7 @@ from corepkg.util._async.SchedulerInterface import SchedulerInterface
 from corepkg.util._eventloop.global_event_loop import global_event_loop
 from .Config import Config
 from .MirrorDistTask import MirrorDistTask
+from .SqliteDB import SqliteDB, migrate_shelve
 
 
 seconds_per_day = 24 * 60 * 60
@@ -153,6 +155,33 @@ common_options = (
         "distfiles names (required for content-hash layout)",
         "metavar": "FILE",
     },
+    {
+        "longopt": "--incremental-db",
+        "help": "database file used to skip packages whose ebuilds and "
+        "Manifest have not changed since the previous run",
+        "metavar": "FILE",
+    },
+    {
+        "longopt": "--full-reconcile",
+        "help": "process all packages, regardless of --incremental-db",
+        "action": "store_true",
+    },
+    {
+        "longopt": "--full-reconcile-interval",
+        "help": "interval between runs that process all packages when "
+        "--incremental-db is used, measured in seconds (defaults to "
+        "the equivalent of 7 days)",
+        "default": 7 * seconds_per_day,
+        "metavar": "SECONDS",
+        "type": int,
+    },
+    {
+        "longopt": "--db-backend",
+        "help": "backend of the --content-db, --deletion-db, --distfiles-db, "
+        "--incremental-db and --recycle-db database files (default is shelve)",
+        "choices": ("shelve", "sqlite"),
+        "default": "shelve",
+    },
     {
         "longopt": "--recycle-dir",
         "help": "directory for extended retention of files that "
@@ -214,6 +243,11 @@ def parse_args(args):
         action="store_true",
         help="mirror distfiles for the selected repository",
     )
+    actions.add_argument(
+        "--migrate-db",
+        action="store_true",
+        help="migrate shelve database files to the sqlite backend",
+    )
 
     common = parser.add_argument_group("Common options")
     for opt_info in common_options:
@@ -453,6 +487,38 @@ def emirrordist_main(args):
         l = logging.getLogger()
         l.setLevel(l.getEffectiveLevel() - 10 * options.verbose)
 
+    if options.incremental_db is not None:
+        options.incremental_db = normalize_path(os.path.abspath(options.incremental_db))
+
+    db_files = [
+        db_file
+        for db_file in (
+            options.content_db,
+            options.deletion_db,
+            options.distfiles_db,
+            options.incremental_db,
+            options.recycle_db,
+        )
+        if db_file is not None
+    ]
+
+    if options.migrate_db:
+        if options.db_backend != "sqlite":
+            parser.error("--migrate-db requires --db-backend=sqlite")
+        if options.dry_run:
+            parser.error("--migrate-db is not supported with --dry-run")
+        for db_file in db_files:
+            migrate_shelve(db_file)
+        return os.EX_OK
+
+    if options.db_backend == "sqlite":
+        for db_file in db_files:
+            if not SqliteDB.is_sqlite(db_file) and dbm.whichdb(db_file):
+                parser.error(
+                    f"'{db_file}' is a shelve database, which has to be "
+                    "migrated with --migrate-db"
+                )
+
     with Config(options, portdb, SchedulerInterface(global_event_loop())) as config:
         if not options.mirror:
             parser.error("No action specified")
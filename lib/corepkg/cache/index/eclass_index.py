@@ -0,0 +1,126 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+
+from corepkg import _encodings, _unicode_encode, os
+from corepkg.util import atomic_ofstream, ensure_dirs
+from corepkg.versions import _pkg_str
+
+
+def eclass_index_line_format(cpv, eclasses):
+    return " ".join([cpv] + sorted(eclasses)) + "\n"
+
+
+def eclass_index_line_read(line):
+    fields = line.split()
+    if not fields:
+        return None
+    return fields[0], tuple(fields[1:])
+
+
+class EclassIndex:
+    """
+    The eclasses that are inherited by each ebuild of a repository, as
+    recorded in the _eclasses_ data of its metadata cache entries. This
+    serves as a reverse index from eclasses to the ebuilds that inherit
+    them, so that the cache entries which are affected by a set of
+    changed paths can be determined without validation of the cache
+    entries for the whole repository.
+    """
+
+    # Changes to these paths may affect the metadata of any ebuild.
+    _global_paths = frozenset(("metadata/layout.conf", "profiles/repo_name"))
+
+    def __init__(self, path):
+        self._path = path
+        self._eclasses = {}
+        self._inherited_by = None
+
+    def load(self):
+        """
+        @rtype: bool
+        @return: True if the index was loaded, or False if it does not
+                exist yet
+        """
+        self._eclasses = {}
+        self._inherited_by = None
+        try:
+            with open(
+                _unicode_encode(self._path, encoding=_encodings["fs"], errors="strict"),
+                encoding=_encodings["repo.content"],
+                errors="replace",
+            ) as f:
+                for line in f:
+                    node = eclass_index_line_read(line)
+                    if node is not None:
+                        self._eclasses[node[0]] = node[1]
+        except OSError as e:
+            if e.errno not in (errno.ENOENT, errno.ESTALE):
+                raise
+            return False
+        return True
+
+    def write(self):
+        ensure_dirs(os.path.dirname(self._path))
+        f = atomic_ofstream(self._path, encoding=_encodings["repo.content"])
+        for cpv in sorted(self._eclasses):
+            f.write(eclass_index_line_format(cpv, self._eclasses[cpv]))
+        f.close()
+
+    def __iter__(self):
+        return iter(self._eclasses)
+
+    def update(self, cpv, eclasses):
+        self._eclasses[str(cpv)] = tuple(eclasses)
+        self._inherited_by = None
+
+    def discard(self, cpv):
+        if self._eclasses.pop(str(cpv), None) is not None:
+            self._inherited_by = None
+
+    def inherited_by(self, eclass):
+        """
+        @rtype: frozenset
+        @return: the cpvs of the ebuilds that inherit the given eclass
+        """
+        if self._inherited_by is None:
+            inherited_by = {}
+            for cpv, eclasses in self._eclasses.items():
+                for name in eclasses:
+                    inherited_by.setdefault(name, set()).add(cpv)
+            self._inherited_by = inherited_by
+        return frozenset(self._inherited_by.get(eclass, ()))
+
+    def affected_cps(self, paths, categories):
+        """
+        Determine the packages whose cache entries may be affected by
+        changes to the given paths, which are relative to the repository
+        (as listed by git diff --name-only). A changed eclass affects all
+        ebuilds which inherit it, and any other changed file affects the
+        package in whose directory it is located. Only the eclasses of the
+        repository itself are considered, so a repository which inherits
+        eclasses from masters or eclass-overrides has to be updated as a
+        whole.
+
+        @param paths: changed paths
+        @type paths: iterable
+        @param categories: the categories of the repository
+        @type categories: frozenset
+        @rtype: set or None
+        @return: the affected cps, or None if the metadata of any ebuild
+                may be affected
+        """
+        cps = set()
+        for path in paths:
+            path = os.path.normpath(path)
+            if path in self._global_paths:
+                return None
+            parts = path.split(os.sep)
+            if len(parts) == 2 and parts[0] == "eclass":
+                if parts[1].endswith(".eclass"):
+                    for cpv in self.inherited_by(parts[1][: -len(".eclass")]):
+                        cps.add(_pkg_str(cpv).cp)
+            elif len(parts) > 2 and parts[0] in categories:
+                cps.add(f"{parts[0]}/{parts[1]}")
+        return cps
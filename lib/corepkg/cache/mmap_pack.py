@@ -0,0 +1,387 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import mmap
+import struct
+import sys
+import zlib
+
+from corepkg import _encodings, _unicode_encode, os
+from corepkg.cache import cache_errors
+from corepkg.cache import fs_template
+from corepkg.cache.mappings import MutableMapping
+from corepkg.exception import InvalidData
+from corepkg.util import atomic_ofstream, ensure_dirs
+from corepkg.versions import _pkg_str
+
+
+class database(fs_template.FsBased):
+    """
+    A metadata cache which is stored in a single file, so that it can be
+    distributed with a repository in place of the one file per ebuild
+    of the md5-dict format. The file is memory-mapped, and lookups only
+    decode the values of the keys which are actually accessed, so that
+    cold cache lookups do not need any open or read system calls.
+
+    The file consists of a header, the list of keys, a hash table of
+    record numbers, an array of fixed-width records which are sorted by
+    cpv, and a string table. Each record holds the offset and length of
+    the cpv in the string table, and the offset and length of the value
+    of each key. All integers are unsigned 32-bit little endian values.
+
+    Since the whole file has to be rewritten for any modification,
+    updates are kept in memory until commit() is called.
+    """
+
+    autocommits = False
+
+    _magic = b"CPKGPACK"
+    _format_version = 1
+    _header = struct.Struct("<8sIIII")
+    _absent = 0xFFFFFFFF
+
+    def __init__(self, *args, **config):
+        super().__init__(*args, **config)
+        self.location = os.path.join(
+            self.location, self.label.lstrip(os.path.sep).rstrip(os.path.sep)
+        )
+        write_keys = set(self._known_keys)
+        write_keys.add("_eclasses_")
+        write_keys.add(f"_{self.validation_chf}_")
+        self._write_keys = sorted(write_keys)
+        # Commit only when requested, rather than after each update.
+        self.sync_rate = sys.maxsize
+        self._updates = {}
+        self._mmap = None
+        self._keys = None
+        self._record = None
+        self._record_count = None
+        self._table_offset = None
+        self._table_size = None
+        self._records_offset = None
+        self._strings_offset = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The mapping is not picklable, so it is automatically
+        # recreated after unpickling.
+        state["_mmap"] = None
+        state["_keys"] = None
+        state["_record"] = None
+        return state
+
+    @classmethod
+    def _record_struct(cls, key_count):
+        return struct.Struct("<II" + "II" * key_count)
+
+    @staticmethod
+    def _hash(cpv):
+        return zlib.crc32(cpv)
+
+    def _open(self):
+        """
+        Map the cache file, and validate its header. Returns False if the
+        file does not exist or is unusable.
+        """
+        if self._mmap is not None:
+            return True
+        if self._keys is False:
+            return False
+        self._keys = False
+        try:
+            with open(
+                _unicode_encode(
+                    self.location, encoding=_encodings["fs"], errors="strict"
+                ),
+                mode="rb",
+            ) as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # ValueError is raised for an empty file.
+            if isinstance(e, OSError) and e.errno not in (
+                errno.ENOENT,
+                errno.ENOTDIR,
+                errno.EACCES,
+            ):
+                raise cache_errors.CacheCorruption(self.location, e)
+            return False
+
+        header = self._header
+        try:
+            magic, version, key_count, record_count, table_size = header.unpack_from(
+                buf
+            )
+            if magic != self._magic or version != self._format_version:
+                raise ValueError("unsupported format")
+            (keys_len,) = struct.unpack_from("<I", buf, header.size)
+            keys_offset = header.size + 4
+            keys = bytes(buf[keys_offset : keys_offset + keys_len])
+            keys = keys.decode("ascii").split("\0") if keys else []
+            if len(keys) != key_count:
+                raise ValueError("corrupt key list")
+            record = self._record_struct(key_count)
+            table_offset = keys_offset + keys_len
+            records_offset = table_offset + 4 * table_size
+            strings_offset = records_offset + record.size * record_count
+            if strings_offset > len(buf) or (
+                record_count and table_size < record_count
+            ):
+                raise ValueError("truncated")
+        except (struct.error, UnicodeDecodeError, ValueError):
+            buf.close()
+            return False
+
+        self._mmap = buf
+        self._keys = keys
+        self._record = record
+        self._record_count = record_count
+        self._table_offset = table_offset
+        self._table_size = table_size
+        self._records_offset = records_offset
+        self._strings_offset = strings_offset
+        return True
+
+    def _reset(self):
+        # Existing entries may still refer to the old mapping, so it
+        # is not closed explicitly.
+        self._mmap = None
+        self._keys = None
+
+    def _record_values(self, record_number):
+        record = self._record
+        return record.unpack_from(
+            self._mmap, self._records_offset + record.size * (record_number - 1)
+        )
+
+    def _string(self, offset, length):
+        start = self._strings_offset + offset
+        return self._mmap[start : start + length]
+
+    def _lookup(self, cpv):
+        """
+        Return the record of the given cpv, or None if it is not in the
+        file.
+        """
+        if not self._open() or not self._table_size:
+            return None
+        key = _unicode_encode(cpv, encoding=_encodings["repo.content"])
+        buf = self._mmap
+        table_size = self._table_size
+        slot = self._hash(key) % table_size
+        try:
+            for _ in range(table_size):
+                (record_number,) = struct.unpack_from(
+                    "<I", buf, self._table_offset + 4 * slot
+                )
+                if record_number == 0 or record_number > self._record_count:
+                    return None
+                values = self._record_values(record_number)
+                if self._string(values[0], values[1]) == key:
+                    return values
+                slot = (slot + 1) % table_size
+        except (struct.error, ValueError) as e:
+            raise cache_errors.CacheCorruption(cpv, e)
+        return None
+
+    def _iter_records(self):
+        if not self._open():
+            return
+        try:
+            for record_number in range(1, self._record_count + 1):
+                values = self._record_values(record_number)
+                cpv = str(
+                    self._string(values[0], values[1]),
+                    encoding=_encodings["repo.content"],
+                    errors="replace",
+                )
+                yield cpv, values
+        except (struct.error, ValueError) as e:
+            raise cache_errors.CacheCorruption(self.location, e)
+
+    def _fields(self, values):
+        strings_offset = self._strings_offset
+        absent = self._absent
+        return {
+            k: (strings_offset + offset, length)
+            for k, offset, length in zip(self._keys, values[2::2], values[3::2])
+            if length != absent
+        }
+
+    def _getitem(self, cpv):
+        try:
+            values = self._updates[cpv]
+        except KeyError:
+            pass
+        else:
+            if values is None:
+                raise KeyError(cpv)
+            return dict(values)
+
+        values = self._lookup(cpv)
+        if values is None:
+            raise KeyError(cpv)
+        return _LazyEntry(self._mmap, self._fields(values))
+
+    def _setitem(self, cpv, values):
+        entry = {}
+        for k in self._write_keys:
+            v = values.get(k)
+            if v:
+                entry[k] = v
+        self._updates[cpv] = entry
+
+    def _delitem(self, cpv):
+        if cpv not in self:
+            raise KeyError(cpv)
+        self._updates[cpv] = None
+
+    def __contains__(self, cpv):
+        try:
+            return self._updates[cpv] is not None
+        except KeyError:
+            return self._lookup(cpv) is not None
+
+    def __iter__(self):
+        updates = self._updates
+        cpvs = [cpv for cpv, _values in self._iter_records() if cpv not in updates]
+        cpvs.extend(cpv for cpv, values in updates.items() if values is not None)
+        for cpv in cpvs:
+            try:
+                yield _pkg_str(cpv)
+            except InvalidData:
+                continue
+
+    def commit(self):
+        """
+        Write the cache file, including all updates, and replace the
+        existing file atomically.
+        """
+        if not self._updates:
+            return
+        entries = {}
+        for cpv, values in self._iter_records():
+            if cpv not in self._updates:
+                entries[cpv] = _LazyEntry(self._mmap, self._fields(values))
+        for cpv, values in self._updates.items():
+            if values is not None:
+                entries[cpv] = values
+
+        try:
+            ensure_dirs(os.path.dirname(self.location))
+            self._write(self.location, entries)
+        except (OSError, InvalidData) as e:
+            raise cache_errors.CacheCorruption(self.location, e)
+        self._ensure_access(self.location)
+        self._updates = {}
+        self._reset()
+
+    @classmethod
+    def _write(cls, filename, entries):
+        keys = set()
+        for metadata in entries.values():
+            keys.update(metadata)
+        keys = sorted(keys)
+
+        strings = bytearray()
+        string_offsets = {}
+
+        def add_string(s):
+            data = _unicode_encode(
+                s, encoding=_encodings["repo.content"], errors="backslashreplace"
+            )
+            offset = string_offsets.get(data)
+            if offset is None:
+                offset = len(strings)
+                string_offsets[data] = offset
+                strings.extend(data)
+            return offset, len(data)
+
+        record = cls._record_struct(len(keys))
+        records = bytearray()
+        table_size = max(1, 2 * len(entries))
+        table = [0] * table_size
+        for record_number, cpv in enumerate(sorted(entries), 1):
+            metadata = entries[cpv]
+            cpv_offset, cpv_len = add_string(cpv)
+            fields = [cpv_offset, cpv_len]
+            for k in keys:
+                v = metadata.get(k)
+                if v is None:
+                    fields.extend((0, cls._absent))
+                else:
+                    fields.extend(add_string(v))
+            records.extend(record.pack(*fields))
+            slot = cls._hash(bytes(strings[cpv_offset : cpv_offset + cpv_len]))
+            slot %= table_size
+            while table[slot]:
+                slot = (slot + 1) % table_size
+            table[slot] = record_number
+
+        key_list = "\0".join(keys).encode("ascii")
+        with atomic_ofstream(filename, "wb") as f:
+            f.write(
+                cls._header.pack(
+                    cls._magic,
+                    cls._format_version,
+                    len(keys),
+                    len(entries),
+                    table_size,
+                )
+            )
+            f.write(struct.pack("<I", len(key_list)))
+            f.write(key_list)
+            f.write(struct.pack(f"<{table_size}I", *table))
+            f.write(records)
+            f.write(strings)
+
+
+class _LazyEntry(MutableMapping):
+    """
+    A cache entry which decodes each value from the mapped file when it
+    is accessed for the first time.
+    """
+
+    __slots__ = ("_buf", "_data", "_fields")
+
+    def __init__(self, buf, fields):
+        self._buf = buf
+        self._data = {}
+        self._fields = fields
+
+    def __getitem__(self, key):
+        try:
+            return self._data[key]
+        except KeyError:
+            start, length = self._fields.pop(key)
+        value = str(
+            self._buf[start : start + length],
+            encoding=_encodings["repo.content"],
+            errors="replace",
+        )
+        self._data[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._fields.pop(key, None)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        if self._fields.pop(key, None) is None:
+            del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data or key in self._fields
+
+    def __iter__(self):
+        return iter(list(self._data) + list(self._fields))
+
+    def __len__(self):
+        return len(self._data) + len(self._fields)
+
+    keys = __iter__
+
+
+class md5_database(database):
+    validation_chf = "md5"
+    store_eclass_paths = False
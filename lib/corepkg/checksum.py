@@ -3,6 +3,7 @@
 # Distributed under the terms of the GNU General Public License v2
 # pylint: disable=ungrouped-imports
 
+import contextlib
 import errno
 import functools
 import hashlib
@@ -74,6 +75,14 @@ class _generate_hash_function:
         checksum.update(data)
         return checksum.hexdigest()
 
+    def new(self):
+        """
+        Create a new hash object, for incremental hashing.
+
+        @return: An object with update and hexdigest methods
+        """
+        return self._hashobject()
+
     def checksum_file(self, filename):
         """
         Run a checksum against a file.
@@ -197,6 +206,56 @@ def is_prelinkable_elf(filename):
     )  # 2=ET_EXEC, 3=ET_DYN
 
 
+# Reads of this size amortize the per-call overhead of feeding several
+# hash objects, each of which releases the GIL for the whole block.
+_MULTI_HASHING_BLOCKSIZE = 1024 * 1024
+
+
+def _checksum_file_multi(filename, hashnames):
+    """
+    Run several checksums against a file in a single pass, feeding each
+    block that is read to all hash objects.
+
+    @rtype: dict
+    @return: The hex digest for each hash name, and the size for "size"
+    """
+    hash_objects = []
+    for hashname in hashnames:
+        if hashname != "size":
+            hash_objects.append(
+                (
+                    hashname,
+                    hashfunc_map[hashname].new(),
+                    hashorigin_map.get(hashname) == "hashlib",
+                )
+            )
+    buf = bytearray(_MULTI_HASHING_BLOCKSIZE)
+    view = memoryview(buf)
+    size = 0
+    with _open_file(filename) as f:
+        while True:
+            length = f.readinto(buf)
+            if not length:
+                break
+            size += length
+            data = view[:length]
+            block = None
+            for _hashname, checksum, buffer_protocol in hash_objects:
+                if buffer_protocol:
+                    checksum.update(data)
+                else:
+                    # Other implementations may not accept memoryview.
+                    if block is None:
+                        block = bytes(data)
+                    checksum.update(block)
+
+    digests = {hashname: checksum.hexdigest() for hashname, checksum, _ in hash_objects}
+    return {
+        hashname: size if hashname == "size" else digests[hashname]
+        for hashname in hashnames
+    }
+
+
 def perform_md5(x, calc_prelink=0):
     return perform_checksum(x, "MD5", calc_prelink)[0]
 
@@ -208,8 +267,7 @@ def _perform_md5_merge(x, **kwargs):
 
 
 def perform_all(x, calc_prelink=0):
-    mydict = {k: perform_checksum(x, k, calc_prelink)[0] for k in hashfunc_keys}
-    return mydict
+    return perform_checksums(x, hashfunc_keys, calc_prelink)
 
 
 def get_valid_checksum_keys():
@@ -348,44 +406,35 @@ def verify_all(filename, mydict, calc_prelink=0, strict=0):
         got = " ".join(got)
         return False, (_("Insufficient data for checksum verification"), got, expected)
 
-    for x in sorted(mydict):
-        if x == "size":
-            continue
-        elif x in hashfunc_keys:
-            myhash = perform_checksum(filename, x, calc_prelink=calc_prelink)[0]
-            if mydict[x] != myhash:
-                if strict:
-                    raise corepkg.exception.DigestException(
-                        f"Failed to verify '{filename}' on checksum type '{x}'"
-                    )
-                else:
-                    file_is_ok = False
-                    reason = (f"Failed on {x} verification", myhash, mydict[x])
-                    break
+    # All hashes are computed in a single pass, and compared in sorted
+    # order, so that the first mismatch is reported.
+    verifiable_hash_types = sorted(verifiable_hash_types)
+    digests = perform_checksums(
+        filename, verifiable_hash_types, calc_prelink=calc_prelink
+    )
+    for x in verifiable_hash_types:
+        myhash = digests[x]
+        if mydict[x] != myhash:
+            if strict:
+                raise corepkg.exception.DigestException(
+                    f"Failed to verify '{filename}' on checksum type '{x}'"
+                )
+            else:
+                file_is_ok = False
+                reason = (f"Failed on {x} verification", myhash, mydict[x])
+                break
 
     return file_is_ok, reason
 
 
-def perform_checksum(filename, hashname="MD5", calc_prelink=0):
+@contextlib.contextmanager
+def _checksum_target(filename, calc_prelink):
     """
-    Run a specific checksum against a file. The filename can
-    be either unicode or an encoded byte string. If filename
-    is unicode then a UnicodeDecodeError will be raised if
-    necessary.
-
-    @param filename: File to run the checksum against
-    @type filename: String
-    @param hashname: The type of hash function to run
-    @type hashname: String
-    @param calc_prelink: Whether or not to reverse prelink before running the checksum
-    @type calc_prelink: Integer
-    @rtype: Tuple
-    @return: The hash and size of the data
+    Yield the name of the file to checksum, which is a temporary file
+    with prelinking reverted if calc_prelink is enabled and the file is
+    a prelinked ELF, and convert errors to corepkg exceptions.
     """
     global prelink_capable
-    # Make sure filename is encoded with the correct encoding before
-    # it is passed to spawn (for prelink) and/or the hash function.
-    filename = _unicode_encode(filename, encoding=_encodings["fs"], errors="strict")
     myfilename = filename
     prelink_tmpfile = None
     try:
@@ -406,18 +455,13 @@ def perform_checksum(filename, hashname="MD5", calc_prelink=0):
                 # This happens during uninstallation of prelink.
                 prelink_capable = False
         try:
-            if hashname not in hashfunc_keys:
-                raise corepkg.exception.DigestException(
-                    f"{hashname} hash function not available (needs dev-python/pycrypto)"
-                )
-            myhash, mysize = hashfunc_map[hashname].checksum_file(myfilename)
+            yield myfilename
         except OSError as e:
             if e.errno in (errno.ENOENT, errno.ESTALE):
                 raise corepkg.exception.FileNotFound(myfilename)
             elif e.errno == corepkg.exception.PermissionDenied.errno:
                 raise corepkg.exception.PermissionDenied(myfilename)
             raise
-        return myhash, mysize
     finally:
         if prelink_tmpfile:
             try:
@@ -428,6 +472,60 @@ def perform_checksum(filename, hashname="MD5", calc_prelink=0):
                 del e
 
 
+def perform_checksum(filename, hashname="MD5", calc_prelink=0):
+    """
+    Run a specific checksum against a file. The filename can
+    be either unicode or an encoded byte string. If filename
+    is unicode then a UnicodeDecodeError will be raised if
+    necessary.
+
+    @param filename: File to run the checksum against
+    @type filename: String
+    @param hashname: The type of hash function to run
+    @type hashname: String
+    @param calc_prelink: Whether or not to reverse prelink before running the checksum
+    @type calc_prelink: Integer
+    @rtype: Tuple
+    @return: The hash and size of the data
+    """
+    # Make sure filename is encoded with the correct encoding before
+    # it is passed to spawn (for prelink) and/or the hash function.
+    filename = _unicode_encode(filename, encoding=_encodings["fs"], errors="strict")
+    with _checksum_target(filename, calc_prelink) as myfilename:
+        if hashname not in hashfunc_keys:
+            raise corepkg.exception.DigestException(
+                f"{hashname} hash function not available (needs dev-python/pycrypto)"
+            )
+        return hashfunc_map[hashname].checksum_file(myfilename)
+
+
+def perform_checksums(filename, hashes, calc_prelink=0):
+    """
+    Run a group of checksums against a file, reading it only once,
+    regardless of the number of checksums.
+
+    @param filename: File to run the checksums against
+    @type filename: String
+    @param hashes: The types of hash functions to run, which may include
+            "size"
+    @type hashes: Iterable
+    @param calc_prelink: Whether or not to reverse prelink before running the checksum
+    @type calc_prelink: Integer
+    @rtype: Dict
+    @return: The hash (hex-digest) for each given hash type, and the size
+            of the data for "size"
+    """
+    hashes = list(hashes)
+    for x in hashes:
+        if x not in hashfunc_keys:
+            raise corepkg.exception.DigestException(
+                f"{x} hash function not available (needs dev-python/pycrypto)"
+            )
+    filename = _unicode_encode(filename, encoding=_encodings["fs"], errors="strict")
+    with _checksum_target(filename, calc_prelink) as myfilename:
+        return _checksum_file_multi(myfilename, hashes)
+
+
 def perform_multiple_checksums(filename, hashes=["MD5"], calc_prelink=0):
     """
     Run a group of checksums against a file.
@@ -443,14 +541,7 @@ def perform_multiple_checksums(filename, hashes=["MD5"], calc_prelink=0):
             return_value[hash_name] = (hash_result,size)
             for each given checksum
     """
-    rVal = {}
-    for x in hashes:
-        if x not in hashfunc_keys:
-            raise corepkg.exception.DigestException(
-                f"{x} hash function not available (needs dev-python/pycrypto)"
-            )
-        rVal[x] = perform_checksum(filename, x, calc_prelink)[0]
-    return rVal
+    return perform_checksums(filename, hashes, calc_prelink)
 
 
 def checksum_str(data, hashname="MD5"):
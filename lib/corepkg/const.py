@@ -157,6 +157,7 @@ EBUILD_PHASES = (
 )
 SUPPORTED_FEATURES = frozenset(
     (
+        "adaptive-mirrors",
         "assume-digests",
         "binpkg-docompress",
         "binpkg-dostrip",
@@ -177,10 +178,13 @@ SUPPORTED_FEATURES = frozenset(
         "compress-build-logs",
         "compressdebug",
         "compress-index",
+        "compress-index-zstd",
         "config-protect-if-modified",
         "dedupdebug",
+        "delta-index",
         "digest",
         "distcc",
+        "distfile-digest-cache",
         "distlocks",
         "downgrade-backup",
         "ebuild-locks",
@@ -201,9 +205,11 @@ SUPPORTED_FEATURES = frozenset(
         "merge-sync",
         "merge-wait",
         "metadata-transfer",
+        "metadata-workers",
         "mirror",
         "mount-sandbox",
         "multilib-strict",
+        "native-fetch",
         "network-sandbox",
         "network-sandbox-proxy",
         "news",
@@ -0,0 +1,295 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import ItemsView, MutableMapping
+
+from corepkg import os
+
+
+class CompactContents(MutableMapping):
+    """
+    A mapping of CONTENTS entries, with the same keys, values and order
+    as the dict that dblink.getcontents() used to return, but with a more
+    compact representation for packages that install many files.
+
+    Each directory path is only stored once, and lookups are a binary
+    search in the base names of a directory, which are indexed in sorted
+    order. The entry type, mtime, and md5 digest are stored in arrays,
+    and value tuples are created when they are accessed. Entries that can
+    not be represented exactly in this way, such as an mtime that is not
+    a canonical integer, are stored as they are.
+
+    The mapping can be modified like a dict, in which case the entries
+    are copied to a dict first, since they may be shared with other
+    mappings that were created by share().
+    """
+
+    __slots__ = (
+        "_dict",
+        "_dir_ids",
+        "_dir_rows",
+        "_dir_start",
+        "_extra",
+        "_md5s",
+        "_mtimes",
+        "_names",
+        "_prefixes",
+        "_row_dirs",
+        "_sorted_names",
+        "_targets",
+        "_types",
+    )
+
+    _type_names = ("dir", "obj", "sym", "dev", "fif")
+    _type_codes = {name: code for code, name in enumerate(_type_names)}
+    _type_tuples = tuple((name,) for name in _type_names)
+    _md5_size = 16
+
+    def __init__(self, items=()):
+        """
+        @param items: (path, data) tuples, where paths are normalized
+                absolute paths, and later entries replace earlier entries
+                with the same path, like dict.update()
+        @type items: iterable
+        """
+        entries = {}
+        for path, data in items:
+            entries[path] = data
+
+        self._dict = None
+        self._dir_ids = {}
+        self._prefixes = []
+        self._row_dirs = array("I")
+        self._names = []
+        self._types = bytearray()
+        self._mtimes = array("q")
+        self._md5s = bytearray()
+        self._targets = {}
+        self._extra = {}
+        dir_rows = []
+        md5_padding = bytes(self._md5_size)
+        for row, (path, data) in enumerate(entries.items()):
+            dir_path, name = os.path.split(path)
+            dir_id = self._dir_ids.get(dir_path)
+            if dir_id is None:
+                dir_id = len(self._prefixes)
+                dir_path = sys.intern(dir_path)
+                self._dir_ids[dir_path] = dir_id
+                self._prefixes.append(
+                    dir_path if dir_path.endswith(os.sep) else dir_path + os.sep
+                )
+                dir_rows.append([])
+            dir_rows[dir_id].append(row)
+            self._row_dirs.append(dir_id)
+            self._names.append(name)
+            mtime = 0
+            md5 = md5_padding
+            code = self._type_codes.get(data[0]) if data else None
+            if code is None:
+                self._extra[row] = data
+                code = 0
+            elif data[0] in ("obj", "sym"):
+                if (
+                    len(data) != 3
+                    or not data[1].isdigit()
+                    or str(int(data[1])) != data[1]
+                ):
+                    self._extra[row] = data
+                elif data[0] == "sym":
+                    mtime = int(data[1])
+                    self._targets[row] = data[2]
+                else:
+                    try:
+                        md5 = bytes.fromhex(data[2])
+                    except ValueError:
+                        md5 = None
+                    if (
+                        md5 is None
+                        or len(md5) != self._md5_size
+                        or md5.hex() != data[2]
+                    ):
+                        self._extra[row] = data
+                        md5 = md5_padding
+                    else:
+                        mtime = int(data[1])
+            elif len(data) != 1:
+                self._extra[row] = data
+            self._types.append(code)
+            self._mtimes.append(mtime)
+            self._md5s.extend(md5)
+
+        # The rows of each directory, sorted by base name, so that they
+        # can be searched with bisect.
+        self._dir_start = array("I", [0])
+        self._dir_rows = array("I")
+        for rows in dir_rows:
+            rows.sort(key=self._names.__getitem__)
+            self._dir_rows.extend(rows)
+            self._dir_start.append(len(self._dir_rows))
+        self._sorted_names = [self._names[row] for row in self._dir_rows]
+
+    def share(self):
+        """
+        Return a new mapping with the same entries, which shares the
+        representation of the entries with this one, until either of
+        them is modified.
+
+        @rtype: CompactContents
+        """
+        if self._dict is not None:
+            other = CompactContents()
+            other._dict = self._dict.copy()
+            return other
+        other = CompactContents.__new__(CompactContents)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def _row(self, path):
+        if not isinstance(path, str):
+            return -1
+        dir_path, name = os.path.split(path)
+        dir_id = self._dir_ids.get(dir_path)
+        if dir_id is None:
+            return -1
+        hi = self._dir_start[dir_id + 1]
+        i = bisect_left(self._sorted_names, name, self._dir_start[dir_id], hi)
+        if i < hi and self._sorted_names[i] == name:
+            return self._dir_rows[i]
+        return -1
+
+    def _data(self, row):
+        data = self._extra.get(row)
+        if data is not None:
+            return data
+        code = self._types[row]
+        if code == 1:
+            offset = row * self._md5_size
+            return (
+                "obj",
+                str(self._mtimes[row]),
+                self._md5s[offset : offset + self._md5_size].hex(),
+            )
+        if code == 2:
+            return ("sym", str(self._mtimes[row]), self._targets[row])
+        return self._type_tuples[code]
+
+    def _mutable(self):
+        """
+        Copy the entries to a dict, which is modified instead of the
+        compact representation, since that may be shared.
+        """
+        if self._dict is None:
+            self._dict = dict(self.items())
+            self._dir_ids = {}
+            self._dir_rows = self._dir_start = self._row_dirs = array("I")
+            self._extra = {}
+            self._md5s = self._types = bytearray()
+            self._mtimes = array("q")
+            self._names = []
+            self._prefixes = []
+            self._sorted_names = []
+            self._targets = {}
+        return self._dict
+
+    def __getitem__(self, path):
+        if self._dict is not None:
+            return self._dict[path]
+        row = self._row(path)
+        if row < 0:
+            raise KeyError(path)
+        return self._data(row)
+
+    def __setitem__(self, path, data):
+        self._mutable()[path] = data
+
+    def __delitem__(self, path):
+        del self._mutable()[path]
+
+    def __contains__(self, path):
+        if self._dict is not None:
+            return path in self._dict
+        return self._row(path) >= 0
+
+    def __len__(self):
+        if self._dict is not None:
+            return len(self._dict)
+        return len(self._names)
+
+    def _iter_rows(self):
+        names = self._names
+        prefixes = self._prefixes
+        for row, dir_id in enumerate(self._row_dirs):
+            yield row, prefixes[dir_id] + names[row]
+
+    def __iter__(self):
+        if self._dict is not None:
+            yield from self._dict
+            return
+        for _row, path in self._iter_rows():
+            yield path
+
+    def items(self):
+        if self._dict is not None:
+            return self._dict.items()
+        return _CompactContentsItems(self)
+
+    def copy(self):
+        """
+        @rtype: dict
+        @return: a copy of the entries
+        """
+        if self._dict is not None:
+            return self._dict.copy()
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.copy()!r})"
+
+
+class _CompactContentsItems(ItemsView):
+    def __iter__(self):
+        contents = self._mapping
+        for row, path in contents._iter_rows():
+            yield path, contents._data(row)
+
+
+class ContentsCache:
+    """
+    A least recently used cache of parsed CONTENTS, which is shared by
+    all dblink instances, so that CONTENTS files are not parsed again by
+    short-lived dblink instances. Keys must identify the file and its
+    state, for example by inode, size and mtime, since entries are never
+    invalidated. The cache is bounded by the total number of entries.
+    """
+
+    def __init__(self, max_entries):
+        self._max_entries = max_entries
+        self._cache = OrderedDict()
+        self._entries = 0
+
+    def get(self, key):
+        contents = self._cache.get(key)
+        if contents is not None:
+            self._cache.move_to_end(key)
+        return contents
+
+    def add(self, key, contents):
+        if len(contents) > self._max_entries:
+            return
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._entries -= len(old)
+        self._cache[key] = contents
+        self._entries += len(contents)
+        while self._entries > self._max_entries:
+            _key, old = self._cache.popitem(last=False)
+            self._entries -= len(old)
+
+    def clear(self):
+        self._cache.clear()
+        self._entries = 0
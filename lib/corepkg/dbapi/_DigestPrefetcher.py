@@ -0,0 +1,128 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import stat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from corepkg import os
+
+
+class DigestPrefetcher:
+    """
+    Compute digests of regular files in a bounded pool of threads, ahead
+    of a loop that consumes them in a known order, such as the merge and
+    unmerge loops of dblink. Hashing releases the GIL, so that reading
+    and hashing of files overlaps with the work of the loop.
+
+    A digest is only used if the file still has the same identity that
+    it had when it was hashed, which is verified by comparing the stat
+    result of the consumer with the one of the prefetching thread.
+    Otherwise, get() returns None, and the consumer has to compute the
+    digest itself, so that results are the same as without prefetching.
+    """
+
+    # Do not bother with threads for a small number of files.
+    min_files = 16
+
+    def __init__(self, paths, digest, max_workers=None, window=None):
+        """
+        @param paths: paths of files to hash, in the order in which they
+                are going to be passed to get()
+        @type paths: list
+        @param digest: called with a path, and returns its digest
+        @type digest: callable
+        @param max_workers: maximum number of threads
+        @type max_workers: int
+        @param window: maximum number of files that are hashed or queued
+                ahead of the consumer
+        @type window: int
+        """
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        if window is None:
+            window = 8 * max_workers
+        self._paths = paths
+        self._index = {path: i for i, path in enumerate(paths)}
+        self._digest = digest
+        self._window = window
+        self._next = 0
+        self._queue = deque()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    @classmethod
+    def create(cls, paths, digest, **kwargs):
+        """
+        @rtype: DigestPrefetcher or None
+        @return: a prefetcher, or None if there are too few paths
+        """
+        if len(paths) < cls.min_files:
+            return None
+        return cls(paths, digest, **kwargs)
+
+    @staticmethod
+    def _stat_key(st):
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+    def _hash(self, path):
+        try:
+            st = os.lstat(path)
+            if not stat.S_ISREG(st.st_mode):
+                return None
+            value = self._digest(path)
+            # Discard the digest if the file was modified while it was
+            # read.
+            if self._stat_key(os.lstat(path)) != self._stat_key(st):
+                return None
+        except Exception:
+            # The consumer computes the digest itself, and handles any
+            # errors.
+            return None
+        return self._stat_key(st), value
+
+    def _fill(self, limit):
+        limit = min(limit, len(self._paths))
+        while self._next < limit:
+            path = self._paths[self._next]
+            self._queue.append((self._next, self._executor.submit(self._hash, path)))
+            self._next += 1
+
+    def get(self, path, st):
+        """
+        Return the digest of the given path, or None if it was not
+        prefetched, or the file has been modified since it was hashed.
+
+        @param st: the current lstat result of path
+        @type st: os.stat_result
+        """
+        i = self._index.get(path)
+        if i is None:
+            return None
+        # Skipped paths are cancelled, since the consumer does not go
+        # back.
+        while self._queue and self._queue[0][0] < i:
+            self._queue.popleft()[1].cancel()
+        self._next = max(self._next, i)
+        self._fill(i + self._window + 1)
+        if not self._queue or self._queue[0][0] != i:
+            return None
+        future = self._queue.popleft()[1]
+        result = future.result()
+        if result is None or result[0] != self._stat_key(st):
+            return None
+        return result[1]
+
+    def close(self):
+        """
+        Cancel queued work, and wait for running threads.
+        """
+        for _i, future in self._queue:
+            future.cancel()
+        self._queue.clear()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,235 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import mmap
+import struct
+import zlib
+
+from corepkg import _encodings, _unicode_encode
+from corepkg.util import atomic_ofstream
+
+
+class VdbMetadataIndex:
+    """
+    A compact, memory-mappable index of the installed package metadata
+    that vardbapi.aux_get caches in vdb_metadata.pickle. Unlike the
+    pickle, the index does not need to be loaded as a whole, since
+    lookups only decode the record of the requested package.
+
+    The file consists of a header, the list of keys, a hash table of
+    record numbers, an array of fixed-width records, and a string table.
+    Each record holds the offset and length of the cpv in the string
+    table, the mtime of the package directory, and the offset and length
+    of the value of each key. All integers are unsigned 32-bit little
+    endian values, and mtimes are doubles.
+    """
+
+    _magic = b"CPKGVDBI"
+    _format_version = 1
+    _header = struct.Struct("<8sIIII")
+    _absent = 0xFFFFFFFF
+
+    def __init__(self, filename):
+        self._filename = filename
+        self._mmap = None
+        self._keys = None
+        self._record = None
+        self._record_count = None
+        self._table_offset = None
+        self._table_size = None
+        self._records_offset = None
+        self._strings_offset = None
+
+    @classmethod
+    def _record_struct(cls, key_count):
+        return struct.Struct("<IId" + "II" * key_count)
+
+    @staticmethod
+    def _hash(cpv):
+        return zlib.crc32(cpv)
+
+    def _open(self):
+        """
+        Map the index file, and validate its header. Returns False if the
+        index does not exist or is unusable.
+        """
+        if self._mmap is not None:
+            return True
+        if self._keys is False:
+            return False
+        self._keys = False
+        try:
+            with open(
+                _unicode_encode(
+                    self._filename, encoding=_encodings["fs"], errors="strict"
+                ),
+                mode="rb",
+            ) as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # ValueError is raised for an empty file.
+            if isinstance(e, OSError) and e.errno not in (errno.ENOENT, errno.EACCES):
+                raise
+            return False
+
+        header = self._header
+        try:
+            magic, version, key_count, record_count, table_size = header.unpack_from(
+                buf
+            )
+            if magic != self._magic or version != self._format_version:
+                raise ValueError("unsupported format")
+            (keys_len,) = struct.unpack_from("<I", buf, header.size)
+            keys_offset = header.size + 4
+            keys = bytes(buf[keys_offset : keys_offset + keys_len])
+            keys = keys.decode("ascii").split("\0") if keys else []
+            if len(keys) != key_count:
+                raise ValueError("corrupt key list")
+            record = self._record_struct(key_count)
+            table_offset = keys_offset + keys_len
+            records_offset = table_offset + 4 * table_size
+            strings_offset = records_offset + record.size * record_count
+            if strings_offset > len(buf) or (
+                record_count and table_size < record_count
+            ):
+                raise ValueError("truncated")
+        except (struct.error, UnicodeDecodeError, ValueError):
+            buf.close()
+            return False
+
+        self._mmap = buf
+        self._keys = keys
+        self._record = record
+        self._record_count = record_count
+        self._table_offset = table_offset
+        self._table_size = table_size
+        self._records_offset = records_offset
+        self._strings_offset = strings_offset
+        return True
+
+    def close(self):
+        """
+        Unmap the index, so that it is opened again by the next lookup,
+        for example after it has been rewritten.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = None
+        self._keys = None
+
+    def _string(self, offset, length):
+        start = self._strings_offset + offset
+        return self._mmap[start : start + length]
+
+    def get(self, cpv):
+        """
+        Return the cached metadata of the given package, in the same
+        (mtime, metadata) form as the entries of vdb_metadata.pickle,
+        or None if the package is not in the index.
+        """
+        if not self._open():
+            return None
+        key = _unicode_encode(cpv, encoding=_encodings["repo.content"])
+        buf = self._mmap
+        table_size = self._table_size
+        if not table_size:
+            return None
+        record = self._record
+        slot = self._hash(key) % table_size
+        try:
+            for _ in range(table_size):
+                (record_number,) = struct.unpack_from(
+                    "<I", buf, self._table_offset + 4 * slot
+                )
+                if record_number == 0:
+                    return None
+                if record_number > self._record_count:
+                    return None
+                values = record.unpack_from(
+                    buf, self._records_offset + record.size * (record_number - 1)
+                )
+                if self._string(values[0], values[1]) == key:
+                    metadata = {}
+                    for i, k in enumerate(self._keys):
+                        offset, length = values[3 + 2 * i : 5 + 2 * i]
+                        if length != self._absent:
+                            metadata[k] = str(
+                                self._string(offset, length),
+                                encoding=_encodings["repo.content"],
+                                errors="replace",
+                            )
+                    return values[2], metadata
+                slot = (slot + 1) % table_size
+        except (struct.error, ValueError):
+            pass
+        return None
+
+    @classmethod
+    def write(cls, filename, packages):
+        """
+        Write an index of the given packages, which has the same format
+        as the "packages" entry of vdb_metadata.pickle, replacing the
+        existing index atomically.
+        """
+        entries = []
+        keys = set()
+        for cpv, pkg_data in packages.items():
+            if not isinstance(pkg_data, tuple) or len(pkg_data) != 2:
+                continue
+            mtime, metadata = pkg_data
+            if not isinstance(mtime, (float, int)) or not isinstance(metadata, dict):
+                continue
+            entries.append((str(cpv), float(mtime), metadata))
+            keys.update(metadata)
+        keys = sorted(keys)
+        entries.sort()
+
+        strings = bytearray()
+        string_offsets = {}
+
+        def add_string(s):
+            data = _unicode_encode(s, encoding=_encodings["repo.content"])
+            offset = string_offsets.get(data)
+            if offset is None:
+                offset = len(strings)
+                string_offsets[data] = offset
+                strings.extend(data)
+            return offset, len(data)
+
+        record = cls._record_struct(len(keys))
+        records = bytearray()
+        table_size = max(1, 2 * len(entries))
+        table = [0] * table_size
+        for record_number, (cpv, mtime, metadata) in enumerate(entries, 1):
+            cpv_offset, cpv_len = add_string(cpv)
+            fields = [cpv_offset, cpv_len, mtime]
+            for k in keys:
+                v = metadata.get(k)
+                if v is None:
+                    fields.extend((0, cls._absent))
+                else:
+                    fields.extend(add_string(v))
+            records.extend(record.pack(*fields))
+            slot = cls._hash(bytes(strings[cpv_offset : cpv_offset + cpv_len]))
+            slot %= table_size
+            while table[slot]:
+                slot = (slot + 1) % table_size
+            table[slot] = record_number
+
+        key_list = "\0".join(keys).encode("ascii")
+        with atomic_ofstream(filename, "wb") as f:
+            f.write(
+                cls._header.pack(
+                    cls._magic,
+                    cls._format_version,
+                    len(keys),
+                    len(entries),
+                    table_size,
+                )
+            )
+            f.write(struct.pack("<I", len(key_list)))
+            f.write(key_list)
+            f.write(struct.pack(f"<{table_size}I", *table))
+            f.write(records)
+            f.write(strings)
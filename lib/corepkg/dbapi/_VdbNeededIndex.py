@@ -0,0 +1,46 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from ._VdbSqliteIndex import VdbSqliteIndex
+
+
+class VdbNeededIndex(VdbSqliteIndex):
+    """
+    A persistent index of the NEEDED.ELF.2 entries of installed packages,
+    stored in an sqlite database next to vdb_metadata.pickle. It allows
+    LinkageMapELF.rebuild() to load the entries of all packages with a
+    single query, rather than by reading a NEEDED.ELF.2 file for each
+    installed package.
+    """
+
+    _description = "NEEDED index"
+    _tables = ("needed",)
+
+    def _create_index_tables(self, connection):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS needed (cpv TEXT NOT NULL, line TEXT NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS needed_cpv ON needed (cpv)")
+
+    def _insert_pkg(self, connection, cpv):
+        (needed,) = self._vardb.aux_get(cpv, ["NEEDED.ELF.2"])
+        connection.executemany(
+            "INSERT INTO needed VALUES (?, ?)",
+            ((cpv, line) for line in needed.splitlines()),
+        )
+
+    def get_needed(self):
+        """
+        Return a dict which maps the cpv of each installed package that
+        has NEEDED.ELF.2 entries to a list of its entries, in the order
+        of the NEEDED.ELF.2 file. The caller must call populate() first.
+
+        @rtype: dict
+        @return: cpv -> list of NEEDED.ELF.2 lines
+        """
+        needed = {}
+        for cpv, line in self._connect().execute(
+            "SELECT cpv, line FROM needed ORDER BY rowid"
+        ):
+            needed.setdefault(cpv, []).append(line)
+        return needed
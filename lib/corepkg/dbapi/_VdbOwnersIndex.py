@@ -0,0 +1,118 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from corepkg import os
+from corepkg.util import normalize_path
+from ._VdbSqliteIndex import VdbSqliteIndex
+
+
+class VdbOwnersIndex(VdbSqliteIndex):
+    """
+    A persistent index of the files that are installed by each package,
+    stored in an sqlite database next to vdb_metadata.pickle. Each entry
+    of the CONTENTS of an installed package is stored as a row with the
+    directory, the base name, the owner cpv and the entry type, so that
+    owner lookups are indexed queries, rather than searches through the
+    CONTENTS of every package that has a file with the same base name.
+
+    The index is also updated for packages that have their CONTENTS
+    rewritten. If it can not be used, callers have to use the CONTENTS
+    based search.
+    """
+
+    _description = "file owners index"
+    _tables = ("contents",)
+
+    def _create_index_tables(self, connection):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS contents "
+            "(cpv TEXT NOT NULL, dir TEXT NOT NULL, name TEXT NOT NULL, "
+            "type TEXT NOT NULL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS contents_name ON contents (name)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS contents_cpv ON contents (cpv)")
+
+    def _rel_path(self, path):
+        """
+        Convert an absolute CONTENTS key to a path that is relative to
+        ROOT, with a leading slash.
+        """
+        return path[len(self._vardb.settings["ROOT"]) - 1 :] or os.sep
+
+    def _insert_pkg(self, connection, cpv):
+        contents = {
+            os.path.split(self._rel_path(path)): data[0]
+            for path, data in self._vardb._dblink(cpv).itercontents()
+        }
+        connection.executemany(
+            "INSERT INTO contents VALUES (?, ?, ?, ?)",
+            (
+                (cpv, dir_path, name, entry_type)
+                for (dir_path, name), entry_type in contents.items()
+            ),
+        )
+
+    def iter_owners(self, path_iter):
+        """
+        Iterate over (cpv, path) tuples for the owners of the given paths,
+        like vardbapi._owners.iter_owners(), where paths and base names
+        are handled in the same way as by dblink._match_contents(). The
+        caller must call populate() first.
+        """
+        connection = self._connect()
+        root = self._vardb.settings["ROOT"]
+        eroot_len = len(self._vardb._eroot)
+        stat_cache = {}
+
+        def dir_id(dir_path):
+            try:
+                return stat_cache[dir_path]
+            except KeyError:
+                pass
+            try:
+                st = os.stat(os.path.join(root, dir_path.lstrip(os.sep)))
+            except OSError:
+                result = None
+            else:
+                result = (st.st_dev, st.st_ino)
+            stat_cache[dir_path] = result
+            return result
+
+        def owner_path(dir_path, name):
+            path = root + os.path.join(dir_path, name).lstrip(os.sep)
+            return path[eroot_len:]
+
+        query = "SELECT cpv, dir FROM contents WHERE name = ?"
+        for path in path_iter:
+            is_basename = os.sep != path[:1]
+            if is_basename:
+                for cpv, dir_path in connection.execute(query, (path,)):
+                    yield cpv, owner_path(dir_path, path)
+                continue
+
+            dir_path, name = os.path.split(normalize_path(os.sep + path.lstrip(os.sep)))
+            if not name:
+                continue
+            rows = connection.execute(query, (name,)).fetchall()
+            if not rows:
+                continue
+            owners = {}
+            aliases = []
+            for cpv, owned_dir in rows:
+                if owned_dir == dir_path:
+                    owners[cpv] = owned_dir
+                else:
+                    aliases.append((cpv, owned_dir))
+            if aliases:
+                # A package also owns the path if it has an entry with the
+                # same base name, in a directory that refers to the same
+                # inode, due to symlinked directories.
+                target = dir_id(dir_path)
+                if target is not None:
+                    for cpv, owned_dir in aliases:
+                        if cpv not in owners and dir_id(owned_dir) == target:
+                            owners[cpv] = owned_dir
+            for cpv, owned_dir in owners.items():
+                yield cpv, owner_path(owned_dir, name)
@@ -0,0 +1,172 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from corepkg import os
+from corepkg.const import VDB_PATH
+from corepkg.util._sqlite import SqliteDatabase
+
+
+class VdbSqliteIndex(SqliteDatabase):
+    """
+    Base class for persistent indexes of data of installed packages,
+    which are stored in sqlite databases in the vdb cache directory.
+
+    Each indexed package is recorded together with its COUNTER and the
+    mtime of its vdb directory, in the same way as the owners cache of
+    vdb_metadata.pickle, so that packages that were changed without
+    updating the index are detected by populate(). An index is created by
+    the first populate() call, and from then on it is updated in a single
+    transaction for each package that is merged or unmerged, so that it
+    is not maintained unless it is actually used. Within a process, the
+    packages are only checked again by populate() when the mtimes of the
+    vdb directories have changed, other than by updates and mtime bumps
+    of the same process.
+
+    Subclasses create the tables that are listed in _tables, each of
+    which has a cpv column, in _create_index_tables, and fill them in
+    _insert_pkg.
+
+    If sqlite is unavailable, or the index can not be updated, populate()
+    returns False, and callers have to read the data from the vdb.
+    """
+
+    def __init__(self, vardb, filename):
+        super().__init__(filename)
+        self._vardb = vardb
+        self._populated_signature = None
+
+    def _drop_tables(self, connection):
+        connection.execute("DROP TABLE IF EXISTS packages")
+        super()._drop_tables(connection)
+
+    def _create_tables(self, connection):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS packages "
+            "(cpv TEXT PRIMARY KEY, counter INTEGER NOT NULL, "
+            "mtime REAL NOT NULL)"
+        )
+        self._create_index_tables(connection)
+
+    def _create_index_tables(self, connection):
+        raise NotImplementedError(self)
+
+    def _insert_pkg(self, connection, cpv):
+        raise NotImplementedError(self)
+
+    def _pkg_hash(self, cpv):
+        counter, mtime = self._vardb.aux_get(cpv, ["COUNTER", "_mtime_"])
+        try:
+            counter = int(counter)
+        except ValueError:
+            counter = 0
+        return counter, float(mtime)
+
+    def _index_pkg(self, connection, cpv):
+        """
+        Replace the index entries of the given package, inside of the
+        caller's transaction.
+        """
+        for table in self._tables:
+            connection.execute(f"DELETE FROM {table} WHERE cpv = ?", (cpv,))
+        connection.execute("DELETE FROM packages WHERE cpv = ?", (cpv,))
+        try:
+            counter, mtime = self._pkg_hash(cpv)
+        except KeyError:
+            return
+        self._insert_pkg(connection, cpv)
+        connection.execute(
+            "INSERT INTO packages VALUES (?, ?, ?)", (cpv, counter, mtime)
+        )
+
+    def exists(self):
+        """
+        Return True if the index has been created by populate().
+        """
+        return os.path.exists(self._filename)
+
+    def _vdb_signature(self):
+        """
+        Return the mtimes of the vdb directory and of its category
+        directories, which are updated by vardbapi._bump_mtime() when
+        packages are merged or unmerged, or None if they are unavailable.
+        """
+        vdb_path = os.path.join(self._vardb._eroot, VDB_PATH)
+        try:
+            vdb_mtime = os.stat(vdb_path).st_mtime_ns
+            with os.scandir(vdb_path) as it:
+                mtimes = sorted((entry.name, entry.stat().st_mtime_ns) for entry in it)
+        except OSError:
+            return None
+        return vdb_mtime, mtimes
+
+    def update(self, cpv):
+        """
+        Update the index entries of a package that has been merged or
+        unmerged, in one transaction, if the index exists.
+        """
+        if not self.exists():
+            return
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            with connection:
+                self._index_pkg(connection, str(cpv))
+        except self._db_error as e:
+            self._disable(e)
+            return
+        if self._populated_signature is not None:
+            # Avoid checking all of the other packages again.
+            self._populated_signature = self._vdb_signature()
+
+    def mtime_bumped(self, signature):
+        """
+        Called by vardbapi._bump_mtime() with the vdb signature from before
+        the bump, so that the bump does not cause populate() to check all
+        packages again if the index was up to date.
+        """
+        if signature is not None and signature == self._populated_signature:
+            self._populated_signature = self._vdb_signature()
+
+    def populate(self):
+        """
+        Index the packages that are not indexed yet, or were modified since
+        they were indexed, and drop the entries of packages that are no
+        longer installed.
+
+        @rtype: bool
+        @return: True if the index is up to date and can be used
+        """
+        connection = self._connect()
+        if connection is None:
+            return False
+        signature = self._vdb_signature()
+        if signature is not None and signature == self._populated_signature:
+            return True
+        try:
+            indexed = {
+                cpv: (counter, mtime)
+                for cpv, counter, mtime in connection.execute(
+                    "SELECT cpv, counter, mtime FROM packages"
+                )
+            }
+            installed = set()
+            stale = []
+            for cpv in self._vardb.cpv_all():
+                cpv = str(cpv)
+                installed.add(cpv)
+                try:
+                    if indexed.get(cpv) != self._pkg_hash(cpv):
+                        stale.append(cpv)
+                except KeyError:
+                    pass
+            stale.extend(cpv for cpv in indexed if cpv not in installed)
+            if stale:
+                with connection:
+                    for cpv in stale:
+                        self._index_pkg(connection, cpv)
+        except self._db_error as e:
+            self._disable(e)
+            return False
+        self._populated_signature = signature
+        return True
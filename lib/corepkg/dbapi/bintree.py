@@ -45,6 +45,7 @@ from corepkg import _unicode_encode
 
 import codecs
 import errno
+import hashlib
 import io
 import json
 import shlex
@@ -52,10 +53,13 @@ import stat
 import subprocess
 import tempfile
 import textwrap
+import threading
 import time
 import traceback
 import urllib
+import uuid
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from gzip import GzipFile
 from itertools import chain
 from pathlib import PurePath
@@ -561,6 +565,9 @@ class binarytree:
         self._pkgindex_version = 0
         self._pkgindex_hashes = ["MD5", "SHA1"]
         self._pkgindex_file = os.path.join(self.pkgdir, "Packages")
+        # Limit on the number of delta segments of the Packages index that
+        # are retained for FEATURES=delta-index.
+        self._pkgindex_delta_max_segments = 100
         self._pkgindex_keys = self.dbapi._aux_cache_keys.copy()
         self._pkgindex_keys.update(["CPV", "SIZE"])
         self._pkgindex_aux_keys = [
@@ -1432,6 +1439,7 @@ class binarytree:
         atoms = " ".join(getbinpkg_include or []).split()
         getbinpkg_include = WildcardPackageSet(atoms)
 
+        jobs = []
         # Order by descending priority.
         for repo in reversed(list(self._binrepos_conf.values())):
             excluded = repo.getbinpkg_exclude or []
@@ -1468,27 +1476,51 @@ class binarytree:
                 for a in conflicted_include:
                     getbinpkg_include_repo.remove(a)
 
-            self._populate_remote_repo(
-                repo,
-                getbinpkg_refresh,
-                pretend,
-                verbose,
-                gpkg_only,
-                getbinpkg_exclude_repo,
-                getbinpkg_include_repo,
-            )
+            jobs.append((repo, getbinpkg_exclude_repo, getbinpkg_include_repo))
+
+        # The indexes are retrieved concurrently, since this is dominated by
+        # network latency and decompression, but they are injected in order
+        # of descending priority, as if they were retrieved serially.
+        if len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                pkgindexes = [
+                    executor.submit(
+                        self._fetch_remote_pkgindex,
+                        repo,
+                        getbinpkg_refresh,
+                        pretend,
+                        verbose,
+                    )
+                    for repo, _exclude, _include in jobs
+                ]
+                pkgindexes = [future.result() for future in pkgindexes]
+        else:
+            pkgindexes = [
+                self._fetch_remote_pkgindex(repo, getbinpkg_refresh, pretend, verbose)
+                for repo, _exclude, _include in jobs
+            ]
 
-    def _populate_remote_repo(
+        for (repo, exclude, include), pkgindex in zip(jobs, pkgindexes):
+            self._populate_remote_repo(repo, pkgindex, gpkg_only, exclude, include)
+
+    def _fetch_remote_pkgindex(
         self,
         repo,
         getbinpkg_refresh: bool,
         pretend: bool,
         verbose: bool,
-        gpkg_only: bool,
-        getbinpkg_exclude: WildcardPackageSet,
-        getbinpkg_include: WildcardPackageSet,
     ):
+        """
+        Retrieve the package index of a binary package repository, or
+        use the local copy of it if that is recent enough, and update
+        the local copy. This does not modify the binarytree, so that it
+        can be called concurrently for multiple repositories.
+
+        @rtype: PackageIndex or None
+        @return: the package index, or None if it is unavailable
+        """
         from corepkg.package.ebuild.fetch import _hide_url_passwd
+        from corepkg.process import find_binary
         from corepkg.util import atomic_ofstream, writemsg
         from corepkg.util.time import unix_to_iso_time
         from corepkg.util._urlopen import (
@@ -1496,17 +1528,14 @@ class binarytree:
             have_pep_476 as _have_pep_476,
             http_to_timestamp,
         )
-        from corepkg.versions import _pkg_str
 
         binrepo_name = repo.name or repo.name_fallback
         base_url = repo.sync_uri
-        pkgindex_uri = base_url.rstrip("/") + "/Packages"
         parsed_url = urlparse(base_url)
         host = parsed_url.hostname or ""
         port = parsed_url.port
         user = parsed_url.username
         user_passwd = user + "@" if user else ""
-        gpkg_only_warned = False
 
         pkgindex_file = os.path.join(
             self.settings["EROOT"],
@@ -1560,7 +1589,24 @@ class binarytree:
                 ):
                     raise UseCachedCopyOfRemoteIndex("within TTL")
 
-            for remote_pkgindex_file in ("Packages.gz", "Packages"):
+            local_digest = pkgindex.header.get("DOWNLOAD_SHA512")
+            if local_digest and local_digest == self._fetch_remote_pkgindex_digest(
+                repo
+            ):
+                raise UseCachedCopyOfRemoteIndex("up-to-date")
+
+            delta_idx = None
+            if local_timestamp:
+                delta_idx = self._fetch_remote_pkgindex_deltas(repo, pkgindex)
+            if delta_idx is not None:
+                pkgindex = rmt_idx = delta_idx
+                remote_pkgindex_files = ()
+            elif find_binary("zstd") is not None:
+                remote_pkgindex_files = ("Packages.zst", "Packages.gz", "Packages")
+            else:
+                remote_pkgindex_files = ("Packages.gz", "Packages")
+
+            for remote_pkgindex_file in remote_pkgindex_files:
                 # urlparse.urljoin() only works correctly with recognized
                 # protocols and requires the base url to have a trailing
                 # slash, so join manually...
@@ -1636,15 +1682,15 @@ class binarytree:
                                 extra_info = f" (local: {local_iso_time}, remote: {remote_iso_time})"
 
                             raise UseCachedCopyOfRemoteIndex("up-to-date", extra_info)
-                        if remote_pkgindex_file == "Packages.gz" and (
+                        if remote_pkgindex_file != "Packages" and (
                             isinstance(err, FileNotFoundError)
                             or (
                                 isinstance(err, urllib.error.HTTPError)
                                 and err.code == 404
                             )
                         ):
-                            # Ignore 404s for Packages.gz, as the file is
-                            # not guaranteed to exist.
+                            # Ignore 404s for compressed indexes, as they
+                            # are not guaranteed to exist.
                             continue
 
                         if parsed_url.scheme in ("ftp", "http", "https"):
@@ -1666,10 +1712,10 @@ class binarytree:
                     path = parsed_url.path.rstrip("/") + "/" + remote_pkgindex_file
 
                     if repo.fetchcommand is None and parsed_url.scheme == "ssh":
-                        if remote_pkgindex_file == "Packages.gz":
-                            # TODO: Check first if Packages.gz exist before
-                            # cat'ing it. Until this is done, never try to retrieve
-                            # Packages.gz as it is not guaranteed to exist.
+                        if remote_pkgindex_file != "Packages":
+                            # TODO: Check first if compressed indexes exist before
+                            # cat'ing them. Until this is done, never try to retrieve
+                            # them as they are not guaranteed to exist.
                             continue
 
                         # Use a pipe so that we can terminate the download
@@ -1719,20 +1765,25 @@ class binarytree:
                             fcmd=fcmd, fcmd_vars=fcmd_vars
                         )
                         if not success:
-                            if remote_pkgindex_file == "Packages.gz":
-                                # Ignore failures for Packages.gz, as the file is
-                                # not guaranteed to exist.
+                            if remote_pkgindex_file != "Packages":
+                                # Ignore failures for compressed indexes, as
+                                # they are not guaranteed to exist.
                                 continue
                             raise OSError(f"{setting} failed")
                         f = open(tmp_filename, "rb")
 
                 if remote_pkgindex_file == "Packages.gz":
                     f = GzipFile(fileobj=f, mode="rb")
+                elif remote_pkgindex_file == "Packages.zst":
+                    f = corepkg.getbinpkg._ZstdDecompressFile(f)
 
-                f_dec = codecs.iterdecode(
-                    f, _encodings["repo.content"], errors="replace"
-                )
+                digest = hashlib.sha512()
                 try:
+                    f_dec = codecs.iterdecode(
+                        corepkg.getbinpkg._digest_lines(f, digest),
+                        _encodings["repo.content"],
+                        errors="replace",
+                    )
                     rmt_idx.readHeader(f_dec)
                     if (
                         not remote_timestamp
@@ -1764,16 +1815,25 @@ class binarytree:
                             remote_timestamp
                         ):
                             rmt_idx.readBody(f_dec)
+                            # Read any trailing data, so that the digest
+                            # covers the whole index.
+                            for _line in f_dec:
+                                pass
+                            rmt_idx.header["DOWNLOAD_SHA512"] = digest.hexdigest()
                             pkgindex = rmt_idx
                 finally:
                     # Timeout after 5 seconds, in case close() blocks
-                    # indefinitely (see bug #350139).
+                    # indefinitely (see bug #350139). Signal handlers can
+                    # only be installed by the main thread.
+                    use_alarm = threading.current_thread() is threading.main_thread()
                     try:
                         try:
-                            AlarmSignal.register(5)
+                            if use_alarm:
+                                AlarmSignal.register(5)
                             f.close()
                         finally:
-                            AlarmSignal.unregister()
+                            if use_alarm:
+                                AlarmSignal.unregister()
                     except AlarmSignal:
                         writemsg(
                             "\n\n!!! [%s] %s\n"
@@ -1794,7 +1854,7 @@ class binarytree:
                         except OSError:
                             pass
                 # We successfully fetched the remote index, break
-                # out of the ("Packages.gz", "Packages") loop.
+                # out of the remote_pkgindex_files loop.
                 break
         except UseCachedCopyOfRemoteIndex as exc:
             changed = False
@@ -1839,6 +1899,138 @@ class binarytree:
                     raise
                 # The current user doesn't have permission to cache the
                 # file, but that's alright.
+        return pkgindex
+
+    def _read_remote_pkgindex_file(self, repo, name):
+        """
+        Read a small file in the format of the Packages index, such as
+        Packages.digest, from a binary package repository. Only local
+        paths and the protocols that are supported by urlopen are
+        supported, since other protocols require a FETCHCOMMAND.
+
+        @raise OSError: if the file could not be read
+        @rtype: PackageIndex or None
+        @return: the file, or None if the protocol is not supported
+        """
+        from corepkg.util._urlopen import (
+            urlopen as _urlopen,
+            have_pep_476 as _have_pep_476,
+        )
+
+        base_url = repo.sync_uri.rstrip("/")
+        parsed_url = urlparse(base_url)
+        if parsed_url.scheme in ("", "file"):
+            f = open(f"{parsed_url.path}/{name}", "rb")
+        elif (
+            repo.fetchcommand is None
+            and parsed_url.scheme in ("ftp", "http", "https")
+            and (parsed_url.scheme != "https" or _have_pep_476())
+        ):
+            proxies = {}
+            for proto in ("http", "https"):
+                value = self.settings.get(proto + "_proxy")
+                if value is not None:
+                    proxies[proto] = value
+            f = _urlopen(f"{base_url}/{name}", proxies=proxies)
+        else:
+            return None
+
+        idx = self._new_pkgindex()
+        try:
+            idx.read(codecs.iterdecode(f, _encodings["repo.content"], errors="replace"))
+        finally:
+            f.close()
+        return idx
+
+    def _fetch_remote_pkgindex_digest(self, repo):
+        """
+        @rtype: str or None
+        @return: the SHA512 digest of the Packages index of a binary
+                package repository, from its Packages.digest file, or
+                None if it is unavailable
+        """
+        try:
+            digest = self._read_remote_pkgindex_file(repo, "Packages.digest")
+        except (OSError, ValueError):
+            return None
+        return None if digest is None else digest.header.get("SHA512")
+
+    def _fetch_remote_pkgindex_deltas(self, repo, pkgindex):
+        """
+        Update a local copy of the package index of a binary package
+        repository by applying the delta segments that the binhost has
+        published since the copy was retrieved (see FEATURES=delta-index).
+
+        @raise UseCachedCopyOfRemoteIndex: if the local copy is current
+        @rtype: PackageIndex or None
+        @return: the updated package index, or None if the deltas are
+                unavailable, in which case the whole index needs to be
+                retrieved
+        """
+        delta_id = pkgindex.header.get("DELTA_ID")
+        try:
+            local_sequence = int(pkgindex.header.get("DELTA_SEQUENCE"))
+        except (TypeError, ValueError):
+            return None
+        if not delta_id:
+            return None
+
+        def read_remote(name):
+            idx = self._read_remote_pkgindex_file(repo, name)
+            if idx is None:
+                raise FileNotFoundError(name)
+            return idx
+
+        def entry_key(d):
+            build_id = d.get("BUILD_ID")
+            return f"{d['CPV']}:{build_id}" if build_id else d["CPV"]
+
+        try:
+            manifest = read_remote("Packages.delta")
+            if manifest.header.get("DELTA_ID") != delta_id:
+                return None
+            first = int(manifest.header["DELTA_FIRST"])
+            sequence = int(manifest.header["DELTA_SEQUENCE"])
+            if sequence == local_sequence:
+                raise UseCachedCopyOfRemoteIndex("up-to-date")
+            if not first <= local_sequence + 1 <= sequence:
+                return None
+
+            packages = {entry_key(d): d for d in pkgindex.packages}
+            for segment_sequence in range(local_sequence + 1, sequence + 1):
+                segment = read_remote(f"Packages.delta.{segment_sequence}")
+                if (
+                    segment.header.get("DELTA_ID") != delta_id
+                    or segment.header.get("DELTA_SEQUENCE") != str(segment_sequence)
+                    or not self._pkgindex_version_supported(segment)
+                ):
+                    return None
+                for key in segment.header.pop("DELTA_REMOVE", "").split():
+                    packages.pop(key, None)
+                for d in segment.packages:
+                    packages[entry_key(d)] = d
+        except (OSError, KeyError, ValueError):
+            return None
+
+        segment.packages = list(packages.values())
+        return segment
+
+    def _populate_remote_repo(
+        self,
+        repo,
+        pkgindex,
+        gpkg_only: bool,
+        getbinpkg_exclude: WildcardPackageSet,
+        getbinpkg_include: WildcardPackageSet,
+    ):
+        from corepkg.util import writemsg
+        from corepkg.versions import _pkg_str
+
+        binrepo_name = repo.name or repo.name_fallback
+        base_url = repo.sync_uri
+        pkgindex_uri = base_url.rstrip("/") + "/Packages"
+        gpkg_only_warned = False
+
         if pkgindex:
             have_getbinpkg_exclude = not getbinpkg_exclude.isEmpty()
             have_getbinpkg_include = not getbinpkg_include.isEmpty()
@@ -2267,15 +2459,32 @@ class binarytree:
         return d
 
     def _pkgindex_write(self, pkgindex):
-        from corepkg.util import atomic_ofstream
+        from corepkg.util import atomic_ofstream, writemsg
+
+        delta_index = "delta-index" in self.settings.features
+        if delta_index:
+            old_contents = self._pkgindex_delta_prepare(pkgindex)
+        else:
+            pkgindex.header.pop("DELTA_ID", None)
+            pkgindex.header.pop("DELTA_SEQUENCE", None)
 
         contents = codecs.getwriter(_encodings["repo.content"])(io.BytesIO())
         pkgindex.write(contents)
         contents = contents.getvalue()
+        if delta_index:
+            # The segment is written first, so that it exists before the
+            # index and the delta manifest refer to it.
+            self._pkgindex_delta_write(old_contents, contents)
         atime = mtime = int(pkgindex.header["TIMESTAMP"])
         output_files = [
-            (atomic_ofstream(self._pkgindex_file, mode="wb"), self._pkgindex_file, None)
+            (
+                atomic_ofstream(self._pkgindex_file, mode="wb"),
+                self._pkgindex_file,
+                None,
+                contents,
+            )
         ]
+        stale_files = []
 
         if "compress-index" in self.settings.features:
             gz_fname = self._pkgindex_file + ".gz"
@@ -2285,17 +2494,64 @@ class binarytree:
                     GzipFile(filename="", mode="wb", fileobj=fileobj, mtime=mtime),
                     gz_fname,
                     fileobj,
+                    contents,
+                )
+            )
+        else:
+            stale_files.append(self._pkgindex_file + ".gz")
+
+        zst_fname = self._pkgindex_file + ".zst"
+        if "compress-index-zstd" in self.settings.features:
+            try:
+                zst_contents = corepkg.getbinpkg._zstd_compress(contents)
+            except OSError as e:
+                writemsg(
+                    f"!!! Unable to write {zst_fname}: {e}\n",
+                    noiselevel=-1,
+                )
+                stale_files.append(zst_fname)
+            else:
+                output_files.append(
+                    (
+                        atomic_ofstream(zst_fname, mode="wb"),
+                        zst_fname,
+                        None,
+                        zst_contents,
+                    )
+                )
+        else:
+            stale_files.append(zst_fname)
+
+        # The digest of the uncompressed index allows clients to check if
+        # their copy is current without downloading the index. It is
+        # published along with the compressed indexes, which are intended
+        # for binhosts.
+        digest_fname = self._pkgindex_file + ".digest"
+        if len(output_files) > 1:
+            output_files.append(
+                (
+                    atomic_ofstream(digest_fname, mode="wb"),
+                    digest_fname,
+                    None,
+                    (
+                        f"SHA512: {hashlib.sha512(contents).hexdigest()}\n"
+                        f"SIZE: {len(contents)}\n"
+                        f"TIMESTAMP: {pkgindex.header['TIMESTAMP']}\n\n"
+                    ).encode(),
                 )
             )
         else:
+            stale_files.append(digest_fname)
+
+        for fname in stale_files:
             try:
-                os.unlink(self._pkgindex_file + ".gz")
+                os.unlink(fname)
             except OSError as e:
                 if e.errno != errno.ENOENT:
                     raise
 
-        for f, fname, f_close in output_files:
-            f.write(contents)
+        for f, fname, f_close, data in output_files:
+            f.write(data)
             f.close()
             if f_close is not None:
                 f_close.close()
@@ -2303,6 +2559,180 @@ class binarytree:
             # some seconds might have elapsed since TIMESTAMP
             os.utime(fname, (atime, mtime))
 
+        if delta_index:
+            self._pkgindex_delta_commit(pkgindex, len(contents))
+        else:
+            self._pkgindex_delta_remove()
+
+    @staticmethod
+    def _pkgindex_blocks(contents):
+        """
+        Split the serialized Packages index into its header and its
+        package entries, without parsing them.
+
+        @rtype: tuple
+        @return: (header, entries) where entries is a list of bytes
+        """
+        blocks = [block for block in contents.split(b"\n\n") if block]
+        if not blocks:
+            return b"", []
+        return blocks[0], blocks[1:]
+
+    @staticmethod
+    def _pkgindex_block_value(block, key):
+        prefix = key + b": "
+        for line in block.split(b"\n"):
+            if line.startswith(prefix):
+                return line[len(prefix) :]
+        return None
+
+    def _pkgindex_delta_prepare(self, pkgindex):
+        """
+        Set the DELTA_ID and DELTA_SEQUENCE headers of pkgindex, which
+        continue the delta chain of the Packages index that is replaced,
+        or start a new chain.
+
+        @rtype: bytes or None
+        @return: the contents of the replaced Packages index if the chain
+                is continued, otherwise None
+        """
+        try:
+            with open(self._pkgindex_file, "rb") as f:
+                old_contents = f.read()
+        except FileNotFoundError:
+            old_contents = None
+
+        delta_id = sequence = None
+        if old_contents is not None:
+            header = self._pkgindex_blocks(old_contents)[0]
+            delta_id = self._pkgindex_block_value(header, b"DELTA_ID")
+            sequence = self._pkgindex_block_value(header, b"DELTA_SEQUENCE")
+            try:
+                sequence = int(sequence)
+            except (TypeError, ValueError):
+                delta_id = None
+
+        if delta_id is None:
+            pkgindex.header["DELTA_ID"] = uuid.uuid4().hex
+            pkgindex.header["DELTA_SEQUENCE"] = "0"
+            return None
+        pkgindex.header["DELTA_ID"] = _unicode_decode(delta_id)
+        pkgindex.header["DELTA_SEQUENCE"] = str(sequence + 1)
+        return old_contents
+
+    def _pkgindex_delta_write(self, old_contents, contents):
+        """
+        Write the delta segment that transforms old_contents into
+        contents. It consists of the header of the new index, with a
+        DELTA_REMOVE header that lists the removed entries, followed by
+        the entries that were added or changed. Entries are identified
+        by their CPV and BUILD_ID.
+        """
+        from corepkg.util import atomic_ofstream
+
+        if old_contents is None:
+            return
+
+        def entry_key(block):
+            cpv = self._pkgindex_block_value(block, b"CPV")
+            build_id = self._pkgindex_block_value(block, b"BUILD_ID")
+            return cpv if build_id is None else cpv + b":" + build_id
+
+        header, entries = self._pkgindex_blocks(contents)
+        old_entries = set(self._pkgindex_blocks(old_contents)[1])
+        added = [block for block in entries if block not in old_entries]
+        old_entries.difference_update(entries)
+        removed = {entry_key(block) for block in old_entries}
+        removed.difference_update(entry_key(block) for block in added)
+
+        sequence = self._pkgindex_block_value(header, b"DELTA_SEQUENCE")
+        segment_file = f"{self._pkgindex_file}.delta.{_unicode_decode(sequence)}"
+        f = atomic_ofstream(segment_file, mode="wb")
+        f.write(header + b"\n")
+        if removed:
+            f.write(b"DELTA_REMOVE: " + b" ".join(sorted(removed)) + b"\n")
+        f.write(b"\n")
+        for block in added:
+            f.write(block + b"\n\n")
+        f.close()
+        self._file_permissions(segment_file)
+
+    def _pkgindex_delta_segments(self):
+        """
+        @rtype: dict
+        @return: the paths of the delta segments in pkgdir, by sequence
+        """
+        prefix = os.path.basename(self._pkgindex_file) + ".delta."
+        segments = {}
+        try:
+            names = os.listdir(self.pkgdir)
+        except OSError:
+            return segments
+        for name in names:
+            if name.startswith(prefix):
+                try:
+                    sequence = int(name[len(prefix) :])
+                except ValueError:
+                    continue
+                segments[sequence] = os.path.join(self.pkgdir, name)
+        return segments
+
+    def _pkgindex_delta_commit(self, pkgindex, index_size):
+        """
+        Prune delta segments that are outside of the current chain, or
+        which are not worth downloading instead of the whole index, and
+        write the Packages.delta manifest that describes the available
+        segments.
+        """
+        from corepkg.util import atomic_ofstream
+
+        sequence = int(pkgindex.header["DELTA_SEQUENCE"])
+        segments = self._pkgindex_delta_segments()
+        first = sequence + 1
+        total_size = 0
+        while (
+            first - 1 in segments
+            and sequence - first + 1 < self._pkgindex_delta_max_segments
+        ):
+            try:
+                total_size += os.stat(segments[first - 1]).st_size
+            except OSError:
+                break
+            if total_size > index_size:
+                break
+            first -= 1
+
+        manifest_file = self._pkgindex_file + ".delta"
+        f = atomic_ofstream(manifest_file, mode="w")
+        f.write(
+            f"DELTA_FIRST: {first}\n"
+            f"DELTA_ID: {pkgindex.header['DELTA_ID']}\n"
+            f"DELTA_SEQUENCE: {sequence}\n"
+            f"TIMESTAMP: {pkgindex.header['TIMESTAMP']}\n\n"
+        )
+        f.close()
+        self._file_permissions(manifest_file)
+
+        for segment_sequence, path in segments.items():
+            if not first <= segment_sequence <= sequence:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    def _pkgindex_delta_remove(self):
+        """
+        Remove the delta manifest and segments, so that clients retrieve
+        the whole Packages index.
+        """
+        paths = list(self._pkgindex_delta_segments().values())
+        paths.insert(0, self._pkgindex_file + ".delta")
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
     def _pkgindex_entry(self, cpv):
         from corepkg.checksum import perform_multiple_checksums
 
@@ -42,6 +42,11 @@ from corepkg import _unicode_decode
 from corepkg import _unicode_encode
 from corepkg.util.futures.executor.fork import ForkExecutor
 from ._VdbMetadataDelta import VdbMetadataDelta
+from ._CompactContents import CompactContents, ContentsCache
+from ._DigestPrefetcher import DigestPrefetcher
+from ._VdbMetadataIndex import VdbMetadataIndex
+from ._VdbNeededIndex import VdbNeededIndex
+from ._VdbOwnersIndex import VdbOwnersIndex
 
 from _emerge.EbuildBuildDir import EbuildBuildDir
 from _emerge.EbuildPhase import EbuildPhase
@@ -187,6 +192,10 @@ class vardbapi(dbapi):
             self._eroot, CACHE_PATH, "vdb_metadata_delta.json"
         )
         self._cache_delta = VdbMetadataDelta(self)
+        self._metadata_index_filename = os.path.join(
+            self._eroot, CACHE_PATH, "vdb_metadata.idx"
+        )
+        self._metadata_index = VdbMetadataIndex(self._metadata_index_filename)
         self._counter_path = os.path.join(self._eroot, CACHE_PATH, "counter")
 
         self._plib_registry = PreservedLibsRegistry(
@@ -194,6 +203,12 @@ class vardbapi(dbapi):
             os.path.join(self._eroot, PRIVATE_PATH, "preserved_libs_registry"),
         )
         self._linkmap = LinkageMap(self)
+        self._owners_index = VdbOwnersIndex(
+            self, os.path.join(self._eroot, CACHE_PATH, "vdb_owners.sqlite")
+        )
+        self._needed_index = VdbNeededIndex(
+            self, os.path.join(self._eroot, CACHE_PATH, "vdb_needed.sqlite")
+        )
         self._owners = self._owners_db(self)
 
         self._cached_counter = None
@@ -348,6 +363,12 @@ class vardbapi(dbapi):
         base = self._eroot + VDB_PATH
         cat = catsplit(cpv)[0]
         catdir = base + _os.sep + cat
+        indexes = [
+            index
+            for index in (self._owners_index, self._needed_index)
+            if index._populated_signature is not None
+        ]
+        signature = indexes[0]._vdb_signature() if indexes else None
         t = time.time()
         t = (t, t)
         try:
@@ -355,6 +376,8 @@ class vardbapi(dbapi):
                 os.utime(x, t)
         except OSError:
             ensure_dirs(catdir)
+        for index in indexes:
+            index.mtime_bumped(signature)
 
     def cpv_exists(self, mykey, myrepo=None):
         "Tells us whether an actual ebuild exists on disk (no masking)"
@@ -593,14 +616,21 @@ class vardbapi(dbapi):
         self.matchcache.clear()
         self.cpcache.clear()
         self._aux_cache_obj = None
+        self._metadata_index.close()
 
     def _add(self, pkg_dblink):
         self._pkgs_changed = True
         self._clear_pkg_cache(pkg_dblink)
+        self._owners_index.update(pkg_dblink.mycpv)
+        self._needed_index.update(pkg_dblink.mycpv)
 
     def _remove(self, pkg_dblink):
         self._pkgs_changed = True
         self._clear_pkg_cache(pkg_dblink)
+        # If the package has been replaced by an instance with the same
+        # cpv, then this indexes the new instance.
+        self._owners_index.update(pkg_dblink.mycpv)
+        self._needed_index.update(pkg_dblink.mycpv)
 
     def _clear_pkg_cache(self, pkg_dblink):
         from corepkg.util.listdir import dircache
@@ -664,12 +694,16 @@ class vardbapi(dbapi):
         from corepkg.data import secpass
         from corepkg.util import ensure_dirs, atomic_ofstream, apply_secpass_permissions
 
+        # If the pickle has not been loaded, because all lookups were
+        # served by the metadata index, then nothing has been modified.
         if (
             self._flush_cache_enabled
-            and self._aux_cache is not None
             and secpass >= 2
             and (
-                len(self._aux_cache["modified"]) >= self._aux_cache_threshold
+                (
+                    self._aux_cache_obj is not None
+                    and len(self._aux_cache["modified"]) >= self._aux_cache_threshold
+                )
                 or not os.path.exists(self._cache_delta_filename)
             )
         ):
@@ -689,6 +723,12 @@ class vardbapi(dbapi):
 
             apply_secpass_permissions(self._aux_cache_filename, mode=0o644)
 
+            self._metadata_index.close()
+            VdbMetadataIndex.write(
+                self._metadata_index_filename, self._aux_cache["packages"]
+            )
+            apply_secpass_permissions(self._metadata_index_filename, mode=0o644)
+
             self._cache_delta.initialize(timestamp)
             apply_secpass_permissions(self._cache_delta_filename, mode=0o644)
 
@@ -776,6 +816,11 @@ class vardbapi(dbapi):
         If an error occurs while loading the cache pickle or the version is
         unrecognized, the cache will simple be recreated from scratch (it is
         completely disposable).
+
+        When the cache is written, a memory-mappable index of it is written
+        as well (see VdbMetadataIndex). Lookups are served from the index
+        until a lookup misses it, so that the pickle is only loaded when
+        needed.
         """
         from corepkg.eapi import _get_eapi_attrs
         from corepkg.versions import _get_slot_re
@@ -802,12 +847,26 @@ class vardbapi(dbapi):
             raise KeyError(mycpv)
         # Use float mtime when available.
         mydir_mtime = mydir_stat.st_mtime
-        pkg_data = self._aux_cache["packages"].get(mycpv)
         pull_me = cache_these.union(wants)
         mydata = {"_mtime_": mydir_mtime}
         cache_valid = False
         cache_mtime = None
         metadata = None
+
+        pkg_data = None
+        if self._aux_cache_obj is None:
+            # Avoid loading the whole pickle as long as the metadata index
+            # has valid entries with all of the cached keys. Uncached keys
+            # are read from the package directory below, and _mtime_ comes
+            # from its stat result.
+            pkg_data = self._metadata_index.get(mycpv)
+            if pkg_data is not None and not (
+                self._aux_cache_mtime_valid(pkg_data[0], mydir_stat)
+                and cache_these.difference(mydata).issubset(pkg_data[1])
+            ):
+                pkg_data = None
+        if pkg_data is None:
+            pkg_data = self._aux_cache["packages"].get(mycpv)
         if pkg_data is not None:
             if not isinstance(pkg_data, tuple) or len(pkg_data) != 2:
                 pkg_data = None
@@ -820,17 +879,7 @@ class vardbapi(dbapi):
 
         if pkg_data:
             cache_mtime, metadata = pkg_data
-            if isinstance(cache_mtime, float):
-                if cache_mtime == mydir_stat.st_mtime:
-                    cache_valid = True
-
-                # Handle truncated mtime in order to avoid cache
-                # invalidation for livecd squashfs (bug 564222).
-                elif int(cache_mtime) == mydir_stat.st_mtime:
-                    cache_valid = True
-            else:
-                # Cache may contain integer mtime.
-                cache_valid = cache_mtime == mydir_stat[stat.ST_MTIME]
+            cache_valid = self._aux_cache_mtime_valid(cache_mtime, mydir_stat)
 
         if cache_valid:
             # Migrate old metadata to unicode.
@@ -863,6 +912,22 @@ class vardbapi(dbapi):
 
         return [mydata[x] for x in wants]
 
+    @staticmethod
+    def _aux_cache_mtime_valid(cache_mtime, st):
+        """
+        Return True if the mtime of a cache entry matches the stat result
+        of the corresponding package directory.
+        """
+        if isinstance(cache_mtime, float):
+            if cache_mtime == st.st_mtime:
+                return True
+
+            # Handle truncated mtime in order to avoid cache
+            # invalidation for livecd squashfs (bug 564222).
+            return int(cache_mtime) == st.st_mtime
+        # Cache may contain integer mtime.
+        return cache_mtime == st[stat.ST_MTIME]
+
     def _aux_get(self, mycpv, wants, st=None):
         mydir = self.getpath(mycpv)
         if st is None:
@@ -1376,6 +1441,7 @@ class vardbapi(dbapi):
         f.close()
         self._bump_mtime(pkg.mycpv)
         pkg._clear_contents_cache()
+        self._owners_index.update(pkg.mycpv)
 
     class _owners_cache:
         """
@@ -1453,6 +1519,7 @@ class vardbapi(dbapi):
 
         def populate(self):
             self._populate()
+            self._vardb._owners_index.populate()
 
         def _populate(self):
             owners_cache = vardbapi._owners_cache(self._vardb)
@@ -1528,8 +1595,11 @@ class vardbapi(dbapi):
 
             if not isinstance(path_iter, list):
                 path_iter = list(path_iter)
-            owners_cache = self._populate()
             vardb = self._vardb
+            if self._use_index():
+                yield from self._iter_owners_index(path_iter)
+                return
+            owners_cache = self._populate()
             root = vardb._eroot
             hash_pkg = owners_cache._hash_pkg
             hash_str = owners_cache._hash_str
@@ -1610,6 +1680,30 @@ class vardbapi(dbapi):
                         for cpv, p in owners:
                             yield (dblink(cpv), p)
 
+        def _use_index(self):
+            """
+            Return True if owners can be looked up in the persistent owners
+            index, which is created by the first call if necessary.
+            """
+            return (
+                "case-insensitive-fs" not in self._vardb.settings.features
+                and self._vardb._owners_index.populate()
+            )
+
+        def _iter_owners_index(self, path_list):
+            """
+            Look up owners in the persistent owners index (see
+            VdbOwnersIndex), which does not require CONTENTS to be
+            parsed for packages that do not own any of the paths.
+            """
+            dblink_cache = {}
+            for cpv, path in self._vardb._owners_index.iter_owners(path_list):
+                x = dblink_cache.get(cpv)
+                if x is None:
+                    x = self._vardb._dblink(cpv)
+                    dblink_cache[cpv] = x
+                yield (x, path)
+
         def _iter_owners_low_mem(self, path_list):
             """
             This implementation will make a short-lived dblink instance (and
@@ -1774,6 +1868,11 @@ class vartree:
         self.populated = 1
 
 
+# Parsed CONTENTS that are shared by dblink instances, bounded by the
+# total number of entries.
+_contents_cache = ContentsCache(max_entries=500000)
+
+
 class dblink:
     """
     This class provides an interface to the installed package database
@@ -2042,29 +2141,81 @@ class dblink:
     def getcontents(self):
         """
         Get the installed files of a given package (aka what that package installed)
-        """
-        from corepkg.util import normalize_path
-        from corepkg.util import writemsg
 
+        @rtype: CompactContents
+        @return: a mapping of paths to entry data, in the order of the
+                CONTENTS file, which can be used and modified like a dict
+        """
         if self.contentscache is not None:
             return self.contentscache
         contents_file = os.path.join(self.dbdir, "CONTENTS")
-        pkgfiles = {}
+        f = self._open_contents(contents_file)
+        if f is None:
+            self.contentscache = CompactContents()
+            return self.contentscache
+
+        with f:
+            st = os.fstat(f.fileno())
+            # CONTENTS files are replaced atomically, so the inode, size
+            # and mtime identify the parsed entries.
+            cache_key = (
+                contents_file,
+                st.st_dev,
+                st.st_ino,
+                st.st_size,
+                st.st_mtime_ns,
+                self.settings["ROOT"],
+                self.settings["EROOT"],
+            )
+            pkgfiles = _contents_cache.get(cache_key)
+            if pkgfiles is None:
+                pkgfiles = CompactContents(self._parse_contents(f, contents_file))
+                _contents_cache.add(cache_key, pkgfiles)
+        # The cached entries are copied if this instance is modified.
+        self.contentscache = pkgfiles.share()
+        return self.contentscache
+
+    def itercontents(self):
+        """
+        Iterate over (path, data) tuples of the installed files of this
+        package, in the same form as the items of getcontents(). Unless
+        the contents have been parsed already, they are parsed while they
+        are iterated, without keeping them in memory, which is useful for
+        callers that do not need random access.
+        """
+        if self.contentscache is not None:
+            yield from self.contentscache.items()
+            return
+        contents_file = os.path.join(self.dbdir, "CONTENTS")
+        f = self._open_contents(contents_file)
+        if f is None:
+            return
+        with f:
+            yield from self._parse_contents(f, contents_file)
+
+    def _open_contents(self, contents_file):
         try:
-            with open(
+            return open(
                 _unicode_encode(
                     contents_file, encoding=_encodings["fs"], errors="strict"
                 ),
                 encoding=_encodings["repo.content"],
                 errors="replace",
-            ) as f:
-                mylines = f.readlines()
+            )
         except OSError as e:
             if e.errno != errno.ENOENT:
                 raise
-            del e
-            self.contentscache = pkgfiles
-            return pkgfiles
+        return None
+
+    def _parse_contents(self, lines, contents_file):
+        """
+        Parse CONTENTS lines, generating (path, data) tuples, preceded by
+        entries for parent directories that have not been generated yet.
+        Parse errors are reported as soon as they are found, so that they
+        are also reported to callers that stop the iteration early.
+        """
+        from corepkg.util import normalize_path
+        from corepkg.util import writemsg
 
         null_byte = "\0"
         normalize_needed = self._normalize_needed
@@ -2082,17 +2233,25 @@ class dblink:
         # used to generate parent dir entries
         dir_entry = ("dir",)
         eroot_split_len = len(self.settings["EROOT"].split(os.sep)) - 1
-        pos = 0
-        errors = []
-        for pos, line in enumerate(mylines):
+        seen = set()
+        errors = False
+
+        def parse_error(pos, e):
+            nonlocal errors
+            if not errors:
+                errors = True
+                writemsg(_("!!! Parse error in '%s'\n") % contents_file, noiselevel=-1)
+            writemsg(_("!!!   line %d: %s\n") % (pos, e), noiselevel=-1)
+
+        for pos, line in enumerate(lines):
             if null_byte in line:
                 # Null bytes are a common indication of corruption.
-                errors.append((pos + 1, _("Null byte found in CONTENTS entry")))
+                parse_error(pos + 1, _("Null byte found in CONTENTS entry"))
                 continue
             line = line.rstrip("\n")
             m = contents_re.match(line)
             if m is None:
-                errors.append((pos + 1, _("Unrecognized CONTENTS entry")))
+                parse_error(pos + 1, _("Unrecognized CONTENTS entry"))
                 continue
 
             if m.group(obj_index) is not None:
@@ -2135,19 +2294,14 @@ class dblink:
             path_split.pop()
             while len(path_split) > eroot_split_len:
                 parent = os.sep.join(path_split)
-                if parent in pkgfiles:
+                if parent in seen:
                     break
-                pkgfiles[parent] = dir_entry
+                seen.add(parent)
+                yield parent, dir_entry
                 path_split.pop()
 
-            pkgfiles[path] = data
-
-        if errors:
-            writemsg(_("!!! Parse error in '%s'\n") % contents_file, noiselevel=-1)
-            for pos, e in errors:
-                writemsg(_("!!!   line %d: %s\n") % (pos, e), noiselevel=-1)
-        self.contentscache = pkgfiles
-        return pkgfiles
+            seen.add(path)
+            yield path, data
 
     def quickpkg(
         self,
@@ -2826,6 +2980,16 @@ class dblink:
                 )
                 if infodir
             )
+            # Hash files ahead of the loop below, which unlinks them.
+            digest_prefetcher = DigestPrefetcher.create(
+                [
+                    normalize_path(objkey)
+                    for objkey in mykeys
+                    if pkgfiles[objkey][0] == "obj"
+                ],
+                functools.partial(perform_md5, calc_prelink=calc_prelink),
+            )
+
             infodirs_inodes = set()
             for infodir in infodirs:
                 infodir = os.path.join(real_root, infodir.lstrip(os.sep))
@@ -3050,8 +3214,11 @@ class dblink:
                         show_unmerge("---", unmerge_desc["!obj"], file_type, obj)
                         continue
                     mymd5 = None
+                    if digest_prefetcher is not None and perf_md5 is perform_md5:
+                        mymd5 = digest_prefetcher.get(obj, lstatobj)
                     try:
-                        mymd5 = perf_md5(obj, calc_prelink=calc_prelink)
+                        if mymd5 is None:
+                            mymd5 = perf_md5(obj, calc_prelink=calc_prelink)
                     except FileNotFound as e:
                         # the file has disappeared between now and our stat call
                         show_unmerge("---", unmerge_desc["!obj"], file_type, obj)
@@ -3077,6 +3244,9 @@ class dblink:
                 elif pkgfiles[objkey][0] == "dev":
                     show_unmerge("---", "", file_type, obj)
 
+            if digest_prefetcher is not None:
+                digest_prefetcher.close()
+
             self._unmerge_dirs(
                 mydirs, infodirs_inodes, protected_symlinks, unmerge_desc, unlink, os
             )
@@ -3976,6 +4146,15 @@ class dblink:
 
         plib_collisions = {}
 
+        # If the owners index exists, then look up the owners of existing
+        # files there, rather than in the CONTENTS of each package. The
+        # index is not created here, since that is only worthwhile for
+        # queries that search all installed packages.
+        vardb = self.vartree.dbapi
+        owner_cpvs = None
+        if vardb._owners_index.exists() and vardb._owners._use_index():
+            owner_cpvs = {str(x.mycpv) for x in mypkglist}
+
         showMessage = self._display_merge
         stopmerge = False
         collisions = []
@@ -4086,10 +4265,16 @@ class dblink:
 
             isowned = False
             full_path = os.path.join(destroot, f.lstrip(os.path.sep))
-            for ver in mypkglist:
-                if ver.isowner(f):
-                    isowned = True
-                    break
+            if owner_cpvs is not None:
+                for cpv, _path in vardb._owners_index.iter_owners([f]):
+                    if cpv in owner_cpvs:
+                        isowned = True
+                        break
+            else:
+                for ver in mypkglist:
+                    if ver.isowner(f):
+                        isowned = True
+                        break
             if not isowned and self.isprotected(full_path):
                 isowned = True
             if not isowned:
@@ -4169,7 +4354,7 @@ class dblink:
 
         file_paths = set()
         for dblnk in installed_instances:
-            file_paths.update(dblnk.getcontents())
+            file_paths.update(path for path, _data in dblnk.itercontents())
         inode_map = {}
         real_paths = set()
         for i, path in enumerate(file_paths):
@@ -4941,14 +5126,16 @@ class dblink:
                 msg.append("")
                 eerror(msg)
 
-                if len(collisions) > 20:
-                    # get_owners is slow for large numbers of files, so
-                    # don't look them all up.
-                    collisions = collisions[:20]
-
                 pkg_info_strs = {}
                 self.lockdb()
                 try:
+                    if (
+                        len(collisions) > 20
+                        and not self.vartree.dbapi._owners._use_index()
+                    ):
+                        # Without the owners index, get_owners is slow for
+                        # large numbers of files, so don't look them all up.
+                        collisions = collisions[:20]
                     owners = self.vartree.dbapi._owners.get_owners(collisions)
                     self.vartree.dbapi.flush_cache()
 
@@ -5525,6 +5712,73 @@ class dblink:
         2. None otherwise
 
         """
+        digest_prefetcher = None
+        if isinstance(stufftomerge, str):
+            digest_prefetcher = self._mergeme_digest_prefetcher(srcroot, stufftomerge)
+        try:
+            return self._mergeme(
+                srcroot,
+                destroot,
+                outfile,
+                secondhand,
+                stufftomerge,
+                cfgfiledict,
+                thismtime,
+                digest_prefetcher,
+            )
+        finally:
+            if digest_prefetcher is not None:
+                digest_prefetcher.close()
+
+    def _mergeme_digest_prefetcher(self, srcroot, stufftomerge):
+        """
+        Create a DigestPrefetcher for the regular files that _mergeme()
+        is going to hash when it merges the given directory, in the order
+        of its traversal, or return None if there are only a few files.
+        """
+        from corepkg.checksum import _perform_md5_merge as perform_md5
+        from corepkg.util import normalize_path
+
+        os = _os_merge
+        join = os.path.join
+        srcroot = normalize_path(srcroot).rstrip(os.sep) + os.sep
+        calc_prelink = "prelink-checksums" in self.settings.features
+
+        paths = []
+        try:
+            mergelist = [
+                join(stufftomerge, child)
+                for child in os.listdir(join(srcroot, stufftomerge))
+            ]
+            while mergelist:
+                relative_path = mergelist.pop()
+                path = join(srcroot, relative_path)
+                mode = os.lstat(path).st_mode
+                if stat.S_ISDIR(mode):
+                    mergelist.extend(
+                        join(relative_path, child) for child in os.listdir(path)
+                    )
+                elif stat.S_ISREG(mode):
+                    paths.append(path)
+        except (OSError, UnicodeError):
+            # Errors are reported by _mergeme().
+            pass
+
+        return DigestPrefetcher.create(
+            paths, functools.partial(perform_md5, calc_prelink=calc_prelink)
+        )
+
+    def _mergeme(
+        self,
+        srcroot,
+        destroot,
+        outfile,
+        secondhand,
+        stufftomerge,
+        cfgfiledict,
+        thismtime,
+        digest_prefetcher,
+    ):
         from hashlib import md5
         from corepkg.checksum import _perform_md5_merge as perform_md5
         from corepkg.eapi import eapi_rewrites_symlinks
@@ -5572,7 +5826,10 @@ class dblink:
             mymtime = mystat.st_mtime_ns
 
             if stat.S_ISREG(mymode):
-                mymd5 = perform_md5(mysrc, calc_prelink=calc_prelink)
+                if digest_prefetcher is not None:
+                    mymd5 = digest_prefetcher.get(mysrc, mystat)
+                if mymd5 is None:
+                    mymd5 = perform_md5(mysrc, calc_prelink=calc_prelink)
             elif stat.S_ISLNK(mymode):
                 # The file name of mysrc and the actual file that it points to
                 # will have earlier been forcefully converted to the 'merge'
@@ -100,8 +100,9 @@ class BinhostHandler:
         """
         errors = []
         bintree = self._bintree
+        compressed = {".gz": "compress-index", ".zst": "compress-index-zstd"}
         timestamps = {}
-        for suffix in ("", ".gz"):
+        for suffix in ("", *compressed):
             pkgindex_file = self._pkgindex_file + suffix
             try:
                 st = os.stat(pkgindex_file)
@@ -110,30 +111,26 @@ class BinhostHandler:
                 if e.errno == errno.ENOENT:
                     if suffix == "":
                         errors.append(f"Missing index file: {pkgindex_file}")
-                    elif (
-                        suffix == ".gz"
-                        and "compress-index" in bintree.settings.features
-                    ):
+                    elif compressed[suffix] in bintree.settings.features:
                         errors.append(f"Missing index file: {pkgindex_file}")
                 else:
                     raise
             else:
                 timestamps[suffix] = st[stat.ST_MTIME]
 
-        if "compress-index" in bintree.settings.features and len(timestamps) == 2:
-            if (
-                timestamps[""] is not None
-                and timestamps[".gz"] is not None
-                and timestamps[""] != timestamps[".gz"]
-            ):
+        for suffix, feature in compressed.items():
+            if feature in bintree.settings.features:
+                if (
+                    timestamps[""] is not None
+                    and timestamps[suffix] is not None
+                    and timestamps[""] != timestamps[suffix]
+                ):
+                    errors.append(
+                        f"Uncompressed index timestamp '{timestamps['']}' is not equal to compressed index timestamp '{timestamps[suffix]}'"
+                    )
+            elif timestamps[suffix] is not None:
                 errors.append(
-                    f"Uncompressed index timestamp '{timestamps['']}' is not equal to compressed index timestamp '{timestamps['.gz']}'"
-                )
-
-        if "compress-index" not in bintree.settings.features:
-            if timestamps[".gz"] is not None:
-                errors.append(
-                    f"Compressed index exists but 'compress-index' feature is disabled: {self._pkgindex_file}.gz"
+                    f"Compressed index exists but '{feature}' feature is disabled: {self._pkgindex_file}{suffix}"
                 )
 
         return errors
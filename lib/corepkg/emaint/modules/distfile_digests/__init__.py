@@ -0,0 +1,21 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+doc = """Check and prune the cache of verified distfile digests."""
+__doc__ = doc
+
+
+module_spec = {
+    "name": "distfile_digests",
+    "description": doc,
+    "provides": {
+        "module1": {
+            "name": "distfile-digests",
+            "sourcefile": "distfile_digests",
+            "class": "DistfileDigestsHandler",
+            "description": doc,
+            "functions": ["check", "fix"],
+            "func_desc": {},
+        }
+    },
+}
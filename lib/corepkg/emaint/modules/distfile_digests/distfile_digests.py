@@ -0,0 +1,98 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+
+import corepkg
+from corepkg import os
+from corepkg.checksum import hashfunc_keys, perform_checksums
+from corepkg.exception import CorepkgException
+from corepkg.package.ebuild._distfile_digests import DistfileDigestCache
+
+
+class DistfileDigestsHandler:
+    short_desc = "Check and prune the distfile digest cache"
+
+    @staticmethod
+    def name():
+        return "distfile-digests"
+
+    def __init__(self, cache=None):
+        if cache is None:
+            cache = DistfileDigestCache(
+                DistfileDigestCache.settings_filename(corepkg.settings)
+            )
+        self._cache = cache
+
+    def _scan(self, onProgress=None):
+        """
+        @rtype: tuple
+        @return: lists of (path, digests) of entries whose file is
+                missing, and of (path, stat, digests) of entries whose
+                file has changed since it was hashed
+        """
+        missing = []
+        changed = []
+        if not os.path.exists(self._cache.filename):
+            return missing, changed
+        entries = self._cache.entries()
+        maxval = len(entries)
+        if onProgress:
+            onProgress(maxval, 0)
+        for i, (path, key, digests) in enumerate(entries):
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                if e.errno not in (errno.ENOENT, errno.ESTALE, errno.ENOTDIR):
+                    raise
+                missing.append((path, digests))
+            else:
+                if DistfileDigestCache.stat_key(st) != key:
+                    changed.append((path, st, digests))
+            if onProgress:
+                onProgress(maxval, i + 1)
+        return missing, changed
+
+    def check(self, **kwargs):
+        missing, changed = self._scan(kwargs.get("onProgress"))
+        errors = [f"'{path}' does not exist" for path, _digests in missing]
+        errors.extend(
+            f"'{path}' has changed since it was hashed"
+            for path, _st, _digests in changed
+        )
+        if errors:
+            return (False, errors)
+        return (True, None)
+
+    def fix(self, **kwargs):
+        onProgress = kwargs.get("onProgress")
+        missing, changed = self._scan()
+        maxval = len(missing) + len(changed)
+        if onProgress:
+            onProgress(maxval, 0)
+        for i, (path, _digests) in enumerate(missing):
+            self._cache.discard(path)
+            if onProgress:
+                onProgress(maxval, i + 1)
+        errors = []
+        for i, (path, st, digests) in enumerate(changed, len(missing)):
+            # Only digests that were verified against a Manifest are
+            # cached, so the entry is kept only if the contents of the
+            # file are still the same, and otherwise the file is verified
+            # again by the next fetch.
+            hashes = [k for k in digests if k in hashfunc_keys]
+            try:
+                current = perform_checksums(path, hashes) if hashes else None
+            except (OSError, CorepkgException) as e:
+                errors.append(f"'{path}': {e}")
+                current = None
+            if current is not None and current == {k: digests[k] for k in hashes}:
+                self._cache.add(path, st, current)
+            else:
+                self._cache.discard(path)
+            if onProgress:
+                onProgress(maxval, i + 1)
+        self._cache.close()
+        if errors:
+            return (False, errors)
+        return (True, None)
@@ -15,10 +15,12 @@ from _emerge.Package import _all_metadata_keys
 
 import pickle
 import shlex
+import subprocess
 import sys
 import socket
 import time
 import tempfile
+import threading
 import base64
 import warnings
 
@@ -865,6 +867,124 @@ def _cmp_cpv(d1, d2):
     return -1
 
 
+def _zstd(data, *args):
+    """
+    Filter data through the zstd program, which is used to compress the
+    Packages.zst index.
+
+    @raise OSError: if zstd is not installed or fails
+    """
+    from corepkg.process import find_binary
+
+    zstd = find_binary("zstd")
+    if zstd is None:
+        raise FileNotFoundError("zstd: command not found")
+    proc = subprocess.run(
+        [zstd, "-q", "-c", *args],
+        input=data,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode != os.EX_OK:
+        raise OSError(
+            f"zstd failed: {_unicode_decode(proc.stderr, errors='replace').strip()}"
+        )
+    return proc.stdout
+
+
+def _zstd_compress(data):
+    # Higher levels compress the index only slightly better, but they are
+    # many times slower, and the index is written for each new package.
+    return _zstd(data, "-15", "-T0")
+
+
+class _ZstdDecompressFile:
+    """
+    An iterator over the lines of a Packages.zst index, decompressed by
+    a zstd -dc pipe while it is read, so that it does not have to be held
+    in memory at once. The compressed data is copied to the pipe by a
+    thread, since it may be read from a network connection.
+
+    @raise OSError: if zstd is not installed or fails
+    """
+
+    _bufsize = 65536
+
+    def __init__(self, fileobj):
+        from corepkg.process import find_binary
+
+        zstd = find_binary("zstd")
+        if zstd is None:
+            raise FileNotFoundError("zstd: command not found")
+        self._fileobj = fileobj
+        self._error = None
+        self._proc = subprocess.Popen(
+            [zstd, "-q", "-d", "-c"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._feeder.start()
+
+    def _feed(self):
+        stdin = self._proc.stdin
+        try:
+            while True:
+                data = self._fileobj.read(self._bufsize)
+                if not data:
+                    break
+                stdin.write(data)
+        except BrokenPipeError:
+            # zstd exited early, and the reader reports its error.
+            pass
+        except Exception as e:
+            self._error = e
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self._proc.stdout.readline()
+        if line:
+            return line
+        self._feeder.join()
+        if self._error is not None:
+            raise OSError(f"failed to read compressed index: {self._error}")
+        if self._proc.wait() != os.EX_OK:
+            stderr = self._proc.stderr.read()
+            raise OSError(
+                f"zstd failed: {_unicode_decode(stderr, errors='replace').strip()}"
+            )
+        raise StopIteration
+
+    def close(self):
+        """
+        Terminate zstd if the index was not read completely, and close
+        the compressed file object.
+        """
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.wait()
+        self._proc.stdout.close()
+        self._proc.stderr.close()
+        self._fileobj.close()
+
+
+def _digest_lines(lines, digest):
+    """
+    Generate lines of bytes, and update digest with them.
+    """
+    for line in lines:
+        digest.update(line)
+        yield line
+
+
 class PackageIndex:
     def __init__(
         self,
@@ -899,17 +1019,17 @@ class PackageIndex:
             d = self._pkg_slot_dict()
             allowed_keys = d.allowed_keys
 
+        read_translation_map = self._read_translation_map
         for line in pkgfile:
-            line = line.rstrip("\n")
-            if not line:
+            if line == "\n" or not line:
                 break
-            line = line.split(":", 1)
-            if not len(line) == 2:
+            # Use partition, since this is called for every line of
+            # indexes with many thousands of entries.
+            k, sep, v = line.partition(":")
+            if not sep:
                 continue
-            k, v = line
-            if v:
-                v = v[1:]
-            k = self._read_translation_map.get(k, k)
+            v = v.rstrip("\n")[1:]
+            k = read_translation_map.get(k, k)
             if allowed_keys is not None and k not in allowed_keys:
                 continue
             d[k] = v
@@ -928,6 +1048,14 @@ class PackageIndex:
         self.header.update(self._readpkgindex(pkgfile, pkg_entry=False))
 
     def readBody(self, pkgfile):
+        self.packages.extend(self.iterBody(pkgfile))
+
+    def iterBody(self, pkgfile):
+        """
+        Generate the package entries of pkgfile as they are read, so
+        that they can be processed while the rest of the index is
+        still being downloaded and decompressed.
+        """
         while True:
             d = self._readpkgindex(pkgfile)
             if not d:
@@ -943,7 +1071,7 @@ class PackageIndex:
                     v = self.header.get(k)
                     if v:
                         d.setdefault(k, v)
-            self.packages.append(d)
+            yield d
 
     def write(self, pkgfile):
         if self.modified:
@@ -0,0 +1,291 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import fcntl
+import shlex
+
+from corepkg import _encodings, _unicode_encode, os
+from corepkg.util._eventloop.global_event_loop import global_event_loop
+
+
+class DependWorkerPool:
+    """
+    A pool of persistent bash processes (see ebuild-depend-worker.sh)
+    which evaluate the "depend" phase of ebuilds, for regeneration of
+    metadata. Each worker sources ebuild.sh in a forked subshell for
+    each ebuild, which is much cheaper than the fork and exec of a new
+    bash process by corepkg. The workers are started on demand, and
+    each worker processes one ebuild at a time.
+
+    The environment of each ebuild is prepared by doebuild, in the same
+    way as for a new process. A worker is only used for an ebuild if it
+    would be spawned with the same options as the worker itself, and
+    otherwise spawn() returns None, so that a new process is spawned
+    instead.
+
+    Eclasses are not preloaded by the workers. An eclass that is
+    preloaded as the body of a function still has to define all of its
+    functions for each ebuild, which costs nearly as much as parsing it,
+    since bash copies each function definition, and a larger worker
+    makes the fork of each subshell more expensive.
+    """
+
+    _opt_name = "ebuild-depend-worker"
+
+    def __init__(self):
+        self._idle = []
+        self._workers = []
+        self._spawn_func = None
+        self._keywords = None
+
+    def spawn(self, settings, spawn_func, env, **keywords):
+        """
+        Evaluate the "depend" phase in a worker, instead of spawning
+        a new ebuild.sh process with spawn_func(..., env=env, **keywords).
+
+        @rtype: DependWorkerProcess or None
+        @return: the process of the request, or None if the workers can
+                not be used with the given options
+        """
+        if not keywords.pop("returnproc", False) or keywords.pop("returnpid", False):
+            return None
+        fd_pipes = keywords.pop("fd_pipes", None) or {}
+        keywords.pop("opt_name", None)
+        try:
+            pipe_fd = int(env["PORTAGE_PIPE_FD"])
+        except (KeyError, ValueError):
+            return None
+        stdio = {fd: fd_pipes.get(fd) for fd in (1, 2)}
+        if set(fd_pipes).difference((0, 1, 2, pipe_fd)) or pipe_fd not in fd_pipes:
+            return None
+        keywords["stdio"] = stdio
+
+        if self._spawn_func is None:
+            self._spawn_func = spawn_func
+            self._keywords = keywords
+        elif spawn_func is not self._spawn_func or keywords != self._keywords:
+            return None
+
+        if self._idle:
+            worker = self._idle.pop()
+        else:
+            worker = self._start_worker(settings, env)
+        return worker.request(env, fd_pipes[pipe_fd])
+
+    def _start_worker(self, settings, env):
+        keywords = dict(self._keywords)
+        stdio = keywords.pop("stdio")
+        request_r, request_w = os.pipe()
+        result_r, result_w = os.pipe()
+        fd_pipes = {0: request_r, 3: result_w}
+        fd_pipes.update(
+            (fd, target) for fd, target in stdio.items() if target is not None
+        )
+        try:
+            proc = self._spawn_func(
+                shlex.quote(
+                    os.path.join(
+                        settings["PORTAGE_BIN_PATH"], "ebuild-depend-worker.sh"
+                    )
+                ),
+                env=env,
+                fd_pipes=fd_pipes,
+                opt_name=self._opt_name,
+                returnproc=True,
+                **keywords,
+            )
+        finally:
+            os.close(request_r)
+            os.close(result_w)
+        worker = _DependWorker(proc, request_w, result_r, self._idle)
+        self._workers.append(worker)
+        return worker
+
+    async def async_close(self):
+        """
+        Stop the workers, after their current requests, and wait for
+        them to exit.
+        """
+        workers = self._workers
+        self._workers = []
+        del self._idle[:]
+        for worker in workers:
+            worker.close()
+        for worker in workers:
+            await worker.async_wait()
+
+
+class _DependWorker:
+    def __init__(self, proc, request_fd, result_fd, idle):
+        self._proc = proc
+        self._idle = idle
+        self._request_fd = request_fd
+        self._result_fd = result_fd
+        self._buf = b""
+        self._request = None
+        self._loop = global_event_loop()
+        fcntl.fcntl(
+            result_fd,
+            fcntl.F_SETFL,
+            fcntl.fcntl(result_fd, fcntl.F_GETFL) | os.O_NONBLOCK,
+        )
+        self._loop.add_reader(result_fd, self._output_handler)
+
+    def request(self, env, pipe_fd):
+        request = DependWorkerProcess(self._proc.pid, os.dup(pipe_fd))
+        self._request = request
+        data = b"".join(
+            _unicode_encode(
+                f"{key}={value}\0", encoding=_encodings["fs"], errors="strict"
+            )
+            for key, value in env.items()
+            if key != "PORTAGE_PIPE_FD"
+        )
+        try:
+            _write_all(self._request_fd, data + b"\0")
+        except OSError:
+            self._exit()
+        return request
+
+    def _output_handler(self):
+        try:
+            buf = os.read(self._result_fd, 65536)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            buf = b""
+        if not buf:
+            self._exit()
+            return
+        data, sep, status = (self._buf + buf).partition(b"\0")
+        if self._request is not None and data:
+            self._request.write(data)
+        if not sep:
+            self._buf = b""
+            return
+        if b"\n" not in status:
+            self._buf = sep + status
+            return
+        status, _, self._buf = status.partition(b"\n")
+        request = self._request
+        self._request = None
+        if self._request_fd is None:
+            # The pool was closed during the request.
+            self._close_result()
+        else:
+            self._idle.append(self)
+        request.finish(int(status))
+
+    def _exit(self):
+        """
+        Handle termination of the worker, which is unexpected unless
+        the request fd was closed.
+        """
+        self._close_result()
+        if self in self._idle:
+            self._idle.remove(self)
+        request = self._request
+        self._request = None
+        self.close()
+        if request is not None:
+            request.finish(1)
+
+    def _close_result(self):
+        if self._result_fd is not None:
+            self._loop.remove_reader(self._result_fd)
+            os.close(self._result_fd)
+            self._result_fd = None
+
+    def close(self):
+        """
+        Stop the worker, after the current request if there is one.
+        """
+        if self._request_fd is not None:
+            os.close(self._request_fd)
+            self._request_fd = None
+        if self._request is None:
+            self._close_result()
+
+    async def async_wait(self):
+        return await self._proc.wait()
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+class DependWorkerProcess:
+    """
+    A request that is processed by a worker, which provides the parts
+    of the corepkg.process.Process interface that are used by
+    EbuildMetadataPhase. The metadata is written to the pipe of the
+    caller, which is closed when the request is finished. The pid is
+    the one of the worker, so that cancellation of the request
+    terminates the worker, and the request fails.
+    """
+
+    def __init__(self, pid, pipe_fd):
+        self.pid = pid
+        self.returncode = None
+        self._pipe_fd = pipe_fd
+        self._pending = b""
+        self._finished = False
+        self._loop = global_event_loop()
+        self._exit_waiter = self._loop.create_future()
+        fcntl.fcntl(
+            pipe_fd,
+            fcntl.F_SETFL,
+            fcntl.fcntl(pipe_fd, fcntl.F_GETFL) | os.O_NONBLOCK,
+        )
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.pid}>"
+
+    def write(self, data):
+        if self._pipe_fd is None:
+            return
+        if self._pending:
+            self._pending += data
+            return
+        self._pending = data
+        self._flush()
+
+    def _flush(self):
+        try:
+            while self._pending:
+                self._pending = self._pending[os.write(self._pipe_fd, self._pending) :]
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                # The reader has gone away.
+                self._pending = b""
+            else:
+                self._loop.add_writer(self._pipe_fd, self._writer_handler)
+                return
+        if self._finished:
+            self._close_pipe()
+
+    def _writer_handler(self):
+        self._loop.remove_writer(self._pipe_fd)
+        self._flush()
+
+    def finish(self, returncode):
+        """
+        Called by the worker when the request is finished.
+        """
+        self.returncode = returncode
+        self._finished = True
+        if not self._exit_waiter.done():
+            self._exit_waiter.set_result(returncode)
+        if not self._pending:
+            self._close_pipe()
+
+    def _close_pipe(self):
+        if self._pipe_fd is not None:
+            os.close(self._pipe_fd)
+            self._pipe_fd = None
+
+    async def wait(self):
+        return await self._exit_waiter
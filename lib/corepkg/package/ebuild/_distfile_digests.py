@@ -0,0 +1,169 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import json
+
+from corepkg import os
+from corepkg.const import CACHE_PATH
+from corepkg.util._sqlite import SqliteDatabase
+
+
+class DistfileDigestCache(SqliteDatabase):
+    """
+    A persistent cache of distfile digests that have been verified against
+    a Manifest, so that distfiles which have not changed since they were
+    verified are not read and hashed again by every fetch.
+
+    Entries are keyed on the path of the distfile, and are only valid as
+    long as its inode, size, mtime and ctime are the same as when it was
+    hashed. Since any modification of the file changes its ctime, a stat
+    change invalidates the entry. A digest is only stored if the stat of
+    the file after hashing is the same as before, so that files which are
+    modified while they are hashed are never cached.
+
+    The cache is an sqlite database in the local CACHE_PATH, rather than
+    in DISTDIR, since sqlite locking is unreliable on network filesystems.
+    If sqlite is unavailable, or the database can not be opened, the cache
+    is disabled, and all digests are verified as usual.
+    """
+
+    _description = "distfile digest cache"
+    _tables = ("digests",)
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        @rtype: DistfileDigestCache or None
+        @return: a cache, or None if FEATURES=distfile-digest-cache is
+                not enabled
+        """
+        if "distfile-digest-cache" not in settings.features:
+            return None
+        return cls(cls.settings_filename(settings))
+
+    @staticmethod
+    def settings_filename(settings):
+        return os.path.join(settings["EROOT"], CACHE_PATH, "distfile_digests.sqlite")
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def _create_tables(self, connection):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS digests "
+            "(path TEXT PRIMARY KEY, ino INTEGER NOT NULL, "
+            "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "ctime_ns INTEGER NOT NULL, digests TEXT NOT NULL)"
+        )
+
+    @staticmethod
+    def stat_key(st):
+        return (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+    @staticmethod
+    def _load_digests(value):
+        try:
+            digests = json.loads(value)
+        except ValueError:
+            return {}
+        return digests if isinstance(digests, dict) else {}
+
+    def _get_entry(self, connection, path):
+        row = connection.execute(
+            "SELECT ino, size, mtime_ns, ctime_ns, digests FROM digests "
+            "WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            return None, {}
+        return tuple(row[:4]), self._load_digests(row[4])
+
+    def get(self, path, st):
+        """
+        Return the cached digests of the given path, or an empty dict if
+        there are none, or the file has changed since it was hashed.
+
+        @param st: the current stat result of path
+        @type st: os.stat_result
+        @rtype: dict
+        """
+        connection = self._connect()
+        if connection is None:
+            return {}
+        try:
+            key, digests = self._get_entry(connection, path)
+        except self._db_error as e:
+            self._disable(e)
+            return {}
+        if key != self.stat_key(st):
+            return {}
+        return digests
+
+    def add(self, path, st, digests):
+        """
+        Store digests which have been verified for the given path. They
+        are merged with the cached digests of the same file, and are
+        discarded if the file has changed since st was obtained.
+
+        @param st: the stat result of path before it was hashed
+        @type st: os.stat_result
+        @param digests: a dict of hash names and hex digests
+        @type digests: dict
+        """
+        digests = {k: v for k, v in digests.items() if k != "size"}
+        if not digests:
+            return
+        try:
+            if self.stat_key(os.stat(path)) != self.stat_key(st):
+                return
+        except OSError:
+            return
+        connection = self._connect()
+        if connection is None:
+            return
+        key = self.stat_key(st)
+        try:
+            with connection:
+                old_key, old_digests = self._get_entry(connection, path)
+                if old_key == key:
+                    old_digests.update(digests)
+                    digests = old_digests
+                connection.execute(
+                    "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                    (path,) + key + (json.dumps(digests, sort_keys=True),),
+                )
+        except self._db_error as e:
+            self._disable(e)
+
+    def discard(self, path):
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            with connection:
+                connection.execute("DELETE FROM digests WHERE path = ?", (path,))
+        except self._db_error as e:
+            self._disable(e)
+
+    def entries(self):
+        """
+        @rtype: list
+        @return: (path, stat key, digests) tuples of all cached files,
+                sorted by path
+        """
+        connection = self._connect()
+        if connection is None:
+            return []
+        try:
+            result = [
+                (row[0], tuple(row[1:5]), self._load_digests(row[5]))
+                for row in connection.execute(
+                    "SELECT path, ino, size, mtime_ns, ctime_ns, digests "
+                    "FROM digests ORDER BY path"
+                )
+            ]
+        except self._db_error as e:
+            self._disable(e)
+            return []
+        return result
@@ -0,0 +1,638 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import asyncio
+import base64
+import ssl
+import time
+from urllib.parse import unquote, urljoin, urlsplit
+
+import corepkg
+from corepkg import os
+from corepkg.localization import _
+from corepkg.util import writemsg
+
+
+class _HttpError(Exception):
+    pass
+
+
+class _Connection:
+    __slots__ = ("key", "reader", "writer")
+
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class _Response:
+    """
+    The status and headers of a response, and a reader for its body.
+    The connection is returned to the pool of the fetcher once the body
+    has been read completely, or closed if close() is called before.
+    """
+
+    def __init__(self, fetcher, connection, status, reason, headers, method):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._fetcher = fetcher
+        self._connection = connection
+        self._chunked = False
+        self._remaining = None
+        self._until_close = False
+        self._keep_alive = headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            self._remaining = 0
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            self._chunked = True
+        elif "content-length" in headers:
+            try:
+                self._remaining = int(headers["content-length"])
+            except ValueError:
+                raise _HttpError(_("invalid Content-Length header"))
+        else:
+            self._until_close = True
+            self._keep_alive = False
+        if self._remaining == 0:
+            self._finish()
+
+    @property
+    def content_length(self):
+        if self._chunked or self._until_close:
+            return None
+        return self._remaining
+
+    def _finish(self):
+        if self._connection is not None:
+            self._fetcher._release(self._connection, reuse=self._keep_alive)
+            self._connection = None
+
+    def close(self):
+        """
+        Close the connection, unless the body has been read completely.
+        """
+        if self._connection is not None:
+            self._fetcher._release(self._connection, reuse=False)
+            self._connection = None
+
+    async def _read(self, size):
+        data = await asyncio.wait_for(
+            self._connection.reader.read(size), self._fetcher.timeout
+        )
+        if not data and not self._until_close:
+            raise _HttpError(_("connection closed before the end of the response"))
+        return data
+
+    async def _readline(self):
+        line = await self._fetcher._readline(self._connection)
+        if not line.endswith(b"\n"):
+            raise _HttpError(_("connection closed before the end of the response"))
+        return line
+
+    async def iter_body(self):
+        """
+        Generate the chunks of the body, without transfer encoding.
+        """
+        blocksize = self._fetcher.blocksize
+        if self._chunked:
+            while self._connection is not None:
+                line = await self._readline()
+                try:
+                    size = int(line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise _HttpError(_("invalid chunk size"))
+                if size == 0:
+                    # Discard trailers.
+                    while (await self._readline()).strip():
+                        pass
+                    self._finish()
+                    break
+                while size:
+                    data = await self._read(min(size, blocksize))
+                    size -= len(data)
+                    yield data
+                await self._readline()
+        elif self._until_close:
+            while self._connection is not None:
+                data = await self._read(blocksize)
+                if not data:
+                    self._finish()
+                    break
+                yield data
+        else:
+            while self._remaining:
+                data = await self._read(min(self._remaining, blocksize))
+                self._remaining -= len(data)
+                if not self._remaining:
+                    self._finish()
+                yield data
+
+    async def discard(self):
+        """
+        Read and discard the body, so that the connection can be reused.
+        """
+        async for _data in self.iter_body():
+            pass
+
+
+class HttpFetcher:
+    """
+    A fetcher for http and https URIs, which downloads files in the
+    calling process instead of spawning FETCHCOMMAND for each URI.
+
+    Idle connections are kept in a pool for each host, so that files
+    which are fetched from the same mirror reuse a connection and its
+    TLS session, and the number of concurrent connections per host is
+    bounded. Partial downloads are resumed with a range request, and
+    large files are downloaded in parallel segments by separate range
+    requests if the server supports them. If a segmented download
+    fails, the file is truncated to the data that was received
+    contiguously from its start, so that it can be resumed later.
+    Optionally, the total rate at which data is received by all
+    downloads of the fetcher is limited.
+    """
+
+    blocksize = 256 * 1024
+    max_redirects = 10
+    # Segments smaller than this are not worth an extra connection.
+    segment_min_size = 8 * 1024 * 1024
+
+    _default_ports = {"http": 80, "https": 443}
+    _redirect_status = (301, 302, 303, 307, 308)
+
+    def __init__(
+        self,
+        segments=4,
+        max_host_connections=None,
+        timeout=60,
+        ssl_context=None,
+        rate_limit=None,
+    ):
+        """
+        @param segments: maximum number of parallel range requests for
+                one file
+        @type segments: int
+        @param max_host_connections: maximum number of concurrent
+                connections to one host, which defaults to the number of
+                segments
+        @type max_host_connections: int
+        @param timeout: timeout in seconds for connecting, and for each
+                read from a connection
+        @type timeout: int
+        @param rate_limit: maximum number of bytes per second that are
+                received by all downloads, or None for no limit
+        @type rate_limit: int
+        """
+        self.segments = max(1, segments)
+        if max_host_connections is None:
+            max_host_connections = self.segments
+        self.max_host_connections = max(1, max_host_connections)
+        self.timeout = timeout
+        self.user_agent = f"corepkg/{corepkg.VERSION}"
+        self._ssl_context = ssl_context
+        self.rate_limit = rate_limit or None
+        self._rate_time = None
+        self._idle = {}
+        self._semaphores = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        @rtype: HttpFetcher or None
+        @return: a fetcher, or None if FEATURES=native-fetch is not
+                enabled, or the configuration requires FETCHCOMMAND
+        """
+        if "native-fetch" not in settings.features:
+            return None
+        # Proxies and SELinux fetch contexts are only supported by
+        # FETCHCOMMAND.
+        if settings.selinux_enabled():
+            return None
+        for var in ("http_proxy", "https_proxy", "all_proxy"):
+            if (
+                settings.get(var)
+                or settings.get(var.upper())
+                or os.environ.get(var)
+                or os.environ.get(var.upper())
+            ):
+                return None
+
+        segments = 4
+        v = settings.get("PORTAGE_FETCH_SEGMENTS")
+        if v:
+            try:
+                segments = int(v)
+            except ValueError:
+                writemsg(
+                    _(
+                        "!!! Variable PORTAGE_FETCH_SEGMENTS"
+                        " contains non-integer value: '%s'\n"
+                    )
+                    % v,
+                    noiselevel=-1,
+                )
+
+        # This is imported here since fetch imports this module.
+        from corepkg.package.ebuild.fetch import (
+            _fetch_resume_size_re,
+            _size_suffix_map,
+        )
+
+        rate_limit = None
+        v = "".join(settings.get("PORTAGE_FETCH_RATE_LIMIT", "").split())
+        if v:
+            match = _fetch_resume_size_re.match(v)
+            if match is None or match.group(2).upper() not in _size_suffix_map:
+                writemsg(
+                    _(
+                        "!!! Variable PORTAGE_FETCH_RATE_LIMIT"
+                        " contains an unrecognized format: '%s'\n"
+                    )
+                    % v,
+                    noiselevel=-1,
+                )
+            else:
+                rate_limit = (
+                    int(match.group(1)) * 2 ** _size_suffix_map[match.group(2).upper()]
+                )
+        if rate_limit and "PORTAGE_PARALLEL_FETCHONLY" in settings:
+            # The limit is shared by the concurrent jobs of the
+            # parallel-fetch queue.
+            try:
+                fetch_jobs = int(settings.get("PORTAGE_FETCH_JOBS", "1"))
+            except ValueError:
+                fetch_jobs = 1
+            rate_limit = max(1, rate_limit // max(1, fetch_jobs))
+        return cls(segments=segments, rate_limit=rate_limit)
+
+    def _get_ssl_context(self):
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
+
+    async def _acquire(self, key):
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(
+                self.max_host_connections
+            )
+        await semaphore.acquire()
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if connection.reader.at_eof():
+                connection.close()
+                continue
+            return connection, True
+        scheme, host, port = key
+        try:
+            if scheme == "https":
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        host,
+                        port,
+                        ssl=self._get_ssl_context(),
+                        server_hostname=host,
+                    ),
+                    self.timeout,
+                )
+            else:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), self.timeout
+                )
+        except BaseException:
+            semaphore.release()
+            raise
+        return _Connection(key, reader, writer), False
+
+    def _release(self, connection, reuse):
+        if reuse and not connection.reader.at_eof():
+            self._idle.setdefault(connection.key, []).append(connection)
+        else:
+            connection.close()
+        self._semaphores[connection.key].release()
+
+    async def close(self):
+        """
+        Close all idle connections.
+        """
+        for idle in self._idle.values():
+            for connection in idle:
+                connection.close()
+        self._idle.clear()
+
+    def _request_head(self, method, parts, headers):
+        host = parts.hostname
+        host_header = f"[{host}]" if ":" in host else host
+        if parts.port is not None and parts.port != self._default_ports[parts.scheme]:
+            host_header = f"{host_header}:{parts.port}"
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {host_header}",
+            f"User-Agent: {self.user_agent}",
+            "Accept: */*",
+            "Accept-Encoding: identity",
+            "Connection: keep-alive",
+        ]
+        if parts.username is not None:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            lines.append(
+                "Authorization: Basic "
+                + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+            )
+        for name, value in headers.items():
+            if any(c in f"{name}{value}" for c in ("\r", "\n", "\x00")):
+                raise _HttpError(_("invalid header '%s'") % name)
+            lines.append(f"{name}: {value}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _request(self, method, url, headers):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+            scheme = None
+        if scheme not in self._default_ports or not parts.hostname:
+            raise _HttpError(_("unsupported URI"))
+        parts = parts._replace(scheme=scheme)
+        key = (scheme, parts.hostname, port or self._default_ports[scheme])
+        request = self._request_head(method, parts, headers)
+
+        # A request on an idle connection is retried once on a new
+        # connection, since the server may have closed it meanwhile.
+        for attempt in range(2):
+            connection, reused = await self._acquire(key)
+            try:
+                connection.writer.write(request)
+                await asyncio.wait_for(connection.writer.drain(), self.timeout)
+                line = await self._readline(connection)
+                if not line:
+                    raise ConnectionResetError(_("connection closed by server"))
+                status, reason, headers_in = await self._read_head(connection, line)
+            except (OSError, EOFError, _HttpError):
+                self._release(connection, reuse=False)
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                self._release(connection, reuse=False)
+                raise
+            try:
+                return _Response(self, connection, status, reason, headers_in, method)
+            except _HttpError:
+                self._release(connection, reuse=False)
+                raise
+
+    async def _readline(self, connection):
+        try:
+            return await asyncio.wait_for(connection.reader.readline(), self.timeout)
+        except (ValueError, asyncio.LimitOverrunError):
+            # The line exceeds the buffer limit of the reader.
+            raise _HttpError(_("line too long in response"))
+
+    async def _read_head(self, connection, line):
+        try:
+            version, status, reason = (
+                line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""]
+            )[:3]
+            status = int(status)
+        except ValueError:
+            raise _HttpError(_("invalid response"))
+        if not version.startswith("HTTP/"):
+            raise _HttpError(_("invalid response"))
+        headers = {}
+        while True:
+            line = await self._readline(connection)
+            if not line.endswith(b"\n"):
+                raise _HttpError(_("connection closed before the end of the response"))
+            line = line.decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        if status == 100:
+            line = await self._readline(connection)
+            return await self._read_head(connection, line)
+        return status, reason, headers
+
+    async def fetch(self, uri, path, headers=None, resume=False, stats=None):
+        """
+        Download uri to path, and display a message if an error occurs.
+
+        @param headers: additional request headers
+        @type headers: dict
+        @param resume: resume the download of a partial file at path
+        @type resume: bool
+        @param stats: if not None, the time to first byte in seconds is
+                stored as "ttfb" once the response headers are received
+        @type stats: dict
+        @rtype: int
+        @return: os.EX_OK on success, and 1 otherwise
+        """
+        try:
+            await self._fetch(uri, path, dict(headers or {}), resume, stats)
+        except (OSError, EOFError, asyncio.TimeoutError, _HttpError) as e:
+            writemsg(_("!!! Download failed: %s\n") % (e,), noiselevel=-1)
+            return 1
+        return os.EX_OK
+
+    async def _fetch(self, uri, path, headers, resume, stats):
+        start_time = time.monotonic()
+        offset = 0
+        if resume:
+            try:
+                offset = os.stat(path).st_size
+            except FileNotFoundError:
+                pass
+
+        url = uri
+        for _i in range(self.max_redirects + 1):
+            request_headers = dict(headers)
+            if offset or self.segments > 1:
+                # A range request for the whole file tells whether the
+                # server supports ranges.
+                request_headers["Range"] = f"bytes={offset}-"
+            response = await self._request("GET", url, request_headers)
+            if response.status not in self._redirect_status:
+                break
+            location = response.headers.get("location")
+            await response.discard()
+            if not location:
+                raise _HttpError(
+                    _("HTTP error %d %s") % (response.status, response.reason)
+                )
+            new_url = urljoin(url, location)
+            # Credentials are not sent to a different host.
+            if urlsplit(new_url).netloc != urlsplit(url).netloc:
+                headers = {
+                    k: v for k, v in headers.items() if k.lower() != "authorization"
+                }
+            url = new_url
+        else:
+            raise _HttpError(_("too many redirects"))
+        if stats is not None:
+            stats["ttfb"] = time.monotonic() - start_time
+
+        try:
+            await self._receive(response, url, headers, path, offset)
+        finally:
+            response.close()
+
+    @staticmethod
+    def _parse_content_range(value):
+        """
+        @return: (start, end, total) where end is exclusive, and total is
+                None if it is unknown
+        """
+        try:
+            unit, _sep, spec = value.partition(" ")
+            byte_range, _sep, total = spec.partition("/")
+            start, _sep, end = byte_range.partition("-")
+            if unit != "bytes":
+                raise ValueError(value)
+            return (
+                int(start),
+                int(end) + 1,
+                None if total == "*" else int(total),
+            )
+        except (AttributeError, ValueError):
+            raise _HttpError(_("invalid Content-Range header"))
+
+    async def _receive(self, response, url, headers, path, offset):
+        if response.status == 416 and offset:
+            # The file is complete already.
+            total = response.headers.get("content-range", "").rpartition("/")[2]
+            await response.discard()
+            if total == str(offset):
+                return
+        end = None
+        if response.status == 200:
+            start = 0
+            total = response.content_length
+        elif response.status == 206:
+            start, end, total = self._parse_content_range(
+                response.headers.get("content-range")
+            )
+            if start != offset:
+                raise _HttpError(_("unexpected Content-Range header"))
+        else:
+            raise _HttpError(_("HTTP error %d %s") % (response.status, response.reason))
+
+        flags = os.O_WRONLY | os.O_CREAT
+        if not start:
+            flags |= os.O_TRUNC
+        fd = os.open(path, flags, 0o666)
+        try:
+            segments = []
+            if response.status == 206 and total is not None and end == total:
+                segments = self._plan_segments(start, total)
+            if len(segments) > 1:
+                await self._fetch_segments(response, url, headers, fd, segments)
+            else:
+                pos = await self._write_body(response, fd, start)
+                if total is not None and pos != total:
+                    raise _HttpError(_("incomplete download"))
+        finally:
+            os.close(fd)
+
+    def _plan_segments(self, start, total):
+        count = min(self.segments, (total - start) // self.segment_min_size)
+        if count < 2:
+            return []
+        size = (total - start) // count
+        bounds = [start + i * size for i in range(count)] + [total]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    async def _throttle(self, size):
+        """
+        Delay the caller as long as the data received so far exceeds
+        rate_limit. Up to one second of unused rate is carried over, so
+        that short pauses do not reduce the average rate.
+        """
+        if self.rate_limit is None:
+            return
+        now = time.monotonic()
+        start = now if self._rate_time is None else max(self._rate_time, now - 1)
+        self._rate_time = start + size / self.rate_limit
+        delay = self._rate_time - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _write_body(self, response, fd, pos, end=None, progress=None, index=0):
+        """
+        Write the body of a response to fd at pos, until end if it is not
+        None, and return the position after the last byte written.
+        """
+        body = response.iter_body()
+        try:
+            async for data in body:
+                if end is not None and pos + len(data) > end:
+                    data = data[: end - pos]
+                view = memoryview(data)
+                while view:
+                    written = os.pwrite(fd, view, pos)
+                    view = view[written:]
+                    pos += written
+                    if progress is not None:
+                        progress[index] = pos
+                await self._throttle(len(data))
+                if end is not None and pos >= end:
+                    break
+        finally:
+            await body.aclose()
+        return pos
+
+    async def _fetch_segments(self, response, url, headers, fd, segments):
+        progress = [start for start, _end in segments]
+
+        async def fetch_segment(index, response):
+            start, end = segments[index]
+            if response is None:
+                response = await self._request(
+                    "GET", url, dict(headers, Range=f"bytes={start}-{end - 1}")
+                )
+            try:
+                if response.status != 206:
+                    raise _HttpError(
+                        _("HTTP error %d %s") % (response.status, response.reason)
+                    )
+                content_range = response.headers.get("content-range")
+                if index and self._parse_content_range(content_range)[0] != start:
+                    raise _HttpError(_("unexpected Content-Range header"))
+                pos = await self._write_body(response, fd, start, end, progress, index)
+            finally:
+                response.close()
+            if pos != end:
+                raise _HttpError(_("incomplete download"))
+
+        tasks = [asyncio.ensure_future(fetch_segment(0, response))]
+        tasks.extend(
+            asyncio.ensure_future(fetch_segment(i, None))
+            for i in range(1, len(segments))
+        )
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Keep the data that was received contiguously from the start
+            # of the file, so that the download can be resumed.
+            size = segments[0][0]
+            for (start, end), pos in zip(segments, progress):
+                size = pos
+                if pos != end:
+                    break
+            os.ftruncate(fd, size)
+            raise
@@ -0,0 +1,187 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import json
+import time
+from urllib.parse import urlparse
+
+from corepkg import os
+from corepkg.util import atomic_ofstream
+
+
+class MirrorHealth:
+    """
+    A persistent table of the recent health of each mirror, which is used
+    to try the mirrors that are expected to be the fastest first.
+
+    For each mirror, an exponentially weighted moving average of the
+    throughput, the time to first byte, and the error rate of transfers
+    is stored in a json file in DISTDIR, next to the mirror layout cache,
+    so that it is shared by the hosts that share a DISTDIR. Statistics
+    that have not been updated for max_age seconds are ignored, so that
+    a mirror that was degraded is tried again eventually.
+
+    The expected cost of a mirror is the time to first byte plus the time
+    to transfer reference_size bytes, plus error_penalty weighted by the
+    error rate. Mirrors without statistics are assumed to have the median
+    cost of the known mirrors, and mirrors with the same cost keep their
+    order, so that the configured order is a tie breaker.
+    """
+
+    alpha = 0.3
+    max_age = 7 * 86400
+    # Transfers of smaller files are dominated by latency.
+    min_throughput_size = 64 * 1024
+    reference_size = 4 * 1024 * 1024
+    # Roughly the time that is wasted by a failed attempt.
+    error_penalty = 60.0
+
+    def __init__(self, filename):
+        self._filename = filename
+        self._entries = self._load()
+        self._updated = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        @rtype: MirrorHealth or None
+        @return: a table, or None if FEATURES=adaptive-mirrors is not
+                enabled
+        """
+        if "adaptive-mirrors" not in settings.features:
+            return None
+        return cls(os.path.join(settings["DISTDIR"], ".mirror-health.json"))
+
+    def _load(self):
+        try:
+            with open(self._filename) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return {
+            k: v
+            for k, v in entries.items()
+            if isinstance(v, dict) and isinstance(v.get("time"), (int, float))
+        }
+
+    @staticmethod
+    def mirror_key(uri):
+        """
+        @return: the scheme and network location of a remote uri, without
+                credentials, or None for local paths
+        """
+        try:
+            parsed = urlparse(uri)
+            port = parsed.port
+        except ValueError:
+            return None
+        if parsed.scheme in ("", "file") or not parsed.hostname:
+            return None
+        key = f"{parsed.scheme}://{parsed.hostname}"
+        if port is not None:
+            key = f"{key}:{port}"
+        return key
+
+    def _entry(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None or now - entry.get("time", 0) > self.max_age:
+            return None
+        return entry
+
+    def _average(self, old, value):
+        if old is None:
+            return value
+        return old + self.alpha * (value - old)
+
+    def record(self, uri, success, elapsed=None, size=0, ttfb=None, now=None):
+        """
+        Update the statistics of the mirror of uri after a transfer.
+
+        @param success: whether the transfer succeeded
+        @type success: bool
+        @param elapsed: duration of the transfer in seconds
+        @type elapsed: float
+        @param size: number of bytes transferred
+        @type size: int
+        @param ttfb: time to first byte in seconds, if known
+        @type ttfb: float
+        """
+        key = self.mirror_key(uri)
+        if key is None:
+            return
+        if now is None:
+            now = time.time()
+        entry = self._entry(key, now) or {
+            "errors": None,
+            "samples": 0,
+            "throughput": None,
+            "ttfb": None,
+        }
+        entry = dict(entry)
+        entry["errors"] = self._average(entry.get("errors"), 0.0 if success else 1.0)
+        if success and elapsed and size >= self.min_throughput_size:
+            entry["throughput"] = self._average(entry.get("throughput"), size / elapsed)
+        if ttfb is not None:
+            entry["ttfb"] = self._average(entry.get("ttfb"), ttfb)
+        entry["samples"] = entry.get("samples", 0) + 1
+        entry["time"] = now
+        self._entries[key] = entry
+        self._updated[key] = entry
+
+    def sort(self, uris, now=None):
+        """
+        Sort uris by the expected cost of their mirrors.
+
+        @rtype: list
+        """
+        if now is None:
+            now = time.time()
+        entries = [self._entry(self.mirror_key(uri), now) for uri in uris]
+        known = [entry for entry in entries if entry is not None]
+        if not known:
+            return list(uris)
+
+        def median(values):
+            values = sorted(values)
+            return values[len(values) // 2] if values else None
+
+        default_throughput = median(
+            e["throughput"] for e in known if e.get("throughput")
+        )
+        default_ttfb = median(e["ttfb"] for e in known if e.get("ttfb") is not None)
+
+        def cost(entry):
+            throughput = entry.get("throughput") or default_throughput
+            ttfb = entry.get("ttfb")
+            if ttfb is None:
+                ttfb = default_ttfb or 0.0
+            result = ttfb + (self.reference_size / throughput if throughput else 0.0)
+            return result + (entry.get("errors") or 0.0) * self.error_penalty
+
+        costs = [None if entry is None else cost(entry) for entry in entries]
+        default_cost = median(c for c in costs if c is not None)
+        order = sorted(
+            range(len(costs)),
+            key=lambda i: default_cost if costs[i] is None else costs[i],
+        )
+        return [uris[i] for i in order]
+
+    def save(self):
+        """
+        Write the updated statistics, merged with the ones that other
+        processes may have written meanwhile.
+        """
+        if not self._updated:
+            return
+        entries = self._load()
+        entries.update(self._updated)
+        try:
+            f = atomic_ofstream(self._filename, "w")
+            json.dump(entries, f, sort_keys=True)
+            f.close()
+        except OSError:
+            return
+        self._entries = entries
+        self._updated = {}
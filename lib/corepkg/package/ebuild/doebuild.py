@@ -787,6 +787,7 @@ def doebuild(
     fd_pipes=None,
     returnpid=False,
     returnproc=False,
+    depend_worker_pool=None,
 ) -> Union[int, corepkg.process.MultiprocessingProcess, list[int]]:
     """
     Wrapper function that invokes specific ebuild phases through the spawning
@@ -833,6 +834,9 @@ def doebuild(
             supported only when mydo is "depend". NOTE: This requires the caller to
             asynchronously wait for the MultiprocessingProcess instance.
     @type returnproc: Boolean
+    @param depend_worker_pool: Evaluate the "depend" phase in the persistent
+            workers of this pool if possible, which requires returnproc.
+    @type depend_worker_pool: DependWorkerPool
     @rtype: Boolean
     @return:
     1. 0 for success
@@ -1123,6 +1127,7 @@ def doebuild(
                 fd_pipes=fd_pipes,
                 returnpid=returnpid,
                 returnproc=returnproc,
+                depend_worker_pool=depend_worker_pool,
             )
 
         if mydo == "nofetch":
@@ -2053,6 +2058,7 @@ def spawn(
 
     check_config_instance(mysettings)
 
+    depend_worker_pool = keywords.pop("depend_worker_pool", None)
     fd_pipes = keywords.get("fd_pipes")
     if fd_pipes is None:
         fd_pipes = {
@@ -2296,6 +2302,10 @@ def spawn(
 
     try:
         if keywords.get("returnpid") or keywords.get("returnproc"):
+            if depend_worker_pool is not None:
+                proc = depend_worker_pool.spawn(mysettings, spawn_func, env, **keywords)
+                if proc is not None:
+                    return proc
             return spawn_func(mystring, env=env, **keywords)
 
         proc = EbuildSpawnProcess(
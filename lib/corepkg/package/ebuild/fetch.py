@@ -52,6 +52,9 @@ from corepkg.exception import (
 from corepkg.localization import _
 from corepkg.locks import lockfile, unlockfile
 from corepkg.output import colorize, EOutput
+from corepkg.package.ebuild._distfile_digests import DistfileDigestCache
+from corepkg.package.ebuild._http_fetcher import HttpFetcher
+from corepkg.package.ebuild._mirror_health import MirrorHealth
 from corepkg.util import (
     apply_recursive_permissions,
     apply_secpass_permissions,
@@ -527,8 +530,14 @@ def _check_digests(filename, digests, show_errors=1):
     return True
 
 
-def _check_distfile(filename, digests, eout, show_errors=1, hash_filter=None):
+def _check_distfile(
+    filename, digests, eout, show_errors=1, hash_filter=None, digest_cache=None
+):
     """
+    @param digest_cache: digests that match the cached digests of an
+            unchanged file are not verified again, and verified digests
+            are added to the cache
+    @type digest_cache: DistfileDigestCache
     @return a tuple of (match, stat_obj) where match is True if filename
     matches all given digests (if any) and stat_obj is a stat result, or
     None if the file does not exist.
@@ -556,7 +565,20 @@ def _check_distfile(filename, digests, eout, show_errors=1, hash_filter=None):
         digests = _filter_unaccelarated_hashes(digests)
         if hash_filter is not None:
             digests = _apply_hash_filter(digests, hash_filter)
-        if _check_digests(filename, digests, show_errors=show_errors):
+        unverified = digests
+        if digest_cache is not None:
+            cached = digest_cache.get(filename, st)
+            unverified = {
+                k: v for k, v in digests.items() if k == "size" or cached.get(k) != v
+            }
+            # The size has been checked above.
+            if len(unverified) < len(digests) and all(k == "size" for k in unverified):
+                unverified = None
+        if not unverified or _check_digests(
+            filename, unverified, show_errors=show_errors
+        ):
+            if unverified and digest_cache is not None:
+                digest_cache.add(filename, st, unverified)
             eout.ebegin(f"{os.path.basename(filename)} {' '.join(sorted(digests))} ;-)")
             eout.eend(0)
         else:
@@ -1025,6 +1047,50 @@ async def async_fetch(
     digests=None,
     allow_missing_digests=True,
     force=False,
+):
+    # The native fetcher writes files in this process, so it is not used
+    # if privileges have to be dropped for userfetch.
+    http_fetcher = None
+    mirror_health = None
+    if not listonly:
+        if not _want_userfetch(mysettings):
+            http_fetcher = HttpFetcher.from_settings(mysettings)
+        mirror_health = MirrorHealth.from_settings(mysettings)
+    try:
+        return await _async_fetch(
+            myuris,
+            mysettings,
+            listonly=listonly,
+            fetchonly=fetchonly,
+            locks_in_subdir=locks_in_subdir,
+            use_locks=use_locks,
+            try_mirrors=try_mirrors,
+            digests=digests,
+            allow_missing_digests=allow_missing_digests,
+            force=force,
+            http_fetcher=http_fetcher,
+            mirror_health=mirror_health,
+        )
+    finally:
+        if http_fetcher is not None:
+            await http_fetcher.close()
+        if mirror_health is not None:
+            mirror_health.save()
+
+
+async def _async_fetch(
+    myuris,
+    mysettings,
+    listonly=0,
+    fetchonly=0,
+    locks_in_subdir=".locks",
+    use_locks=1,
+    try_mirrors=1,
+    digests=None,
+    allow_missing_digests=True,
+    force=False,
+    http_fetcher=None,
+    mirror_health=None,
 ):
     from corepkg.package.ebuild.config import check_config_instance
 
@@ -1195,10 +1261,13 @@ async def async_fetch(
                 fsmirrors.append(x.rstrip("/"))
             else:
                 public_mirrors.append(x.rstrip("/"))
+        if mirror_health is not None:
+            public_mirrors = mirror_health.sort(public_mirrors)
 
     hash_filter = _hash_filter(mysettings.get("PORTAGE_CHECKSUM_FILTER", ""))
     if hash_filter.transparent:
         hash_filter = None
+    digest_cache = DistfileDigestCache.from_settings(mysettings)
     skip_manifest = mysettings.get("EBUILD_SKIP_MANIFEST") == "1"
     if skip_manifest:
         allow_missing_digests = True
@@ -1317,6 +1386,8 @@ async def async_fetch(
                         for locmirr in thirdpartymirrors[mirrorname]
                     ]
                     random.shuffle(uris)
+                    if mirror_health is not None:
+                        uris = mirror_health.sort(uris)
                     filedict[myfile].extend(uris)
                     thirdpartymirror_uris.setdefault(myfile, []).extend(uris)
 
@@ -1503,7 +1574,11 @@ async def async_fetch(
                 eout = EOutput()
                 eout.quiet = mysettings.get("PORTAGE_QUIET") == "1"
                 match, mystat = _check_distfile(
-                    myfile_path, pruned_digests, eout, hash_filter=hash_filter
+                    myfile_path,
+                    pruned_digests,
+                    eout,
+                    hash_filter=hash_filter,
+                    digest_cache=digest_cache,
                 )
                 if match and not force:
                     # Skip permission adjustment for symlinks, since we don't
@@ -1627,7 +1702,11 @@ async def async_fetch(
                     for x in ro_distdirs:
                         filename = await async_mirror_url(x, myfile, mysettings)
                         match, mystat = _check_distfile(
-                            filename, pruned_digests, eout, hash_filter=hash_filter
+                            filename,
+                            pruned_digests,
+                            eout,
+                            hash_filter=hash_filter,
+                            digest_cache=digest_cache,
                         )
                         if match:
                             readonly_file = filename
@@ -1978,6 +2057,7 @@ async def async_fetch(
                     myfetch = varexpand(locfetch, mydict=variables)
                     myfetch = shlex.split(myfetch)
 
+                    http_headers = {}
                     if protocol in ("http", "https"):
                         _fetch_var, header_value = _get_uri_fetchcommand(
                             mysettings, "PORTAGE_FETCH_HTTP_HEADER", protocol, loc
@@ -1990,10 +2070,30 @@ async def async_fetch(
                             header_value = _get_oneg4_gitlab_header(loc, mysettings)
                         if header_value:
                             myfetch = _inject_http_header(myfetch, header_value)
+                            name, sep, value = header_value.partition(":")
+                            if sep:
+                                http_headers[name.strip()] = value.strip()
 
+                    start_size = 0
+                    if fetched == 1:
+                        try:
+                            start_size = os.stat(download_path).st_size
+                        except OSError:
+                            pass
+                    start_time = time.monotonic()
+                    fetch_stats = {}
                     myret = -1
                     try:
-                        myret = await _async_spawn_fetch(mysettings, myfetch)
+                        if http_fetcher is not None and protocol in ("http", "https"):
+                            myret = await http_fetcher.fetch(
+                                loc,
+                                download_path,
+                                headers=http_headers,
+                                resume=fetched == 1,
+                                stats=fetch_stats,
+                            )
+                        else:
+                            myret = await _async_spawn_fetch(mysettings, myfetch)
 
                     finally:
                         try:
@@ -2011,6 +2111,19 @@ async def async_fetch(
                                 )
                             del e
 
+                    if mirror_health is not None:
+                        try:
+                            transferred = os.stat(download_path).st_size - start_size
+                        except OSError:
+                            transferred = 0
+                        mirror_health.record(
+                            loc,
+                            myret == os.EX_OK,
+                            elapsed=time.monotonic() - start_time,
+                            size=transferred,
+                            ttfb=fetch_stats.get("ttfb"),
+                        )
+
                     # If the file is empty then it's obviously invalid.  Don't
                     # trust the return value from the fetcher.  Remove the
                     # empty file and try to download again.
@@ -2123,6 +2236,10 @@ async def async_fetch(
                                     digests = _apply_hash_filter(digests, hash_filter)
                                 verified_ok, reason = verify_all(download_path, digests)
                                 if not verified_ok:
+                                    # A mirror that serves corrupt files is
+                                    # as bad as one that fails.
+                                    if mirror_health is not None:
+                                        mirror_health.record(loc, False)
                                     writemsg(
                                         _("!!! Fetched file: %s VERIFY FAILED!\n")
                                         % myfile,
@@ -622,6 +622,10 @@ class RepoConfig:
                 from corepkg.cache.flat_hash import md5_database as database
 
                 name = "metadata/md5-cache"
+            elif fmt == "md5-pack":
+                from corepkg.cache.mmap_pack import md5_database as database
+
+                name = "metadata/md5-cache.pack"
 
             if name is not None:
                 yield database(self.location, name, auxdbkeys, readonly=readonly)
@@ -1647,13 +1651,16 @@ def parse_layout_conf(repo_location, repo_name=None):
     # cache exists or not.
     cache_formats = layout_data.get("cache-formats", "").lower().split()
     if not cache_formats:
-        # Auto-detect cache formats, and prefer md5-cache if available.
+        # Auto-detect cache formats, and prefer md5-cache.pack or
+        # md5-cache if available.
         # This behavior was deployed in corepkg-2.1.11.14, so that the
         # default egencache format could eventually be changed to md5-dict
         # in corepkg-2.1.11.32. WARNING: Versions prior to corepkg-2.1.11.14
         # will NOT recognize md5-dict format unless it is explicitly
         # listed in layout.conf.
         cache_formats = []
+        if os.path.isfile(os.path.join(repo_location, "metadata", "md5-cache.pack")):
+            cache_formats.append("md5-pack")
         if os.path.isdir(os.path.join(repo_location, "metadata", "md5-cache")):
             cache_formats.append("md5-dict")
         if os.path.isdir(os.path.join(repo_location, "metadata", "cache")):
@@ -371,8 +371,9 @@ class SyncManager:
         if updatecache_flg and "metadata-transfer" not in self.settings.features:
             updatecache_flg = False
 
-        if updatecache_flg and os.path.exists(
-            os.path.join(repo.location, "metadata", "md5-cache")
+        if updatecache_flg and any(
+            os.path.exists(os.path.join(repo.location, "metadata", name))
+            for name in ("md5-cache", "md5-cache.pack")
         ):
             # Only update cache for repo.location since that's
             # the only one that's been synced here.
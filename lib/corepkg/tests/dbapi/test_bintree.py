@@ -1,6 +1,8 @@
 # Copyright 2022-2025 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
+import hashlib
+from itertools import chain
 from unittest.mock import MagicMock, patch, call
 import io
 import os
@@ -10,7 +12,11 @@ import tempfile
 from corepkg.tests import TestCase
 
 from corepkg.dbapi.bintree import binarytree
-from corepkg.const import BINREPOS_CONF_FILE
+from corepkg.const import BINREPOS_CONF_FILE, CACHE_PATH
+from corepkg.package.ebuild.config import config
+from corepkg.process import find_binary
+from corepkg.getbinpkg import PackageIndex, _ZstdDecompressFile, _zstd_compress
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
 
 
 class BinarytreeTestCase(TestCase):
@@ -244,3 +250,224 @@ class BinarytreeTestCase(TestCase):
             run_trust_helper.assert_not_called()
         finally:
             d.cleanup()
+
+    def test_package_index_read(self):
+        pkgindex = PackageIndex(
+            allowed_pkg_keys=("CPV", "DESCRIPTION", "SLOT", "repository"),
+            default_pkg_data={"SLOT": "0"},
+            inherited_keys=("repository",),
+            translated_keys=(("DESCRIPTION", "DESC"), ("repository", "REPO")),
+        )
+        pkgindex.read(
+            io.StringIO(
+                "REPO: gentoo\n"
+                "TIMESTAMP: 1\n"
+                "\n"
+                "CPV: app-misc/foo-1\n"
+                "DESC: foo: a package\n"
+                "garbage\n"
+                "USE: test\n"
+                "\n"
+                "DESC: no CPV\n"
+                "\n"
+                "CPV: app-misc/bar-1\n"
+                "SLOT: 1\n"
+                "REPO: other"
+            )
+        )
+        self.assertEqual(pkgindex.header, {"TIMESTAMP": "1", "repository": "gentoo"})
+        self.assertEqual(
+            [dict(d.items()) for d in pkgindex.packages],
+            [
+                {
+                    "CPV": "app-misc/foo-1",
+                    "DESCRIPTION": "foo: a package",
+                    "SLOT": "0",
+                    "repository": "gentoo",
+                },
+                {"CPV": "app-misc/bar-1", "SLOT": "1", "repository": "other"},
+            ],
+        )
+
+    def test_populate_remote_multiple_binrepos(self):
+        playground = ResolverPlayground(
+            binrepos={"high_binrepo": {}, "low_binrepo": {}},
+            user_config={
+                "binrepos.conf": ("[high_binrepo]", "priority = 2"),
+            },
+        )
+        try:
+            indexes = {
+                "high_binrepo": ("app-misc/foo-1",),
+                "low_binrepo": ("app-misc/foo-1", "app-misc/bar-1"),
+            }
+            for binrepo, cpvs in indexes.items():
+                with open(
+                    os.path.join(playground._get_binrepo_dir(binrepo), "Packages"), "w"
+                ) as f:
+                    f.write("TIMESTAMP: 1\nVERSION: 0\n\n")
+                    for cpv in cpvs:
+                        f.write(f"CPV: {cpv}\nPATH: {cpv}-1.gpkg.tar\nSLOT: 0\n\n")
+
+            bintree = playground.trees[playground.eroot]["bintree"]
+            bintree.populate(getbinpkgs=True)
+            self.assertEqual(
+                sorted(bintree.dbapi.cpv_all()), ["app-misc/bar-1", "app-misc/foo-1"]
+            )
+            # Both indexes are retrieved concurrently, but the package from
+            # the binrepo with the highest priority is used.
+            (foo,) = bintree.dbapi.match("app-misc/foo")
+            self.assertEqual(
+                bintree.dbapi.aux_get(foo, ["BASE_URI"])[0],
+                playground._get_binrepo_dir("high_binrepo"),
+            )
+        finally:
+            playground.cleanup()
+
+    def test_populate_remote_delta_index(self):
+        playground = ResolverPlayground(
+            binrepos={"test_binrepo": {}},
+            user_config={
+                "binrepos.conf": ("[test_binrepo]", "frozen = no"),
+            },
+        )
+        try:
+            binrepo_dir = playground._get_binrepo_dir("test_binrepo")
+            server_settings = config(clone=playground.settings)
+            server_settings.features.add("delta-index")
+            server = binarytree(pkgdir=binrepo_dir, settings=server_settings)
+
+            # Segments are only retained while they are smaller than the
+            # whole index, so add some packages that do not change.
+            unchanged = {f"app-misc/unchanged-{i}": {} for i in range(50)}
+
+            def publish(entries):
+                pkgindex = server._new_pkgindex()
+                server._update_pkgindex_header(pkgindex.header)
+                for cpv, metadata in chain(unchanged.items(), entries.items()):
+                    d = {"CPV": cpv, "PATH": f"{cpv}.gpkg.tar", "SLOT": "0"}
+                    d.update(metadata)
+                    pkgindex.packages.append(d)
+                server._pkgindex_write(pkgindex)
+
+            bintree = playground.trees[playground.eroot]["bintree"]
+
+            def populate():
+                bintree.populate(getbinpkgs=True, getbinpkg_refresh=True)
+                return {
+                    cpv: bintree.dbapi.aux_get(cpv, ["DESCRIPTION"])[0]
+                    for cpv in bintree.dbapi.cpv_all()
+                    if cpv not in unchanged
+                }
+
+            publish({"app-misc/foo-1": {}, "app-misc/bar-1": {}})
+            self.assertFalse(os.path.exists(f"{binrepo_dir}/Packages.delta.0"))
+            self.assertEqual(populate(), {"app-misc/foo-1": "", "app-misc/bar-1": ""})
+
+            publish(
+                {
+                    "app-misc/foo-1": {"DESCRIPTION": "changed"},
+                    "app-misc/baz-1": {"BUILD_ID": "1"},
+                }
+            )
+            # Only the delta segment is needed by the client.
+            os.unlink(f"{binrepo_dir}/Packages")
+            os.unlink(f"{binrepo_dir}/Packages.gz")
+            expected = {"app-misc/foo-1": "changed", "app-misc/baz-1": ""}
+            self.assertEqual(populate(), expected)
+            self.assertEqual(populate(), expected)
+
+            # The chain is broken if deltas are no longer published, so
+            # that the whole index has to be retrieved.
+            server_settings.features.discard("delta-index")
+            publish({"app-misc/foo-1": {}})
+            self.assertEqual(
+                sorted(os.listdir(binrepo_dir)),
+                ["Packages", "Packages.digest", "Packages.gz"],
+            )
+            repo = bintree._binrepos_conf["test_binrepo"]
+            self.assertIsNone(
+                bintree._fetch_remote_pkgindex_deltas(repo, bintree._load_pkgindex())
+            )
+        finally:
+            playground.cleanup()
+
+    def test_populate_remote_compressed_index(self):
+        if find_binary("zstd") is None:
+            self.skipTest("zstd: command not found")
+        playground = ResolverPlayground(
+            binrepos={"test_binrepo": {}},
+            user_config={
+                "binrepos.conf": ("[test_binrepo]", "frozen = no"),
+            },
+        )
+        try:
+            binrepo_dir = playground._get_binrepo_dir("test_binrepo")
+            server_settings = config(clone=playground.settings)
+            server_settings.features.add("compress-index-zstd")
+            server = binarytree(pkgdir=binrepo_dir, settings=server_settings)
+            pkgindex = server._new_pkgindex()
+            server._update_pkgindex_header(pkgindex.header)
+            pkgindex.packages.append(
+                {"CPV": "app-misc/foo-1", "PATH": "app-misc/foo-1.gpkg.tar"}
+            )
+            server._pkgindex_write(pkgindex)
+            with open(f"{binrepo_dir}/Packages", "rb") as f:
+                digest = hashlib.sha512(f.read()).hexdigest()
+
+            # Packages.zst is preferred.
+            os.unlink(f"{binrepo_dir}/Packages")
+            os.unlink(f"{binrepo_dir}/Packages.gz")
+            bintree = playground.trees[playground.eroot]["bintree"]
+            bintree.populate(getbinpkgs=True, getbinpkg_refresh=True)
+            self.assertEqual(bintree.dbapi.cpv_all(), ["app-misc/foo-1"])
+            # The digest of the index is recorded in the local copy.
+            cache_file = os.path.join(
+                playground.eroot, CACHE_PATH, "binhost", binrepo_dir[1:], "Packages"
+            )
+            with open(cache_file) as f:
+                self.assertIn(f"DOWNLOAD_SHA512: {digest}\n", f.read())
+
+            # Packages.digest shows that the local copy is current.
+            os.unlink(f"{binrepo_dir}/Packages.zst")
+            stderr = io.StringIO()
+            with patch("sys.stderr", stderr):
+                bintree.populate(getbinpkgs=True, getbinpkg_refresh=True)
+            self.assertEqual(bintree.dbapi.cpv_all(), ["app-misc/foo-1"])
+            self.assertIn("is up-to-date", stderr.getvalue())
+            self.assertEqual(
+                bintree._fetch_remote_pkgindex_digest(
+                    bintree._binrepos_conf["test_binrepo"]
+                ),
+                digest,
+            )
+        finally:
+            playground.cleanup()
+
+    def test_zstd_decompress_file(self):
+        if find_binary("zstd") is None:
+            self.skipTest("zstd: command not found")
+        # Larger than the pipe buffers, so that the index is decompressed
+        # while it is read.
+        contents = b"".join(b"CPV: app-misc/foo-%d\n\n" % i for i in range(100000))
+        compressed = _zstd_compress(contents)
+
+        f = _ZstdDecompressFile(io.BytesIO(compressed))
+        try:
+            self.assertEqual(b"".join(f), contents)
+        finally:
+            f.close()
+
+        # The index does not have to be read completely.
+        fileobj = io.BytesIO(compressed)
+        f = _ZstdDecompressFile(fileobj)
+        self.assertEqual(next(f), b"CPV: app-misc/foo-0\n")
+        f.close()
+        self.assertTrue(fileobj.closed)
+
+        f = _ZstdDecompressFile(io.BytesIO(b"garbage"))
+        try:
+            with self.assertRaises(OSError):
+                list(f)
+        finally:
+            f.close()
@@ -0,0 +1,166 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import contextlib
+import io
+
+from corepkg import os
+from corepkg.dbapi._CompactContents import CompactContents, ContentsCache
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class CompactContentsTestCase(TestCase):
+    def testCompactContents(self):
+        entries = {
+            "/usr": ("dir",),
+            "/usr/bin": ("dir",),
+            "/usr/bin/a": ("obj", "1700000000", "d41d8cd98f00b204e9800998ecf8427e"),
+            "/usr/bin/a-b": ("sym", "1700000001", "a"),
+            "/usr/bin-x": ("dir",),
+            "/usr/bin-x/y": ("fif",),
+            "/dev": ("dir",),
+            "/dev/null": ("dev",),
+            # Entries which are not stored in compact form.
+            "/usr/bin/b": ("obj", "0123", "d41d8cd98f00b204e9800998ecf8427e"),
+            "/usr/bin/c": ("obj", "1", "D41D8CD98F00B204E9800998ECF8427E"),
+            "/usr/bin/d": ("obj", "1", "not-hex"),
+            "/usr/bin/e": ("sym", "1", "target with spaces"),
+        }
+        contents = CompactContents(entries.items())
+        self.assertEqual(len(contents), len(entries))
+        self.assertEqual(contents, entries)
+        self.assertEqual(dict(contents.items()), entries)
+        # The order of the entries is preserved.
+        self.assertEqual(list(contents), list(entries))
+        self.assertEqual(list(contents.items()), list(entries.items()))
+        for path, data in entries.items():
+            self.assertIn(path, contents)
+            self.assertEqual(contents[path], data)
+        for path in ("/", "/usr/bin/f", "/usr/bin/a/", "/var", "usr", None):
+            self.assertNotIn(path, contents)
+            self.assertEqual(contents.get(path), None)
+
+        copied = contents.copy()
+        self.assertIsInstance(copied, dict)
+        copied.pop("/usr/bin/a")
+        self.assertIn("/usr/bin/a", contents)
+
+        # The mapping can be modified like a dict, without modifying the
+        # mappings that share its entries.
+        shared = contents.share()
+        self.assertEqual(shared, entries)
+        contents["/usr/bin/f"] = ("fif",)
+        contents["/usr"] = ("sym", "1", "usr")
+        del contents["/dev/null"]
+        self.assertEqual(contents.pop("/usr/bin/a-b"), entries["/usr/bin/a-b"])
+        expected = entries.copy()
+        expected["/usr/bin/f"] = ("fif",)
+        expected["/usr"] = ("sym", "1", "usr")
+        del expected["/dev/null"]
+        del expected["/usr/bin/a-b"]
+        self.assertEqual(list(contents.items()), list(expected.items()))
+        self.assertEqual(list(shared.items()), list(entries.items()))
+        self.assertEqual(contents.share(), expected)
+        self.assertRaises(KeyError, contents.__delitem__, "/dev/null")
+
+        # Later entries replace earlier ones, in the position of the
+        # first one.
+        contents = CompactContents(
+            [("/a", ("dir",)), ("/b", ("dir",)), ("/a", ("sym", "1", "b"))]
+        )
+        self.assertEqual(
+            list(contents.items()), [("/a", ("sym", "1", "b")), ("/b", ("dir",))]
+        )
+        self.assertEqual(len(CompactContents()), 0)
+
+    def testContentsCache(self):
+        cache = ContentsCache(max_entries=3)
+        one = CompactContents([("/a", ("dir",))])
+        two = CompactContents([("/b", ("dir",)), ("/c", ("dir",))])
+        cache.add("one", one)
+        cache.add("two", two)
+        self.assertIs(cache.get("one"), one)
+        cache.add("three", CompactContents([("/d", ("dir",))]))
+        # The least recently used entry is evicted.
+        self.assertIs(cache.get("two"), None)
+        self.assertIs(cache.get("one"), one)
+        cache.add("four", CompactContents([("/" + x, ("dir",)) for x in "efgh"]))
+        self.assertIs(cache.get("four"), None)
+        self.assertIs(cache.get("one"), one)
+        cache.clear()
+        self.assertIs(cache.get("one"), None)
+
+    def testGetcontents(self):
+        installed = {"dev-libs/A-1": {"EAPI": "8"}}
+        playground = ResolverPlayground(installed=installed)
+        try:
+            eroot = playground.eroot
+            vardb = playground.trees[eroot]["vartree"].dbapi
+            contents = {
+                os.path.join(eroot, "usr/bin/a"): (
+                    "obj",
+                    "0",
+                    "d41d8cd98f00b204e9800998ecf8427e",
+                ),
+                os.path.join(eroot, "usr/lib/liba.so"): ("sym", "0", "liba.so.1"),
+            }
+            vardb.writeContentsToContentsFile(vardb._dblink("dev-libs/A-1"), contents)
+
+            # Missing parent directories are generated before each entry,
+            # deepest first, in the order of the dict that was returned
+            # before the contents were parsed lazily.
+            expected = [
+                (os.path.join(eroot, "usr/bin"), ("dir",)),
+                (os.path.join(eroot, "usr"), ("dir",)),
+                (
+                    os.path.join(eroot, "usr/bin/a"),
+                    contents[os.path.join(eroot, "usr/bin/a")],
+                ),
+                (os.path.join(eroot, "usr/lib"), ("dir",)),
+                (os.path.join(eroot, "usr/lib/liba.so"), ("sym", "0", "liba.so.1")),
+            ]
+            dblink = vardb._dblink("dev-libs/A-1")
+            self.assertEqual(
+                list(vardb._dblink("dev-libs/A-1").itercontents()), expected
+            )
+            pkgfiles = dblink.getcontents()
+            self.assertEqual(list(pkgfiles.items()), expected)
+            self.assertEqual(list(dblink.itercontents()), expected)
+
+            # Parsed contents are shared by dblink instances, and each
+            # instance can modify its own copy.
+            other = vardb._dblink("dev-libs/A-1").getcontents()
+            self.assertIs(other._names, pkgfiles._names)
+            other[os.path.join(eroot, "usr/bin/b")] = ("dir",)
+            self.assertNotIn(os.path.join(eroot, "usr/bin/b"), pkgfiles)
+            self.assertEqual(list(pkgfiles.items()), expected)
+
+            # Parse errors are reported as they are found, even if the
+            # iteration stops early.
+            contents_file = os.path.join(dblink.dbdir, "CONTENTS")
+            with open(contents_file) as f:
+                lines = f.read()
+            with open(contents_file, "w") as f:
+                f.write("garbage\n" + lines)
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                for _entry in vardb._dblink("dev-libs/A-1").itercontents():
+                    break
+                self.assertIn(f"Parse error in '{contents_file}'", stderr.getvalue())
+                self.assertIn("line 1: Unrecognized CONTENTS entry", stderr.getvalue())
+                pkgfiles = vardb._dblink("dev-libs/A-1").getcontents()
+            self.assertEqual(list(pkgfiles.items()), expected)
+
+            # Rewritten contents are parsed again.
+            del contents[os.path.join(eroot, "usr/lib/liba.so")]
+            vardb.writeContentsToContentsFile(dblink, contents)
+            self.assertNotIn(
+                os.path.join(eroot, "usr/lib/liba.so"), dblink.getcontents()
+            )
+            self.assertNotIn(
+                os.path.join(eroot, "usr/lib/liba.so"),
+                vardb._dblink("dev-libs/A-1").getcontents(),
+            )
+        finally:
+            playground.cleanup()
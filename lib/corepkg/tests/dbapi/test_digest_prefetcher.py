@@ -0,0 +1,51 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import hashlib
+import tempfile
+
+from corepkg import os
+from corepkg.dbapi._DigestPrefetcher import DigestPrefetcher
+from corepkg.tests import TestCase
+
+
+def _md5(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+class DigestPrefetcherTestCase(TestCase):
+    def testDigestPrefetcher(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for i in range(40):
+                path = os.path.join(tmpdir, f"file{i}")
+                with open(path, "w") as f:
+                    f.write(f"content {i}\n")
+                paths.append(path)
+            paths.append(os.path.join(tmpdir, "missing"))
+            os.mkdir(os.path.join(tmpdir, "dir"))
+            paths.append(os.path.join(tmpdir, "dir"))
+
+            self.assertEqual(
+                DigestPrefetcher.create(paths[: DigestPrefetcher.min_files - 1], _md5),
+                None,
+            )
+
+            with DigestPrefetcher.create(paths, _md5, max_workers=2, window=4) as p:
+                for path in paths[:10]:
+                    self.assertEqual(p.get(path, os.lstat(path)), _md5(path))
+
+                # Skipped paths do not stall the prefetcher.
+                path = paths[30]
+                self.assertEqual(p.get(path, os.lstat(path)), _md5(path))
+                path = paths[10]
+                self.assertEqual(p.get(path, os.lstat(path)), None)
+
+                # A digest is not used if the file that the consumer sees
+                # is not the one that was hashed.
+                self.assertEqual(p.get(paths[35], os.lstat(paths[36])), None)
+
+                dir_path = paths[-1]
+                self.assertEqual(p.get(dir_path, os.lstat(dir_path)), None)
+                self.assertEqual(p.get("/unknown", os.lstat(tmpdir)), None)
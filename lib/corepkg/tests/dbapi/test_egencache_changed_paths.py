@@ -0,0 +1,185 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import subprocess
+import sys
+
+import corepkg
+from corepkg import os
+from corepkg.cache.index.eclass_index import EclassIndex
+from corepkg.const import PORTAGE_PYM_PATH, USER_CONFIG_PATH
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+from corepkg.util import ensure_dirs
+
+
+class EgencacheChangedPathsTestCase(TestCase):
+    def testEclassIndex(self):
+        eclass_index = EclassIndex(os.devnull)
+        eclass_index.update("dev-libs/A-1", ())
+        eclass_index.update("dev-libs/B-1", ("foo", "bar"))
+        eclass_index.update("sys-apps/C-1", ("bar",))
+        categories = frozenset(("dev-libs", "sys-apps"))
+
+        self.assertEqual(
+            eclass_index.inherited_by("bar"),
+            frozenset(("dev-libs/B-1", "sys-apps/C-1")),
+        )
+        self.assertEqual(
+            eclass_index.affected_cps(
+                [
+                    "eclass/foo.eclass",
+                    "eclass/tests/foo.sh",
+                    "dev-libs/A/A-2.ebuild",
+                    "dev-libs/metadata.xml",
+                    "profiles/package.mask",
+                ],
+                categories,
+            ),
+            {"dev-libs/A", "dev-libs/B"},
+        )
+        self.assertEqual(
+            eclass_index.affected_cps(["eclass/bar.eclass"], categories),
+            {"dev-libs/B", "sys-apps/C"},
+        )
+        self.assertIsNone(
+            eclass_index.affected_cps(["metadata/layout.conf"], categories)
+        )
+
+        eclass_index.discard("dev-libs/B-1")
+        self.assertEqual(
+            eclass_index.affected_cps(["eclass/foo.eclass"], categories), set()
+        )
+
+    def testEgencacheChangedPaths(self):
+        ebuilds = {
+            "dev-libs/A-1": {"EAPI": "8"},
+            "dev-libs/B-1": {"EAPI": "8", "MISC_CONTENT": "inherit foo"},
+            "sys-apps/C-1": {"EAPI": "8", "MISC_CONTENT": "inherit bar"},
+            "dev-libs/D-1::overlay": {"EAPI": "8", "MISC_CONTENT": "inherit bar"},
+        }
+        eclasses = {
+            "foo": ("inherit bar",),
+            "bar": ("IDEPEND=dev-libs/A",),
+        }
+
+        repo_configs = {"overlay": {"layout.conf": ("masters = test_repo",)}}
+
+        playground = ResolverPlayground(
+            ebuilds=ebuilds, eclasses=eclasses, repo_configs=repo_configs
+        )
+        settings = playground.settings
+        eprefix = settings["EPREFIX"]
+        test_repo_location = settings.repositories["test_repo"].location
+        overlay_location = settings.repositories["overlay"].location
+        md5_cache_dir = os.path.join(test_repo_location, "metadata", "md5-cache")
+        cache_dir = os.path.join(eprefix, "var", "cache", "edb", "dep")
+
+        pythonpath = os.environ.get("PYTHONPATH", "").strip()
+        pythonpath = PORTAGE_PYM_PATH + (":" + pythonpath if pythonpath else "")
+        env = {
+            "PATH": settings["PATH"],
+            "PORTAGE_OVERRIDE_EPREFIX": eprefix,
+            "PORTAGE_PYTHON": corepkg._python_interpreter,
+            "PORTAGE_REPOSITORIES": settings.repositories.config_string(),
+            "PYTHONDONTWRITEBYTECODE": os.environ.get("PYTHONDONTWRITEBYTECODE", ""),
+            "PYTHONPATH": pythonpath,
+        }
+
+        def egencache(*args, changed_paths=None, repo="test_repo"):
+            proc = subprocess.run(
+                (
+                    corepkg._python_interpreter,
+                    "-b",
+                    "-Wd",
+                    os.path.join(str(self.bindir), "egencache"),
+                    "--repo",
+                    repo,
+                    "--cache-dir",
+                    cache_dir,
+                    "--update",
+                )
+                + args,
+                env=env,
+                input=changed_paths,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+            if proc.returncode != os.EX_OK:
+                sys.stderr.write(proc.stdout)
+            self.assertEqual(proc.returncode, os.EX_OK)
+
+        def cache_entry(cpv, md5_cache_dir=md5_cache_dir):
+            try:
+                with open(os.path.join(md5_cache_dir, cpv)) as f:
+                    return dict(line.rstrip("\n").split("=", 1) for line in f)
+            except FileNotFoundError:
+                return None
+
+        try:
+            ensure_dirs(os.path.join(eprefix, USER_CONFIG_PATH))
+            ensure_dirs(cache_dir)
+
+            # Without an eclass index, the whole repository is updated.
+            egencache("--changed-paths", "-", changed_paths="")
+            self.assertEqual(cache_entry("sys-apps/C-1")["IDEPEND"], "dev-libs/A")
+
+            eclass_index = EclassIndex(
+                os.path.join(
+                    cache_dir,
+                    test_repo_location.lstrip(os.sep),
+                    "metadata",
+                    "eclass_index",
+                )
+            )
+            self.assertTrue(eclass_index.load())
+            self.assertEqual(
+                eclass_index.inherited_by("bar"),
+                frozenset(("dev-libs/B-1", "sys-apps/C-1")),
+            )
+
+            # Only the packages that are affected by the changed paths
+            # are updated, so the removed entry of an unaffected package
+            # is not regenerated.
+            os.unlink(os.path.join(md5_cache_dir, "dev-libs/A-1"))
+            with open(
+                os.path.join(test_repo_location, "eclass", "bar.eclass"), "w"
+            ) as f:
+                f.write("IDEPEND=dev-libs/B\n")
+            egencache("--changed-paths", "-", changed_paths="eclass/bar.eclass\n")
+            self.assertEqual(cache_entry("dev-libs/B-1")["IDEPEND"], "dev-libs/B")
+            self.assertEqual(cache_entry("sys-apps/C-1")["IDEPEND"], "dev-libs/B")
+            self.assertIsNone(cache_entry("dev-libs/A-1"))
+
+            changed_paths_file = os.path.join(eprefix, "changed_paths")
+            with open(changed_paths_file, "w") as f:
+                f.write("dev-libs/A/A-1.ebuild\n")
+            egencache("--changed-paths", changed_paths_file)
+            self.assertEqual(cache_entry("dev-libs/A-1")["EAPI"], "8")
+
+            # Changes to the eclasses of masters are not listed in the
+            # changed paths of an overlay, so the whole overlay is updated.
+            # Remove the eclasses of the overlay, so that it inherits those
+            # of its master.
+            for eclass in eclasses:
+                os.unlink(os.path.join(overlay_location, "eclass", f"{eclass}.eclass"))
+            overlay_md5_cache_dir = os.path.join(
+                overlay_location, "metadata", "md5-cache"
+            )
+            egencache("--changed-paths", "-", changed_paths="", repo="overlay")
+            self.assertEqual(
+                cache_entry("dev-libs/D-1", overlay_md5_cache_dir)["IDEPEND"],
+                "dev-libs/B",
+            )
+            with open(
+                os.path.join(test_repo_location, "eclass", "bar.eclass"), "w"
+            ) as f:
+                f.write("IDEPEND=dev-libs/C\n")
+            egencache("--changed-paths", "-", changed_paths="", repo="overlay")
+            self.assertEqual(
+                cache_entry("dev-libs/D-1", overlay_md5_cache_dir)["IDEPEND"],
+                "dev-libs/C",
+            )
+        finally:
+            playground.cleanup()
@@ -0,0 +1,182 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import pickle
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+import corepkg
+from corepkg import os
+from corepkg.cache.flat_hash import md5_database as md5_dict_database
+from corepkg.cache.mmap_pack import _LazyEntry, md5_database
+from corepkg.const import PORTAGE_PYM_PATH, USER_CONFIG_PATH
+from corepkg.dbapi import dbapi
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+from corepkg.util import ensure_dirs
+
+
+class MmapPackTestCase(TestCase):
+    def testDatabase(self):
+        auxdbkeys = ("DEPEND", "DESCRIPTION", "EAPI", "SLOT")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = md5_database(tmpdir, "metadata/md5-cache.pack", auxdbkeys)
+            self.assertNotIn("dev-libs/A-1", cache)
+            self.assertEqual(list(cache), [])
+
+            cache["dev-libs/A-1"] = {
+                "EAPI": "8",
+                "SLOT": "0",
+                "DESCRIPTION": "é",
+                "_md5_": "0" * 32,
+            }
+            cache["dev-libs/B-1"] = {"EAPI": "8", "SLOT": "1", "_md5_": "1" * 32}
+            # Updates are not written before commit.
+            self.assertFalse(os.path.exists(cache.location))
+            self.assertEqual(cache["dev-libs/B-1"]["SLOT"], "1")
+            cache.commit()
+            self.assertTrue(os.path.exists(cache.location))
+
+            cache = md5_database(
+                tmpdir, "metadata/md5-cache.pack", auxdbkeys, readonly=True
+            )
+            self.assertEqual(sorted(cache), ["dev-libs/A-1", "dev-libs/B-1"])
+            self.assertNotIn("dev-libs/C-1", cache)
+            self.assertRaises(KeyError, cache.__getitem__, "dev-libs/C-1")
+
+            entry = cache._getitem("dev-libs/A-1")
+            self.assertIsInstance(entry, _LazyEntry)
+            self.assertEqual(entry["EAPI"], "8")
+            # Only the accessed value has been decoded.
+            self.assertEqual(list(entry._data), ["EAPI"])
+            self.assertNotIn("DEPEND", entry)
+
+            self.assertEqual(
+                dict(cache["dev-libs/A-1"].items()),
+                {
+                    "DESCRIPTION": "é",
+                    "EAPI": "8",
+                    "SLOT": "0",
+                    "_eclasses_": {},
+                    "_md5_": "0" * 32,
+                },
+            )
+
+            # The cache can be pickled after a lookup, for example to be
+            # passed to a subprocess, and the file is mapped again.
+            cache = pickle.loads(pickle.dumps(cache))
+            self.assertIsNone(cache._mmap)
+            self.assertEqual(cache["dev-libs/B-1"]["SLOT"], "1")
+
+            cache = md5_database(tmpdir, "metadata/md5-cache.pack", auxdbkeys)
+            del cache["dev-libs/A-1"]
+            cache["dev-libs/C-1"] = {"EAPI": "8", "SLOT": "2", "_md5_": "2" * 32}
+            self.assertEqual(sorted(cache), ["dev-libs/B-1", "dev-libs/C-1"])
+            cache.commit()
+
+            cache = md5_database(
+                tmpdir, "metadata/md5-cache.pack", auxdbkeys, readonly=True
+            )
+            self.assertEqual(sorted(cache), ["dev-libs/B-1", "dev-libs/C-1"])
+            self.assertEqual(cache["dev-libs/B-1"]["SLOT"], "1")
+            self.assertEqual(cache["dev-libs/C-1"]["SLOT"], "2")
+
+            with open(cache.location, "wb") as f:
+                f.write(b"garbage")
+            cache = md5_database(
+                tmpdir, "metadata/md5-cache.pack", auxdbkeys, readonly=True
+            )
+            self.assertNotIn("dev-libs/B-1", cache)
+            self.assertEqual(list(cache), [])
+
+    def testEgencache(self):
+        ebuilds = {
+            "dev-libs/A-1": {"EAPI": "8"},
+            "dev-libs/A-2": {"EAPI": "8", "DESCRIPTION": "é"},
+            "sys-apps/B-1": {"EAPI": "8", "MISC_CONTENT": "inherit foo"},
+        }
+        eclasses = {
+            "foo": ("inherit bar",),
+            "bar": ("IDEPEND=dev-libs/A",),
+        }
+
+        playground = ResolverPlayground(ebuilds=ebuilds, eclasses=eclasses)
+        settings = playground.settings
+        eprefix = settings["EPREFIX"]
+        test_repo_location = settings.repositories["test_repo"].location
+        metadata_dir = os.path.join(test_repo_location, "metadata")
+
+        pythonpath = os.environ.get("PYTHONPATH", "").strip()
+        pythonpath = PORTAGE_PYM_PATH + (":" + pythonpath if pythonpath else "")
+        env = {
+            "PATH": settings["PATH"],
+            "PORTAGE_OVERRIDE_EPREFIX": eprefix,
+            "PORTAGE_PYTHON": corepkg._python_interpreter,
+            "PORTAGE_REPOSITORIES": settings.repositories.config_string(),
+            "PYTHONDONTWRITEBYTECODE": os.environ.get("PYTHONDONTWRITEBYTECODE", ""),
+            "PYTHONPATH": pythonpath,
+        }
+
+        def run(*args):
+            proc = subprocess.run(
+                (corepkg._python_interpreter, "-b", "-Wd") + args,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+            if proc.returncode != os.EX_OK:
+                sys.stderr.write(proc.stdout)
+            self.assertEqual(proc.returncode, os.EX_OK)
+
+        try:
+            ensure_dirs(os.path.join(eprefix, USER_CONFIG_PATH))
+            with open(os.path.join(metadata_dir, "layout.conf"), "a") as f:
+                f.write("cache-formats = md5-pack md5-dict\n")
+
+            run(
+                os.path.join(str(self.bindir), "egencache"),
+                "--repo",
+                "test_repo",
+                "--update",
+            )
+
+            auxdbkeys = dbapi._known_keys
+            pack = md5_database(
+                test_repo_location, "metadata/md5-cache.pack", auxdbkeys, readonly=True
+            )
+            md5_dict = md5_dict_database(
+                test_repo_location, "metadata/md5-cache", auxdbkeys, readonly=True
+            )
+            self.assertEqual(sorted(pack), sorted(ebuilds))
+            for cpv in ebuilds:
+                # The md5-dict reader adds the _mtime_ of the cache file.
+                expected = dict(md5_dict[cpv].items())
+                expected.pop("_mtime_", None)
+                self.assertEqual(dict(pack[cpv].items()), expected, cpv)
+
+            # The entries of the pack are valid for portdbapi.
+            run(
+                "-c",
+                textwrap.dedent(
+                    """
+                    import sys, corepkg
+                    from corepkg.cache.mmap_pack import md5_database
+                    portdb = corepkg.portdb
+                    location = portdb.repositories["test_repo"].location
+                    if not isinstance(portdb._pregen_auxdb[location], md5_database):
+                        sys.exit(1)
+                    metadata, _ = portdb._pull_valid_cache(
+                        "sys-apps/B-1", portdb.findname("sys-apps/B-1"), location
+                    )
+                    if metadata is None or metadata["IDEPEND"] != "dev-libs/A":
+                        sys.exit(1)
+                    if portdb.aux_get("dev-libs/A-2", ["DESCRIPTION"]) != ["é"]:
+                        sys.exit(1)
+                    """
+                ),
+            )
+        finally:
+            playground.cleanup()
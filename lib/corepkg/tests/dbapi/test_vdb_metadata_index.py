@@ -0,0 +1,85 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import tempfile
+
+from _emerge.FakeVartree import FakeVartree
+
+from corepkg import os
+from corepkg.const import CACHE_PATH
+from corepkg.dbapi._VdbMetadataIndex import VdbMetadataIndex
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class VdbMetadataIndexTestCase(TestCase):
+    def testVdbMetadataIndex(self):
+        packages = {
+            "dev-libs/A-1": (1.5, {"EAPI": "8", "SLOT": "0", "USE": "a b"}),
+            "dev-libs/B-2": (2, {"EAPI": "7", "SLOT": "0/2", "DESCRIPTION": "é"}),
+            "dev-libs/C-3": "invalid",
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "vdb_metadata.idx")
+            index = VdbMetadataIndex(filename)
+            self.assertEqual(index.get("dev-libs/A-1"), None)
+            index.close()
+
+            VdbMetadataIndex.write(filename, packages)
+            index = VdbMetadataIndex(filename)
+            self.assertEqual(index.get("dev-libs/A-1"), packages["dev-libs/A-1"])
+            self.assertEqual(
+                index.get("dev-libs/B-2"), (2.0, packages["dev-libs/B-2"][1])
+            )
+            self.assertEqual(index.get("dev-libs/C-3"), None)
+            self.assertEqual(index.get("dev-libs/D-4"), None)
+            index.close()
+
+            VdbMetadataIndex.write(filename, {})
+            index = VdbMetadataIndex(filename)
+            self.assertEqual(index.get("dev-libs/A-1"), None)
+            index.close()
+
+            with open(filename, "wb") as f:
+                f.write(b"garbage")
+            index = VdbMetadataIndex(filename)
+            self.assertEqual(index.get("dev-libs/A-1"), None)
+            index.close()
+
+    def testVardbapiMetadataIndex(self):
+        installed = {
+            "dev-libs/A-1": {"EAPI": "8", "SLOT": "0", "RDEPEND": "dev-libs/B"},
+            "dev-libs/B-1": {"EAPI": "8", "SLOT": "1"},
+        }
+        playground = ResolverPlayground(installed=installed)
+        try:
+            vardb = playground.trees[playground.eroot]["vartree"].dbapi
+            keys = ["EAPI", "SLOT", "RDEPEND"]
+            expected = {cpv: vardb.aux_get(cpv, keys) for cpv in installed}
+            VdbMetadataIndex.write(
+                os.path.join(playground.eroot, CACHE_PATH, "vdb_metadata.idx"),
+                vardb._aux_cache["packages"],
+            )
+
+            vardb._clear_cache()
+            for cpv, values in expected.items():
+                self.assertEqual(vardb.aux_get(cpv, keys), values)
+            # All lookups were served by the index.
+            self.assertEqual(vardb._aux_cache_obj, None)
+
+            # The _mtime_ key, which FakeVartree always requests, comes
+            # from the package directory rather than from a cache.
+            fakedb = FakeVartree(playground.trees[playground.eroot]["root_config"])
+            self.assertIn("_mtime_", fakedb._db_keys)
+            for cpv in installed:
+                values = dict(zip(fakedb._db_keys, vardb.aux_get(cpv, fakedb._db_keys)))
+                self.assertEqual(
+                    values["_mtime_"], os.stat(vardb.getpath(cpv)).st_mtime
+                )
+            self.assertEqual(vardb._aux_cache_obj, None)
+
+            # Keys that are not in the index are looked up as usual.
+            vardb.aux_get("dev-libs/A-1", ["NEEDED.ELF.2"])
+            self.assertNotEqual(vardb._aux_cache_obj, None)
+        finally:
+            playground.cleanup()
@@ -0,0 +1,116 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import shutil
+
+from corepkg import os
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+from corepkg.util import ensure_dirs
+
+
+class VdbNeededIndexTestCase(TestCase):
+    def testVdbNeededIndex(self):
+        installed = {
+            "dev-libs/A-1": {"EAPI": "8"},
+            "dev-libs/B-1": {"EAPI": "8"},
+            "dev-libs/C-1": {"EAPI": "8"},
+        }
+        playground = ResolverPlayground(installed=installed)
+        try:
+            eroot = playground.eroot
+            root = playground.settings["ROOT"]
+            eprefix = playground.settings["EPREFIX"]
+            vardb = playground.trees[eroot]["vartree"].dbapi
+            ensure_dirs(os.path.join(eroot, "usr", "bin"))
+            ensure_dirs(os.path.join(eroot, "usr", "lib64"))
+
+            def touch(path):
+                with open(os.path.join(root, path.lstrip(os.sep)), "w"):
+                    pass
+
+            needed = {
+                "dev-libs/A-1": [
+                    f"X86_64;{eprefix}/usr/lib64/liba.so.1;liba.so.1;;libc.so.6;x86_64",
+                ],
+                "dev-libs/B-1": [
+                    f"X86_64;{eprefix}/usr/bin/b;;{eprefix}/usr/lib64;liba.so.1,libc.so.6;x86_64",
+                    f"X86_64;{eprefix}/usr/lib64/libb.so.1;libb.so.1;{eprefix}/usr/lib64;liba.so.1;x86_64",
+                ],
+            }
+            for cpv, lines in needed.items():
+                for line in lines:
+                    touch(line.split(";")[1])
+                with open(vardb.getpath(cpv, filename="NEEDED.ELF.2"), "w") as f:
+                    f.write("".join(line + "\n" for line in lines))
+            vardb._clear_cache()
+
+            self.assertTrue(vardb._needed_index.populate())
+            self.assertEqual(vardb._needed_index.get_needed(), needed)
+
+            def consumers(path):
+                vardb._linkmap.rebuild()
+                return sorted(vardb._linkmap.findConsumers(os.path.join(eprefix, path)))
+
+            expected = [f"{eprefix}/usr/bin/b", f"{eprefix}/usr/lib64/libb.so.1"]
+            self.assertEqual(consumers("usr/lib64/liba.so.1"), expected)
+
+            # The LinkageMap is the same without the index.
+            vardb._needed_index.close()
+            vardb._needed_index._disabled = True
+            self.assertEqual(consumers("usr/lib64/liba.so.1"), expected)
+            vardb._needed_index._disabled = False
+
+            # Excluded packages are omitted.
+            vardb._linkmap.rebuild(exclude_pkgs=("dev-libs/B-1",))
+            self.assertEqual(
+                list(
+                    vardb._linkmap.findConsumers(
+                        os.path.join(eprefix, "usr/lib64/liba.so.1")
+                    )
+                ),
+                [],
+            )
+
+            # Unmerged packages are removed from the index.
+            dblink = vardb._dblink("dev-libs/B-1")
+            shutil.rmtree(dblink.dbdir)
+            vardb._remove(dblink)
+            self.assertEqual(
+                vardb._needed_index.get_needed(),
+                {"dev-libs/A-1": needed["dev-libs/A-1"]},
+            )
+
+            # A merge does not cause populate() to check all packages again.
+            dblink = vardb._dblink("dev-libs/C-1")
+            vardb._bump_mtime(dblink.mycpv)
+            touch(f"{eprefix}/usr/bin/c")
+            with open(vardb.getpath("dev-libs/C-1", filename="NEEDED.ELF.2"), "w") as f:
+                f.write(
+                    f"X86_64;{eprefix}/usr/bin/c;;{eprefix}/usr/lib64;liba.so.1;x86_64\n"
+                )
+            vardb._add(dblink)
+            vardb._bump_mtime(dblink.mycpv)
+
+            def pkg_hash(cpv):
+                raise AssertionError(cpv)
+
+            vardb._needed_index._pkg_hash = pkg_hash
+            self.assertEqual(consumers("usr/lib64/liba.so.1"), [f"{eprefix}/usr/bin/c"])
+            del vardb._needed_index._pkg_hash
+
+            # Packages which were modified by another process, without
+            # updating the index, are indexed again by populate().
+            touch(f"{eprefix}/usr/bin/d")
+            with open(vardb.getpath("dev-libs/C-1", filename="NEEDED.ELF.2"), "w") as f:
+                f.write(
+                    f"X86_64;{eprefix}/usr/bin/d;;{eprefix}/usr/lib64;liba.so.1;x86_64\n"
+                )
+            pkgdir = vardb.getpath("dev-libs/C-1")
+            for path in (pkgdir, os.path.dirname(pkgdir)):
+                mtime_ns = os.stat(path).st_mtime_ns + 10**9
+                os.utime(path, ns=(mtime_ns, mtime_ns))
+            vardb._clear_cache()
+            self.assertEqual(consumers("usr/lib64/liba.so.1"), [f"{eprefix}/usr/bin/d"])
+        finally:
+            playground.cleanup()
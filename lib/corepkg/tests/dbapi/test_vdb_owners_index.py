@@ -0,0 +1,140 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import shutil
+
+from corepkg import os
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+from corepkg.util import ensure_dirs
+
+
+class VdbOwnersIndexTestCase(TestCase):
+    def testVdbOwnersIndex(self):
+        installed = {
+            "dev-libs/A-1": {"EAPI": "8"},
+            "dev-libs/B-1": {"EAPI": "8"},
+            "dev-libs/C-1": {"EAPI": "8"},
+        }
+        playground = ResolverPlayground(installed=installed)
+        try:
+            eroot = playground.eroot
+            vardb = playground.trees[eroot]["vartree"].dbapi
+            ensure_dirs(os.path.join(eroot, "usr", "lib"))
+            os.symlink("lib", os.path.join(eroot, "usr", "lib64"))
+
+            contents = {
+                "dev-libs/A-1": {
+                    "usr/bin": ("dir",),
+                    "usr/bin/a": ("obj", "0", "d41d8cd98f00b204e9800998ecf8427e"),
+                    "usr/lib/liba.so": ("sym", "0", "liba.so.1"),
+                },
+                "dev-libs/B-1": {
+                    "usr/bin": ("dir",),
+                    "usr/bin/b": ("obj", "0", "d41d8cd98f00b204e9800998ecf8427e"),
+                    "usr/lib64/libb.so": ("sym", "0", "libb.so.1"),
+                },
+                "dev-libs/C-1": {},
+            }
+            for cpv, pkg_contents in contents.items():
+                vardb.writeContentsToContentsFile(
+                    vardb._dblink(cpv),
+                    {os.path.join(eroot, k): v for k, v in pkg_contents.items()},
+                )
+
+            # Paths are relative to ROOT, which includes EPREFIX here.
+            def get_owners(paths):
+                return {
+                    (pkg.mycpv, path)
+                    for pkg, files in vardb._owners.get_owners(paths).items()
+                    for path in files
+                }
+
+            queries = (
+                ([eroot + "usr/bin/a"], {("dev-libs/A-1", "usr/bin/a")}),
+                (
+                    [eroot + "usr/bin"],
+                    {("dev-libs/A-1", "usr/bin"), ("dev-libs/B-1", "usr/bin")},
+                ),
+                (["b"], {("dev-libs/B-1", "usr/bin/b")}),
+                # Paths are matched through symlinked directories.
+                ([eroot + "usr/lib64/liba.so"], {("dev-libs/A-1", "usr/lib/liba.so")}),
+                ([eroot + "usr/lib/libb.so"], {("dev-libs/B-1", "usr/lib64/libb.so")}),
+                ([eroot + "usr/bin/c", "c"], set()),
+            )
+
+            # The index is not maintained until it is used.
+            self.assertFalse(vardb._owners_index.exists())
+            self.assertTrue(vardb._owners_index.populate())
+            self.assertTrue(vardb._owners_index.exists())
+            for paths, expected in queries:
+                self.assertEqual(get_owners(paths), expected)
+
+            # Installed packages are not checked again while the vdb is
+            # unchanged.
+            def pkg_hash(cpv):
+                raise AssertionError(cpv)
+
+            vardb._owners_index._pkg_hash = pkg_hash
+            self.assertTrue(vardb._owners_index.populate())
+            del vardb._owners_index._pkg_hash
+
+            # Collision protection looks up owners in the index.
+            with open(os.path.join(eroot, "usr/bin/a"), "w"):
+                pass
+            with open(os.path.join(eroot, "usr/bin/x"), "w"):
+                pass
+            pkg_dblink = vardb._dblink("dev-libs/D-1")
+
+            files = [eroot + "usr/bin/a", eroot + "usr/bin/x"]
+
+            def collisions(mypkglist):
+                return pkg_dblink._collision_protect(
+                    eroot, eroot, mypkglist, [f.lstrip(os.sep) for f in files], []
+                )[0]
+
+            dblink = vardb._dblink("dev-libs/A-1")
+            dblink.isowner = pkg_hash
+            self.assertEqual(collisions([dblink]), files[1:])
+            self.assertEqual(collisions([]), files)
+            vardb._owners_index.close()
+            vardb._owners_index._disabled = True
+            self.assertEqual(collisions([vardb._dblink("dev-libs/A-1")]), files[1:])
+            vardb._owners_index._disabled = False
+
+            # The index gives the same results as the CONTENTS based search.
+            vardb._owners_index.close()
+            vardb._owners_index._disabled = True
+            for paths, expected in queries:
+                self.assertEqual(get_owners(paths), expected)
+            vardb._owners_index._disabled = False
+
+            # Rewritten CONTENTS are indexed.
+            dblink = vardb._dblink("dev-libs/C-1")
+            vardb.writeContentsToContentsFile(
+                dblink,
+                {
+                    os.path.join(eroot, "usr/bin/c"): (
+                        "obj",
+                        "0",
+                        "d41d8cd98f00b204e9800998ecf8427e",
+                    )
+                },
+            )
+            self.assertEqual(get_owners(["c"]), {("dev-libs/C-1", "usr/bin/c")})
+
+            # Unmerged packages are removed from the index.
+            shutil.rmtree(dblink.dbdir)
+            vardb._remove(dblink)
+            self.assertEqual(get_owners(["c"]), set())
+
+            # Packages which were modified by another process, without
+            # updating the index, are indexed again by populate().
+            dblink = vardb._dblink("dev-libs/B-1")
+            shutil.rmtree(dblink.dbdir)
+            mtime_ns = os.stat(dblink.dbcatdir).st_mtime_ns + 10**9
+            os.utime(dblink.dbcatdir, ns=(mtime_ns, mtime_ns))
+            vardb._clear_cache()
+            self.assertEqual(get_owners(["b"]), set())
+        finally:
+            playground.cleanup()
@@ -0,0 +1,86 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import shutil
+
+import corepkg
+from _emerge.MetadataRegen import metadata_regen_retry
+from corepkg import os
+from corepkg.dbapi.porttree import portdbapi
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+from corepkg.util._eventloop.global_event_loop import global_event_loop
+
+
+class DependWorkerTestCase(TestCase):
+    def testMetadataWorkers(self):
+        ebuilds = {
+            "dev-libs/A-1": {"EAPI": "8"},
+            "dev-libs/A-2": {
+                "EAPI": "8",
+                "IUSE": "foo",
+                "MISC_CONTENT": "inherit bar",
+            },
+            "dev-libs/B-1": {
+                "EAPI": "8",
+                "DEPEND": "dev-libs/A",
+                "MISC_CONTENT": "inherit foo",
+            },
+            "dev-libs/C-1": {"EAPI": "8", "MISC_CONTENT": "inherit baz"},
+            "dev-libs/D-1": {"EAPI": "8", "MISC_CONTENT": "inherit bar"},
+        }
+        eclasses = {
+            "foo": ("inherit bar", 'BDEPEND="dev-libs/C"'),
+            "bar": (
+                '[[ ${PN} == D ]] && IDEPEND="dev-libs/D"',
+                "bar_src_compile() { :; }",
+                "EXPORT_FUNCTIONS src_compile",
+            ),
+            "baz": ("",),
+        }
+
+        playground = ResolverPlayground(ebuilds=ebuilds, eclasses=eclasses)
+        try:
+            loop = global_event_loop()
+            test_repo_location = playground.settings.repositories["test_repo"].location
+            with open(
+                os.path.join(test_repo_location, "eclass", "baz.eclass"), "w"
+            ) as f:
+                f.write("die broken\n")
+
+            def regen(workers):
+                # Remove the cache, so that all the metadata is generated.
+                shutil.rmtree(playground.settings.depcachedir, ignore_errors=True)
+                settings = corepkg.config(clone=playground.settings)
+                if workers:
+                    settings.features.add("metadata-workers")
+                portdb = portdbapi(mysettings=settings)
+                results = {}
+
+                def consumer(cpv, repo_path, metadata, ebuild_hash, eapi_supported):
+                    results[str(cpv)] = metadata and {
+                        k: v for k, v in metadata.items() if k != "_mtime_"
+                    }
+
+                returncode = loop.run_until_complete(
+                    metadata_regen_retry(
+                        portdb,
+                        consumer=consumer,
+                        write_auxdb=False,
+                        max_jobs=2,
+                        max_tries=1,
+                    )
+                )
+                portdb.close_caches()
+                return returncode, results
+
+            expected = regen(False)
+            self.assertEqual(expected[0], 1)
+            self.assertIsNone(expected[1]["dev-libs/C-1"])
+            self.assertEqual(expected[1]["dev-libs/B-1"]["BDEPEND"], "dev-libs/C")
+            self.assertEqual(expected[1]["dev-libs/D-1"]["IDEPEND"], "dev-libs/D")
+
+            self.assertEqual(regen(True), expected)
+
+        finally:
+            playground.cleanup()
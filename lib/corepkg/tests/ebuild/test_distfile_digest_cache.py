@@ -0,0 +1,99 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import tempfile
+
+from corepkg import os
+from corepkg.checksum import perform_checksums
+from corepkg.emaint.modules.distfile_digests.distfile_digests import (
+    DistfileDigestsHandler,
+)
+from corepkg.output import EOutput
+from corepkg.package.ebuild._distfile_digests import DistfileDigestCache
+from corepkg.package.ebuild.fetch import _check_distfile
+from corepkg.tests import TestCase
+
+
+class DistfileDigestCacheTestCase(TestCase):
+    def testDistfileDigestCache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = DistfileDigestCache(os.path.join(tmpdir, "digests.sqlite"))
+            distfile = os.path.join(tmpdir, "foo.tar.gz")
+            with open(distfile, "wb") as f:
+                f.write(b"foo\n")
+            digests = perform_checksums(distfile, ["size", "SHA512", "BLAKE2B"])
+            eout = EOutput()
+            eout.quiet = True
+
+            self.assertEqual(cache.get(distfile, os.stat(distfile)), {})
+            self.assertEqual(
+                _check_distfile(distfile, digests, eout, digest_cache=cache)[0], True
+            )
+            st = os.stat(distfile)
+            self.assertEqual(
+                cache.get(distfile, st),
+                {k: v for k, v in digests.items() if k != "size"},
+            )
+
+            # Cached digests are trusted as long as the file is unchanged,
+            # so a digest that is only in the cache is not verified.
+            fake = {"SHA512": "0" * 128}
+            cache.add(distfile, st, fake)
+            self.assertEqual(cache.get(distfile, st)["SHA512"], fake["SHA512"])
+            self.assertEqual(
+                _check_distfile(distfile, fake, eout, digest_cache=cache)[0], True
+            )
+            self.assertEqual(
+                _check_distfile(distfile, fake, eout, show_errors=0)[0], False
+            )
+
+            # A stat change invalidates the entry.
+            os.utime(distfile, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+            self.assertEqual(cache.get(distfile, os.stat(distfile)), {})
+            self.assertEqual(
+                _check_distfile(
+                    distfile, fake, eout, show_errors=0, digest_cache=cache
+                )[0],
+                False,
+            )
+
+            # Digests are not stored if the file changed after st was
+            # obtained.
+            cache.discard(distfile)
+            self.assertEqual(cache.get(distfile, st), {})
+            cache.add(distfile, st, fake)
+            self.assertEqual(cache.get(distfile, st), {})
+
+            # emaint keeps entries of files that were modified without
+            # changing their contents, and prunes the others.
+            self.assertEqual(
+                _check_distfile(distfile, digests, eout, digest_cache=cache)[0], True
+            )
+            other = os.path.join(tmpdir, "bar.tar.gz")
+            with open(other, "wb") as f:
+                f.write(b"bar\n")
+            cache.add(other, os.stat(other), perform_checksums(other, ["SHA512"]))
+            missing = os.path.join(tmpdir, "missing.tar.gz")
+            with open(missing, "wb") as f:
+                f.write(b"missing\n")
+            cache.add(missing, os.stat(missing), perform_checksums(missing, ["SHA512"]))
+            os.unlink(missing)
+            st = os.stat(distfile)
+            os.utime(distfile, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+            with open(other, "ab") as f:
+                f.write(b"bar\n")
+
+            handler = DistfileDigestsHandler(cache=cache)
+            result, errors = handler.check()
+            self.assertEqual(result, False)
+            self.assertEqual(len(errors), 3)
+            self.assertEqual(handler.fix(), (True, None))
+            self.assertEqual(handler.check(), (True, None))
+            self.assertEqual(
+                [path for path, _key, _digests in cache.entries()], [distfile]
+            )
+            self.assertEqual(
+                cache.get(distfile, os.stat(distfile)),
+                {k: v for k, v in digests.items() if k != "size"},
+            )
+            cache.close()
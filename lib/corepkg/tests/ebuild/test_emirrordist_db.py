@@ -0,0 +1,184 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import shelve
+import shutil
+import subprocess
+import tempfile
+
+import corepkg
+from corepkg import os
+from corepkg._emirrordist.ContentDB import ContentDB
+from corepkg._emirrordist.SqliteDB import SqliteDB, migrate_shelve
+from corepkg.const import PORTAGE_PYM_PATH
+from corepkg.package.ebuild.fetch import DistfileName
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class EmirrordistDBTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        super().tearDown()
+
+    def testSqliteDB(self):
+        db_file = os.path.join(self.tmpdir, "distfiles.db")
+        db = SqliteDB(db_file)
+        db.batch_size = 2
+        try:
+            db["foo"] = "cat/foo-1"
+            db["bar"] = (1024, 1.5)
+            db["baz"] = {"a", "b"}
+            self.assertEqual(db["bar"], (1024, 1.5))
+            self.assertIn("baz", db)
+            self.assertNotIn("missing", db)
+            self.assertEqual(db.get("missing", 1), 1)
+            self.assertRaises(KeyError, db.__getitem__, "missing")
+            self.assertRaises(KeyError, db.__delitem__, "missing")
+            # The mapping can be modified while it is iterated.
+            for key in db:
+                if key != "baz":
+                    del db[key]
+            self.assertEqual(db.items(), [("baz", {"a", "b"})])
+        finally:
+            db.close()
+
+        self.assertTrue(SqliteDB.is_sqlite(db_file))
+        db = SqliteDB(db_file, readonly=True)
+        try:
+            self.assertEqual(len(db), 1)
+            self.assertEqual(db["baz"], {"a", "b"})
+            self.assertRaises(OSError, db.__setitem__, "foo", "bar")
+        finally:
+            db.close()
+
+    def testContentDB(self):
+        content_db = ContentDB(SqliteDB(os.path.join(self.tmpdir, "content.db")))
+        try:
+            foo = DistfileName("foo", digests={"SHA512": "aa", "BLAKE2B": "bb"})
+            content_db.add(foo)
+            content_db.add(DistfileName("bar", digests=dict(foo.digests)))
+            self.assertEqual(
+                sorted(
+                    str(x)
+                    for x in content_db.get_filenames_translate(
+                        DistfileName("x", digests={"SHA512": "AA"})
+                    )
+                ),
+                ["bar", "foo"],
+            )
+            content_db.remove(foo)
+            self.assertNotIn("filename:foo", content_db)
+            self.assertEqual(content_db["digest:SHA512:aa"], {"bar"})
+        finally:
+            content_db.close()
+
+    def testMigrateShelve(self):
+        db_file = os.path.join(self.tmpdir, "deletion.db")
+        self.assertFalse(migrate_shelve(db_file))
+
+        with shelve.open(db_file) as db:
+            for i in range(2500):
+                db[f"file-{i}"] = float(i)
+        self.assertTrue(migrate_shelve(db_file))
+        self.assertFalse(migrate_shelve(db_file))
+
+        db = SqliteDB(db_file)
+        try:
+            self.assertEqual(len(db), 2500)
+            self.assertEqual(db["file-2499"], 2499.0)
+        finally:
+            db.close()
+        self.assertFalse(os.path.exists(db_file + "-wal"))
+
+    def testIncremental(self):
+        distfiles = {"a.tar.gz": b"a\n", "b.tar.gz": b"b\n"}
+        ebuilds = {
+            "dev-libs/A-1": {"SRC_URI": "https://example.invalid/a.tar.gz"},
+            "dev-libs/B-1": {"SRC_URI": "https://example.invalid/b.tar.gz"},
+        }
+        playground = ResolverPlayground(ebuilds=ebuilds, distfiles=distfiles)
+        try:
+            settings = playground.settings
+            layout_conf = os.path.join(self.tmpdir, "layout.conf")
+            with open(layout_conf, "w") as f:
+                f.write("[structure]\n0=flat\n")
+            incremental_db = os.path.join(self.tmpdir, "incremental.db")
+            env = settings.environ()
+            env["PYTHONPATH"] = ":".join(
+                filter(
+                    None,
+                    [PORTAGE_PYM_PATH] + os.environ.get("PYTHONPATH", "").split(":"),
+                )
+            )
+
+            def emirrordist(*args):
+                proc = subprocess.run(
+                    (
+                        corepkg._python_interpreter,
+                        "-b",
+                        "-Wd",
+                        os.path.join(str(self.bindir), "emirrordist"),
+                        "--verbose",
+                        "--distfiles",
+                        playground.distdir,
+                        "--config-root",
+                        settings["EPREFIX"],
+                        "--layout-conf",
+                        layout_conf,
+                        "--delete",
+                        "--repositories-configuration",
+                        settings.repositories.config_string(),
+                        "--repo",
+                        "test_repo",
+                        "--db-backend",
+                        "sqlite",
+                        "--incremental-db",
+                        incremental_db,
+                        "--mirror",
+                    )
+                    + args,
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                )
+                output = proc.stdout.decode(errors="replace")
+                self.assertEqual(proc.returncode, 0, output)
+                return output
+
+            self.assertIn("processed 2 of 2 packages", emirrordist())
+            db = SqliteDB(incremental_db, readonly=True)
+            try:
+                self.assertEqual(
+                    db["cp:dev-libs/A"]["files"], {"a.tar.gz": "dev-libs/A-1"}
+                )
+            finally:
+                db.close()
+
+            self.assertIn("processed 0 of 2 packages", emirrordist())
+
+            ebuild = os.path.join(
+                playground.settings.repositories["test_repo"].location,
+                "dev-libs/B/B-1.ebuild",
+            )
+            st = os.stat(ebuild)
+            os.utime(ebuild, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+            # The readonly db is not updated for --dry-run.
+            self.assertIn("incremental db not updated", emirrordist("--dry-run"))
+
+            # Only the changed package is processed, and the files of the
+            # other one are not deleted.
+            self.assertIn("processed 1 of 2 packages", emirrordist())
+            for filename in distfiles:
+                self.assertTrue(
+                    os.path.exists(os.path.join(playground.distdir, filename))
+                )
+
+            self.assertIn("processed 2 of 2 packages", emirrordist("--full-reconcile"))
+        finally:
+            playground.cleanup()
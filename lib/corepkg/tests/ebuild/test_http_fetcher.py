@@ -0,0 +1,321 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import functools
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from corepkg import os
+from corepkg.checksum import checksum_str
+from corepkg.package.ebuild.config import config
+from corepkg.package.ebuild.fetch import fetch
+from corepkg.package.ebuild._http_fetcher import HttpFetcher
+from corepkg.package.ebuild._mirror_health import MirrorHealth
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+from corepkg.util.futures import asyncio
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, server_state, *args, **kwargs):
+        self.state = server_state
+        BaseHTTPRequestHandler.__init__(self, *args, **kwargs)
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.state["lock"]:
+            self.state["connections"] += 1
+
+    def do_GET(self):
+        with self.state["lock"]:
+            self.state["requests"].append((self.path, self.headers.get("Range")))
+        if self.path.startswith("/redirect/"):
+            self.send_response(302)
+            self.send_header("Location", self.path[len("/redirect") :])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/long-header":
+            self.send_response(200)
+            self.send_header("X-Long", "x" * 70000)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/auth/"):
+            if self.headers.get("Authorization") != "Bearer secret":
+                self.send_error(403)
+                return
+            path = self.path[len("/auth") :]
+        else:
+            path = self.path
+        content = self.state["content"].get(path)
+        if content is None:
+            self.send_error(404)
+            return
+
+        range_header = self.headers.get("Range")
+        match = range_header and re.fullmatch(r"bytes=(\d+)-(\d*)", range_header)
+        if match and range_header == self.state["fail_range"]:
+            self.send_error(500)
+            return
+        if match and self.state["ranges"]:
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(content)
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            end = min(end, len(content))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(content)}")
+            body = content[start:end]
+        else:
+            self.send_response(200)
+            body = content
+        if self.state["chunked"]:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(body), 1000):
+                chunk = body[i : i + 1000]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+class HttpFetcherTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.state = {
+            "chunked": False,
+            "connections": 0,
+            "fail_range": None,
+            "content": {
+                "/small": b"small\n",
+                "/large": bytes(range(256)) * 400,
+            },
+            "lock": threading.Lock(),
+            "ranges": True,
+            "requests": [],
+        }
+        self.server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(_Handler, self.state)
+        )
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.base_uri = f"http://127.0.0.1:{self.server.server_port}"
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        for name in os.listdir(self.tmpdir):
+            os.unlink(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+        super().tearDown()
+
+    def _fetch(self, fetches, **kwargs):
+        async def fetch_all():
+            fetcher = HttpFetcher(**kwargs)
+            fetcher.segment_min_size = 10000
+            try:
+                return [
+                    await fetcher.fetch(
+                        self.base_uri + path, os.path.join(self.tmpdir, name), **opts
+                    )
+                    for path, name, opts in fetches
+                ]
+            finally:
+                await fetcher.close()
+
+        return asyncio.run(fetch_all())
+
+    def _read(self, name):
+        with open(os.path.join(self.tmpdir, name), "rb") as f:
+            return f.read()
+
+    def testConnectionReuse(self):
+        for chunked in (False, True):
+            self.state["chunked"] = chunked
+            self.state["connections"] = 0
+            self.assertEqual(
+                self._fetch(
+                    [
+                        ("/small", "a", {}),
+                        ("/redirect/small", "b", {}),
+                        (
+                            "/auth/small",
+                            "c",
+                            {"headers": {"Authorization": "Bearer secret"}},
+                        ),
+                        ("/small", "d", {}),
+                    ],
+                    segments=1,
+                ),
+                [os.EX_OK] * 4,
+            )
+            for name in "abcd":
+                self.assertEqual(self._read(name), self.state["content"]["/small"])
+            self.assertEqual(self.state["connections"], 1)
+
+    def testErrors(self):
+        self.assertEqual(
+            self._fetch(
+                [
+                    ("/missing", "a", {}),
+                    ("/auth/small", "b", {}),
+                    # A header which exceeds the limit of the reader only
+                    # fails this download.
+                    ("/long-header", "c", {}),
+                    ("/small", "d", {}),
+                ]
+            ),
+            [1, 1, 1, os.EX_OK],
+        )
+        self.assertEqual(self._read("d"), self.state["content"]["/small"])
+
+    def testSegments(self):
+        content = self.state["content"]["/large"]
+        self.assertEqual(self._fetch([("/large", "large", {})]), [os.EX_OK])
+        self.assertEqual(self._read("large"), content)
+        ranges = sorted(r for path, r in self.state["requests"] if path == "/large")
+        self.assertEqual(
+            ranges,
+            [
+                "bytes=0-",
+                "bytes=25600-51199",
+                "bytes=51200-76799",
+                "bytes=76800-102399",
+            ],
+        )
+
+        # After a failure, the data that was received contiguously from
+        # the start of the file is kept, and the download is resumed.
+        os.unlink(os.path.join(self.tmpdir, "large"))
+        self.state["fail_range"] = "bytes=51200-76799"
+        self.assertEqual(self._fetch([("/large", "large", {})]), [1])
+        partial = self._read("large")
+        self.assertLessEqual(len(partial), 51200)
+        self.assertEqual(partial, content[: len(partial)])
+        self.state["fail_range"] = None
+        self.assertEqual(
+            self._fetch([("/large", "large", {"resume": True})]), [os.EX_OK]
+        )
+        self.assertEqual(self._read("large"), content)
+
+        # Servers which do not support ranges send the whole file.
+        self.state["ranges"] = False
+        os.unlink(os.path.join(self.tmpdir, "large"))
+        self.assertEqual(self._fetch([("/large", "large", {})]), [os.EX_OK])
+        self.assertEqual(self._read("large"), content)
+
+    def testResume(self):
+        content = self.state["content"]["/large"]
+        for ranges in (True, False):
+            self.state["ranges"] = ranges
+            with open(os.path.join(self.tmpdir, "large"), "wb") as f:
+                f.write(content[:5000])
+            del self.state["requests"][:]
+            self.assertEqual(
+                self._fetch([("/large", "large", {"resume": True})], segments=1),
+                [os.EX_OK],
+            )
+            self.assertEqual(self._read("large"), content)
+            self.assertEqual(self.state["requests"], [("/large", "bytes=5000-")])
+
+        # A complete file is not downloaded again.
+        self.state["ranges"] = True
+        self.assertEqual(
+            self._fetch([("/large", "large", {"resume": True})]), [os.EX_OK]
+        )
+        self.assertEqual(self._read("large"), content)
+
+    def testRateLimit(self):
+        content = self.state["content"]["/large"]
+        start_time = time.monotonic()
+        self.assertEqual(
+            self._fetch([("/large", "large", {})], rate_limit=200 * 1024),
+            [os.EX_OK],
+        )
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.45)
+        self.assertEqual(self._read("large"), content)
+
+        playground = ResolverPlayground()
+        try:
+            settings = config(clone=playground.settings)
+            settings.features.add("native-fetch")
+            settings["PORTAGE_FETCH_RATE_LIMIT"] = "1M"
+            self.assertEqual(HttpFetcher.from_settings(settings).rate_limit, 2**20)
+            # The limit is shared by the jobs of the parallel-fetch queue.
+            settings["PORTAGE_FETCH_JOBS"] = "4"
+            settings["PORTAGE_PARALLEL_FETCHONLY"] = "1"
+            self.assertEqual(HttpFetcher.from_settings(settings).rate_limit, 2**18)
+            settings["PORTAGE_FETCH_RATE_LIMIT"] = "fast"
+            self.assertIsNone(HttpFetcher.from_settings(settings).rate_limit)
+        finally:
+            playground.cleanup()
+
+    def testFetch(self):
+        playground = ResolverPlayground()
+        try:
+            settings = config(clone=playground.settings)
+            settings["DISTDIR"] = self.tmpdir
+            settings["GENTOO_MIRRORS"] = ""
+            # FETCHCOMMAND must not be used.
+            settings["FETCHCOMMAND"] = "false ${FILE}"
+            settings.features.add("native-fetch")
+            # The native fetcher is not used if privileges have to be
+            # dropped by FETCHCOMMAND.
+            settings.features.discard("userfetch")
+            settings.features.add("adaptive-mirrors")
+            content = self.state["content"]["/large"]
+            digests = {
+                "large": {
+                    "size": len(content),
+                    "SHA512": checksum_str(content, "SHA512"),
+                },
+            }
+            self.assertEqual(
+                fetch(
+                    {"large": (self.base_uri + "/large",)},
+                    settings,
+                    digests=digests,
+                ),
+                1,
+            )
+            self.assertEqual(self._read("large"), content)
+
+            settings.features.discard("native-fetch")
+            os.unlink(os.path.join(self.tmpdir, "large"))
+            self.assertEqual(
+                fetch(
+                    {"large": (self.base_uri + "/large",)},
+                    settings,
+                    digests=digests,
+                ),
+                0,
+            )
+
+            # Transfers are recorded in the mirror health table.
+            entry = MirrorHealth(
+                os.path.join(self.tmpdir, ".mirror-health.json")
+            )._entries[MirrorHealth.mirror_key(self.base_uri)]
+            self.assertEqual(entry["samples"], 2)
+            self.assertGreater(entry["errors"], 0)
+            self.assertIsNotNone(entry["ttfb"])
+        finally:
+            playground.cleanup()
@@ -0,0 +1,86 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import tempfile
+
+from corepkg import os
+from corepkg.package.ebuild._mirror_health import MirrorHealth
+from corepkg.tests import TestCase
+
+
+class MirrorHealthTestCase(TestCase):
+    def testMirrorHealth(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, ".mirror-health.json")
+            health = MirrorHealth(filename)
+            now = 1700000000.0
+            fast = "https://fast.example.org/gentoo"
+            slow = "https://slow.example.org/gentoo"
+            failing = "http://failing.example.org:8080/gentoo"
+            unknown = "https://unknown.example.org/gentoo"
+            mirrors = [failing, unknown, slow, fast, "/var/cache/mirror"]
+
+            self.assertEqual(health.sort(mirrors, now=now), mirrors)
+            self.assertEqual(
+                MirrorHealth.mirror_key("https://user:pw@Fast.example.org/a/b"),
+                "https://fast.example.org",
+            )
+            self.assertEqual(
+                MirrorHealth.mirror_key(failing), "http://failing.example.org:8080"
+            )
+            self.assertEqual(MirrorHealth.mirror_key("/var/cache/mirror"), None)
+
+            size = 8 * 1024 * 1024
+            for i in range(3):
+                health.record(
+                    fast + "/distfiles/a", True, elapsed=1, size=size, ttfb=0.1, now=now
+                )
+                health.record(
+                    slow + "/distfiles/a", True, elapsed=8, size=size, ttfb=0.5, now=now
+                )
+                health.record(failing + "/distfiles/a", False, now=now)
+            # Unknown and local mirrors are ranked in the middle.
+            self.assertEqual(
+                health.sort(mirrors, now=now),
+                [fast, unknown, slow, "/var/cache/mirror", failing],
+            )
+
+            # Statistics are persistent, and shared with other instances.
+            health.save()
+            other = MirrorHealth(filename)
+            self.assertEqual(
+                other.sort(mirrors, now=now),
+                [fast, unknown, slow, "/var/cache/mirror", failing],
+            )
+            other.record(slow + "/distfiles/b", False, now=now)
+            other.save()
+            health.record(fast + "/distfiles/b", True, now=now)
+            health.save()
+            health = MirrorHealth(filename)
+            self.assertGreater(
+                health._entry("https://slow.example.org", now)["errors"], 0
+            )
+            self.assertEqual(
+                health._entry("https://fast.example.org", now)["samples"], 4
+            )
+
+            # A mirror that recovers moves up again.
+            for i in range(10):
+                health.record(
+                    failing + "/distfiles/a",
+                    True,
+                    elapsed=0.5,
+                    size=size,
+                    ttfb=0.05,
+                    now=now,
+                )
+            self.assertEqual(health.sort(mirrors, now=now)[:2], [fast, failing])
+
+            # Old statistics are ignored.
+            self.assertEqual(
+                health.sort(mirrors, now=now + MirrorHealth.max_age + 1), mirrors
+            )
+
+            with open(filename, "w") as f:
+                f.write("not json")
+            self.assertEqual(MirrorHealth(filename).sort(mirrors, now=now), mirrors)
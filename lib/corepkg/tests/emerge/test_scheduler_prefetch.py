@@ -0,0 +1,112 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import re
+import weakref
+
+from _emerge.CompositeTask import CompositeTask
+from _emerge.JobStatusDisplay import JobStatusDisplay
+from _emerge.Scheduler import Scheduler
+from _emerge.SequentialTaskQueue import SequentialTaskQueue
+from corepkg.tests import TestCase
+from corepkg.util._async.AsyncTaskFuture import AsyncTaskFuture
+from corepkg.util._eventloop.global_event_loop import global_event_loop
+from corepkg.util.futures import asyncio
+
+
+class _StatusDisplay(JobStatusDisplay):
+    def _update(self, msg):
+        object.__setattr__(self, "status_line", re.sub("\x1b\\[[0-9;]*m", "", msg))
+
+    def _load_avg_str(self):
+        return "0.00"
+
+
+class _FakePrefetcher(CompositeTask):
+    __slots__ = ("future", "logfile")
+
+    def _start(self):
+        self.future = self.scheduler.create_future()
+        self._start_task(AsyncTaskFuture(future=self.future), self._default_final_exit)
+
+
+class SchedulerPrefetchTestCase(TestCase):
+    def _scheduler(self, loop):
+        scheduler = Scheduler.__new__(Scheduler)
+        scheduler._event_loop = loop
+        scheduler._fetch_log = None
+        scheduler._pending_prefetchers = set()
+        scheduler._prefetchers = weakref.WeakValueDictionary()
+        scheduler._status_display = _StatusDisplay(quiet=True, xterm_titles=False)
+        scheduler._task_queues = Scheduler._task_queues_class()
+        scheduler._task_queues.fetch = SequentialTaskQueue(max_jobs=1)
+        return scheduler
+
+    def _add_prefetcher(self, scheduler, pkg):
+        prefetcher = _FakePrefetcher(scheduler=scheduler._event_loop)
+        prefetcher.addExitListener(scheduler._prefetcher_exit)
+        scheduler._pending_prefetchers.add(prefetcher)
+        scheduler._status_display.fetch_maxval += 1
+        scheduler._prefetchers[pkg] = prefetcher
+        scheduler._task_queues.fetch.add(prefetcher)
+        return prefetcher
+
+    def _fetch_status(self, scheduler):
+        scheduler._status_display._display_status()
+        status_line = scheduler._status_display.status_line
+        return status_line[status_line.index(" complete") :].split("Load avg")[0]
+
+    def testDiscardedPrefetchers(self):
+        loop = global_event_loop()
+        scheduler = self._scheduler(loop)
+        status_display = scheduler._status_display
+        fetch = scheduler._task_queues.fetch
+
+        prefetchers = [self._add_prefetcher(scheduler, pkg) for pkg in "ABCD"]
+        self.assertEqual(status_display.fetch_maxval, 4)
+        self.assertIn(" 0 of 4 fetched", self._fetch_status(scheduler))
+
+        prefetchers[0].future.set_result(None)
+        loop.run_until_complete(prefetchers[0].async_wait())
+        loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(status_display.fetched, 1)
+        self.assertIn(" 1 of 4 fetched, 1 fetching", self._fetch_status(scheduler))
+
+        # A prefetcher which has not started is discarded from the queue
+        # and cancelled when its build starts first.
+        prefetcher = prefetchers[2]
+        self.assertIsNone(scheduler._get_prefetcher("C"))
+        loop.run_until_complete(prefetcher.async_wait())
+        self.assertTrue(prefetcher.cancelled)
+        self.assertEqual(len(fetch), 2)
+        self.assertEqual(status_display.fetch_maxval, 3)
+        self.assertIn(" 1 of 3 fetched", self._fetch_status(scheduler))
+
+        # The queued and running prefetchers are cancelled when the fetch
+        # queue is cleared, and the fetch status disappears.
+        fetch.clear()
+        for prefetcher in (prefetchers[1], prefetchers[3]):
+            loop.run_until_complete(prefetcher.async_wait())
+            self.assertTrue(prefetcher.cancelled)
+        self.assertEqual(status_display.fetch_maxval, 1)
+        self.assertEqual(status_display.fetched, 1)
+        self.assertNotIn("fetch", self._fetch_status(scheduler))
+        self.assertEqual(scheduler._pending_prefetchers, set())
+
+    def testResetStatusDisplay(self):
+        loop = global_event_loop()
+        scheduler = self._scheduler(loop)
+        status_display = scheduler._status_display
+
+        prefetcher = self._add_prefetcher(scheduler, "A")
+        status_display.reset()
+        scheduler._task_queues.fetch.clear()
+        scheduler._pending_prefetchers.clear()
+        loop.run_until_complete(prefetcher.async_wait())
+
+        # The cancelled prefetcher is not subtracted from the total of
+        # the next run.
+        self._add_prefetcher(scheduler, "B")
+        self.assertEqual(status_display.fetch_maxval, 1)
+        self.assertIn(" 0 of 1 fetched", self._fetch_status(scheduler))
+        scheduler._task_queues.fetch.clear()
@@ -0,0 +1,69 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from unittest import mock
+
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import (
+    ResolverPlayground,
+    ResolverPlaygroundTestCase,
+)
+
+import _emerge.depgraph
+
+
+class BacktrackingSpeculationTestCase(TestCase):
+    def testBacktrackingSpeculation(self):
+        ebuilds = {
+            "dev-libs/A-1": {},
+            "dev-libs/A-2": {},
+            "dev-libs/B-1": {"RDEPEND": "dev-libs/D"},
+            "dev-libs/C-1": {},
+            "dev-libs/C-2": {"RDEPEND": ">=dev-libs/A-2"},
+            "dev-libs/D-1": {"RDEPEND": "<dev-libs/A-2"},
+        }
+        installed = {
+            "dev-libs/A-1": {},
+            "dev-libs/B-1": {"RDEPEND": "dev-libs/D"},
+            "dev-libs/C-1": {},
+            "dev-libs/D-1": {"RDEPEND": "<dev-libs/A-2"},
+        }
+        world = ["dev-libs/B", "dev-libs/C"]
+
+        playground = ResolverPlayground(
+            ebuilds=ebuilds, installed=installed, world=world
+        )
+        take_orig = _emerge.depgraph._take_backtrack_outcome
+        try:
+            for backtrack_jobs in (1, 4):
+                test_case = ResolverPlaygroundTestCase(
+                    ["@world"],
+                    options={
+                        "--update": True,
+                        "--deep": True,
+                        "--backtrack-jobs": backtrack_jobs,
+                    },
+                    mergelist=[],
+                    success=True,
+                )
+                outcomes = []
+
+                def take_backtrack_outcome(*args):
+                    outcome = take_orig(*args)
+                    outcomes.append(outcome)
+                    return outcome
+
+                with mock.patch(
+                    "_emerge.depgraph._take_backtrack_outcome",
+                    side_effect=take_backtrack_outcome,
+                ):
+                    playground.run_TestCase(test_case)
+                self.assertEqual(test_case.test_success, True, test_case.fail_msg)
+                # Failed attempts are consumed from forked processes, in
+                # place of evaluating them again.
+                self.assertEqual(
+                    any(x is not None and not x.success for x in outcomes),
+                    backtrack_jobs > 1,
+                )
+        finally:
+            playground.cleanup()
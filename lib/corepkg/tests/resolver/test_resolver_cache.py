@@ -0,0 +1,109 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import json
+import shutil
+import tempfile
+
+from corepkg import os
+from corepkg.const import USER_CONFIG_PATH
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import (
+    ResolverPlayground,
+    ResolverPlaygroundTestCase,
+)
+
+from _emerge.ResolverCache import ResolverCache
+
+
+class ResolverCacheTestCase(TestCase):
+    def testResolverCache(self):
+        ebuilds = {
+            "dev-libs/A-1": {"EAPI": "8", "RDEPEND": "dev-libs/B"},
+            "dev-libs/B-1": {"EAPI": "8"},
+        }
+        options = {"--resolver-cache": "y"}
+
+        # Use a configured cache directory, which is also written
+        # without superuser privileges.
+        cache_dir = tempfile.mkdtemp()
+        cache_file = os.path.join(cache_dir, "resolver_cache.json")
+        playground = ResolverPlayground(
+            ebuilds=ebuilds,
+            user_config={"make.conf": (f'PORTAGE_RESOLVER_CACHE_DIR="{cache_dir}"',)},
+        )
+        try:
+            full_resolution = ResolverPlaygroundTestCase(
+                ["dev-libs/A"],
+                options=options,
+                success=True,
+                mergelist=["dev-libs/B-1", "dev-libs/A-1"],
+            )
+
+            playground.run_TestCase(full_resolution)
+            self.assertEqual(
+                full_resolution.test_success, True, full_resolution.fail_msg
+            )
+            with open(cache_file) as f:
+                entries = json.load(f)["entries"]
+            self.assertEqual(len(entries), 1)
+
+            # Tamper with the stored merge list, in order to prove that the
+            # next run with identical inputs does not resolve again.
+            entry = next(iter(entries.values()))
+            entry["mergelist"] = [
+                x for x in entry["mergelist"] if x[2] == "dev-libs/B-1"
+            ]
+            with open(cache_file, "w") as f:
+                json.dump({"version": "1", "entries": entries}, f)
+
+            test_case = ResolverPlaygroundTestCase(
+                ["dev-libs/A"],
+                options=options,
+                success=True,
+                mergelist=["dev-libs/B-1"],
+            )
+            playground.run_TestCase(test_case)
+            self.assertEqual(test_case.test_success, True, test_case.fail_msg)
+
+            # Any configuration change must invalidate the entry.
+            with open(
+                os.path.join(playground.eroot, USER_CONFIG_PATH, "package.mask"), "a"
+            ) as f:
+                f.write("dev-libs/C\n")
+            playground.run_TestCase(full_resolution)
+            self.assertEqual(
+                full_resolution.test_success, True, full_resolution.fail_msg
+            )
+        finally:
+            playground.cleanup()
+            shutil.rmtree(cache_dir)
+
+    def testFingerprint(self):
+        playground = ResolverPlayground(ebuilds={"dev-libs/A-1": {}})
+        try:
+            settings, trees = playground.settings, playground.trees
+            fingerprint = ResolverCache(
+                settings, trees, {"--update": True}, None, ["@world"]
+            ).fingerprint
+            self.assertEqual(
+                fingerprint,
+                ResolverCache(
+                    settings, trees, {"--update": True, "--ask": True}, None, ["@world"]
+                ).fingerprint,
+            )
+            self.assertNotEqual(
+                fingerprint,
+                ResolverCache(
+                    settings,
+                    trees,
+                    {"--update": True, "--deep": True},
+                    None,
+                    ["@world"],
+                ).fingerprint,
+            )
+            self.assertFalse(ResolverCache.applicable(None, {"--getbinpkg": True}))
+            self.assertFalse(ResolverCache.applicable("depclean", {}))
+            self.assertTrue(ResolverCache.applicable(None, {"--update": True}))
+        finally:
+            playground.cleanup()
@@ -0,0 +1,88 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import (
+    ResolverPlayground,
+    ResolverPlaygroundTestCase,
+)
+
+
+class ResolverIncrementalTestCase(TestCase):
+    def testResolverIncremental(self):
+        ebuilds = {
+            "app-misc/A-1": {"EAPI": "8", "RDEPEND": "dev-libs/B"},
+            "dev-libs/B-1": {"EAPI": "8"},
+            "dev-libs/B-2": {"EAPI": "8"},
+            "app-misc/C-1": {"EAPI": "8", "RDEPEND": "|| ( dev-libs/D dev-libs/E )"},
+            "dev-libs/D-1": {"EAPI": "8"},
+            "dev-libs/E-1": {"EAPI": "8"},
+            "app-misc/F-1": {"EAPI": "8", "IUSE": "foo", "RDEPEND": "dev-libs/G"},
+            "dev-libs/G-1": {"EAPI": "8", "IUSE": "bar"},
+            "app-misc/H-1": {"EAPI": "8", "RDEPEND": "|| ( dev-libs/I dev-libs/J )"},
+            "dev-libs/I-1": {"EAPI": "8"},
+            "dev-libs/J-1": {"EAPI": "8"},
+            "app-misc/K-1": {"EAPI": "8", "RDEPEND": "|| ( dev-libs/L dev-libs/M )"},
+            "dev-libs/L-1": {"EAPI": "8"},
+            "dev-libs/M-1": {"EAPI": "8"},
+            "dev-libs/M-2": {"EAPI": "8"},
+        }
+        installed = {
+            "app-misc/A-1": {"EAPI": "8", "RDEPEND": "dev-libs/B"},
+            "dev-libs/B-1": {"EAPI": "8"},
+            "app-misc/C-1": {"EAPI": "8", "RDEPEND": "|| ( dev-libs/D dev-libs/E )"},
+            "dev-libs/D-1": {"EAPI": "8"},
+            "app-misc/F-1": {"EAPI": "8", "IUSE": "foo", "RDEPEND": "dev-libs/G"},
+            "dev-libs/G-1": {"EAPI": "8", "IUSE": "bar"},
+            "app-misc/H-1": {"EAPI": "8", "RDEPEND": "|| ( dev-libs/I dev-libs/J )"},
+            "dev-libs/J-1": {"EAPI": "8"},
+            "app-misc/K-1": {"EAPI": "8", "RDEPEND": "|| ( dev-libs/L dev-libs/M )"},
+            "dev-libs/M-1": {"EAPI": "8"},
+        }
+        world = ["app-misc/A", "app-misc/C", "app-misc/F", "app-misc/H", "app-misc/K"]
+
+        playground = ResolverPlayground(
+            ebuilds=ebuilds,
+            installed=installed,
+            world=world,
+            user_config={"package.use": ("dev-libs/G bar",)},
+        )
+        try:
+            for options, mergelist in (
+                ({}, ["dev-libs/B-2", "dev-libs/M-2"]),
+                ({"--newuse": True}, ["dev-libs/B-2", "dev-libs/G-1", "dev-libs/M-2"]),
+            ):
+                options = dict(options)
+                options.update({"--update": True, "--deep": True})
+                for incremental in ("n", "y"):
+                    options["--resolver-incremental"] = incremental
+                    test_case = ResolverPlaygroundTestCase(
+                        ["@world"],
+                        options=options,
+                        success=True,
+                        ignore_mergelist_order=True,
+                        mergelist=mergelist,
+                    )
+                    playground.run_TestCase(test_case)
+                    self.assertEqual(test_case.test_success, True, test_case.fail_msg)
+
+                depgraph = playground.run(["@world"], options).depgraph
+                clean_pkgs = {
+                    pkg.cpv for pkg in depgraph._dynamic_config._incremental_clean_pkgs
+                }
+                # An || dependency is clean if its first installed choice is
+                # clean, even if it is not the first choice, but not if the
+                # installed choice has an update.
+                expected = {
+                    "app-misc/C-1",
+                    "dev-libs/D-1",
+                    "app-misc/H-1",
+                    "dev-libs/J-1",
+                }
+                if "--newuse" not in options:
+                    expected.update(("app-misc/F-1", "dev-libs/G-1"))
+                self.assertEqual(clean_pkgs, expected)
+                # The installed dependencies are checked once per resolution.
+                self.assertIsNotNone(depgraph._frozen_config._incremental_deps)
+        finally:
+            playground.cleanup()
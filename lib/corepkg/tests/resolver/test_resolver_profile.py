@@ -0,0 +1,67 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import json
+import tempfile
+from unittest import mock
+
+from corepkg import os
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import (
+    ResolverPlayground,
+    ResolverPlaygroundTestCase,
+)
+
+
+class ResolverProfileTestCase(TestCase):
+    def testResolverProfile(self):
+        ebuilds = {
+            "dev-libs/A-1": {},
+            "dev-libs/A-2": {},
+            "dev-libs/B-1": {"RDEPEND": "dev-libs/D"},
+            "dev-libs/C-1": {},
+            "dev-libs/C-2": {"RDEPEND": ">=dev-libs/A-2"},
+            "dev-libs/D-1": {"RDEPEND": "<dev-libs/A-2"},
+        }
+        installed = {
+            "dev-libs/A-1": {},
+            "dev-libs/B-1": {"RDEPEND": "dev-libs/D"},
+            "dev-libs/C-1": {},
+            "dev-libs/D-1": {"RDEPEND": "<dev-libs/A-2"},
+        }
+        world = ["dev-libs/B", "dev-libs/C"]
+
+        playground = ResolverPlayground(
+            ebuilds=ebuilds, installed=installed, world=world
+        )
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                profile_file = os.path.join(tmpdir, "profile.json")
+                test_case = ResolverPlaygroundTestCase(
+                    ["@world"],
+                    options={"--update": True, "--deep": True},
+                    mergelist=[],
+                    success=True,
+                )
+                with mock.patch.dict(
+                    os.environ, {"PORTAGE_RESOLVER_PROFILE": profile_file}
+                ):
+                    playground.run_TestCase(test_case)
+                self.assertEqual(test_case.test_success, True, test_case.fail_msg)
+
+                with open(profile_file) as f:
+                    profile = json.load(f)
+        finally:
+            playground.cleanup()
+
+        iterations = profile["iterations"]
+        self.assertGreater(len(iterations), 1)
+        self.assertEqual(iterations[0]["success"], False)
+        self.assertEqual(iterations[0]["need_restart"], True)
+        self.assertIn("slot conflict", iterations[0]["backtrack_infos"])
+        self.assertEqual(iterations[-1]["success"], True)
+        for iteration in iterations:
+            self.assertEqual(iteration["phases"]["select_files"]["calls"], 1)
+            self.assertIn("highest_pkg_cache", iteration["caches"])
+        self.assertGreater(profile["phases"]["_add_pkg_deps"]["calls"], 0)
+        self.assertIn("vercmp", profile["lru_caches"])
@@ -0,0 +1,272 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import struct
+import tempfile
+
+from corepkg import os
+from corepkg.tests import TestCase
+from corepkg.tests.resolver.ResolverPlayground import ResolverPlayground
+from corepkg.util import ensure_dirs
+from corepkg.util.elf.constants import (
+    DF_1_PIE,
+    DT_FLAGS_1,
+    DT_NEEDED,
+    DT_RPATH,
+    DT_RUNPATH,
+    DT_SONAME,
+    DT_STRTAB,
+    ELFCLASS32,
+    ELFCLASS64,
+    ELFDATA2LSB,
+    ELFDATA2MSB,
+    EM_PPC,
+    EM_X86_64,
+    ET_DYN,
+    ET_EXEC,
+    PT_DYNAMIC,
+    PT_LOAD,
+)
+from corepkg.util.elf.dynamic import ELFDynamic
+
+
+def make_elf(ei_class, ei_data, e_type, e_machine, dynamic):
+    """
+    Create an ELF object with a single loadable segment, which contains
+    the string table and the dynamic section. String values of dynamic
+    entries are added to the string table.
+    """
+    endian = "<" if ei_data == ELFDATA2LSB else ">"
+    if ei_class == ELFCLASS64:
+        ehdr_size, phdr_format, dyn_format = 64, "IIQQQQQQ", "qQ"
+    else:
+        ehdr_size, phdr_format, dyn_format = 52, "IIIIIIII", "iI"
+    phdr_size = struct.calcsize(endian + phdr_format)
+    strtab_offset = ehdr_size + 2 * phdr_size
+    vaddr = 0x1000
+
+    strtab = b"\0"
+    entries = []
+    for tag, value in dynamic:
+        if isinstance(value, str):
+            entries.append((tag, len(strtab)))
+            strtab += value.encode() + b"\0"
+        else:
+            entries.append((tag, value))
+    entries.append((DT_STRTAB, vaddr + strtab_offset))
+    entries.append((0, 0))
+    dynamic_offset = strtab_offset + len(strtab)
+    dynamic_data = b"".join(
+        struct.pack(endian + dyn_format, tag, value) for tag, value in entries
+    )
+    size = dynamic_offset + len(dynamic_data)
+
+    ident = b"\x7fELF" + bytes([ei_class, ei_data, 1]) + b"\0" * 9
+    if ei_class == ELFCLASS64:
+        ehdr = ident + struct.pack(
+            endian + "HHIQQQIHHHHHH",
+            e_type,
+            e_machine,
+            1,
+            0,
+            ehdr_size,
+            0,
+            0,
+            ehdr_size,
+            phdr_size,
+            2,
+            0,
+            0,
+            0,
+        )
+        phdrs = struct.pack(
+            endian + phdr_format, PT_LOAD, 4, 0, vaddr, vaddr, size, size, 0x1000
+        ) + struct.pack(
+            endian + phdr_format,
+            PT_DYNAMIC,
+            4,
+            dynamic_offset,
+            vaddr + dynamic_offset,
+            vaddr + dynamic_offset,
+            len(dynamic_data),
+            len(dynamic_data),
+            8,
+        )
+    else:
+        ehdr = ident + struct.pack(
+            endian + "HHIIIIIHHHHHH",
+            e_type,
+            e_machine,
+            1,
+            0,
+            ehdr_size,
+            0,
+            0,
+            ehdr_size,
+            phdr_size,
+            2,
+            0,
+            0,
+            0,
+        )
+        phdrs = struct.pack(
+            endian + phdr_format, PT_LOAD, 0, vaddr, vaddr, size, size, 4, 0x1000
+        ) + struct.pack(
+            endian + phdr_format,
+            PT_DYNAMIC,
+            dynamic_offset,
+            vaddr + dynamic_offset,
+            vaddr + dynamic_offset,
+            len(dynamic_data),
+            len(dynamic_data),
+            4,
+            4,
+        )
+    return ehdr + phdrs + strtab + dynamic_data
+
+
+class ELFDynamicTestCase(TestCase):
+    def _read(self, data):
+        with tempfile.TemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            return ELFDynamic.read(f)
+
+    def testELFDynamic(self):
+        dynamic = self._read(
+            make_elf(
+                ELFCLASS64,
+                ELFDATA2LSB,
+                ET_DYN,
+                EM_X86_64,
+                [
+                    (DT_NEEDED, "libc.so.6"),
+                    (DT_NEEDED, "libm.so.6"),
+                    (DT_SONAME, "libfoo.so.1"),
+                    (DT_RUNPATH, "/opt/foo/lib:$ORIGIN"),
+                ],
+            )
+        )
+        self.assertEqual(dynamic.arch, "X86_64")
+        self.assertEqual(dynamic.soname, "libfoo.so.1")
+        self.assertEqual(dynamic.needed, ("libc.so.6", "libm.so.6"))
+        self.assertEqual(dynamic.runpaths, ("/opt/foo/lib", "$ORIGIN"))
+        self.assertTrue(dynamic.shared_object)
+
+        dynamic = self._read(
+            make_elf(
+                ELFCLASS32,
+                ELFDATA2MSB,
+                ET_EXEC,
+                EM_PPC,
+                [
+                    (DT_NEEDED, "libc.so.6"),
+                    (DT_RPATH, "/opt/foo/lib"),
+                    (DT_RUNPATH, "/opt/foo/lib:/opt/bar/lib"),
+                ],
+            )
+        )
+        self.assertEqual(dynamic.arch, "PPC")
+        self.assertEqual(dynamic.soname, "")
+        self.assertEqual(dynamic.needed, ("libc.so.6",))
+        self.assertEqual(dynamic.runpaths, ("/opt/foo/lib", "/opt/bar/lib"))
+        self.assertFalse(dynamic.shared_object)
+
+        # Position independent executables are not shared objects.
+        dynamic = self._read(
+            make_elf(
+                ELFCLASS64,
+                ELFDATA2LSB,
+                ET_DYN,
+                EM_X86_64,
+                [(DT_NEEDED, "libc.so.6"), (DT_FLAGS_1, DF_1_PIE)],
+            )
+        )
+        self.assertFalse(dynamic.shared_object)
+
+    def testELFDynamicInvalid(self):
+        self.assertIsNone(self._read(b""))
+        self.assertIsNone(self._read(b"#!/bin/sh\n"))
+
+        # Truncated objects are handled like objects without a dynamic
+        # section.
+        data = make_elf(
+            ELFCLASS64, ELFDATA2LSB, ET_DYN, EM_X86_64, [(DT_NEEDED, "libc.so.6")]
+        )
+        for size in (64, len(data) - 40):
+            dynamic = self._read(data[:size])
+            self.assertEqual(dynamic.arch, "X86_64")
+            self.assertEqual(dynamic.needed, ())
+
+    def testLinkageMapPreservedLibs(self):
+        installed = {"dev-libs/A-1": {"EAPI": "8"}}
+        playground = ResolverPlayground(installed=installed)
+        try:
+            eroot = playground.eroot
+            root = playground.settings["ROOT"]
+            eprefix = playground.settings["EPREFIX"]
+            vardb = playground.trees[eroot]["vartree"].dbapi
+            linkmap = vardb._linkmap
+            libdir = os.path.join(eroot, "usr", "lib64")
+            ensure_dirs(libdir)
+            ensure_dirs(os.path.join(eroot, "usr", "bin"))
+
+            with open(os.path.join(eroot, "usr", "bin", "a"), "wb") as f:
+                f.write(make_elf(ELFCLASS64, ELFDATA2LSB, ET_EXEC, EM_X86_64, []))
+            with open(vardb.getpath("dev-libs/A-1", filename="NEEDED.ELF.2"), "w") as f:
+                f.write(
+                    f"X86_64;{eprefix}/usr/bin/a;;{eprefix}/usr/lib64;"
+                    "libold.so.1,libnosoname.so;x86_64\n"
+                )
+            vardb._clear_cache()
+
+            preserved = {
+                "libold.so.1": make_elf(
+                    ELFCLASS64,
+                    ELFDATA2LSB,
+                    ET_DYN,
+                    EM_X86_64,
+                    [(DT_SONAME, "libold.so.1"), (DT_NEEDED, "libc.so.6")],
+                ),
+                # The soname is inferred from the file name.
+                "libnosoname.so": make_elf(
+                    ELFCLASS64, ELFDATA2LSB, ET_DYN, EM_X86_64, []
+                ),
+                "libstatic.a": b"!<arch>\n",
+            }
+            preserve_paths = set()
+            for name, data in preserved.items():
+                with open(os.path.join(libdir, name), "wb") as f:
+                    f.write(data)
+                preserve_paths.add(os.path.join(eprefix, "usr/lib64", name))
+
+            linkmap.rebuild(preserve_paths=preserve_paths)
+            for name in ("libold.so.1", "libnosoname.so"):
+                path = os.path.join(eprefix, "usr/lib64", name)
+                self.assertEqual(linkmap.getSoname(path), name)
+                self.assertEqual(
+                    list(linkmap.findConsumers(path)), [f"{eprefix}/usr/bin/a"]
+                )
+            self.assertEqual(
+                linkmap.getSoname(os.path.join(eprefix, "usr/lib64/libstatic.a")), ""
+            )
+
+            # Many objects are read in a pool of threads, and the results
+            # are in the order of the paths.
+            paths = [os.path.join(root, x.lstrip(os.sep)) for x in preserve_paths]
+            paths.append(os.path.join(libdir, "missing.so"))
+            paths *= linkmap._read_dynamic_min_files
+            expected = [
+                (path, os.path.basename(path))
+                for path in paths
+                if not path.endswith((".a", "missing.so"))
+            ]
+            self.assertEqual(
+                [
+                    (path, os.path.basename(path) if dynamic.shared_object else None)
+                    for path, dynamic in linkmap._read_dynamic(paths)
+                ],
+                expected,
+            )
+        finally:
+            playground.cleanup()
@@ -1,10 +1,21 @@
 # Copyright 2011-2022 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
+import tempfile
+
+from corepkg import os
 from corepkg.tests import TestCase
 
-from corepkg.checksum import checksum_str, _apply_hash_filter
-from corepkg.exception import DigestException
+from corepkg.checksum import (
+    _MULTI_HASHING_BLOCKSIZE,
+    checksum_str,
+    get_valid_checksum_keys,
+    perform_checksum,
+    perform_checksums,
+    verify_all,
+    _apply_hash_filter,
+)
+from corepkg.exception import DigestException, FileNotFound
 
 
 class ChecksumTestCase(TestCase):
@@ -109,6 +120,58 @@ class ChecksumTestCase(TestCase):
             self.skipTest("SHA3_512 implementation not available")
 
 
+class PerformChecksumsTestCase(TestCase):
+    def test_perform_checksums(self):
+        data = os.urandom(2 * _MULTI_HASHING_BLOCKSIZE + 12345)
+        hashes = sorted(get_valid_checksum_keys())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "distfile")
+            with open(filename, "wb") as f:
+                f.write(data)
+
+            digests = perform_checksums(filename, hashes)
+            self.assertEqual(list(digests), hashes)
+            self.assertEqual(digests["size"], len(data))
+            for hashname in hashes:
+                self.assertEqual(
+                    digests[hashname], perform_checksum(filename, hashname)[0]
+                )
+                if hashname != "size":
+                    self.assertEqual(digests[hashname], checksum_str(data, hashname))
+
+            self.assertEqual(perform_checksums(filename, []), {})
+            self.assertRaises(
+                DigestException, perform_checksums, filename, ["MD5", "unknown"]
+            )
+            self.assertRaises(
+                FileNotFound,
+                perform_checksums,
+                os.path.join(tmpdir, "missing"),
+                ["MD5"],
+            )
+
+    def test_verify_all(self):
+        data = b"Some test string used to check if the hash works"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "distfile")
+            with open(filename, "wb") as f:
+                f.write(data)
+            digests = {
+                "size": len(data),
+                "SHA256": checksum_str(data, "SHA256"),
+                "SHA512": checksum_str(data, "SHA512"),
+            }
+            self.assertEqual(verify_all(filename, digests), (True, "Reason unknown"))
+
+            # The first mismatch in sorted order is reported.
+            bad = dict(digests, SHA256="0" * 64, SHA512="0" * 128)
+            self.assertEqual(
+                verify_all(filename, bad),
+                (False, ("Failed on SHA256 verification", digests["SHA256"], "0" * 64)),
+            )
+            self.assertRaises(DigestException, verify_all, filename, bad, strict=1)
+
+
 class ApplyHashFilterTestCase(TestCase):
     def test_apply_hash_filter(self):
         indict = {"MD5": "", "SHA1": "", "SHA256": "", "size": ""}
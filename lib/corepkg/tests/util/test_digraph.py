@@ -1,14 +1,18 @@
-# Copyright 2010-2012 Gentoo Foundation
+# Copyright 2010-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
+import random
+
 from corepkg.tests import TestCase
-from corepkg.util.digraph import digraph
+from corepkg.util.digraph import digraph, digraph_condensation, indexed_digraph
 
 # ~ from corepkg.util import noiselimit
 import corepkg.util
 
 
 class DigraphTest(TestCase):
+    graph_class = digraph
+
     def _assertBFSEqual(self, result, expected):
         result_stack = list(result)
         result_stack.reverse()
@@ -45,7 +49,7 @@ class DigraphTest(TestCase):
             self.assertEqual(result_compared, expected_compared)
 
     def testBackwardCompatibility(self):
-        g = digraph()
+        g = self.graph_class()
         f = g.copy()
         g.addnode("A", None)
         self.assertEqual("A" in g, True)
@@ -55,7 +59,7 @@ class DigraphTest(TestCase):
         self.assertEqual(g.hasnode("A"), True)
 
     def testDigraphEmptyGraph(self):
-        g = digraph()
+        g = self.graph_class()
         f = g.clone()
         for x in g, f:
             self.assertEqual(bool(x), False)
@@ -82,14 +86,14 @@ class DigraphTest(TestCase):
             corepkg.util.noiselimit = 0
 
     def testDigraphCircle(self):
-        g = digraph()
+        g = self.graph_class()
         g.add("A", "B", -1)
         g.add("B", "C", 0)
         g.add("C", "D", 1)
         g.add("D", "A", 2)
 
         f = g.clone()
-        h = digraph()
+        h = self.graph_class()
         h.update(f)
         for x in g, f, h:
             self.assertEqual(bool(x), True)
@@ -137,7 +141,7 @@ class DigraphTest(TestCase):
             corepkg.util.noiselimit = 0
 
     def testDigraphTree(self):
-        g = digraph()
+        g = self.graph_class()
         g.add("B", "A", -1)
         g.add("C", "A", 0)
         g.add("D", "C", 1)
@@ -185,7 +189,7 @@ class DigraphTest(TestCase):
             self.assertRaises(KeyError, x.remove_edge, "A", "E")
 
     def testDigraphCompleteGraph(self):
-        g = digraph()
+        g = self.graph_class()
         g.add("A", "B", -1)
         g.add("B", "A", 1)
         g.add("A", "C", 1)
@@ -244,7 +248,7 @@ class DigraphTest(TestCase):
         def always_false(dummy):
             return False
 
-        g = digraph()
+        g = self.graph_class()
         g.add("A", "B")
 
         self.assertEqual(g.parent_nodes("A"), ["B"])
@@ -262,3 +266,166 @@ class DigraphTest(TestCase):
         self.assertEqual(g.root_nodes(), ["B"])
         self.assertEqual(g.root_nodes(ignore_priority=always_false), ["B"])
         self.assertEqual(g.root_nodes(ignore_priority=always_true), ["A", "B"])
+
+    def testStronglyConnectedComponents(self):
+        g = self.graph_class()
+        g.add("B", "A", 1)
+        g.add("A", "B", 0)
+        g.add("C", "B", 1)
+        g.add("D", "C", 1)
+        g.add("C", "D", 1)
+        g.add("E", "E", 1)
+        g.add("F", None)
+
+        components = g.strongly_connected_components()
+        self.assertEqual(
+            [set(x) for x in components],
+            [{"C", "D"}, {"A", "B"}, {"E"}, {"F"}],
+        )
+        self.assertEqual(
+            [set(x) for x in g.strongly_connected_components(ignore_priority=0)],
+            [{"C", "D"}, {"B"}, {"A"}, {"E"}, {"F"}],
+        )
+        self.assertEqual(
+            [set(x) for x in g.strongly_connected_components(nodes=["A", "C"])],
+            [{"A"}, {"C"}],
+        )
+        self.assertEqual(
+            {tuple(x) for x in g.get_cycles()},
+            {("B", "A"), ("A", "B"), ("D", "C"), ("C", "D"), ("E",)},
+        )
+
+    def testDigraphCondensation(self):
+        g = self.graph_class()
+        g.add("B", "A", 1)
+        g.add("C", "B", 1)
+        g.add("A", "C", 0)
+        g.add("D", "C", 1)
+        g.add("E", "D", 1)
+        g.add("D", "E", 1)
+
+        condensation = digraph_condensation(g, [None, 0])
+
+        def components(level):
+            return sorted(sorted(x) for x in condensation.components(level).values())
+
+        self.assertEqual(components(0), [["A", "B", "C"], ["D", "E"]])
+        self.assertEqual(components(1), [["A"], ["B"], ["C"], ["D", "E"]])
+        abc = condensation.component_of("A", 0)
+        de = condensation.component_of("D", 0)
+        self.assertEqual(condensation.successors(abc, 0), {de})
+        self.assertEqual(condensation.successors(de, 0), set())
+
+        g.remove("E")
+        self.assertEqual(components(0), [["A", "B", "C"], ["D"]])
+        self.assertEqual(components(1), [["A"], ["B"], ["C"], ["D"]])
+        self.assertEqual(
+            condensation.successors(condensation.component_of("C", 0), 0),
+            {condensation.component_of("D", 0)},
+        )
+
+        g.remove("B")
+        self.assertEqual(components(0), [["A"], ["C"], ["D"]])
+
+        g.add("A", "D", 1)
+        g.add("C", "A", 1)
+        condensation.invalidate()
+        self.assertEqual(components(0), [["A", "C", "D"]])
+
+
+class IndexedDigraphTest(DigraphTest):
+    graph_class = indexed_digraph
+
+    def testIndexedDigraphOrder(self):
+        g = indexed_digraph()
+        g.add("B", "A")
+        g.add("C", "A")
+        g.add("D", "C")
+        self.assertEqual(g.leaf_nodes(), ["B", "D"])
+        g.order = ["D", "C", "B", "A"]
+        self.assertEqual(list(g), ["D", "C", "B", "A"])
+        self.assertEqual(g.leaf_nodes(), ["D", "B"])
+        self.assertEqual(g.clone().leaf_nodes(), ["D", "B"])
+        self.assertRaises(ValueError, setattr, g, "order", ["A"])
+        g.remove("B")
+        g.add("B", None)
+        self.assertEqual(g.all_nodes(), ["D", "C", "A", "B"])
+        self.assertEqual(g.leaf_nodes(), ["D", "B"])
+        self.assertEqual(g.root_nodes(), ["A", "B"])
+        self.assertEqual(g.nodes["C"], ({"D": [0]}, {"A": [0]}, "C"))
+
+    def testIndexedDigraphViews(self):
+        g = indexed_digraph()
+        g.add("B", "A")
+        g.add("C", "A", 1)
+        self.assertIs(g.order, g.order)
+        self.assertEqual(g.order, ("B", "A", "C"))
+        children = g.nodes["A"][0]
+        self.assertEqual(list(children), ["B", "C"])
+        self.assertEqual(children["C"], [1])
+        self.assertIn("B", children)
+        self.assertNotIn("D", children)
+        g.remove("B")
+        # The views reflect modifications of the graph.
+        self.assertEqual(dict(children.items()), {"C": [1]})
+        self.assertEqual(g.order, ("A", "C"))
+        self.assertEqual(g.leaf_nodes(ignore_priority=0), ["C"])
+        g.add("E", "A", -1)
+        self.assertEqual(g.leaf_nodes(ignore_priority=0), ["C", "E"])
+        g.remove_edge("C", "A")
+        self.assertEqual(g.leaf_nodes(ignore_priority=0), ["A", "C", "E"])
+        g.add("E", "A", 2)
+        self.assertEqual(g.leaf_nodes(ignore_priority=0), ["C", "E"])
+        self.assertEqual(g.root_nodes(ignore_priority=0), ["A", "C"])
+
+    def testIndexedDigraphEquivalence(self):
+        """
+        Apply the same random operations to a digraph and an
+        indexed_digraph, and compare the results of all queries.
+        """
+        rng = random.Random(0)
+        nodes = list(range(40))
+        g = digraph()
+        x = indexed_digraph()
+
+        def ignore_low(priority):
+            return priority < 1
+
+        for _ in range(2000):
+            op = rng.random()
+            if op < 0.6:
+                node = rng.choice(nodes)
+                parent = rng.choice(nodes + [None])
+                priority = rng.randint(-2, 2)
+                g.add(node, parent, priority)
+                x.add(node, parent, priority)
+            elif op < 0.7:
+                node = rng.choice(nodes)
+                g.discard(node)
+                x.discard(node)
+            elif op < 0.8:
+                removed = rng.sample(nodes, 3)
+                g.difference_update(removed)
+                x.difference_update(removed)
+            elif op < 0.9:
+                child, parent = rng.choice(nodes), rng.choice(nodes)
+                if g.has_edge(child, parent):
+                    g.remove_edge(child, parent)
+                    x.remove_edge(child, parent)
+            else:
+                x = x.clone()
+
+            self.assertEqual(x.all_nodes(), g.all_nodes())
+            # The same arguments are used repeatedly, so that the
+            # incremental tracking of leaf and root nodes is compared.
+            for ignore_priority in (None, 0, ignore_low):
+                self.assertEqual(
+                    x.leaf_nodes(ignore_priority), g.leaf_nodes(ignore_priority)
+                )
+                self.assertEqual(
+                    x.root_nodes(ignore_priority), g.root_nodes(ignore_priority)
+                )
+            for node in g:
+                self.assertEqual(x.child_nodes(node), g.child_nodes(node))
+                self.assertEqual(x.parent_nodes(node), g.parent_nodes(node))
+                self.assertEqual(x.nodes[node], g.nodes[node])
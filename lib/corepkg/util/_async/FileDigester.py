@@ -3,7 +3,7 @@
 
 import functools
 
-from corepkg.checksum import perform_multiple_checksums
+from corepkg.checksum import perform_checksums
 from corepkg.util._async.AsyncFunction import AsyncFunction
 
 
@@ -22,7 +22,7 @@ class FileDigester(AsyncFunction):
 
     def _start(self):
         self.target = functools.partial(
-            perform_multiple_checksums, self.file_path, hashes=self.hash_names
+            perform_checksums, self.file_path, self.hash_names
         )
         super()._start()
 
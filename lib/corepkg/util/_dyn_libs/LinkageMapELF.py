@@ -5,18 +5,16 @@ import collections
 import errno
 import itertools
 import logging
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 import corepkg
 from corepkg import _encodings
 from corepkg import _os_merge
-from corepkg import _unicode_decode
 from corepkg import _unicode_encode
 from corepkg.cache.mappings import slot_dict_class
-from corepkg.const import EPREFIX
 from corepkg.dep.soname.multilib_category import compute_multilib_category
 from corepkg.dep.soname.SonameAtom import SonameAtom
-from corepkg.exception import CommandNotFound, InvalidData
+from corepkg.exception import InvalidData
 from corepkg.localization import _
 from corepkg.util import getlibpaths
 from corepkg.util import grabfile
@@ -24,7 +22,7 @@ from corepkg.util import normalize_path
 from corepkg.util import varexpand
 from corepkg.util import writemsg_level
 from corepkg.util._dyn_libs.NeededEntry import NeededEntry
-from corepkg.util.elf.header import ELFHeader
+from corepkg.util.elf.dynamic import ELFDynamic
 
 
 # Map ELF e_machine values from NEEDED.ELF.2 to approximate multilib
@@ -195,11 +193,48 @@ class LinkageMapELF:
         def __str__(self):
             return str(sorted(self.alt_paths))
 
-    def rebuild(self, exclude_pkgs=None, include_file=None, preserve_paths=None):
+    # Do not bother with threads for a small number of files.
+    _read_dynamic_min_files = 16
+
+    def _read_dynamic(self, paths):
         """
-        Raises CommandNotFound if there are preserved libs
-        and the scanelf binary is not available.
+        Read the dynamic sections of ELF objects, in a pool of threads
+        if there are many of them.
+
+        @param paths: absolute paths of files
+        @type paths: iterable
+        @rtype: list
+        @return: (path, ELFDynamic) tuples for the paths of ELF objects,
+                in the order of paths. Other files, and files that do not
+                exist, are omitted.
+        """
+        os = _os_merge
+
+        def read(path):
+            try:
+                with open(
+                    _unicode_encode(path, encoding=_encodings["fs"], errors="strict"),
+                    "rb",
+                ) as f:
+                    return path, ELFDynamic.read(f)
+            except OSError as e:
+                if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                    raise
+                # File removed concurrently.
+                return path, None
 
+        paths = list(paths)
+        if len(paths) < self._read_dynamic_min_files:
+            results = map(read, paths)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(8, os.cpu_count() or 1)
+            ) as executor:
+                results = list(executor.map(read, paths))
+        return [(path, dynamic) for path, dynamic in results if dynamic is not None]
+
+    def rebuild(self, exclude_pkgs=None, include_file=None, preserve_paths=None):
+        """
         @param exclude_pkgs: A set of packages that should be excluded from
                 the LinkageMap, since they are being unmerged and their NEEDED
                 entries are therefore irrelevant and would only serve to corrupt
@@ -239,18 +274,29 @@ class LinkageMapELF:
         if can_lock:
             self._dbapi.lock()
         try:
+            # The NEEDED index provides the entries of all packages with
+            # a single query, instead of a file read for each package.
+            needed_index = getattr(self._dbapi, "_needed_index", None)
+            if needed_index is not None and needed_index.populate():
+                needed = needed_index.get_needed()
+            else:
+                needed = None
             for cpv in self._dbapi.cpv_all():
                 if exclude_pkgs is not None and cpv in exclude_pkgs:
                     continue
                 needed_file = self._dbapi.getpath(cpv, filename=self._needed_aux_key)
-                for line in self._dbapi.aux_get(cpv, aux_keys)[0].splitlines():
+                if needed is None:
+                    cpv_lines = self._dbapi.aux_get(cpv, aux_keys)[0].splitlines()
+                else:
+                    cpv_lines = needed.get(str(cpv), ())
+                for line in cpv_lines:
                     lines.append((cpv, needed_file, line))
         finally:
             if can_lock:
                 self._dbapi.unlock()
 
-        # have to call scanelf for preserved libs here as they aren't
-        # registered in NEEDED.ELF.2 files
+        # have to read the ELF objects of preserved libs here as they
+        # aren't registered in NEEDED.ELF.2 files
         plibs = {}
         if preserve_paths is not None:
             plibs.update((x, None) for x in preserve_paths)
@@ -265,96 +311,29 @@ class LinkageMapELF:
                     continue
                 plibs.update((x, cpv) for x in items)
         if plibs:
-            # We don't use scanelf -q, since that would omit libraries like
-            # musl's /usr/lib/libc.so which do not have any DT_NEEDED or
-            # DT_SONAME settings.
-            args = [
-                os.path.join(EPREFIX or "/", "usr/bin/scanelf"),
-                "-BF",
-                "%a;%F;%S;%r;%n",
-            ]
-            args.extend(os.path.join(root, x.lstrip("." + os.sep)) for x in plibs)
-            try:
-                proc = subprocess.Popen(args, stdout=subprocess.PIPE)
-            except OSError as e:
-                if e.errno != errno.ENOENT:
-                    raise
-                raise CommandNotFound(args[0])
-            else:
-                for l in proc.stdout:
-                    try:
-                        l = _unicode_decode(
-                            l, encoding=_encodings["content"], errors="strict"
-                        )
-                    except UnicodeDecodeError:
-                        l = _unicode_decode(
-                            l, encoding=_encodings["content"], errors="replace"
-                        )
-                        writemsg_level(
-                            _(
-                                "\nError decoding characters "
-                                "returned from scanelf: %s\n\n"
-                            )
-                            % (l,),
-                            level=logging.ERROR,
-                            noiselevel=-1,
-                        )
-                    l = l[3:].rstrip("\n")
-                    if not l:
-                        continue
-                    try:
-                        entry = NeededEntry.parse("scanelf", l)
-                    except InvalidData as e:
-                        writemsg_level(f"\n{e}\n\n", level=logging.ERROR, noiselevel=-1)
-                        continue
-                    try:
-                        with open(
-                            _unicode_encode(
-                                entry.filename,
-                                encoding=_encodings["fs"],
-                                errors="strict",
-                            ),
-                            "rb",
-                        ) as f:
-                            elf_header = ELFHeader.read(f)
-                    except OSError as e:
-                        if e.errno != errno.ENOENT:
-                            raise
-                        # File removed concurrently.
-                        continue
-
-                    # Infer implicit soname from basename (bug 715162).
-                    if not entry.soname:
-                        try:
-                            proc = subprocess.Popen(
-                                [
-                                    b"file",
-                                    _unicode_encode(
-                                        entry.filename,
-                                        encoding=_encodings["fs"],
-                                        errors="strict",
-                                    ),
-                                ],
-                                stdout=subprocess.PIPE,
-                            )
-                            out, err = proc.communicate()
-                            proc.wait()
-                        except OSError:
-                            pass
-                        else:
-                            if b"SB shared object" in out:
-                                entry.soname = os.path.basename(entry.filename)
-
-                    entry.multilib_category = compute_multilib_category(elf_header)
-                    entry.filename = entry.filename[root_len:]
-                    owner = plibs.pop(entry.filename, None)
-                    lines.append((owner, "scanelf", str(entry)))
-                proc.wait()
-                proc.stdout.close()
+            # The dynamic sections of preserved libs are read directly,
+            # rather than by scanelf. Like scanelf without -q, this does
+            # not omit libraries like musl's /usr/lib/libc.so which do not
+            # have any DT_NEEDED or DT_SONAME settings.
+            for path, dynamic in self._read_dynamic(
+                os.path.join(root, x.lstrip("." + os.sep)) for x in plibs
+            ):
+                entry = NeededEntry()
+                entry.arch = dynamic.arch
+                entry.filename = path[root_len:]
+                entry.soname = dynamic.soname
+                entry.runpaths = dynamic.runpaths
+                entry.needed = dynamic.needed
+                # Infer implicit soname from basename (bug 715162).
+                if not entry.soname and dynamic.shared_object:
+                    entry.soname = os.path.basename(path)
+                entry.multilib_category = compute_multilib_category(dynamic.header)
+                owner = plibs.pop(entry.filename, None)
+                lines.append((owner, path, str(entry)))
 
         if plibs:
-            # Preserved libraries that did not appear in the scanelf output.
-            # This is known to happen with statically linked libraries.
+            # Preserved libraries that are not ELF objects. This is
+            # known to happen with static archives.
             # Generate dummy lines for these, so we can assume that every
             # preserved library has an entry in self._obj_properties. This
             # is important in order to prevent findConsumers from raising
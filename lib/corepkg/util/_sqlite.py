@@ -0,0 +1,101 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import logging
+
+import corepkg
+from corepkg.util import writemsg_level
+
+
+class SqliteDatabase:
+    """
+    Base class for optional persistent caches and indexes that are stored
+    in sqlite databases. The database is connected on demand, and a new
+    connection is made by forked processes, since a connection must not
+    be shared with them. The schema version is stored in a meta table,
+    and the tables are recreated when it changes.
+
+    If sqlite is unavailable, or the database can not be opened or
+    updated, the database is disabled, _connect() returns None, and
+    callers have to fall back to the data that it would cache. Errors
+    other than missing permissions are reported once.
+
+    Subclasses list their tables in _tables, and create them in
+    _create_tables.
+    """
+
+    _description = None
+    _schema_version = "1"
+    _tables = ()
+
+    def __init__(self, filename):
+        self._filename = filename
+        self._connection = None
+        self._connection_pid = None
+        self._db_error = None
+        self._disabled = False
+
+    def _connect(self):
+        if self._disabled:
+            return None
+        if self._connection is not None and self._connection_pid == corepkg.getpid():
+            return self._connection
+        # A connection must not be shared with a forked process, such
+        # as the one that merges a package.
+        self._connection = None
+        try:
+            import sqlite3
+        except ImportError:
+            self._disabled = True
+            return None
+        self._db_error = sqlite3.Error
+        try:
+            connection = sqlite3.connect(self._filename, timeout=60)
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS meta "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+                )
+                row = connection.execute(
+                    "SELECT value FROM meta WHERE key = 'version'"
+                ).fetchone()
+                if row is None or row[0] != self._schema_version:
+                    self._drop_tables(connection)
+                    connection.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                        (self._schema_version,),
+                    )
+                self._create_tables(connection)
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return None
+        self._connection = connection
+        self._connection_pid = corepkg.getpid()
+        return connection
+
+    def _drop_tables(self, connection):
+        for table in self._tables:
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def _create_tables(self, connection):
+        raise NotImplementedError(self)
+
+    def _disable(self, e):
+        if isinstance(e, OSError) and e.errno in (errno.EACCES, errno.EROFS):
+            pass
+        elif "readonly" in str(e) or "unable to open" in str(e):
+            pass
+        else:
+            writemsg_level(
+                f"!!! Unable to use the {self._description} '{self._filename}': {e}\n",
+                level=logging.WARNING,
+                noiselevel=-1,
+            )
+        self._disabled = True
+        self._connection = None
+
+    def close(self):
+        if self._connection is not None and self._connection_pid == corepkg.getpid():
+            self._connection.close()
+        self._connection = None
@@ -1,14 +1,15 @@
-# Copyright 2025 Gentoo Authors
+# Copyright 2025-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import os
 import corepkg
 
 
-def show_lru_cache_info():
-    if not os.environ.get("PORTAGE_SHOW_LRU_CACHE_INFO"):
-        return
-
+def get_lru_cache_info():
+    """
+    Return a dict mapping the names of the corepkg @lru_cache functions
+    to their current cache_info().
+    """
     corepkg_lru_caches = {
         corepkg.dep._use_reduce_cached: "use_reduce_cached",
         corepkg.eapi._get_eapi_attrs: "get_eapi_attrs",
@@ -16,10 +17,15 @@ def show_lru_cache_info():
         corepkg.versions.catpkgsplit: "catpkgsplit",
         corepkg.versions.vercmp: "vercmp",
     }
+    return {name: method.cache_info() for method, name in corepkg_lru_caches.items()}
+
+
+def show_lru_cache_info():
+    if not os.environ.get("PORTAGE_SHOW_LRU_CACHE_INFO"):
+        return
 
     print("Corepkg @lru_cache information")
-    for method, name in corepkg_lru_caches.items():
-        cache_info = method.cache_info()
+    for name, cache_info in get_lru_cache_info().items():
 
         hits = cache_info.hits
         misses = cache_info.misses
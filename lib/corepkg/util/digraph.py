@@ -1,10 +1,12 @@
 # Copyright 2010-2014 Gentoo Foundation
 # Distributed under the terms of the GNU General Public License v2
 
-__all__ = ["digraph"]
+__all__ = ["digraph", "digraph_condensation", "indexed_digraph"]
 
 import bisect
-from collections import deque
+from collections import OrderedDict, deque
+from itertools import chain
+from collections.abc import Mapping
 
 from corepkg.util import writemsg
 
@@ -345,19 +347,96 @@ class digraph:
                 return paths[child]
         return None
 
+    def strongly_connected_components(self, ignore_priority=None, nodes=None):
+        """
+        Return the strongly connected components of the graph, or of the
+        subgraph induced by the given nodes, as lists of nodes. This is
+        an iterative version of Tarjan's algorithm, which runs in linear
+        time. Components are returned in reverse topological order, so
+        that no component has edges to a component that comes after it.
+        """
+        if nodes is None:
+            nodes = self.order
+            member = None
+        else:
+            nodes = list(nodes)
+            member = frozenset(nodes)
+
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root in nodes:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.child_nodes(root, ignore_priority)))]
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if member is not None and child not in member:
+                        continue
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append(
+                            (child, iter(self.child_nodes(child, ignore_priority)))
+                        )
+                        break
+                    if child in on_stack and index[child] < lowlink[node]:
+                        lowlink[node] = index[child]
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if lowlink[node] < lowlink[parent]:
+                            lowlink[parent] = lowlink[node]
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member_node = stack.pop()
+                            on_stack.discard(member_node)
+                            component.append(member_node)
+                            if member_node == node:
+                                break
+                        component.reverse()
+                        components.append(component)
+        return components
+
     def get_cycles(self, ignore_priority=None, max_length=None):
         """
         Returns all cycles that have at most length 'max_length'.
         If 'max_length' is 'None', all cycles are returned.
         """
+        # A cycle never leaves a strongly connected component, so only
+        # search for paths within the components that contain cycles.
+        cyclic = {}
+        for component in self.strongly_connected_components(ignore_priority):
+            if len(component) == 1:
+                node = component[0]
+                if node not in self.child_nodes(node, ignore_priority):
+                    continue
+            component = frozenset(component)
+            for node in component:
+                cyclic[node] = component
+
         all_cycles = []
         for node in self.nodes:
+            component = cyclic.get(node)
+            if component is None:
+                continue
             # If we have multiple paths of the same length, we have to
             # return them all, so that we always get the same results
             # even with PYTHONHASHSEED="random" enabled.
             shortest_path = None
             candidates = []
             for child in self.child_nodes(node, ignore_priority):
+                if child not in component:
+                    continue
                 path = self.shortest_path(child, node, ignore_priority)
                 if path is None:
                     continue
@@ -378,3 +457,713 @@ class digraph:
     __contains__ = contains
     empty = is_empty
     copy = clone
+
+
+class _indexed_digraph_edges(Mapping):
+    """
+    A read-only view of the { id : priorities } edges of a node of an
+    indexed_digraph, which maps the nodes at the other end of the edges
+    to their priorities.
+    """
+
+    __slots__ = ("_graph", "_edges")
+
+    def __init__(self, graph, edges):
+        self._graph = graph
+        self._edges = edges
+
+    def __getitem__(self, node):
+        node_id = self._graph._ids.get(node)
+        if node_id is None:
+            raise KeyError(node)
+        return self._edges[node_id]
+
+    def __contains__(self, node):
+        node_id = self._graph._ids.get(node)
+        return node_id is not None and node_id in self._edges
+
+    def __iter__(self):
+        nodes = self._graph._id_nodes
+        return (nodes[i] for i in self._edges)
+
+    def __len__(self):
+        return len(self._edges)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class _indexed_digraph_nodes:
+    """
+    A read-only view of an indexed_digraph, which behaves like the
+    digraph.nodes dict, mapping each node to a tuple of views of its
+    { child : priorities } and { parent : priorities } edges and the
+    node itself.
+    """
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def _node_data(self, node_id):
+        graph = self._graph
+        return (
+            _indexed_digraph_edges(graph, graph._children[node_id]),
+            _indexed_digraph_edges(graph, graph._parents[node_id]),
+            graph._id_nodes[node_id],
+        )
+
+    def __getitem__(self, node):
+        return self._node_data(self._graph._ids[node])
+
+    def get(self, node, default=None):
+        node_id = self._graph._ids.get(node)
+        if node_id is None:
+            return default
+        return self._node_data(node_id)
+
+    def __contains__(self, node):
+        return node in self._graph._ids
+
+    def __iter__(self):
+        return iter(self._graph.order)
+
+    def __len__(self):
+        return len(self._graph._ids)
+
+    def keys(self):
+        return self._graph.order
+
+    def values(self):
+        return (self._node_data(i) for i in self._graph._order_ids())
+
+    def items(self):
+        return ((data[2], data) for data in self.values())
+
+
+def _edge_counted(ignore_priority, priorities):
+    """
+    Return True if an edge with the given priorities is not ignored
+    by the given ignore_priority argument of leaf_nodes() or
+    root_nodes(), which must not be None.
+    """
+    if hasattr(ignore_priority, "__call__"):
+        for priority in reversed(priorities):
+            if not ignore_priority(priority):
+                return True
+        return False
+    return ignore_priority < priorities[-1]
+
+
+class _zero_degree_tracker:
+    """
+    The number of edges of each node, in one direction, that are not
+    ignored by an ignore_priority argument, together with the set of
+    nodes for which the number is zero.
+    """
+
+    __slots__ = ("ignore_priority", "counts", "zero")
+
+    def __init__(self, ignore_priority, edges):
+        self.ignore_priority = ignore_priority
+        self.counts = counts = []
+        self.zero = zero = set()
+        for node_id, node_edges in enumerate(edges):
+            count = 0
+            if node_edges:
+                for priorities in node_edges.values():
+                    if _edge_counted(ignore_priority, priorities):
+                        count += 1
+            counts.append(count)
+            if not count and node_edges is not None:
+                zero.add(node_id)
+
+    def add_node(self, node_id):
+        self.counts.append(0)
+        self.zero.add(node_id)
+
+    def remove_node(self, node_id):
+        self.zero.discard(node_id)
+
+    def increment(self, node_id):
+        if not self.counts[node_id]:
+            self.zero.discard(node_id)
+        self.counts[node_id] += 1
+
+    def decrement(self, node_id):
+        self.counts[node_id] -= 1
+        if not self.counts[node_id]:
+            self.zero.add(node_id)
+
+
+class indexed_digraph(digraph):
+    """
+    A directed graph with the same API as digraph, which interns each
+    node as an integer id, and stores edges in per-id adjacency arrays.
+    The sets of leaf and root nodes are maintained as edges are added
+    and removed, so that leaf_nodes() and root_nodes() do not have to
+    scan the whole graph. This makes repeated leaf and root selection on
+    large graphs, as done by merge order calculation and the Scheduler,
+    much cheaper.
+
+    For each ignore_priority argument, the sets are computed by the first
+    call and then maintained in the same way, for a limited number of
+    recently used arguments. This assumes that the results of
+    ignore_priority for the priorities of an edge do not change while
+    the edge is in the graph.
+
+    Node ids are never reused. A node that is removed and added again
+    gets a new id, which places it at the end of the node order, just
+    like with digraph.
+    """
+
+    def __init__(self):
+        """Create an empty indexed_digraph"""
+
+        # node -> id
+        self._ids = {}
+        # id -> node, or None if the node has been removed
+        self._id_nodes = []
+        # id -> { child id : priorities }
+        self._children = []
+        # id -> { parent id : priorities }
+        self._parents = []
+        # id -> position in the node order
+        self._rank = []
+        self._next_rank = 0
+        # ids of nodes without children or parents, respectively
+        self._leaves = set()
+        self._roots = set()
+        # ignore_priority -> _zero_degree_tracker, for children and
+        # parents respectively
+        self._leaf_trackers = OrderedDict()
+        self._root_trackers = OrderedDict()
+        self._order_cache = None
+        self.nodes = _indexed_digraph_nodes(self)
+
+    # Maximum number of ignore_priority arguments for which leaf and
+    # root nodes are tracked, in each direction.
+    _max_trackers = 16
+
+    def _trackers(self):
+        return chain(self._leaf_trackers.values(), self._root_trackers.values())
+
+    def _intern(self, node):
+        node_id = self._ids.get(node)
+        if node_id is None:
+            node_id = len(self._id_nodes)
+            self._ids[node] = node_id
+            self._id_nodes.append(node)
+            self._children.append({})
+            self._parents.append({})
+            self._rank.append(self._next_rank)
+            self._next_rank += 1
+            self._leaves.add(node_id)
+            self._roots.add(node_id)
+            for tracker in self._trackers():
+                tracker.add_node(node_id)
+            self._order_cache = None
+        return node_id
+
+    def _order_ids(self):
+        return sorted(self._ids.values(), key=self._rank.__getitem__)
+
+    def _nodes_in_order(self, ids):
+        nodes = self._id_nodes
+        if len(ids) > 1:
+            ids = sorted(ids, key=self._rank.__getitem__)
+        return [nodes[i] for i in ids]
+
+    @property
+    def order(self):
+        """
+        A tuple of all nodes, in the order that they were added. Assign
+        a new sequence in order to reorder the nodes.
+        """
+        if self._order_cache is None:
+            nodes = self._id_nodes
+            self._order_cache = tuple(nodes[i] for i in self._order_ids())
+        return self._order_cache
+
+    @order.setter
+    def order(self, order):
+        """
+        Reorder the nodes, which must be a permutation of the current
+        node order. This affects the order of all methods that return
+        multiple nodes.
+        """
+        order = tuple(order)
+        if len(order) != len(self._ids):
+            raise ValueError("order must contain all nodes of the graph")
+        rank = self._rank
+        for position, node in enumerate(order):
+            rank[self._ids[node]] = position
+        self._next_rank = len(order)
+        self._order_cache = order
+
+    def add(self, node, parent, priority=0):
+        """Adds the specified node with the specified parent.
+
+        If the dep is a soft-dep and the node already has a hard
+        relationship to the parent, the relationship is left as hard."""
+
+        node_id = self._intern(node)
+
+        if not parent:
+            return
+
+        parent_id = self._intern(parent)
+
+        priorities = self._parents[node_id].get(parent_id)
+        if priorities is None:
+            priorities = []
+            self._parents[node_id][parent_id] = priorities
+            self._children[parent_id][node_id] = priorities
+            self._roots.discard(node_id)
+            self._leaves.discard(parent_id)
+
+        if not priorities or priorities[-1] is not priority:
+            if self._leaf_trackers or self._root_trackers:
+                self._add_priority(node_id, parent_id, priorities, priority)
+            else:
+                bisect.insort(priorities, priority)
+
+    def _add_priority(self, node_id, parent_id, priorities, priority):
+        """
+        Add a priority to an edge, and count the edge for each tracked
+        ignore_priority argument that ignored it before, but does not
+        ignore it any longer.
+        """
+        uncounted = [
+            (tracker, tracked_id)
+            for trackers, tracked_id in (
+                (self._leaf_trackers, parent_id),
+                (self._root_trackers, node_id),
+            )
+            for tracker in trackers.values()
+            if not priorities or not _edge_counted(tracker.ignore_priority, priorities)
+        ]
+        bisect.insort(priorities, priority)
+        for tracker, tracked_id in uncounted:
+            if _edge_counted(tracker.ignore_priority, priorities):
+                tracker.increment(tracked_id)
+
+    def _remove_counted_edge(self, child_id, parent_id, priorities):
+        """
+        Stop counting a removed edge for the tracked ignore_priority
+        arguments that do not ignore it.
+        """
+        for tracker in self._leaf_trackers.values():
+            if _edge_counted(tracker.ignore_priority, priorities):
+                tracker.decrement(parent_id)
+        for tracker in self._root_trackers.values():
+            if _edge_counted(tracker.ignore_priority, priorities):
+                tracker.decrement(child_id)
+
+    def _remove_id(self, node_id):
+        children = self._children
+        parents = self._parents
+        tracked = self._leaf_trackers or self._root_trackers
+        for parent_id, priorities in parents[node_id].items():
+            siblings = children[parent_id]
+            del siblings[node_id]
+            if not siblings:
+                self._leaves.add(parent_id)
+            if tracked:
+                self._remove_counted_edge(node_id, parent_id, priorities)
+        for child_id, priorities in children[node_id].items():
+            coparents = parents[child_id]
+            del coparents[node_id]
+            if not coparents:
+                self._roots.add(child_id)
+            if tracked:
+                self._remove_counted_edge(child_id, node_id, priorities)
+        del self._ids[self._id_nodes[node_id]]
+        self._id_nodes[node_id] = None
+        children[node_id] = None
+        parents[node_id] = None
+        self._leaves.discard(node_id)
+        self._roots.discard(node_id)
+        if tracked:
+            for tracker in self._trackers():
+                tracker.remove_node(node_id)
+
+    def remove(self, node):
+        """Removes the specified node from the digraph, also removing
+        and ties to other nodes in the digraph. Raises KeyError if the
+        node doesn't exist."""
+
+        self._remove_id(self._ids[node])
+        self._order_cache = None
+
+    def update(self, other):
+        """
+        Add all nodes and edges from another digraph instance, preserving
+        the node order of the other instance.
+        """
+        for node in other.order:
+            self.add(node, None)
+        for node in other.order:
+            for parent, priorities in other.nodes[node][1].items():
+                for priority in priorities:
+                    self.add(node, parent, priority=priority)
+
+    def clear(self):
+        """
+        Remove all nodes and edges.
+        """
+        self.__init__()
+
+    def difference_update(self, t):
+        """
+        Remove all given nodes from node_set. This is more efficient
+        than multiple calls to the remove() method.
+        """
+        ids = self._ids
+        removed = False
+        for node in t:
+            node_id = ids.get(node)
+            if node_id is not None:
+                self._remove_id(node_id)
+                removed = True
+        if removed:
+            self._order_cache = None
+
+    def has_edge(self, child, parent):
+        """
+        Return True if the given edge exists.
+        """
+        parent_id = self._ids.get(parent)
+        child_id = self._ids.get(child)
+        if parent_id is None or child_id is None:
+            return False
+        return child_id in self._children[parent_id]
+
+    def remove_edge(self, child, parent):
+        """
+        Remove edge in the direction from child to parent. Note that it is
+        possible for a remaining edge to exist in the opposite direction.
+        Any endpoint vertices that become isolated will remain in the graph.
+        """
+
+        # Nothing should be modified when a KeyError is raised.
+        for k in parent, child:
+            if k not in self._ids:
+                raise KeyError(k)
+
+        parent_id = self._ids[parent]
+        child_id = self._ids[child]
+
+        # Make sure the edge exists.
+        if child_id not in self._children[parent_id]:
+            raise KeyError(child)
+
+        # Remove the edge.
+        priorities = self._parents[child_id].pop(parent_id)
+        del self._children[parent_id][child_id]
+        if self._leaf_trackers or self._root_trackers:
+            self._remove_counted_edge(child_id, parent_id, priorities)
+        if not self._parents[child_id]:
+            self._roots.add(child_id)
+        if not self._children[parent_id]:
+            self._leaves.add(parent_id)
+
+    def __iter__(self):
+        if self._order_cache is None:
+            self.order
+        # Mutations replace the cached list, so they do not disturb
+        # iteration.
+        return iter(self._order_cache)
+
+    def contains(self, node):
+        """Checks if the digraph contains mynode"""
+        return node in self._ids
+
+    def get(self, key, default=None):
+        node_id = self._ids.get(key)
+        if node_id is None:
+            return default
+        return self._id_nodes[node_id]
+
+    def all_nodes(self):
+        """Return a list of all nodes in the graph"""
+        return list(self.order)
+
+    def _filter_edges(self, edges, ignore_priority):
+        """
+        Return the ids of the given { id : priorities } dict, excluding
+        edges whose priorities are all ignored.
+        """
+        if ignore_priority is None:
+            return list(edges)
+        if hasattr(ignore_priority, "__call__"):
+            return [
+                node_id
+                for node_id, priorities in edges.items()
+                if not all(ignore_priority(p) for p in reversed(priorities))
+            ]
+        return [
+            node_id
+            for node_id, priorities in edges.items()
+            if ignore_priority < priorities[-1]
+        ]
+
+    def child_nodes(self, node, ignore_priority=None):
+        """Return all children of the specified node"""
+        nodes = self._id_nodes
+        return [
+            nodes[i]
+            for i in self._filter_edges(
+                self._children[self._ids[node]], ignore_priority
+            )
+        ]
+
+    def parent_nodes(self, node, ignore_priority=None):
+        """Return all parents of the specified node"""
+        nodes = self._id_nodes
+        return [
+            nodes[i]
+            for i in self._filter_edges(self._parents[self._ids[node]], ignore_priority)
+        ]
+
+    def _zero_degree_nodes(self, zero_ids, trackers, edges, ignore_priority):
+        if ignore_priority is None:
+            return self._nodes_in_order(zero_ids)
+        try:
+            tracker = trackers.get(ignore_priority)
+        except TypeError:
+            # Unhashable arguments are not tracked, so all nodes have
+            # to be checked. Nodes that have no edges at all are known
+            # not to need the check.
+            result = []
+            for node_id in self._order_ids():
+                if node_id in zero_ids or not self._filter_edges(
+                    edges[node_id], ignore_priority
+                ):
+                    result.append(self._id_nodes[node_id])
+            return result
+        if tracker is None:
+            tracker = _zero_degree_tracker(ignore_priority, edges)
+            trackers[ignore_priority] = tracker
+            if len(trackers) > self._max_trackers:
+                trackers.popitem(last=False)
+        else:
+            trackers.move_to_end(ignore_priority)
+        return self._nodes_in_order(tracker.zero)
+
+    def leaf_nodes(self, ignore_priority=None):
+        """Return all nodes that have no children
+
+        If ignore_soft_deps is True, soft deps are not counted as
+        children in calculations."""
+        return self._zero_degree_nodes(
+            self._leaves, self._leaf_trackers, self._children, ignore_priority
+        )
+
+    def root_nodes(self, ignore_priority=None):
+        """Return all nodes that have no parents.
+
+        If ignore_soft_deps is True, soft deps are not counted as
+        parents in calculations."""
+        return self._zero_degree_nodes(
+            self._roots, self._root_trackers, self._parents, ignore_priority
+        )
+
+    def __bool__(self):
+        return bool(self._ids)
+
+    def is_empty(self):
+        """Checks if the digraph is empty"""
+        return not self._ids
+
+    def clone(self):
+        clone = indexed_digraph()
+        # Compact the ids of the clone, preserving the order.
+        order_ids = self._order_ids()
+        new_ids = {node_id: i for i, node_id in enumerate(order_ids)}
+        nodes = [self._id_nodes[i] for i in order_ids]
+        children = [{} for _ in order_ids]
+        parents = [{} for _ in order_ids]
+        for node_id, new_id in new_ids.items():
+            child_edges = children[new_id]
+            for child_id, priorities in self._children[node_id].items():
+                priorities = priorities[:]
+                new_child_id = new_ids[child_id]
+                child_edges[new_child_id] = priorities
+                parents[new_child_id][new_id] = priorities
+        # Preserve the insertion order of the parent edges.
+        for node_id, new_id in new_ids.items():
+            edges = parents[new_id]
+            parents[new_id] = {
+                new_ids[parent_id]: edges[new_ids[parent_id]]
+                for parent_id in self._parents[node_id]
+            }
+        clone._ids = {node: i for i, node in enumerate(nodes)}
+        clone._id_nodes = nodes
+        clone._children = children
+        clone._parents = parents
+        clone._rank = list(range(len(nodes)))
+        clone._next_rank = len(nodes)
+        clone._leaves = {new_ids[i] for i in self._leaves}
+        clone._roots = {new_ids[i] for i in self._roots}
+        return clone
+
+    def hasallzeros(self, ignore_priority=None):
+        return len(self.leaf_nodes(ignore_priority=ignore_priority)) == len(self._ids)
+
+    # Backward compatibility
+    addnode = add
+    allnodes = all_nodes
+    allzeros = leaf_nodes
+    hasnode = contains
+    __contains__ = contains
+    empty = is_empty
+    copy = clone
+
+
+class _condensation_level:
+    __slots__ = (
+        "ignore_priority",
+        "components",
+        "node_component",
+        "node_count",
+        "successors",
+    )
+
+    def __init__(self, ignore_priority):
+        self.ignore_priority = ignore_priority
+        # component id -> list of nodes
+        self.components = {}
+        # node -> component id
+        self.node_component = {}
+        # number of nodes in the graph when the components were updated
+        self.node_count = None
+        # component id -> set of successor component ids, computed lazily
+        self.successors = None
+
+
+class digraph_condensation:
+    """
+    The condensation of a digraph into its strongly connected components,
+    for a sequence of ignore_priority values where each value ignores at
+    least the edges that are ignored by the previous one, such as the
+    ignore_priority values of a DepPriority range.
+
+    Ignoring more edges or removing nodes can only split components.
+    Therefore, the components for each ignore_priority value are computed
+    by splitting the components of the previous one, and nodes that are
+    removed from the graph only cause the components that contained them
+    to be computed again. Components are identified by integer ids, which
+    are not reused. If edges or nodes are added to the graph, invalidate()
+    must be called.
+    """
+
+    def __init__(self, graph, ignore_priorities):
+        self._graph = graph
+        self._ignore_priorities = tuple(ignore_priorities)
+        self._levels = []
+        self._next_id = 0
+
+    def invalidate(self):
+        """
+        Discard all components, after edges or nodes have been added to
+        the graph.
+        """
+        del self._levels[:]
+
+    def _add_components(self, level, components):
+        for component in components:
+            component_id = self._next_id
+            self._next_id += 1
+            level.components[component_id] = component
+            for node in component:
+                level.node_component[node] = component_id
+
+    def _split(self, level, component):
+        if len(component) == 1:
+            return [component]
+        return self._graph.strongly_connected_components(
+            level.ignore_priority, nodes=component
+        )
+
+    def _update(self, level):
+        """
+        Split the components that contained nodes that have been removed
+        from the graph since the last update.
+        """
+        graph = self._graph
+        # Since nodes are only removed, the node count tells whether the
+        # components are up to date.
+        node_count = len(graph.nodes)
+        if node_count == level.node_count:
+            return
+        level.node_count = node_count
+        removed = [node for node in level.node_component if node not in graph]
+        if not removed:
+            return
+        affected = set()
+        for node in removed:
+            affected.add(level.node_component.pop(node))
+        for component_id in affected:
+            component = [
+                node for node in level.components.pop(component_id) if node in graph
+            ]
+            if component:
+                self._add_components(level, self._split(level, component))
+        level.successors = None
+
+    def _level(self, level_index):
+        levels = self._levels
+        while len(levels) <= level_index:
+            level = _condensation_level(self._ignore_priorities[len(levels)])
+            if levels:
+                previous = levels[-1]
+                self._update(previous)
+                components = []
+                for component in previous.components.values():
+                    components.extend(self._split(level, component))
+            else:
+                components = self._graph.strongly_connected_components(
+                    level.ignore_priority
+                )
+            self._add_components(level, components)
+            level.node_count = len(self._graph.nodes)
+            levels.append(level)
+        level = levels[level_index]
+        self._update(level)
+        return level
+
+    def components(self, level_index):
+        """
+        Return the components for the ignore_priority value with the given
+        index, as a dict of component id to list of nodes.
+        """
+        return self._level(level_index).components
+
+    def component_of(self, node, level_index):
+        """
+        Return the id of the component that contains the given node, for
+        the ignore_priority value with the given index.
+        """
+        return self._level(level_index).node_component[node]
+
+    def successors(self, component_id, level_index):
+        """
+        Return the set of ids of the components that the given component
+        has edges to, for the ignore_priority value with the given index.
+        """
+        level = self._level(level_index)
+        if level.successors is None:
+            graph = self._graph
+            node_component = level.node_component
+            successors = {}
+            for source_id, component in level.components.items():
+                targets = set()
+                for node in component:
+                    for child in graph.child_nodes(node, level.ignore_priority):
+                        targets.add(node_component[child])
+                targets.discard(source_id)
+                successors[source_id] = targets
+            level.successors = successors
+        return level.successors[component_id]
@@ -69,3 +69,17 @@ EF_LOONGARCH_ABI_ILP32_SOFT_FLOAT = 0b101
 EF_LOONGARCH_ABI_ILP32_SINGLE_FLOAT = 0b110
 EF_LOONGARCH_ABI_ILP32_DOUBLE_FLOAT = 0b111
 EF_LOONGARCH_ABI_MASK = 0x07
+
+ELFMAG = b"\x7fELF"
+
+PT_LOAD = 1
+PT_DYNAMIC = 2
+
+DT_NULL = 0
+DT_NEEDED = 1
+DT_STRTAB = 5
+DT_SONAME = 14
+DT_RPATH = 15
+DT_RUNPATH = 29
+DT_FLAGS_1 = 0x6FFFFFFB
+DF_1_PIE = 0x08000000
@@ -0,0 +1,193 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import mmap
+import struct
+
+from corepkg import _encodings, _unicode_decode
+from corepkg.util.elf import constants
+from corepkg.util.elf.constants import (
+    DF_1_PIE,
+    DT_FLAGS_1,
+    DT_NEEDED,
+    DT_NULL,
+    DT_RPATH,
+    DT_RUNPATH,
+    DT_SONAME,
+    DT_STRTAB,
+    ELFCLASS32,
+    ELFCLASS64,
+    ELFDATA2LSB,
+    ELFDATA2MSB,
+    ELFMAG,
+    ET_DYN,
+    PT_DYNAMIC,
+    PT_LOAD,
+)
+from corepkg.util.elf.header import ELFHeader
+
+# e_machine names, as printed by scanelf, without the EM_ prefix.
+_machine_names = {
+    value: name[3:] for name, value in vars(constants).items() if name.startswith("EM_")
+}
+
+# For each ELF class: the offset and format of e_phoff, the offset
+# of e_phentsize and e_phnum, the format of a program header, the
+# indexes of p_type, p_offset, p_vaddr and p_filesz in a program
+# header, and the format of a dynamic entry.
+_layouts = {
+    ELFCLASS32: (28, "I", 42, "IIIII", (0, 1, 2, 4), "iI"),
+    ELFCLASS64: (32, "Q", 54, "IIQQQQ", (0, 2, 3, 5), "qQ"),
+}
+
+
+class ELFDynamic:
+    """
+    The data of the dynamic section of an ELF object, which is needed
+    for NEEDED.ELF.2 entries. It is read through a read-only memory map
+    of the file, so that only the pages of the headers, the dynamic
+    section and the strings that are referenced by it are accessed.
+    """
+
+    __slots__ = ("flags_1", "header", "needed", "rpath", "runpath", "soname")
+
+    @classmethod
+    def read(cls, f):
+        """
+        @param f: an open file
+        @type f: file
+        @rtype: ELFDynamic or None
+        @return: A new ELFDynamic instance containing data from f, or
+                None if f is not an ELF file
+        """
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # The file is empty.
+            return None
+        try:
+            if mm[: len(ELFMAG)] != ELFMAG:
+                return None
+            obj = cls()
+            obj.header = ELFHeader.read(f)
+            obj.flags_1 = 0
+            obj.needed = ()
+            obj.rpath = ()
+            obj.runpath = ()
+            obj.soname = ""
+            try:
+                obj._read_dynamic(mm)
+            except (struct.error, ValueError):
+                # A truncated or corrupt object, which is handled like an
+                # object without a dynamic section.
+                pass
+            return obj
+        finally:
+            mm.close()
+
+    def _read_dynamic(self, mm):
+        header = self.header
+        layout = _layouts.get(header.ei_class)
+        if header.ei_data == ELFDATA2LSB:
+            endian = "<"
+        elif header.ei_data == ELFDATA2MSB:
+            endian = ">"
+        else:
+            endian = None
+        if layout is None or endian is None:
+            return
+
+        (
+            phoff_offset,
+            phoff_format,
+            phnum_offset,
+            phdr_format,
+            phdr_fields,
+            dyn_format,
+        ) = layout
+        (phoff,) = struct.unpack_from(endian + phoff_format, mm, phoff_offset)
+        phentsize, phnum = struct.unpack_from(endian + "HH", mm, phnum_offset)
+        phdr_format = endian + phdr_format
+        loads = []
+        dynamic = None
+        for i in range(phnum):
+            phdr = struct.unpack_from(phdr_format, mm, phoff + i * phentsize)
+            p_type, p_offset, p_vaddr, p_filesz = (phdr[x] for x in phdr_fields)
+            if p_type == PT_LOAD:
+                loads.append((p_vaddr, p_offset, p_filesz))
+            elif p_type == PT_DYNAMIC:
+                dynamic = (p_offset, p_filesz)
+        if dynamic is None:
+            return
+
+        dyn_format = endian + dyn_format
+        dyn_size = struct.calcsize(dyn_format)
+        offset, size = dynamic
+        end = min(offset + size, len(mm))
+        needed = []
+        strings = {}
+        strtab = None
+        while offset + dyn_size <= end:
+            d_tag, d_val = struct.unpack_from(dyn_format, mm, offset)
+            offset += dyn_size
+            if d_tag == DT_NULL:
+                break
+            if d_tag == DT_NEEDED:
+                needed.append(d_val)
+            elif d_tag in (DT_RPATH, DT_RUNPATH, DT_SONAME):
+                strings[d_tag] = d_val
+            elif d_tag == DT_STRTAB:
+                strtab = d_val
+            elif d_tag == DT_FLAGS_1:
+                self.flags_1 = d_val
+
+        # DT_STRTAB is a virtual address, which is translated to a file
+        # offset through the loadable segment that contains it.
+        strtab_offset = None
+        if strtab is not None:
+            for p_vaddr, p_offset, p_filesz in loads:
+                if p_vaddr <= strtab < p_vaddr + p_filesz:
+                    strtab_offset = strtab - p_vaddr + p_offset
+                    break
+        if strtab_offset is None:
+            return
+
+        def string(index):
+            start = strtab_offset + index
+            end = mm.find(b"\0", start)
+            if end == -1:
+                raise ValueError("unterminated string")
+            return _unicode_decode(
+                mm[start:end], encoding=_encodings["content"], errors="replace"
+            )
+
+        self.needed = tuple(string(x) for x in needed)
+        if DT_SONAME in strings:
+            self.soname = string(strings[DT_SONAME])
+        if DT_RPATH in strings:
+            self.rpath = tuple(filter(None, string(strings[DT_RPATH]).split(":")))
+        if DT_RUNPATH in strings:
+            self.runpath = tuple(filter(None, string(strings[DT_RUNPATH]).split(":")))
+
+    @property
+    def arch(self):
+        """
+        The name of e_machine, as in the first field of NEEDED.ELF.2 entries.
+        """
+        e_machine = self.header.e_machine
+        return _machine_names.get(e_machine, str(e_machine))
+
+    @property
+    def runpaths(self):
+        """
+        The paths of DT_RPATH and DT_RUNPATH, without duplicates.
+        """
+        return tuple(dict.fromkeys(self.rpath + self.runpath))
+
+    @property
+    def shared_object(self):
+        """
+        True for shared libraries, but not for position independent
+        executables, which are ET_DYN objects too.
+        """
+        return self.header.e_type == ET_DYN and not self.flags_1 & DF_1_PIE